@@ -0,0 +1,117 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""Benchmark read throughput of TFRecord and columnar shard datasets.
+
+Writes the same random examples, with the features of
+`ddsp_prepare_tfrecord`, as TFRecord shards and as columnar shards, and reports
+examples/sec of reading batches with TFRecordProvider and
+ColumnarShardProvider. ColumnarShardProvider is read both with get_batch(),
+which gathers whole batches, and by batching the examples of get_dataset().
+Each dataset is read once before timing, so that all are read from the page
+cache.
+
+Usage:
+================================================================================
+python benchmarks/columnar_read_benchmark.py \
+--n_examples=2048 --n_shards=8 --batch_size=32
+"""
+
+import os
+import tempfile
+import time
+
+from absl import app
+from absl import flags
+from ddsp.training import data
+from ddsp.training.data_preparation import prepare_tfrecord_lib
+import numpy as np
+import tensorflow.compat.v2 as tf
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_integer('n_examples', 2048, 'Number of examples to write.')
+flags.DEFINE_integer('n_shards', 8, 'Number of shards of each format.')
+flags.DEFINE_integer('example_secs', 4, 'Length of the examples in seconds.')
+flags.DEFINE_integer('batch_size', 32, 'Number of examples per a batch.')
+flags.DEFINE_integer('repeats', 3, 'Timed reads of each dataset.')
+
+
+def write_datasets(save_dir):
+  """Write random examples as TFRecord and columnar shards."""
+  rng = np.random.RandomState(0)
+  n_samples = FLAGS.example_secs * 16000
+  n_frames = FLAGS.example_secs * 250
+  examples = [{
+      'audio': rng.randn(n_samples).astype(np.float32),
+      'audio_16k': rng.randn(n_samples).astype(np.float32),
+      'f0_hz': rng.uniform(100, 1000, n_frames).astype(np.float32),
+      'f0_confidence': rng.uniform(0, 1, n_frames).astype(np.float32),
+      'loudness_db': rng.uniform(-80, 0, n_frames).astype(np.float32),
+  } for _ in range(FLAGS.n_examples)]
+
+  for shard in range(FLAGS.n_shards):
+    shard_examples = examples[shard::FLAGS.n_shards]
+    suffix = f'{shard:05d}-of-{FLAGS.n_shards:05d}'
+    with tf.io.TFRecordWriter(
+        os.path.join(save_dir, f'data.tfrecord-{suffix}')) as writer:
+      for ex in shard_examples:
+        writer.write(prepare_tfrecord_lib._float_dict_to_tfexample(  # pylint: disable=protected-access
+            ex).SerializeToString())
+    data.write_columnar_shard(
+        os.path.join(save_dir, f'data.columnar-{suffix}'), shard_examples)
+
+
+def time_read(dataset):
+  """Minimum wall time of reading every batch of a dataset once."""
+  times = []
+  for i in range(FLAGS.repeats + 1):
+    start_time = time.time()
+    for _ in dataset:
+      pass
+    if i:  # The first read fills the page cache.
+      times.append(time.time() - start_time)
+  return min(times)
+
+
+def main(unused_argv):
+  save_dir = tempfile.mkdtemp()
+  write_datasets(save_dir)
+  n_batches = FLAGS.n_examples // FLAGS.batch_size
+  print(f'{FLAGS.n_examples} examples of {FLAGS.example_secs}s in '
+        f'{FLAGS.n_shards} shards, batch {FLAGS.batch_size}.')
+  print('provider | read | read time (s) | examples/sec')
+  tfrecord = data.TFRecordProvider(
+      os.path.join(save_dir, 'data.tfrecord-*'),
+      example_secs=FLAGS.example_secs)
+  columnar = data.ColumnarShardProvider(
+      os.path.join(save_dir, 'data.columnar-*'),
+      example_secs=FLAGS.example_secs)
+  datasets = [
+      ('tfrecord', 'get_batch',
+       tfrecord.get_batch(FLAGS.batch_size, shuffle=True, repeats=1)),
+      ('columnar', 'get_batch',
+       columnar.get_batch(FLAGS.batch_size, shuffle=True, repeats=1)),
+      ('columnar', 'get_dataset',
+       columnar.get_dataset(shuffle=True).batch(
+           FLAGS.batch_size, drop_remainder=True).prefetch(-1)),
+  ]
+  for name, read, dataset in datasets:
+    seconds = time_read(dataset)
+    print(f'{name} | {read} | {seconds:.2f} | '
+          f'{n_batches * FLAGS.batch_size / seconds:.0f}')
+
+
+if __name__ == '__main__':
+  app.run(main)
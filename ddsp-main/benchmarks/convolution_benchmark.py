@@ -0,0 +1,118 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""Benchmark long impulse response convolution, FFT vs. partitioned.
+
+Compares core.fft_convolve(), which uses a single FFT of the whole signal,
+against core.partitioned_convolve() with uniform and non-uniform partitions,
+and the per-block cost of streaming with core.partitioned_convolve_step().
+
+Usage:
+================================================================================
+python benchmarks/convolution_benchmark.py \
+--ir_secs=0.5 --ir_secs=2 --ir_secs=10 \
+--audio_secs=4 --audio_secs=60 \
+--block_size=1024 --max_block_size=16384
+"""
+
+import time
+
+from absl import app
+from absl import flags
+from ddsp import core
+import numpy as np
+import tensorflow.compat.v2 as tf
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_multi_float('ir_secs', [0.5, 1.0, 2.0, 5.0, 10.0],
+                         'Lengths of the impulse responses in seconds.')
+flags.DEFINE_multi_float('audio_secs', [4.0, 30.0],
+                         'Lengths of the audio in seconds.')
+flags.DEFINE_integer('sample_rate', 16000, 'Sample rate of audio.')
+flags.DEFINE_integer('batch_size', 1, 'Number of audio clips per a call.')
+flags.DEFINE_integer('block_size', 1024,
+                     'Samples per a block of partitioned convolution.')
+flags.DEFINE_integer('max_block_size', 16384,
+                     'Largest block size of non-uniform partitions.')
+flags.DEFINE_integer('repeats', 3, 'Timed calls per a configuration.')
+
+
+def time_fn(fn):
+  """Minimum wall time of fn() in seconds, after a warm up call."""
+  _ = fn()
+  times = []
+  for _ in range(FLAGS.repeats):
+    start_time = time.time()
+    _ = fn()
+    times.append(time.time() - start_time)
+  return min(times)
+
+
+def time_streaming(audio, impulse_response):
+  """Wall time per a block of streaming partitioned convolution."""
+  block_size = FLAGS.block_size
+  ir_fft = core.partition_impulse_response(impulse_response, block_size)
+  step = tf.function(core.partitioned_convolve_step)
+  n_blocks = int(audio.shape[1]) // block_size
+  blocks = [audio[:, i * block_size:(i + 1) * block_size]
+            for i in range(n_blocks)]
+
+  def stream():
+    state = None
+    for block in blocks:
+      _, state = step(block, ir_fft, state)
+    return state[0].numpy()
+
+  return time_fn(stream) / n_blocks
+
+
+def main(unused_argv):
+  sample_rate = FLAGS.sample_rate
+  block_secs = FLAGS.block_size / sample_rate
+  print(f'block_size {FLAGS.block_size} ({1000 * block_secs:.1f} ms latency), '
+        f'max_block_size {FLAGS.max_block_size}, batch {FLAGS.batch_size}')
+  print('audio (s) | ir (s) | method | time (s) | x realtime')
+
+  rng = np.random.RandomState(0)
+  for audio_secs in FLAGS.audio_secs:
+    audio = rng.randn(FLAGS.batch_size, int(audio_secs * sample_rate))
+    audio = tf.constant(audio, tf.float32)
+    for ir_secs in FLAGS.ir_secs:
+      impulse_response = rng.randn(1, int(ir_secs * sample_rate)) * 0.01
+      impulse_response = tf.constant(impulse_response, tf.float32)
+      ir_batch = tf.tile(impulse_response, [FLAGS.batch_size, 1])
+
+      methods = {
+          'fft_convolve': lambda: core.fft_convolve(  # pylint: disable=g-long-lambda
+              audio, ir_batch, padding='same', delay_compensation=0),
+          'partitioned (uniform)': lambda: core.partitioned_convolve(  # pylint: disable=g-long-lambda
+              audio, impulse_response, FLAGS.block_size,
+              padding='same', delay_compensation=0),
+          'partitioned (non-uniform)': lambda: core.partitioned_convolve(  # pylint: disable=g-long-lambda
+              audio, impulse_response, FLAGS.block_size, FLAGS.max_block_size,
+              padding='same', delay_compensation=0),
+      }
+      for name, fn in methods.items():
+        seconds = time_fn(fn)
+        print(f'{audio_secs} | {ir_secs} | {name} | {seconds:.3f} | '
+              f'{audio_secs / seconds:.1f}')
+
+      seconds = time_streaming(audio, impulse_response)
+      print(f'{audio_secs} | {ir_secs} | streaming (per block) | '
+            f'{seconds:.5f} | {block_secs / seconds:.1f}')
+
+
+if __name__ == '__main__':
+  app.run(main)
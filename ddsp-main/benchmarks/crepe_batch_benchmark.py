@@ -0,0 +1,114 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""Benchmark CREPE frames/sec, per-file compute_f0 vs. compute_f0_batched.
+
+Usage:
+================================================================================
+# Synthetic clips of random lengths.
+python benchmarks/crepe_batch_benchmark.py \
+--n_clips=100 --max_clip_secs=10 \
+--frames_per_batch=512 --frames_per_batch=2048
+
+# Audio files.
+python benchmarks/crepe_batch_benchmark.py \
+--audio_filepattern=/path/to/wavs/*.wav
+
+# Viterbi decoding with banded transitions.
+python benchmarks/crepe_batch_benchmark.py \
+--viterbi --viterbi_method=banded
+"""
+
+import time
+
+from absl import app
+from absl import flags
+from ddsp import spectral_ops
+import numpy as np
+import tensorflow.compat.v2 as tf
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_string('audio_filepattern', None,
+                    'Audio files to analyze. Uses synthetic clips if None.')
+flags.DEFINE_integer('n_clips', 50, 'Number of synthetic clips.')
+flags.DEFINE_float('max_clip_secs', 8.0,
+                   'Maximum length of the synthetic clips in seconds.')
+flags.DEFINE_integer('frame_rate', 250, 'Rate of f0 frames in Hz.')
+flags.DEFINE_boolean('viterbi', False, 'Use viterbi decoding.')
+flags.DEFINE_enum('viterbi_method', 'full', ['full', 'banded'],
+                  'Viterbi decoding with the dense HMM, or banded transitions.')
+flags.DEFINE_string('model_capacity', 'full', 'Size of the CREPE model.')
+flags.DEFINE_multi_integer('frames_per_batch', [256, 1024, 4096],
+                           'Frames per a batch for compute_f0_batched.')
+flags.DEFINE_boolean('per_file', True,
+                     'Also benchmark the per-file compute_f0 path.')
+
+
+def load_audios():
+  """Load audio files at 16kHz, or generate synthetic clips."""
+  if FLAGS.audio_filepattern:
+    # pylint: disable=g-import-not-at-top
+    from ddsp.training.data_preparation import prepare_tfrecord_lib
+    # pylint: enable=g-import-not-at-top
+    paths = tf.io.gfile.glob(FLAGS.audio_filepattern)
+    return [prepare_tfrecord_lib._load_audio_as_array(  # pylint: disable=protected-access
+        p, spectral_ops.CREPE_SAMPLE_RATE) for p in paths]
+
+  rng = np.random.RandomState(0)
+  audios = []
+  for _ in range(FLAGS.n_clips):
+    n_samples = int(rng.uniform(0.5, FLAGS.max_clip_secs) *
+                    spectral_ops.CREPE_SAMPLE_RATE)
+    t = np.arange(n_samples) / spectral_ops.CREPE_SAMPLE_RATE
+    f0 = rng.uniform(100, 800)
+    audios.append((0.5 * np.sin(2 * np.pi * f0 * t)).astype(np.float32))
+  return audios
+
+
+def report(name, n_frames, seconds):
+  print(f'{name:>32} | {seconds:9.2f} s | {n_frames / seconds:12.1f} frames/s')
+
+
+def main(unused_argv):
+  audios = load_audios()
+  kwargs = dict(frame_rate=FLAGS.frame_rate,
+                viterbi=FLAGS.viterbi,
+                viterbi_method=FLAGS.viterbi_method,
+                model_capacity=FLAGS.model_capacity)
+  print(f'{len(audios)} clips, '
+        f'{sum(len(a) for a in audios) / 16000.0:.1f} seconds of audio')
+
+  if FLAGS.per_file:
+    # Warm up.
+    _ = spectral_ops.compute_f0(audios[0], **kwargs)
+    start_time = time.time()
+    n_frames = sum(len(spectral_ops.compute_f0(a, **kwargs)[0])
+                   for a in audios)
+    report('compute_f0 (per file)', n_frames, time.time() - start_time)
+
+  for frames_per_batch in FLAGS.frames_per_batch:
+    # Warm up, also builds the model.
+    _ = list(spectral_ops.compute_f0_batched(
+        audios[:1], frames_per_batch=frames_per_batch, **kwargs))
+    start_time = time.time()
+    # Generator of audio, as would be used for streaming files from disk.
+    n_frames = sum(len(f0_hz) for f0_hz, _ in spectral_ops.compute_f0_batched(
+        (a for a in audios), frames_per_batch=frames_per_batch, **kwargs))
+    report(f'compute_f0_batched ({frames_per_batch})', n_frames,
+           time.time() - start_time)
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -0,0 +1,125 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""Benchmark dense against sparse (pruned) harmonic synthesis.
+
+Compares core.harmonic_synthesis() against core.sparse_harmonic_synthesis()
+for notes of different pitch, with a harmonic distribution that rolls off by
+--rolloff_db per octave. Reports the wall time, the error bound returned by
+sparse synthesis, and the measured largest error against dense synthesis.
+
+Usage:
+================================================================================
+python benchmarks/harmonic_synthesis_benchmark.py \
+--f0_hz=110 --f0_hz=440 --f0_hz=1760 \
+--amplitude_floor_db=-60 --amplitude_floor_db=-80 \
+--n_harmonics=100
+"""
+
+import time
+
+from absl import app
+from absl import flags
+from ddsp import core
+import numpy as np
+import tensorflow.compat.v2 as tf
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_multi_float('f0_hz', [110.0, 220.0, 440.0, 880.0],
+                         'Fundamental frequencies of the notes.')
+flags.DEFINE_multi_float('amplitude_floor_db', [-60.0, -80.0, -100.0],
+                         'Amplitude floors of sparse synthesis.')
+flags.DEFINE_integer('n_harmonics', 100, 'Number of harmonics.')
+flags.DEFINE_float('rolloff_db', 12.0,
+                   'Harmonic amplitude rolloff in dB per an octave.')
+flags.DEFINE_float('audio_secs', 4.0, 'Length of the audio in seconds.')
+flags.DEFINE_integer('sample_rate', 16000, 'Sample rate of audio.')
+flags.DEFINE_integer('frame_rate', 250, 'Frame rate of controls.')
+flags.DEFINE_integer('batch_size', 1, 'Number of notes per a call.')
+flags.DEFINE_integer('block_size', 1024, 'Samples per a block of pruning.')
+flags.DEFINE_integer('repeats', 5, 'Timed calls per a configuration.')
+
+
+def time_fn(fn, *args):
+  """Minimum wall time of fn(*args) in seconds, after a warm up call."""
+  _ = fn(*args)
+  times = []
+  for _ in range(FLAGS.repeats):
+    start_time = time.time()
+    _ = tf.nest.map_structure(lambda x: x.numpy(), fn(*args))
+    times.append(time.time() - start_time)
+  return min(times)
+
+
+def get_controls(f0_hz, n_frames):
+  """Vibrato note with a decaying amplitude and a fixed harmonic rolloff."""
+  t = np.arange(n_frames) / FLAGS.frame_rate
+  frequencies = f0_hz * 2.0 ** (np.sin(2 * np.pi * 5 * t) / 24)
+  amplitudes = 0.5 * np.exp(-t)
+  harmonic_numbers = np.arange(1, FLAGS.n_harmonics + 1)
+  harmonic_distribution = core.db_to_amplitude(
+      -FLAGS.rolloff_db * np.log2(harmonic_numbers))
+  harmonic_distribution /= harmonic_distribution.sum()
+
+  def batch(x):
+    x = np.reshape(x, [1, n_frames, -1]) * np.ones([FLAGS.batch_size, 1, 1])
+    return tf.constant(x, tf.float32)
+
+  return (batch(frequencies), batch(amplitudes),
+          batch(np.tile(harmonic_distribution, [n_frames, 1])))
+
+
+def main(unused_argv):
+  n_samples = int(FLAGS.audio_secs * FLAGS.sample_rate)
+  n_frames = int(FLAGS.audio_secs * FLAGS.frame_rate)
+  kwargs = dict(n_samples=n_samples, sample_rate=FLAGS.sample_rate,
+                use_angular_cumsum=True)
+
+  @tf.function
+  def dense_fn(frequencies, amplitudes, harmonic_distribution):
+    return core.harmonic_synthesis(
+        frequencies, amplitudes, harmonic_distribution=harmonic_distribution,
+        **kwargs)
+
+  print(f'{FLAGS.n_harmonics} harmonics, -{FLAGS.rolloff_db} dB/octave, '
+        f'{FLAGS.audio_secs}s, batch {FLAGS.batch_size}, '
+        f'block_size {FLAGS.block_size}')
+  print('f0 (Hz) | floor (dB) | dense (s) | sparse (s) | speedup | '
+        'error bound | max error')
+  for f0_hz in FLAGS.f0_hz:
+    controls = get_controls(f0_hz, n_frames)
+    dense_seconds = time_fn(dense_fn, *controls)
+    dense = dense_fn(*controls).numpy()
+    for amplitude_floor_db in FLAGS.amplitude_floor_db:
+
+      @tf.function
+      def sparse_fn(frequencies, amplitudes, harmonic_distribution,
+                    amplitude_floor_db=amplitude_floor_db):
+        return core.sparse_harmonic_synthesis(
+            frequencies, amplitudes,
+            harmonic_distribution=harmonic_distribution,
+            amplitude_floor_db=amplitude_floor_db,
+            block_size=FLAGS.block_size, **kwargs)
+
+      sparse_seconds = time_fn(sparse_fn, *controls)
+      sparse, error_bound = sparse_fn(*controls)
+      max_error = np.abs(dense - sparse.numpy()).max()
+      print(f'{f0_hz:.0f} | {amplitude_floor_db:.0f} | {dense_seconds:.3f} | '
+            f'{sparse_seconds:.3f} | {dense_seconds / sparse_seconds:.1f}x | '
+            f'{np.max(error_bound):.2e} | {max_error:.2e}')
+
+
+if __name__ == '__main__':
+  app.run(main)
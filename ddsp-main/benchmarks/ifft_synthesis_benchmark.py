@@ -0,0 +1,129 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""Benchmark inverse FFT against oscillator bank harmonic synthesis.
+
+Compares core.ifft_harmonic_synthesis() against core.harmonic_synthesis() with
+the 'sin' and 'harmonic_sin' oscillator kernels, on a vibrato note with a
+random harmonic distribution. Reports the wall time, and the multi-scale
+SpectralLoss against 'harmonic_sin', whose phase is accumulated in float64.
+The L1 losses of magnitudes and of log magnitudes are reported separately, as
+the log magnitudes are dominated by the sidelobes of IFFT synthesis in bands
+that are silent in the reference.
+
+Usage:
+================================================================================
+python benchmarks/ifft_synthesis_benchmark.py \
+--sample_rate=16000 --sample_rate=48000 \
+--n_harmonics=20 --n_harmonics=60 --n_harmonics=100 \
+--n_lobe_bins=4 --n_lobe_bins=8 --n_lobe_bins=16
+"""
+
+import time
+
+from absl import app
+from absl import flags
+from ddsp import core
+from ddsp import losses
+import numpy as np
+import tensorflow.compat.v2 as tf
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_multi_integer('sample_rate', [16000, 48000],
+                           'Sample rates of the synthesized audio.')
+flags.DEFINE_multi_integer('n_harmonics', [20, 60, 100],
+                           'Numbers of harmonics.')
+flags.DEFINE_multi_integer('n_lobe_bins', [4, 8, 16],
+                           'Bins per a side of each harmonic of the IFFT.')
+flags.DEFINE_float('f0_hz', 220.0, 'Fundamental frequency of the note.')
+flags.DEFINE_float('audio_secs', 4.0, 'Length of the audio in seconds.')
+flags.DEFINE_integer('frame_rate', 250, 'Frame rate of controls.')
+flags.DEFINE_integer('batch_size', 1, 'Number of notes per a call.')
+flags.DEFINE_integer('repeats', 3, 'Timed calls per a configuration.')
+
+
+def time_fn(fn, *args):
+  """Minimum wall time of fn(*args) in seconds, after a warm up call."""
+  _ = fn(*args)
+  times = []
+  for _ in range(FLAGS.repeats):
+    start_time = time.time()
+    _ = fn(*args).numpy()
+    times.append(time.time() - start_time)
+  return min(times)
+
+
+def get_controls(n_frames, n_harmonics, rng):
+  """Vibrato note with a random harmonic distribution."""
+  t = np.arange(n_frames) / FLAGS.frame_rate
+  frequencies = FLAGS.f0_hz * 2.0 ** (np.sin(2 * np.pi * 5 * t) / 24)
+  amplitudes = 0.5 * np.exp(-t)
+  harmonic_distribution = rng.uniform(size=[n_harmonics])
+  harmonic_distribution /= harmonic_distribution.sum()
+
+  def batch(x):
+    x = np.reshape(x, [1, n_frames, -1]) * np.ones([FLAGS.batch_size, 1, 1])
+    return tf.constant(x, tf.float32)
+
+  return (batch(frequencies), batch(amplitudes),
+          batch(np.tile(harmonic_distribution, [n_frames, 1])))
+
+
+def main(unused_argv):
+  mag_loss = losses.SpectralLoss(mag_weight=1.0, logmag_weight=0.0)
+  logmag_loss = losses.SpectralLoss(mag_weight=0.0, logmag_weight=1.0)
+  n_frames = int(FLAGS.audio_secs * FLAGS.frame_rate)
+  rng = np.random.RandomState(0)
+
+  print(f'f0 {FLAGS.f0_hz}Hz vibrato, {FLAGS.audio_secs}s, '
+        f'{FLAGS.frame_rate} frames/s, batch {FLAGS.batch_size}')
+  print('sample rate | harmonics | method | time (s) | x realtime | '
+        'speedup | mag loss | logmag loss')
+  for sample_rate in FLAGS.sample_rate:
+    n_samples = int(FLAGS.audio_secs * sample_rate)
+
+    def oscillator_fn(kernel, sample_rate=sample_rate, n_samples=n_samples):
+      return tf.function(lambda f, a, h: core.harmonic_synthesis(  # pylint: disable=g-long-lambda
+          f, a, harmonic_distribution=h, n_samples=n_samples,
+          sample_rate=sample_rate, amp_resample_method='linear',
+          use_angular_cumsum=True, kernel=kernel))
+
+    def ifft_fn(n_lobe_bins, sample_rate=sample_rate, n_samples=n_samples):
+      return tf.function(lambda f, a, h: core.ifft_harmonic_synthesis(  # pylint: disable=g-long-lambda
+          f, a, harmonic_distribution=h, n_samples=n_samples,
+          sample_rate=sample_rate, n_lobe_bins=n_lobe_bins))
+
+    methods = {'oscillators (sin)': oscillator_fn('sin'),
+               'oscillators (harmonic_sin)': oscillator_fn('harmonic_sin')}
+    for n_lobe_bins in FLAGS.n_lobe_bins:
+      methods[f'ifft ({n_lobe_bins} bins)'] = ifft_fn(n_lobe_bins)
+
+    for n_harmonics in FLAGS.n_harmonics:
+      controls = get_controls(n_frames, n_harmonics, rng)
+      reference = methods['oscillators (harmonic_sin)'](*controls)
+      sin_seconds = None
+      for name, fn in methods.items():
+        seconds = time_fn(fn, *controls)
+        sin_seconds = sin_seconds or seconds
+        audio = fn(*controls)
+        print(f'{sample_rate} | {n_harmonics} | {name} | {seconds:.3f} | '
+              f'{FLAGS.audio_secs / seconds:.1f} | '
+              f'{sin_seconds / seconds:.1f}x | '
+              f'{mag_loss(reference, audio):.4f} | '
+              f'{logmag_loss(reference, audio):.4f}')
+
+
+if __name__ == '__main__':
+  app.run(main)
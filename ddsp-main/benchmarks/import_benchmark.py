@@ -0,0 +1,90 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""Benchmark cold-import latency and memory of the ddsp packages.
+
+Each import runs in a fresh interpreter, and reports the wall time of the
+import statement, the peak resident set size (RSS) of the process, and which
+heavy third party modules were imported.
+
+Usage:
+================================================================================
+python benchmarks/import_benchmark.py \
+--module=ddsp --module=ddsp.training --repeats=5
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+
+from absl import app
+from absl import flags
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_multi_string('module', ['ddsp', 'ddsp.training'],
+                          'Modules to import.')
+flags.DEFINE_integer('repeats', 5, 'Number of fresh interpreters per module.')
+
+# Modules that are slow to import.
+HEAVY_MODULES = [
+    'tensorflow',
+    'tensorflow_probability',
+    'tensorflow_datasets',
+    'librosa',
+    'crepe',
+    'note_seq',
+    'matplotlib',
+    'mir_eval',
+]
+
+_IMPORT_SCRIPT = """
+import json, resource, sys, time
+start_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{
+    'seconds': seconds,
+    'start_rss_mb': start_rss / 1024.0,
+    'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+    'heavy_modules': [m for m in {heavy_modules} if m in sys.modules],
+}}))
+"""
+
+
+def time_import(module):
+  """Import a module in a fresh interpreter, return its measurements."""
+  script = _IMPORT_SCRIPT.format(module=module, heavy_modules=HEAVY_MODULES)
+  output = subprocess.run([sys.executable, '-c', script],
+                          check=True, capture_output=True, text=True).stdout
+  # Only the last line, in case importing prints anything.
+  return json.loads(output.strip().splitlines()[-1])
+
+
+def main(unused_argv):
+  print('module | median time (s) | min time (s) | peak RSS (MB) | '
+        'heavy modules imported')
+  for module in FLAGS.module:
+    results = [time_import(module) for _ in range(FLAGS.repeats)]
+    seconds = [r['seconds'] for r in results]
+    peak_rss = statistics.median(r['peak_rss_mb'] for r in results)
+    heavy_modules = ', '.join(results[-1]['heavy_modules']) or 'none'
+    print(f'{module} | {statistics.median(seconds):.3f} | {min(seconds):.3f} | '
+          f'{peak_rss:.1f} | {heavy_modules}')
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -0,0 +1,150 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""Benchmark peak memory and wall time of dense and gather wavetable lookup.
+
+Compares wavetable synthesis and modulated delay with the dense lookup (a
+distance to every wavetable sample, and a wavetable resampled to every sample)
+against the gather lookup (two neighboring wavetable samples, and a crossfade
+between neighboring frames). Modulated delay looks up every past frame of the
+audio with either lookup, or reads the two neighboring samples of a delay line
+('delay_line'). Each configuration runs in a fresh process, so that the peak
+resident set size (RSS) is measured for that configuration alone.
+
+Usage:
+================================================================================
+python benchmarks/linear_lookup_benchmark.py \
+--sample_rate=16000 --sample_rate=48000 \
+--audio_secs=4 --n_wavetable=2048 --delay_ms=25
+"""
+
+import multiprocessing
+import resource
+import time
+
+from absl import app
+from absl import flags
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_multi_integer('sample_rate', [16000, 48000],
+                           'Sample rates of the synthesized audio.')
+flags.DEFINE_float('audio_secs', 4.0, 'Length of the audio in seconds.')
+flags.DEFINE_integer('n_frames', 1000, 'Frames of wavetables.')
+flags.DEFINE_integer('n_wavetable', 2048, 'Samples per a wavetable.')
+flags.DEFINE_float('delay_ms', 25.0,
+                   'Maximum delay of the modulated delay in milliseconds.')
+flags.DEFINE_integer('batch_size', 1, 'Number of examples per a call.')
+flags.DEFINE_integer('repeats', 3, 'Timed calls per a configuration.')
+
+
+def run_benchmark(case, method, sample_rate, config, results):
+  """Time a configuration and report its peak memory."""
+  # pylint: disable=g-import-not-at-top
+  from ddsp import core
+  import numpy as np
+  import tensorflow.compat.v2 as tf
+  # pylint: enable=g-import-not-at-top
+  n_samples = int(config['audio_secs'] * sample_rate)
+  n_frames = config['n_frames']
+  batch_size = config['batch_size']
+  rng = np.random.RandomState(0)
+
+  if case == 'wavetable':
+    frequencies = tf.constant(
+        rng.uniform(100.0, 1000.0, [batch_size, n_frames, 1]), tf.float32)
+    amplitudes = tf.ones([batch_size, n_frames, 1])
+    wavetables = tf.constant(
+        rng.randn(batch_size, n_frames, config['n_wavetable']), tf.float32)
+    inputs = (frequencies, amplitudes, wavetables)
+
+    def fn(frequencies, amplitudes, wavetables):
+      if method == 'gather':
+        return core.wavetable_synthesis(frequencies, amplitudes, wavetables,
+                                        n_samples, sample_rate)
+      amplitude_envelope = core.resample(amplitudes, n_samples,
+                                         method='window')[:, :, 0]
+      phase_velocity = core.resample(frequencies, n_samples) / sample_rate
+      phase = tf.cumsum(phase_velocity, axis=1, exclusive=True) % 1.0
+      wavetables = core.resample(wavetables, n_samples)
+      audio = core.linear_lookup(phase, wavetables, method='dense')
+      return audio * amplitude_envelope
+
+  else:
+    max_length = int(sample_rate * config['delay_ms'] / 1000.0)
+    audio = tf.constant(rng.randn(batch_size, n_samples), tf.float32)
+    phase = tf.constant(
+        rng.uniform(0.0, 1.0, [batch_size, n_samples, 1]), tf.float32)
+    inputs = (phase, audio)
+
+    def fn(phase, audio):
+      if method == 'delay_line':
+        return core.variable_length_delay(phase, audio, max_length)
+      audio = tf.pad(audio, [(0, 0), (max_length - 1, 0)])
+      frames = tf.signal.frame(audio, max_length, 1, pad_end=False)
+      return core.linear_lookup(phase, frames[..., ::-1], method=method)
+
+  fn = tf.function(fn)
+  _ = fn(*inputs).numpy()
+  times = []
+  for _ in range(config['repeats']):
+    start_time = time.time()
+    _ = fn(*inputs).numpy()
+    times.append(time.time() - start_time)
+  rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+  results.put({
+      'wall_time': min(times),
+      'realtime_factor': config['audio_secs'] * batch_size / min(times),
+      'rss_peak_mb': rss_peak / 1024.0,
+  })
+
+
+def main(unused_argv):
+  ctx = multiprocessing.get_context('spawn')
+  config = {
+      'audio_secs': FLAGS.audio_secs,
+      'n_frames': FLAGS.n_frames,
+      'n_wavetable': FLAGS.n_wavetable,
+      'delay_ms': FLAGS.delay_ms,
+      'batch_size': FLAGS.batch_size,
+      'repeats': FLAGS.repeats,
+  }
+  print(f'{FLAGS.audio_secs}s, batch {FLAGS.batch_size}, wavetable: '
+        f'{FLAGS.n_frames} frames x {FLAGS.n_wavetable} samples, '
+        f'mod delay: {FLAGS.delay_ms}ms')
+  print('case | sample rate | lookup | wall time (s) | realtime factor | '
+        'peak RSS (MB)')
+  methods = {'wavetable': ['dense', 'gather'],
+             'mod_delay': ['dense', 'gather', 'delay_line']}
+  for case in ['wavetable', 'mod_delay']:
+    for sample_rate in FLAGS.sample_rate:
+      for method in methods[case]:
+        results = ctx.Queue()
+        process = ctx.Process(
+            target=run_benchmark,
+            args=(case, method, sample_rate, config, results))
+        process.start()
+        process.join()
+        if process.exitcode != 0:
+          print(f'{case} | {sample_rate} | {method} | '
+                f'failed with exit code {process.exitcode}')
+          continue
+        r = results.get()
+        print(f'{case} | {sample_rate} | {method} | {r["wall_time"]:.3f} | '
+              f'{r["realtime_factor"]:.1f} | {r["rss_peak_mb"]:.0f}')
+
+
+if __name__ == '__main__':
+  app.run(main)
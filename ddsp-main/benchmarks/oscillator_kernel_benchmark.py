@@ -0,0 +1,102 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""Benchmark CPU throughput of the harmonic oscillator kernels.
+
+Times core.harmonic_synthesis() (offline synthesis, as in synths.Harmonic)
+with each of core.OSCILLATOR_KERNELS, and reports the largest error against a
+float64 numpy reference.
+
+Usage:
+================================================================================
+python benchmarks/oscillator_kernel_benchmark.py \
+--n_harmonics=20 --n_harmonics=60 --n_harmonics=100 \
+--audio_secs=4
+"""
+
+import time
+
+from absl import app
+from absl import flags
+from ddsp import core
+import numpy as np
+import tensorflow.compat.v2 as tf
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_multi_integer('n_harmonics', [20, 60, 100],
+                           'Numbers of harmonics.')
+flags.DEFINE_float('f0_hz', 220.0, 'Fundamental frequency of the note.')
+flags.DEFINE_float('audio_secs', 4.0, 'Length of the audio in seconds.')
+flags.DEFINE_integer('sample_rate', 16000, 'Sample rate of audio.')
+flags.DEFINE_integer('frame_rate', 250, 'Frame rate of controls.')
+flags.DEFINE_integer('batch_size', 1, 'Number of notes per a call.')
+flags.DEFINE_integer('repeats', 5, 'Timed calls per a configuration.')
+
+
+def time_fn(fn, *args):
+  """Minimum wall time of fn(*args) in seconds, after a warm up call."""
+  _ = fn(*args)
+  times = []
+  for _ in range(FLAGS.repeats):
+    start_time = time.time()
+    _ = tf.nest.map_structure(lambda x: x.numpy(), fn(*args))
+    times.append(time.time() - start_time)
+  return min(times)
+
+
+def main(unused_argv):
+  n_samples = int(FLAGS.audio_secs * FLAGS.sample_rate)
+  n_frames = int(FLAGS.audio_secs * FLAGS.frame_rate)
+  nyquist = FLAGS.sample_rate / 2.0
+  time_np = np.arange(1, n_samples + 1) / FLAGS.sample_rate
+
+  @tf.function
+  def synthesis_fn(frequencies, amplitudes, harmonic_distribution, kernel):
+    return core.harmonic_synthesis(
+        frequencies, amplitudes, harmonic_distribution=harmonic_distribution,
+        n_samples=n_samples, sample_rate=FLAGS.sample_rate,
+        use_angular_cumsum=True, kernel=kernel)
+
+  print(f'f0 {FLAGS.f0_hz}Hz, {FLAGS.audio_secs}s, batch {FLAGS.batch_size}')
+  print('harmonics | kernel | time (s) | x realtime | speedup | max error')
+  rng = np.random.RandomState(0)
+  for n_harmonics in FLAGS.n_harmonics:
+    harmonic_distribution = rng.uniform(size=[n_harmonics])
+    harmonic_distribution /= harmonic_distribution.sum()
+    harmonic_frequencies = FLAGS.f0_hz * np.arange(1, n_harmonics + 1)
+    audio_np = np.sum(
+        harmonic_distribution * (harmonic_frequencies < nyquist) *
+        np.sin(2.0 * np.pi * harmonic_frequencies * time_np[:, np.newaxis]),
+        axis=-1)
+
+    def constant(x):
+      x = np.reshape(x, [1, 1, -1]) * np.ones([FLAGS.batch_size, n_frames, 1])
+      return tf.constant(x, tf.float32)
+
+    args = (constant(FLAGS.f0_hz), constant(1.0),
+            constant(harmonic_distribution))
+    sin_seconds = None
+    for kernel in core.OSCILLATOR_KERNELS:
+      seconds = time_fn(synthesis_fn, *args, kernel)
+      sin_seconds = sin_seconds or seconds
+      max_error = np.abs(synthesis_fn(*args, kernel).numpy()[0] -
+                         audio_np).max()
+      print(f'{n_harmonics} | {kernel} | {seconds:.3f} | '
+            f'{FLAGS.audio_secs / seconds:.1f} | '
+            f'{sin_seconds / seconds:.1f}x | {max_error:.1e}')
+
+
+if __name__ == '__main__':
+  app.run(main)
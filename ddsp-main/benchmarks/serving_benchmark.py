@@ -0,0 +1,190 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""Load test the render server on localhost.
+
+Starts a serving.RenderServer on a free local port, and runs concurrent clients
+that each send requests one after another over a kept alive connection (a
+closed loop). Reports throughput, client side latency percentiles, and the
+batching metrics of the server, for each combination of the number of clients
+and the maximum batch size.
+
+Usage:
+================================================================================
+python benchmarks/serving_benchmark.py \
+--clients=1 --clients=8 --clients=32 \
+--max_batch_size=1 --max_batch_size=8 \
+--seconds=4 --requests_per_client=8
+
+# Use a trained model instead of a randomly initialized one.
+python benchmarks/serving_benchmark.py \
+--ckpt=/path/to/ckpt_dir
+"""
+
+import asyncio
+import json
+import time
+
+from absl import app
+from absl import flags
+import ddsp
+from ddsp.training import decoders
+from ddsp.training import inference
+from ddsp.training import preprocessing
+from ddsp.training import serving
+import numpy as np
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_multi_integer('clients', [1, 8, 32],
+                           'Numbers of concurrent clients.')
+flags.DEFINE_multi_integer('max_batch_size', [1, 8],
+                           'Maximum batch sizes of the server.')
+flags.DEFINE_integer('requests_per_client', 8,
+                     'Requests that each client sends, one after another.')
+flags.DEFINE_float('seconds', 4.0, 'Mean length of the requested audio.')
+flags.DEFINE_float('jitter', 0.1,
+                   'Request lengths vary uniformly by this fraction.')
+flags.DEFINE_float('max_wait_ms', 10.0,
+                   'Longest time that a request waits to fill a batch.')
+flags.DEFINE_integer('bucket_frames', 250,
+                     'Frames per a length bucket of the server.')
+flags.DEFINE_integer('block_frames', 1000,
+                     'Frames per a block of streaming rendering.')
+flags.DEFINE_string('ckpt', None,
+                    'Optional checkpoint directory of a model trained with a '
+                    'GRU RnnFcDecoder. Uses a random flute-sized model if None.')
+
+
+def get_model(ckpt, block_frames):
+  """Restore a model, or build a random model with the default flute config."""
+  if ckpt is not None:
+    return inference.StreamingAutoencoderInference(
+        ckpt, block_frames=block_frames)
+
+  dag = [
+      (ddsp.synths.Harmonic(n_samples=64000, use_angular_cumsum=True),
+       ['amps', 'harmonic_distribution', 'f0_hz']),
+      (ddsp.synths.FilteredNoise(n_samples=64000, window_size=0),
+       ['noise_magnitudes']),
+      (ddsp.processors.Add(), ['filtered_noise/signal', 'harmonic/signal']),
+      (ddsp.effects.Reverb(trainable=True, reverb_length=48000),
+       ['add/signal']),
+  ]
+  model = inference.StreamingAutoencoderInference(
+      block_frames=block_frames,
+      preprocessor=preprocessing.F0LoudnessPreprocessor(
+          time_steps=1000, compute_loudness=False),
+      decoder=decoders.RnnFcDecoder(
+          rnn_channels=512,
+          ch=512,
+          layers_per_stack=3,
+          stateless=True,
+          input_keys=('ld_scaled', 'f0_scaled'),
+          output_splits=(('amps', 1), ('harmonic_distribution', 60),
+                         ('noise_magnitudes', 65))),
+      processor_group=ddsp.processors.ProcessorGroup(dag=dag))
+  model.warm_up()
+  return model
+
+
+def make_body(n_frames, frame_rate, rng):
+  """JSON features of a short vibrato note."""
+  t = np.arange(n_frames) / frame_rate
+  f0_hz = rng.uniform(200.0, 800.0) * 2.0 ** (np.sin(2 * np.pi * 5 * t) / 24)
+  loudness_db = -30.0 + 10.0 * np.sin(2 * np.pi * 0.5 * t)
+  return json.dumps({'f0_hz': f0_hz.tolist(),
+                     'loudness_db': loudness_db.tolist()}).encode()
+
+
+async def run_client(port, bodies, latencies):
+  """Send requests one after another over a single connection."""
+  reader, writer = await asyncio.open_connection('127.0.0.1', port)
+  for body in bodies:
+    start_time = time.time()
+    writer.write(f'POST /render HTTP/1.1\r\n'
+                 f'Content-Type: application/json\r\n'
+                 f'Content-Length: {len(body)}\r\n\r\n'.encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+      line = await reader.readline()
+      if line in (b'\r\n', b''):
+        break
+      name, _, value = line.decode().partition(':')
+      headers[name.strip().lower()] = value.strip()
+    _ = await reader.readexactly(int(headers['content-length']))
+    if status != 200:
+      raise RuntimeError(f'Request failed with status {status}.')
+    latencies.append(time.time() - start_time)
+  writer.close()
+
+
+async def run_benchmark(model, n_clients, max_batch_size):
+  """Serve a model and load it with concurrent clients, returns the results."""
+  server = serving.RenderServer({'model': model},
+                                max_batch_size=max_batch_size,
+                                max_wait_ms=FLAGS.max_wait_ms,
+                                bucket_frames=FLAGS.bucket_frames)
+  frame_rate = model.sample_rate // model.hop_size
+  rng = np.random.RandomState(0)
+  n_frames = FLAGS.seconds * frame_rate * rng.uniform(
+      1.0 - FLAGS.jitter, 1.0 + FLAGS.jitter,
+      [n_clients, FLAGS.requests_per_client])
+  bodies = [[make_body(int(n), frame_rate, rng) for n in client_frames]
+            for client_frames in n_frames]
+
+  port = await server.start(port=0)
+  latencies = []
+  start_time = time.time()
+  try:
+    await asyncio.gather(*[run_client(port, b, latencies) for b in bodies])
+  finally:
+    await server.close()
+  wall_time = time.time() - start_time
+
+  metrics = server.metrics.snapshot(0)
+  audio_seconds = n_frames.astype(int).sum() / frame_rate
+  latencies = 1000.0 * np.array(latencies)
+  return {
+      'requests_per_second': len(latencies) / wall_time,
+      'realtime_factor': audio_seconds / wall_time,
+      'p50_ms': np.percentile(latencies, 50),
+      'p99_ms': np.percentile(latencies, 99),
+      'mean_batch_size': metrics['mean_batch_size'],
+      'max_queue_depth': metrics['max_queue_depth'],
+      'batch_size_histogram': metrics['batch_size_histogram'],
+  }
+
+
+def main(unused_argv):
+  model = get_model(FLAGS.ckpt, FLAGS.block_frames)
+  print(f'Requests of {FLAGS.seconds}s (+/-{100 * FLAGS.jitter:.0f}%), '
+        f'{FLAGS.requests_per_client} per client, '
+        f'max_wait_ms: {FLAGS.max_wait_ms}')
+  print('clients | max batch | requests/s | realtime factor | p50 (ms) | '
+        'p99 (ms) | mean batch | max queue | batch sizes')
+  for n_clients in FLAGS.clients:
+    for max_batch_size in FLAGS.max_batch_size:
+      r = asyncio.run(run_benchmark(model, n_clients, max_batch_size))
+      print(f'{n_clients:7d} | {max_batch_size:9d} | '
+            f'{r["requests_per_second"]:10.2f} | '
+            f'{r["realtime_factor"]:15.1f} | {r["p50_ms"]:8.0f} | '
+            f'{r["p99_ms"]:8.0f} | {r["mean_batch_size"]:10.2f} | '
+            f'{r["max_queue_depth"]:9d} | {r["batch_size_histogram"]}')
+
+
+if __name__ == '__main__':
+  app.run(main)
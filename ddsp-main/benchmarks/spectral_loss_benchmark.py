@@ -0,0 +1,189 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""Benchmark step time of the multi-resolution SpectralLoss.
+
+Compares SpectralLoss, which computes all fft sizes (and loudness) of a signal
+with spectral_ops.MultiResolutionSpectrogram, against computing each spectrogram of each signal separately with
+compute_mag() and compute_loudness().
+
+Times a loss step (loss and gradient w.r.t. the output audio) for a single
+output, and for several outputs compared against the same target (as in
+InverseSynthesis), where SpectralLoss.compare_outputs() computes the target
+spectrograms once. Also times a full training step of a small Autoencoder.
+
+Usage:
+================================================================================
+python benchmarks/spectral_loss_benchmark.py \
+--batch_size=8 --audio_secs=4 --n_outputs=2
+"""
+
+import time
+
+from absl import app
+from absl import flags
+import ddsp
+from ddsp import losses
+from ddsp import spectral_ops
+from ddsp.training import decoders
+from ddsp.training import models
+from ddsp.training import preprocessing
+import numpy as np
+import tensorflow.compat.v2 as tf
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_integer('batch_size', 8, 'Number of examples per a batch.')
+flags.DEFINE_float('audio_secs', 4.0, 'Length of the audio in seconds.')
+flags.DEFINE_integer('n_outputs', 2,
+                     'Outputs compared against the same target.')
+flags.DEFINE_integer('repeats', 10, 'Timed steps per a configuration.')
+flags.DEFINE_boolean('train_step', True,
+                     'Also time a training step of an Autoencoder.')
+
+
+class SeparateSpectrograms(object):
+  """Each spectrogram computed separately, as before MultiResolutionSpectrogram.
+  """
+
+  def __init__(self, fft_sizes, loudness):
+    self.fft_sizes = fft_sizes
+    self.loudness = loudness
+
+  def __call__(self, audio):
+    mags = [spectral_ops.compute_mag(audio, size=size)
+            for size in self.fft_sizes]
+    loudness = (spectral_ops.compute_loudness(audio, n_fft=2048, use_tf=True)
+                if self.loudness else None)
+    return mags, loudness
+
+
+class SeparateSpectralLoss(losses.SpectralLoss):
+  """SpectralLoss with a separate spectrogram per fft size and signal."""
+
+  def __init__(self, **kwargs):
+    super().__init__(**kwargs)
+    self.spectrogram = SeparateSpectrograms(self.fft_sizes,
+                                            self.loudness_weight > 0)
+
+
+def time_fn(fn, *args):
+  """Minimum wall time of fn(*args) in seconds, after a warm up call."""
+  _ = fn(*args)
+  times = []
+  for _ in range(FLAGS.repeats):
+    start_time = time.time()
+    _ = [x.numpy() for x in tf.nest.flatten(fn(*args))]
+    times.append(time.time() - start_time)
+  return min(times)
+
+
+def loss_step_fn(loss_obj):
+  """Loss, and gradient w.r.t. the outputs, of outputs against a target."""
+  @tf.function
+  def step(target_audio, outputs):
+    with tf.GradientTape() as tape:
+      tape.watch(outputs)
+      loss = tf.add_n(loss_obj.compare_outputs(target_audio, outputs))
+    return loss, tape.gradient(loss, outputs)
+  return step
+
+
+def train_step_fn(model):
+  """Training step of a model, as in Trainer.step_fn()."""
+  optimizer = tf.keras.optimizers.Adam(1e-3)
+
+  @tf.function
+  def step(batch):
+    with tf.GradientTape() as tape:
+      _, losses_dict = model(batch, return_losses=True, training=True)
+    grads = tape.gradient(losses_dict['total_loss'], model.trainable_variables)
+    optimizer.apply_gradients(zip(grads, model.trainable_variables))
+    return losses_dict['total_loss']
+  return step
+
+
+def get_autoencoder(loss_obj, n_samples):
+  """Small Autoencoder with a harmonic plus noise synthesizer."""
+  n_frames = int(FLAGS.audio_secs * 250)
+  dag = [
+      (ddsp.synths.Harmonic(n_samples=n_samples),
+       ['amps', 'harmonic_distribution', 'f0_hz']),
+      (ddsp.synths.FilteredNoise(n_samples=n_samples),
+       ['noise_magnitudes']),
+      (ddsp.processors.Add(), ['filtered_noise/signal', 'harmonic/signal']),
+  ]
+  return models.Autoencoder(
+      preprocessor=preprocessing.F0LoudnessPreprocessor(time_steps=n_frames),
+      decoder=decoders.RnnFcDecoder(
+          rnn_channels=256,
+          ch=256,
+          layers_per_stack=1,
+          input_keys=('ld_scaled', 'f0_scaled'),
+          output_splits=(('amps', 1), ('harmonic_distribution', 60),
+                         ('noise_magnitudes', 65))),
+      processor_group=ddsp.processors.ProcessorGroup(dag=dag),
+      losses=[loss_obj])
+
+
+def main(unused_argv):
+  n_samples = int(FLAGS.audio_secs * 16000)
+  rng = np.random.RandomState(0)
+
+  def random_audio():
+    return tf.constant(rng.randn(FLAGS.batch_size, n_samples), tf.float32)
+
+  target_audio = random_audio()
+  outputs = [random_audio() for _ in range(FLAGS.n_outputs)]
+  configs = {
+      'mag + logmag': dict(mag_weight=1.0, logmag_weight=1.0),
+      'mag + logmag + loudness': dict(mag_weight=1.0, logmag_weight=1.0,
+                                      loudness_weight=1.0),
+  }
+
+  print(f'Batch {FLAGS.batch_size}, {FLAGS.audio_secs}s at 16kHz, '
+        f'{FLAGS.repeats} steps.')
+  print('step | loss | outputs | separate (ms) | fused (ms) | speedup')
+  for name, kwargs in configs.items():
+    for n_outputs in sorted({1, FLAGS.n_outputs}):
+      seconds = [
+          time_fn(loss_step_fn(loss_cls(**kwargs)), target_audio,
+                  outputs[:n_outputs])
+          for loss_cls in [SeparateSpectralLoss, losses.SpectralLoss]]
+      print(f'loss | {name} | {n_outputs} | {1000 * seconds[0]:.1f} | '
+            f'{1000 * seconds[1]:.1f} | {seconds[0] / seconds[1]:.2f}x')
+
+  if FLAGS.train_step:
+    n_frames = int(FLAGS.audio_secs * 250)
+    t = np.arange(n_frames) / 250.0
+    batch = {
+        'audio': target_audio,
+        'f0_hz': tf.constant(np.tile(
+            440.0 * 2.0**(np.sin(2 * np.pi * 5 * t) / 24),
+            [FLAGS.batch_size, 1]), tf.float32),
+        'loudness_db': tf.constant(np.tile(
+            -30.0 + 10.0 * np.sin(2 * np.pi * 0.5 * t),
+            [FLAGS.batch_size, 1]), tf.float32),
+    }
+    for name, kwargs in configs.items():
+      seconds = []
+      for loss_cls in [SeparateSpectralLoss, losses.SpectralLoss]:
+        model = get_autoencoder(loss_cls(**kwargs), n_samples)
+        seconds.append(time_fn(train_step_fn(model), batch))
+      print(f'train | {name} | 1 | {1000 * seconds[0]:.1f} | '
+            f'{1000 * seconds[1]:.1f} | {seconds[0] / seconds[1]:.2f}x')
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -0,0 +1,111 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""Benchmark training steps_per_sec with several Trainer.steps_per_execution.
+
+Trains the `solo_instrument.gin` model with train_util.train() on random
+in-memory examples, and reports the steps_per_sec summary of the last summary
+period, so that tracing and building the model are not included.
+
+Usage:
+================================================================================
+python benchmarks/steps_per_execution_benchmark.py \
+--steps_per_execution=1 --steps_per_execution=10 \
+--batch_size=4 --steps_per_summary=20
+"""
+
+import os
+import tempfile
+
+from absl import app
+from absl import flags
+from ddsp.training import data
+from ddsp.training import models
+from ddsp.training import train_util
+from ddsp.training import trainers
+import gin
+import numpy as np
+import tensorflow.compat.v2 as tf
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_multi_integer('steps_per_execution', [1, 10],
+                           'Training steps per a call of Trainer.train_step.')
+flags.DEFINE_integer('batch_size', 4, 'Number of examples per a batch.')
+flags.DEFINE_integer('steps_per_summary', 20,
+                     'Steps per a steps_per_sec summary.')
+flags.DEFINE_integer('n_summaries', 3,
+                     'Summaries per a configuration, the last is reported.')
+flags.DEFINE_string('gin_file', 'models/solo_instrument.gin',
+                    'Model config, relative to ddsp/training/gin.')
+
+
+class RandomProvider(data.DataProvider):
+  """Random 4 second examples of audio, f0, and loudness in memory."""
+
+  def __init__(self, n_examples=16):
+    super().__init__(sample_rate=16000, frame_rate=250)
+    rng = np.random.RandomState(0)
+    self.examples = {
+        'audio': rng.randn(n_examples, 64000).astype(np.float32),
+        'f0_hz': rng.uniform(100, 1000, [n_examples, 1000]).astype(np.float32),
+        'loudness_db': rng.uniform(-80, 0, [n_examples, 1000]).astype(
+            np.float32),
+    }
+
+  def get_dataset(self, shuffle=True):
+    del shuffle
+    return tf.data.Dataset.from_tensor_slices(self.examples)
+
+
+def last_steps_per_sec(summary_dir):
+  """The last steps_per_sec value written to the summaries."""
+  steps_per_sec = None
+  for path in tf.io.gfile.glob(os.path.join(summary_dir, 'events.*')):
+    for event in tf.compat.v1.train.summary_iterator(path):
+      for value in event.summary.value:
+        if value.tag == 'steps_per_sec':
+          steps_per_sec = float(tf.make_ndarray(value.tensor))
+  return steps_per_sec
+
+
+def main(unused_argv):
+  gin_dir = os.path.join(os.path.dirname(train_util.__file__), 'gin')
+  gin.add_config_file_search_path(gin_dir)
+  with gin.unlock_config():
+    gin.parse_config_file(os.path.join(gin_dir, FLAGS.gin_file))
+
+  print(f'{FLAGS.gin_file}, batch {FLAGS.batch_size}, '
+        f'{FLAGS.steps_per_summary} steps per a summary.')
+  print('steps_per_execution | steps_per_sec')
+  for steps_per_execution in FLAGS.steps_per_execution:
+    save_dir = tempfile.mkdtemp()
+    trainer = trainers.Trainer(models.get_model(),
+                               tf.distribute.get_strategy(),
+                               steps_per_execution=steps_per_execution)
+    train_util.train(RandomProvider(),
+                     trainer,
+                     batch_size=FLAGS.batch_size,
+                     num_steps=FLAGS.n_summaries * FLAGS.steps_per_summary,
+                     steps_per_summary=FLAGS.steps_per_summary,
+                     steps_per_save=10**9,
+                     save_dir=save_dir,
+                     restore_dir=save_dir)
+    steps_per_sec = last_steps_per_sec(
+        os.path.join(save_dir, 'summaries', 'train'))
+    print(f'{steps_per_execution} | {steps_per_sec:.3f}')
+
+
+if __name__ == '__main__':
+  app.run(main)
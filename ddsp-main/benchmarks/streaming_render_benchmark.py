@@ -0,0 +1,154 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""Benchmark peak memory and wall time of block-streaming rendering.
+
+Each input length is rendered in a fresh process, so that the peak resident set
+size (RSS) is measured for that length alone.
+
+Usage:
+================================================================================
+python benchmarks/streaming_render_benchmark.py \
+--minutes=1 --minutes=10 --minutes=60 \
+--block_frames=250
+
+# Compare against rendering the whole input in a single call.
+python benchmarks/streaming_render_benchmark.py \
+--minutes=1 --mode=one_shot
+
+# Use a trained model instead of a randomly initialized one.
+python benchmarks/streaming_render_benchmark.py \
+--ckpt=/path/to/ckpt_dir
+"""
+
+import multiprocessing
+import resource
+import time
+
+from absl import app
+from absl import flags
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_multi_float('minutes', [1.0, 10.0, 60.0],
+                         'Lengths of the rendered inputs in minutes.')
+flags.DEFINE_enum('mode', 'streaming', ['streaming', 'one_shot'],
+                  'Render block by block, or the whole input in one call.')
+flags.DEFINE_integer('block_frames', 250, 'Frames per a rendered block.')
+flags.DEFINE_string('ckpt', None,
+                    'Optional checkpoint directory of a model trained with a '
+                    'GRU RnnFcDecoder. Uses a random flute-sized model if None.')
+
+
+def get_model(ckpt, block_frames, n_frames):
+  """Restore a model, or build a random model with the default flute config."""
+  # pylint: disable=g-import-not-at-top
+  import ddsp
+  from ddsp.training import decoders
+  from ddsp.training import inference
+  from ddsp.training import preprocessing
+  # pylint: enable=g-import-not-at-top
+  if ckpt is not None:
+    return inference.StreamingAutoencoderInference(
+        ckpt, block_frames=block_frames)
+
+  hop_size = 64
+  n_samples = n_frames * hop_size
+  dag = [
+      (ddsp.synths.Harmonic(n_samples=n_samples, use_angular_cumsum=True),
+       ['amps', 'harmonic_distribution', 'f0_hz']),
+      (ddsp.synths.FilteredNoise(n_samples=n_samples, window_size=0),
+       ['noise_magnitudes']),
+      (ddsp.processors.Add(), ['filtered_noise/signal', 'harmonic/signal']),
+      (ddsp.effects.Reverb(trainable=True, reverb_length=48000),
+       ['add/signal']),
+  ]
+  return inference.StreamingAutoencoderInference(
+      block_frames=block_frames,
+      preprocessor=preprocessing.F0LoudnessPreprocessor(
+          time_steps=n_frames, compute_loudness=False),
+      decoder=decoders.RnnFcDecoder(
+          rnn_channels=512,
+          ch=512,
+          layers_per_stack=3,
+          stateless=True,
+          input_keys=('ld_scaled', 'f0_scaled'),
+          output_splits=(('amps', 1), ('harmonic_distribution', 60),
+                         ('noise_magnitudes', 65))),
+      processor_group=ddsp.processors.ProcessorGroup(dag=dag))
+
+
+def run_benchmark(minutes, mode, block_frames, ckpt, results):
+  """Render an input of the given length, report time and peak memory."""
+  # pylint: disable=g-import-not-at-top
+  import numpy as np
+  import tensorflow as tf
+  # pylint: enable=g-import-not-at-top
+  frame_rate = 250
+  n_frames = int(minutes * 60 * frame_rate)
+  t = np.arange(n_frames) / frame_rate
+  features = {
+      'f0_hz': 440.0 * 2.0 ** (np.sin(2 * np.pi * 0.2 * t) / 12.0),
+      'loudness_db': -30.0 + 10.0 * np.sin(2 * np.pi * 0.5 * t),
+  }
+  features = {k: v[np.newaxis, :].astype(np.float32)
+              for k, v in features.items()}
+  model = get_model(ckpt, block_frames, n_frames)
+  sample_rate = model.sample_rate
+
+  rss_start = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  start_time = time.time()
+  n_samples = 0
+  if mode == 'streaming':
+    for chunk in model.render_blocks(features):
+      n_samples += chunk.shape[1]
+  else:
+    features['state'] = tf.zeros([1, model.decoder.rnn.rnn.units])
+    audio = model(features, training=False)['audio_synth']
+    n_samples = int(audio.shape[1])
+  wall_time = time.time() - start_time
+  rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+  results.put({
+      'minutes': minutes,
+      'wall_time': wall_time,
+      'realtime_factor': n_samples / sample_rate / wall_time,
+      'rss_start_mb': rss_start / 1024.0,
+      'rss_peak_mb': rss_peak / 1024.0,
+  })
+
+
+def main(unused_argv):
+  ctx = multiprocessing.get_context('spawn')
+  print(f'Mode: {FLAGS.mode}, block_frames: {FLAGS.block_frames}')
+  print('minutes | wall time (s) | realtime factor | '
+        'RSS before (MB) | peak RSS (MB)')
+  for minutes in FLAGS.minutes:
+    results = ctx.Queue()
+    process = ctx.Process(
+        target=run_benchmark,
+        args=(minutes, FLAGS.mode, FLAGS.block_frames, FLAGS.ckpt, results))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+      print(f'{minutes:7.1f} | failed with exit code {process.exitcode}')
+      continue
+    r = results.get()
+    print(f'{r["minutes"]:7.1f} | {r["wall_time"]:13.2f} | '
+          f'{r["realtime_factor"]:15.1f} | {r["rss_start_mb"]:15.1f} | '
+          f'{r["rss_peak_mb"]:13.1f}')
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -0,0 +1,142 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""Benchmark peak memory and throughput of Trainer training modes.
+
+Compares a float32 training step of a whole batch against gradient
+accumulation over micro-batches (Trainer.grad_accumulation_steps) and a mixed
+precision policy (train_util.set_mixed_precision_policy()), for an Autoencoder
+with the `solo_instrument.gin` decoder and synthesizers. Each configuration
+runs in a fresh process, so that the peak resident set size (RSS) is measured
+for that configuration alone.
+
+Usage:
+================================================================================
+python benchmarks/trainer_modes_benchmark.py \
+--batch_size=16 --grad_accumulation_steps=4 --policy=mixed_bfloat16
+"""
+
+import multiprocessing
+import resource
+import time
+
+from absl import app
+from absl import flags
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_integer('batch_size', 16, 'Number of examples per a step.')
+flags.DEFINE_float('audio_secs', 4.0, 'Length of the examples in seconds.')
+flags.DEFINE_integer('grad_accumulation_steps', 4,
+                     'Micro-batches per a step of the accumulation mode.')
+flags.DEFINE_string('policy', 'mixed_bfloat16',
+                    'Keras mixed precision policy of the mixed mode.')
+flags.DEFINE_integer('rnn_channels', 512, 'Size of the decoder GRU.')
+flags.DEFINE_integer('repeats', 3, 'Timed steps per a configuration.')
+
+
+def run_benchmark(mode, config, results):
+  """Time training steps of a mode and report its peak memory."""
+  # pylint: disable=g-import-not-at-top
+  import ddsp
+  from ddsp.training import decoders
+  from ddsp.training import models
+  from ddsp.training import preprocessing
+  from ddsp.training import train_util
+  from ddsp.training import trainers
+  import numpy as np
+  import tensorflow.compat.v2 as tf
+  # pylint: enable=g-import-not-at-top
+  if mode == 'mixed_precision':
+    train_util.set_mixed_precision_policy(config['policy'])
+
+  n_frames = int(config['audio_secs'] * 250)
+  n_samples = int(config['audio_secs'] * 16000)
+  dag = [
+      (ddsp.synths.Harmonic(n_samples=n_samples),
+       ['amps', 'harmonic_distribution', 'f0_hz']),
+      (ddsp.synths.FilteredNoise(n_samples=n_samples),
+       ['noise_magnitudes']),
+      (ddsp.processors.Add(), ['filtered_noise/signal', 'harmonic/signal']),
+  ]
+  model = models.Autoencoder(
+      preprocessor=preprocessing.F0LoudnessPreprocessor(time_steps=n_frames),
+      decoder=decoders.RnnFcDecoder(
+          rnn_channels=config['rnn_channels'],
+          ch=config['rnn_channels'],
+          layers_per_stack=3,
+          input_keys=('ld_scaled', 'f0_scaled'),
+          output_splits=(('amps', 1), ('harmonic_distribution', 60),
+                         ('noise_magnitudes', 65))),
+      processor_group=ddsp.processors.ProcessorGroup(dag=dag),
+      losses=[ddsp.losses.SpectralLoss(mag_weight=1.0, logmag_weight=1.0)])
+  grad_accumulation_steps = (
+      config['grad_accumulation_steps'] if mode == 'accumulation' else 1)
+  trainer = trainers.Trainer(model, tf.distribute.get_strategy(),
+                             grad_accumulation_steps=grad_accumulation_steps)
+
+  rng = np.random.RandomState(0)
+  batch_size = config['batch_size']
+  batch = {
+      'audio': tf.constant(rng.randn(batch_size, n_samples), tf.float32),
+      'f0_hz': tf.constant(rng.uniform(100, 1000, (batch_size, n_frames)),
+                           tf.float32),
+      'loudness_db': tf.constant(rng.uniform(-80, 0, (batch_size, n_frames)),
+                                 tf.float32),
+  }
+  trainer.build(batch)
+  _ = trainer.train_step(batch)['total_loss'].numpy()
+  times = []
+  for _ in range(config['repeats']):
+    start_time = time.time()
+    _ = trainer.train_step(batch)['total_loss'].numpy()
+    times.append(time.time() - start_time)
+  rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+  results.put({
+      'step_time': min(times),
+      'examples_per_sec': batch_size / min(times),
+      'rss_peak_mb': rss_peak / 1024.0,
+  })
+
+
+def main(unused_argv):
+  ctx = multiprocessing.get_context('spawn')
+  config = {
+      'batch_size': FLAGS.batch_size,
+      'audio_secs': FLAGS.audio_secs,
+      'grad_accumulation_steps': FLAGS.grad_accumulation_steps,
+      'policy': FLAGS.policy,
+      'rnn_channels': FLAGS.rnn_channels,
+      'repeats': FLAGS.repeats,
+  }
+  print(f'Batch {FLAGS.batch_size}, {FLAGS.audio_secs}s, GRU '
+        f'{FLAGS.rnn_channels}, {FLAGS.grad_accumulation_steps} micro-batches, '
+        f'{FLAGS.policy}.')
+  print('mode | step time (s) | examples/sec | peak RSS (MB)')
+  for mode in ['float32', 'accumulation', 'mixed_precision']:
+    results = ctx.Queue()
+    process = ctx.Process(target=run_benchmark, args=(mode, config, results))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+      print(f'{mode} | failed with exit code {process.exitcode}')
+      continue
+    r = results.get()
+    print(f'{mode} | {r["step_time"]:.2f} | {r["examples_per_sec"]:.2f} | '
+          f'{r["rss_peak_mb"]:.0f}')
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -0,0 +1,195 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""Benchmark per-hop CPU time of the real-time VST synthesizer.
+
+Renders hops one at a time with inference.VSTStreamingSynthesizer and compares
+the wall time of each hop against the real-time budget (hop_size /
+sample_rate). Only the control prediction and synthesis are timed by default,
+pass --extract_features to include CREPE and power feature extraction.
+
+Also measures the throughput of the multi-frame modules
+(VSTStatelessPredictControlsFrames and VSTSynthesizeFrames) for each
+--frames_per_call, where 1 uses the single-frame modules.
+
+Usage:
+================================================================================
+python benchmarks/vst_streaming_benchmark.py \
+--ckpt=/path/to/models/flute \
+--ckpt=/path/to/models/violin \
+--n_hops=1000
+
+# Without checkpoints, benchmarks a random model with the `vst.gin` sizes.
+python benchmarks/vst_streaming_benchmark.py
+"""
+
+import os
+import tempfile
+import time
+
+from absl import app
+from absl import flags
+from ddsp.training import inference
+from ddsp.training import models
+from ddsp.training import preprocessing
+import gin
+import numpy as np
+import tensorflow as tf
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_multi_string('ckpt', [],
+                          'Checkpoint directories of models trained with '
+                          '`vst.gin`. Uses a random model if empty.')
+flags.DEFINE_integer('n_hops', 500, 'Timed hops per a model.')
+flags.DEFINE_integer('warm_up_hops', 10, 'Untimed hops before timing.')
+flags.DEFINE_boolean('extract_features', False,
+                     'Also time feature extraction, by calling process() with '
+                     'a hop of audio instead of render_frame().')
+flags.DEFINE_string('crepe_saved_model_path', None,
+                    'Optional CREPE SavedModel for feature extraction.')
+flags.DEFINE_multi_integer('frames_per_call', [1, 4, 16, 64],
+                           'Frames rendered per a call of the multi-frame '
+                           'modules.')
+flags.DEFINE_float('throughput_seconds', 10.0,
+                   'Seconds of audio rendered per --frames_per_call.')
+
+
+def save_random_model(ckpt_dir):
+  """Save a randomly initialized model with the default `vst.gin` config."""
+  gin_file = os.path.join(os.path.dirname(inference.__file__), 'gin', 'models',
+                          'vst', 'vst.gin')
+  with gin.unlock_config():
+    gin.clear_config()
+    gin.parse_config_file(gin_file)
+    config_str = gin.config_str()
+  model = models.Autoencoder()
+  _ = model.decoder({'f0_scaled': tf.zeros([1, 1, 1]),
+                     'pw_scaled': tf.zeros([1, 1, 1])})
+  tf.train.Checkpoint(model=model).save(os.path.join(ckpt_dir, 'ckpt'))
+  with tf.io.gfile.GFile(
+      os.path.join(ckpt_dir, 'operative_config-0.gin'), 'w') as f:
+    f.write(config_str)
+  gin.clear_config()
+
+
+def time_hops(synth, n_hops):
+  """Wall time in seconds of each of n_hops hops of a vibrato note."""
+  t = np.arange(n_hops) * synth.hop_budget_seconds
+  f0_hz = 440.0 * 2.0 ** (np.sin(2 * np.pi * 5 * t) / 24)
+  power_db = -30.0 + 10.0 * np.sin(2 * np.pi * 0.5 * t)
+  audio = 0.3 * np.sin(2 * np.pi * 440.0 * np.arange(
+      n_hops * synth.hop_size) / synth.sample_rate)
+
+  times = []
+  for i in range(n_hops):
+    start_time = time.perf_counter()
+    if FLAGS.extract_features:
+      _ = synth.process(audio[i * synth.hop_size:(i + 1) * synth.hop_size])
+    else:
+      _ = synth.render_frame(f0_hz[i:i + 1], power_db[i:i + 1])
+    times.append(time.perf_counter() - start_time)
+  return np.array(times)
+
+
+def time_frames_per_call(ckpt, n_frames, n_calls):
+  """Calls per second, and CPU seconds per second of audio, of n_frames."""
+  gin.clear_config()
+  if n_frames == 1:
+    predict_controls = inference.VSTStatelessPredictControls(ckpt)
+    synthesize = inference.VSTSynthesize(ckpt)
+  else:
+    predict_controls = inference.VSTStatelessPredictControlsFrames(
+        ckpt, n_frames=n_frames)
+    synthesize = inference.VSTSynthesizeFrames(ckpt, n_frames=n_frames)
+  squeeze = (lambda x: x[0]) if n_frames == 1 else (lambda x: x)
+
+  f0_hz = np.linspace(220.0, 440.0, n_frames, dtype=np.float32)
+  f0_scaled = tf.constant(preprocessing.scale_f0_hz(f0_hz))
+  pw_scaled = tf.constant(preprocessing.scale_db(
+      np.full([n_frames], -30.0, np.float32)))
+  f0_hz = tf.constant(f0_hz[:, np.newaxis])
+  state = tf.zeros([predict_controls.state_size])
+  prev = (tf.zeros([1]), tf.zeros([synthesize.n_harmonics]), f0_hz[0])
+  phase = tf.zeros([1])
+
+  def render_call():
+    nonlocal state, prev, phase
+    amps, hd, noise, state = predict_controls(f0_scaled, pw_scaled, state)
+    audio, phase = synthesize(amps, prev[0], hd, prev[1], squeeze(f0_hz),
+                              prev[2], noise, phase)
+    phase = tf.reshape(phase, [1])
+    prev = (amps[-1], hd[-1], f0_hz[-1]) if n_frames > 1 else (
+        amps, hd, f0_hz[0])
+    return audio
+
+  _ = render_call().numpy()
+  start_time, start_cpu = time.perf_counter(), time.process_time()
+  for _ in range(n_calls):
+    _ = render_call().numpy()
+  wall_time = time.perf_counter() - start_time
+  cpu_time = time.process_time() - start_cpu
+  audio_seconds = n_calls * n_frames * synthesize.hop_size / (
+      synthesize.sample_rate)
+  return n_calls / wall_time, cpu_time / audio_seconds, (
+      wall_time / audio_seconds)
+
+
+def main(unused_argv):
+  ckpts = {os.path.basename(c.rstrip('/')): c for c in FLAGS.ckpt}
+  if not ckpts:
+    ckpt_dir = tempfile.mkdtemp()
+    save_random_model(ckpt_dir)
+    ckpts = {'random_vst': ckpt_dir}
+
+  results = []
+  throughputs = []
+  for name, ckpt in ckpts.items():
+    gin.clear_config()
+    synth = inference.VSTStreamingSynthesizer(
+        ckpt, crepe_saved_model_path=FLAGS.crepe_saved_model_path)
+    _ = time_hops(synth, FLAGS.warm_up_hops)
+    synth.reset()
+    times = 1000.0 * time_hops(synth, FLAGS.n_hops)
+    budget = 1000.0 * synth.hop_budget_seconds
+    results.append((name, synth.hop_size, synth.latency_seconds * 1000.0,
+                    budget, times))
+
+    for n_frames in FLAGS.frames_per_call:
+      n_calls = max(1, int(FLAGS.throughput_seconds /
+                           synth.hop_budget_seconds / n_frames))
+      throughputs.append(
+          (name, n_frames) + time_frames_per_call(ckpt, n_frames, n_calls))
+
+  stage = 'features + ' if FLAGS.extract_features else ''
+  print(f'Per-hop wall time of {stage}controls + synthesis, '
+        f'{FLAGS.n_hops} hops.')
+  print('model | hop | latency (ms) | budget (ms) | mean (ms) | p50 (ms) | '
+        'p99 (ms) | max (ms) | over budget | headroom')
+  for name, hop_size, latency, budget, times in results:
+    print(f'{name} | {hop_size} | {latency:.1f} | {budget:.2f} | '
+          f'{times.mean():.2f} | {np.percentile(times, 50):.2f} | '
+          f'{np.percentile(times, 99):.2f} | {times.max():.2f} | '
+          f'{100.0 * np.mean(times > budget):.1f}% | '
+          f'{budget / times.mean():.1f}x')
+
+  print('\nThroughput of the multi-frame modules, controls + synthesis.')
+  print('model | frames per call | calls/s | CPU s per audio s | '
+        'wall s per audio s')
+  for name, n_frames, calls_per_second, cpu_ratio, wall_ratio in throughputs:
+    print(f'{name} | {n_frames} | {calls_per_second:.1f} | {cpu_ratio:.3f} | '
+          f'{wall_ratio:.3f}')
+
+if __name__ == '__main__':
+  app.run(main)
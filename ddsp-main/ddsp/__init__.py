@@ -12,16 +12,28 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""Base module for the differentiable digital signal processing library."""
+"""Base module for the differentiable digital signal processing library.
+
+Importing a submodule registers its gin configurables. Heavy third party
+dependencies that are only needed by a few functions (TensorFlow Probability,
+librosa, CREPE) are imported on first use, see `ddsp.lazy_imports`.
+"""
 
 # Module imports.
 from ddsp import core
 from ddsp import dags
 from ddsp import effects
+from ddsp import feature_cache
+from ddsp import lazy_imports
 from ddsp import losses
 from ddsp import processors
 from ddsp import spectral_ops
 from ddsp import synths
 
+# Module imports without gin configurables.
+__getattr__, __dir__ = lazy_imports.lazy_submodules(__name__, [
+    'numpy_backend',
+])
+
 # Version number.
 from ddsp.version import __version__
@@ -16,7 +16,7 @@
 
 from collections import abc
 import copy
-from typing import Any, Dict, Optional, Sequence, Text, TypeVar
+from typing import Any, Dict, Optional, Sequence, Text, Tuple, TypeVar
 
 import gin
 import numpy as np
@@ -25,6 +25,7 @@ import tensorflow.compat.v2 as tf
 
 Number = TypeVar('Number', int, float, np.ndarray, tf.Tensor)
 DB_RANGE = 80.0
+OSCILLATOR_KERNELS = ('sin', 'harmonic_sin')
 
 
 # Utility Functions ------------------------------------------------------------
@@ -962,6 +963,17 @@ def oscillator_bank(frequency_envelopes: tf.Tensor,
   return audio
 
 
+def _harmonic_sum(phase: tf.Tensor,
+                  amplitude_envelopes: tf.Tensor) -> tf.Tensor:
+  """Sum of sinusoids at integer multiples of the phase of a fundamental."""
+  n_harmonics = int(amplitude_envelopes.shape[-1])
+  f_ratios = tf.linspace(1.0, float(n_harmonics), int(n_harmonics))
+  f_ratios = f_ratios[tf.newaxis, tf.newaxis, :]
+  wavs = tf.sin(phase * f_ratios)
+  audio = amplitude_envelopes * wavs  # [mb, n_samples, n_sinusoids]
+  return tf.reduce_sum(audio, axis=-1)  # [mb, n_samples]
+
+
 # TODO(jesseengel): Remove reliance on global injection for angular cumsum.
 @gin.configurable
 def harmonic_oscillator_bank(
@@ -1012,16 +1024,8 @@ def harmonic_oscillator_bank(
   phases += initial_phase
   final_phase = phases[:, -1:, 0:1]
 
-  n_harmonics = int(amplitude_envelopes.shape[-1])
-  f_ratios = tf.linspace(1.0, float(n_harmonics), int(n_harmonics))
-  f_ratios = f_ratios[tf.newaxis, tf.newaxis, :]
-  phases = phases * f_ratios
-
   # Convert to waveforms.
-  wavs = tf.sin(phases)
-  audio = amplitude_envelopes * wavs  # [mb, n_samples, n_sinusoids]
-  audio = tf.reduce_sum(audio, axis=-1)  # [mb, n_samples]
-
+  audio = _harmonic_sum(phases, amplitude_envelopes)
   return audio, final_phase
 
 
@@ -1052,7 +1056,8 @@ def harmonic_synthesis(frequencies: tf.Tensor,
                        n_samples: int = 64000,
                        sample_rate: int = 16000,
                        amp_resample_method: Text = 'window',
-                       use_angular_cumsum: bool = False) -> tf.Tensor:
+                       use_angular_cumsum: bool = False,
+                       kernel: Text = 'sin') -> tf.Tensor:
   """Generate audio from frame-wise monophonic harmonic oscillator bank.
 
   Args:
@@ -1071,13 +1076,29 @@ def harmonic_synthesis(frequencies: tf.Tensor,
     amp_resample_method: Mode with which to resample amplitude envelopes.
     use_angular_cumsum: Use angular cumulative sum on accumulating phase
       instead of tf.cumsum. More accurate for inference.
+    kernel: How to compute the harmonic sinusoids, one of OSCILLATOR_KERNELS.
+      'sin' uses oscillator_bank(), which accumulates the phase of each
+      harmonic. 'harmonic_sin' only accumulates the phase of the fundamental,
+      in float64 (so use_angular_cumsum is not needed), and takes sin() of
+      integer multiples of that phase. It doesn't support harmonic_shifts.
 
   Returns:
     audio: Output audio. Shape [batch_size, n_samples, 1]
+
+  Raises:
+    ValueError: If kernel is unknown, or only uses the phase of the
+      fundamental and harmonic_shifts are given.
   """
   frequencies = tf_float32(frequencies)
   amplitudes = tf_float32(amplitudes)
 
+  if kernel not in OSCILLATOR_KERNELS:
+    raise ValueError(f'Oscillator kernel ({kernel}) must be in '
+                     f'{OSCILLATOR_KERNELS}.')
+  if kernel != 'sin' and harmonic_shifts is not None:
+    raise ValueError(f'The {kernel} kernel only synthesizes exact harmonics, '
+                     'harmonic_shifts must be None.')
+
   if harmonic_distribution is not None:
     harmonic_distribution = tf_float32(harmonic_distribution)
     n_harmonics = int(harmonic_distribution.shape[-1])
@@ -1098,6 +1119,21 @@ def harmonic_synthesis(frequencies: tf.Tensor,
   else:
     harmonic_amplitudes = amplitudes
 
+  if kernel != 'sin':
+    # Only the phase of the fundamental, harmonics are integer multiples.
+    frequency_envelope = resample(frequencies, n_samples)  # cycles/sec
+    amplitude_envelopes = resample(harmonic_amplitudes, n_samples,
+                                   method=amp_resample_method)
+    amplitude_envelopes = remove_above_nyquist(
+        get_harmonic_frequencies(frequency_envelope, n_harmonics),
+        amplitude_envelopes, sample_rate)
+    # Phase errors are multiplied by the harmonic number, so accumulate the
+    # single phase track in float64.
+    omega = tf.cast(frequency_envelope, tf.float64) * (2.0 * np.pi)
+    omega = omega / float(sample_rate)  # rad / sample
+    phase = tf.cast(tf.cumsum(omega, axis=1) % (2.0 * np.pi), tf.float32)
+    return _harmonic_sum(phase, amplitude_envelopes)
+
   # Create sample-wise envelopes.
   frequency_envelopes = resample(harmonic_frequencies, n_samples)  # cycles/sec
   amplitude_envelopes = resample(harmonic_amplitudes, n_samples,
@@ -1111,6 +1147,287 @@ def harmonic_synthesis(frequencies: tf.Tensor,
   return audio
 
 
+def sparse_harmonic_synthesis(
+    frequencies: tf.Tensor,
+    amplitudes: tf.Tensor,
+    harmonic_distribution: Optional[tf.Tensor] = None,
+    n_samples: int = 64000,
+    sample_rate: int = 16000,
+    amp_resample_method: Text = 'window',
+    use_angular_cumsum: bool = False,
+    amplitude_floor_db: float = -80.0,
+    block_size: int = 1024) -> Tuple[tf.Tensor, tf.Tensor]:
+  """Harmonic synthesis that skips inaudible and above nyquist harmonics.
+
+  Same as harmonic_synthesis() (without harmonic shifts), but the audio is
+  synthesized in blocks of samples, and only the harmonics that are active
+  somewhere in a block are computed. A harmonic is inactive in a block if its
+  amplitude envelope stays below amplitude_floor_db, or its frequency stays
+  above nyquist, for the whole block. Each block of each batch element only
+  computes its own active harmonics, so the cost is the total number of active
+  harmonics over all blocks, and the savings are largest for low-pitched or
+  quiet notes with steep harmonic rolloff.
+
+  Args:
+    frequencies: Frame-wise fundamental frequency in Hz. Shape [batch_size,
+      n_frames, 1].
+    amplitudes: Frame-wise oscillator peak amplitude. Shape [batch_size,
+      n_frames, 1].
+    harmonic_distribution: Harmonic amplitude variations, ranged zero to one.
+      Total amplitude of a harmonic is equal to (amplitudes *
+      harmonic_distribution). Shape [batch_size, n_frames, n_harmonics].
+    n_samples: Total length of output audio. Interpolates and crops to this.
+    sample_rate: Sample rate.
+    amp_resample_method: Mode with which to resample amplitude envelopes.
+    use_angular_cumsum: Use angular cumulative sum on accumulating phase
+      instead of tf.cumsum. More accurate for inference.
+    amplitude_floor_db: Harmonics with peak amplitudes below this level (dB
+      relative to an amplitude of 1.0) in a block are not synthesized.
+    block_size: Samples per a block of harmonic pruning.
+
+  Returns:
+    audio: Output audio. Shape [batch_size, n_samples].
+    error_bound: Upper bound of the absolute sample-wise difference from
+      harmonic_synthesis(), the largest summed amplitude of the pruned
+      harmonics in any block (up to float32 rounding of the phase). The
+      magnitude of any windowed DFT of the difference is at most error_bound
+      times the sum of the window. Shape [batch_size].
+  """
+  frequencies = tf_float32(frequencies)
+  amplitudes = tf_float32(amplitudes)
+
+  if harmonic_distribution is not None:
+    harmonic_distribution = tf_float32(harmonic_distribution)
+    harmonic_amplitudes = amplitudes * harmonic_distribution
+  else:
+    harmonic_amplitudes = amplitudes
+  n_harmonics = int(harmonic_amplitudes.shape[-1])
+
+  # Create sample-wise envelopes, padded to a whole number of blocks.
+  n_blocks = -(-n_samples // block_size)
+  padding = (0, n_blocks * block_size - n_samples)
+  frequency_envelope = resample(frequencies, n_samples)  # cycles/sec
+  amplitude_envelopes = resample(harmonic_amplitudes, n_samples,
+                                 method=amp_resample_method)
+  frequency_envelope = pad_axis(frequency_envelope, padding, axis=1)
+  amplitude_envelopes = pad_axis(amplitude_envelopes, padding, axis=1)
+
+  # Phase of the fundamental, harmonics are integer multiples.
+  omega = frequency_envelope * (2.0 * np.pi)  # rad / sec
+  omega = omega / float(sample_rate)  # rad / sample
+  if use_angular_cumsum:
+    phase = angular_cumsum(omega)
+  else:
+    phase = tf.cumsum(omega, axis=1)
+
+  # Split into blocks [batch_size, n_blocks, block_size, channels].
+  block_shape = [-1, n_blocks, block_size]
+  frequency_envelope = tf.reshape(frequency_envelope, block_shape + [1])
+  phase = tf.reshape(phase, block_shape + [1])
+  amplitude_envelopes = tf.reshape(amplitude_envelopes,
+                                   block_shape + [n_harmonics])
+
+  # Find the active harmonics of each block [batch_size, n_blocks, n_harmonics].
+  harmonic_numbers = tf.range(1.0, n_harmonics + 1.0)
+  peak_amplitudes = tf.reduce_max(amplitude_envelopes, axis=2)
+  min_frequency = tf.reduce_min(frequency_envelope, axis=2)
+  below_nyquist = min_frequency * harmonic_numbers < sample_rate / 2.0
+  active = tf.logical_and(
+      below_nyquist, peak_amplitudes > db_to_amplitude(amplitude_floor_db))
+
+  # Only pruned harmonics below nyquist differ from harmonic_synthesis().
+  pruned = tf.logical_and(below_nyquist, tf.logical_not(active))
+  pruned_amplitudes = tf.where(pruned, peak_amplitudes,
+                               tf.zeros_like(peak_amplitudes))
+  error_bound = tf.reduce_max(tf.reduce_sum(pruned_amplitudes, axis=-1),
+                              axis=-1)
+
+  # Gather the active harmonics of every block and batch element as rows
+  # [n_active, block_size], with their (batch, block, harmonic) indices.
+  indices = tf.where(active)
+  block_indices = indices[:, :2]
+  amplitude_envelopes = tf.gather_nd(
+      tf.transpose(amplitude_envelopes, [0, 1, 3, 2]), indices)
+  frequency_envelope = tf.gather_nd(frequency_envelope[..., 0], block_indices)
+  phase = tf.gather_nd(phase[..., 0], block_indices)
+  active_numbers = tf.cast(indices[:, 2:] + 1, tf.float32)
+
+  # Synthesize, removing sample-wise frequencies above nyquist.
+  amplitude_envelopes = remove_above_nyquist(
+      frequency_envelope * active_numbers, amplitude_envelopes, sample_rate)
+  wavs = tf.sin(phase * active_numbers)
+
+  # Sum the harmonics of each block [batch_size * n_blocks, block_size].
+  batch_size = tf.shape(active, out_type=tf.int64)[0]
+  audio = tf.math.unsorted_segment_sum(
+      amplitude_envelopes * wavs,
+      segment_ids=indices[:, 0] * n_blocks + indices[:, 1],
+      num_segments=batch_size * n_blocks)
+  audio = tf.reshape(audio, [-1, n_blocks * block_size])[:, :n_samples]
+  return audio, error_bound
+
+
+def get_hann_spectrum_table(frame_size: int,
+                            n_lobe_bins: int = 4,
+                            oversampling: int = 64) -> np.ndarray:
+  """Oversampled spectrum of a periodic hann window, centered in the frame.
+
+  The DTFT of the window w[m], m = -frame_size/2 ... frame_size/2 - 1, at a
+  distance of d bins from DC, sum_m w[m] * exp(-2j * pi * d * m / frame_size).
+
+  Args:
+    frame_size: Window size in samples, must be even.
+    n_lobe_bins: Table covers d in [-n_lobe_bins - 1, n_lobe_bins + 1].
+    oversampling: Table entries per a bin.
+
+  Returns:
+    table: Complex128 table of shape [2 * (n_lobe_bins + 1) * oversampling + 1].
+  """
+  half_width = n_lobe_bins + 1
+  d = np.linspace(-half_width, half_width, 2 * half_width * oversampling + 1)
+  m = np.arange(-frame_size // 2, frame_size // 2)
+  window = 0.5 + 0.5 * np.cos(2.0 * np.pi * m / frame_size)
+  return np.exp(-2j * np.pi * d[:, np.newaxis] * m / frame_size) @ window
+
+
+def ifft_harmonic_synthesis(frequencies: tf.Tensor,
+                            amplitudes: tf.Tensor,
+                            harmonic_distribution: Optional[tf.Tensor] = None,
+                            n_samples: int = 64000,
+                            sample_rate: int = 16000,
+                            n_lobe_bins: int = 8) -> tf.Tensor:
+  """Harmonic synthesis with inverse FFTs and overlap-add (FFT-1 synthesis).
+
+  Instead of an oscillator per harmonic per sample, each frame of controls
+  places the spectrum of a hann windowed sinusoid per harmonic (the 2 *
+  n_lobe_bins bins around its frequency) into a spectrum of 2 * hop_size bins,
+  and the frames are inverse FFTed and overlap-added with a hop of
+  hop_size = n_samples / n_frames. The cost is O(n_harmonics * n_lobe_bins)
+  per a frame, plus the FFTs, so it grows much slower with n_harmonics and
+  sample_rate than the oscillator bank. Frequencies and amplitudes are
+  constant within a frame and crossfaded by the windows between frames.
+
+  Phase is continuous across frames, as the phase of the fundamental at each
+  frame center is accumulated (in float64) from the frequencies of the
+  frames, and harmonics are integer multiples of it.
+
+  Args:
+    frequencies: Frame-wise fundamental frequency in Hz. Shape [batch_size,
+      n_frames, 1].
+    amplitudes: Frame-wise oscillator peak amplitude. Shape [batch_size,
+      n_frames, 1].
+    harmonic_distribution: Harmonic amplitude variations, ranged zero to one.
+      Total amplitude of a harmonic is equal to (amplitudes *
+      harmonic_distribution). Shape [batch_size, n_frames, n_harmonics].
+    n_samples: Total length of output audio, must be a multiple of n_frames.
+      Frame i is centered on sample i * n_samples / n_frames.
+    sample_rate: Sample rate.
+    n_lobe_bins: Bins on each side of a harmonic that are synthesized. The
+      sidelobes of the hann window beyond them are truncated, giving errors
+      of about -48dB for 4 bins, -60dB for 8 bins, and -74dB for 16 bins
+      (relative to the summed amplitudes).
+
+  Returns:
+    audio: Output audio. Shape [batch_size, n_samples].
+
+  Raises:
+    ValueError: If n_samples is not a multiple of n_frames.
+  """
+  frequencies = tf_float32(frequencies)
+  amplitudes = tf_float32(amplitudes)
+
+  if harmonic_distribution is not None:
+    harmonic_distribution = tf_float32(harmonic_distribution)
+    harmonic_amplitudes = amplitudes * harmonic_distribution
+  else:
+    harmonic_amplitudes = amplitudes
+  n_harmonics = int(harmonic_amplitudes.shape[-1])
+  n_frames = int(frequencies.shape[1])
+  if n_samples % n_frames:
+    raise ValueError(f'n_samples ({n_samples}) must be a multiple of '
+                     f'n_frames ({n_frames}).')
+  hop_size = n_samples // n_frames
+  frame_size = 2 * hop_size
+  n_bins = hop_size + 1
+
+  # Repeat the last frame, so the end of the audio isn't faded out.
+  frequencies = tf.concat([frequencies, frequencies[:, -1:]], axis=1)
+  harmonic_amplitudes = tf.concat(
+      [harmonic_amplitudes, harmonic_amplitudes[:, -1:]], axis=1)
+
+  # Phase of the fundamental at frame centers, trapezoidal integration.
+  omega = tf.cast(frequencies, tf.float64) * (2.0 * np.pi / sample_rate)
+  increments = 0.5 * (omega[:, :-1] + omega[:, 1:]) * hop_size
+  phase = omega[:, :1] + tf.cumsum(increments, axis=1, exclusive=True)
+  phase = tf.concat([phase, phase[:, -1:] + increments[:, -1:]], axis=1)
+
+  # Harmonic phases, frequencies in bins, and amplitudes.
+  harmonic_numbers = np.arange(1, n_harmonics + 1)
+  harmonic_phase = (phase * harmonic_numbers) % (2.0 * np.pi)
+  harmonic_phase = tf.cast(harmonic_phase, tf.float32) - np.pi / 2.0
+  harmonic_frequencies = get_harmonic_frequencies(frequencies, n_harmonics)
+  harmonic_amplitudes = remove_above_nyquist(harmonic_frequencies,
+                                             harmonic_amplitudes, sample_rate)
+  center_bins = harmonic_frequencies * (frame_size / sample_rate)
+
+  # Bins of each lobe [batch_size, n_frames, n_harmonics, 2 * n_lobe_bins].
+  offsets = tf.range(-n_lobe_bins + 1, n_lobe_bins + 1)
+  bins = tf.cast(tf.floor(center_bins), tf.int32)[..., tf.newaxis] + offsets
+  distance = tf.cast(bins, tf.float32) - center_bins[..., tf.newaxis]
+
+  # Hann window spectrum at the distance from each bin to the harmonic.
+  oversampling = 64
+  table = get_hann_spectrum_table(frame_size, n_lobe_bins, oversampling)
+  index = (distance + n_lobe_bins + 1) * oversampling
+  index_floor = tf.floor(index)
+  alpha = index - index_floor
+  index_floor = tf.cast(index_floor, tf.int32)
+  window_spectrum = []
+  for part in (table.real, table.imag):
+    part = tf.constant(part, tf.float32)
+    window_spectrum.append(
+        (1.0 - alpha) * tf.gather(part, index_floor) +
+        alpha * tf.gather(part, index_floor + 1))
+  window_real, window_imag = window_spectrum
+
+  # Spectrum of each windowed sinusoid, amp * exp(j * phase) * (-1)^bin * W.
+  sign = tf.cast(1 - 2 * (bins % 2), tf.float32)
+  scale = harmonic_amplitudes[..., tf.newaxis] * sign
+  phase_real = tf.cos(harmonic_phase)[..., tf.newaxis]
+  phase_imag = tf.sin(harmonic_phase)[..., tf.newaxis]
+  spectrum_real = scale * (phase_real * window_real - phase_imag * window_imag)
+  spectrum_imag = scale * (phase_real * window_imag + phase_imag * window_real)
+
+  # Fold negative and above nyquist bins into the real FFT bins, halving all
+  # but the DC and nyquist bins, which are real.
+  bins = bins % frame_size
+  is_mirrored = bins > hop_size
+  bins = tf.where(is_mirrored, frame_size - bins, bins)
+  spectrum_imag = tf.where(is_mirrored, -spectrum_imag, spectrum_imag)
+  is_real = tf.logical_or(tf.equal(bins, 0), tf.equal(bins, hop_size))
+  weight = tf.where(is_real, 1.0, 0.5)
+  spectrum_real *= weight
+  spectrum_imag *= tf.where(is_real, 0.0, 0.5)
+
+  # Sum the lobes into spectra [batch_size, n_frames + 1, n_bins].
+  batch_size = tf.shape(frequencies)[0]
+  frame_ids = tf.range(batch_size * (n_frames + 1)) * n_bins
+  frame_ids = tf.reshape(frame_ids, [batch_size, n_frames + 1, 1, 1])
+  segment_ids = tf.reshape(bins + frame_ids, [-1])
+  n_segments = batch_size * (n_frames + 1) * n_bins
+  spectrum = tf.complex(
+      tf.math.unsorted_segment_sum(
+          tf.reshape(spectrum_real, [-1]), segment_ids, n_segments),
+      tf.math.unsorted_segment_sum(
+          tf.reshape(spectrum_imag, [-1]), segment_ids, n_segments))
+  spectrum = tf.reshape(spectrum, [batch_size, n_frames + 1, n_bins])
+
+  # Overlap-add frames centered on each frame of controls.
+  frames = tf.signal.irfft(spectrum, fft_length=[frame_size])
+  audio = tf.signal.overlap_and_add(frames, hop_size)
+  return audio[:, hop_size:hop_size + n_samples]
+
+
 def streaming_harmonic_synthesis(
     frequencies: tf.Tensor,
     amplitudes: tf.Tensor,
@@ -1166,7 +1483,8 @@ def streaming_harmonic_synthesis(
 
 # Wavetable Synthesizer --------------------------------------------------------
 def linear_lookup(phase: tf.Tensor,
-                  wavetables: tf.Tensor) -> tf.Tensor:
+                  wavetables: tf.Tensor,
+                  method: Text = 'dense') -> tf.Tensor:
   """Lookup from wavetables with linear interpolation.
 
   Args:
@@ -1175,43 +1493,110 @@ def linear_lookup(phase: tf.Tensor,
       Shape [batch_size, n_samples, 1].
     wavetables: Wavetables to be read from on lookup. Shape [batch_size,
       n_samples, n_wavetable] or [batch_size, n_wavetable].
+    method: Type of lookup, must be in ['dense', 'gather']. 'dense' weights
+      every sample of the wavetable by its distance to the phase, which needs
+      a [batch_size, n_samples, n_wavetable] tensor, and fades to zero for
+      phases outside [0, 1]. 'gather' reads the two neighboring wavetable
+      samples at each timestep, which is much faster and uses less memory for
+      large wavetables, but phases outside [0, 1] wrap around. Both have the
+      same values and gradients for phases in [0, 1].
 
   Returns:
     The resulting audio from linearly interpolated lookup of the wavetables at
       each point in time. Shape [batch_size, n_samples].
+
+  Raises:
+    ValueError: If method is not one of 'gather' or 'dense'.
   """
   phase, wavetables = tf_float32(phase), tf_float32(wavetables)
 
-  # Add a time dimension if not present.
-  if len(wavetables.shape) == 2:
-    wavetables = wavetables[:, tf.newaxis, :]
+  if method == 'gather':
+    # Add a time dimension if not present.
+    if len(wavetables.shape) == 2:
+      wavetables = wavetables[:, tf.newaxis, :]
 
-  # Add a wavetable dimension if not present.
-  if len(phase.shape) == 2:
-    phase = phase[:, :, tf.newaxis]
+    # Remove the wavetable dimension if present.
+    if len(phase.shape) == 3:
+      phase = phase[:, :, 0]
 
-  # Add first sample to end of wavetable for smooth linear interpolation
-  # between the last point in the wavetable and the first point.
-  wavetables = tf.concat([wavetables, wavetables[..., 0:1]], axis=-1)
-  n_wavetable = int(wavetables.shape[-1])
+    # Read the same wavetable at every timestep, or one wavetable per timestep.
+    if wavetables.shape[1] == 1:
+      rows = tf.zeros_like(phase[0], dtype=tf.int32)
+    else:
+      rows = tf.range(tf.shape(phase)[1])
+    return _gather_linear_lookup(phase, wavetables, rows)
+
+  elif method == 'dense':
+    # Add a time dimension if not present.
+    if len(wavetables.shape) == 2:
+      wavetables = wavetables[:, tf.newaxis, :]
+
+    # Add a wavetable dimension if not present.
+    if len(phase.shape) == 2:
+      phase = phase[:, :, tf.newaxis]
+
+    # Add first sample to end of wavetable for smooth linear interpolation
+    # between the last point in the wavetable and the first point.
+    wavetables = tf.concat([wavetables, wavetables[..., 0:1]], axis=-1)
+    n_wavetable = int(wavetables.shape[-1])
+
+    # Get a phase value for each point on the wavetable.
+    phase_wavetables = tf.linspace(0.0, 1.0, n_wavetable)
+
+    # Get pair-wise distances from the oscillator phase to each wavetable
+    # point. Axes are [batch, time, n_wavetable].
+    phase_distance = tf.abs(
+        (phase - phase_wavetables[tf.newaxis, tf.newaxis, :]))
 
-  # Get a phase value for each point on the wavetable.
-  phase_wavetables = tf.linspace(0.0, 1.0, n_wavetable)
+    # Put distance in units of wavetable samples.
+    phase_distance *= n_wavetable - 1
 
-  # Get pair-wise distances from the oscillator phase to each wavetable point.
-  # Axes are [batch, time, n_wavetable].
-  phase_distance = tf.abs((phase - phase_wavetables[tf.newaxis, tf.newaxis, :]))
+    # Weighting for interpolation.
+    # Distance is > 1.0 (and thus weights are 0.0) for all but nearest
+    # neighbors.
+    weights = tf.nn.relu(1.0 - phase_distance)
+    weighted_wavetables = weights * wavetables
 
-  # Put distance in units of wavetable samples.
-  phase_distance *= n_wavetable - 1
+    # Interpolated audio from summing the weighted wavetable at each timestep.
+    return tf.reduce_sum(weighted_wavetables, axis=-1)
+
+  else:
+    raise ValueError('Method ({}) is invalid. Must be one of {}.'.format(
+        method, "['gather', 'dense']"))
 
-  # Weighting for interpolation.
-  # Distance is > 1.0 (and thus weights are 0.0) for all but nearest neighbors.
-  weights = tf.nn.relu(1.0 - phase_distance)
-  weighted_wavetables = weights * wavetables
 
-  # Interpolated audio from summing the weighted wavetable at each timestep.
-  return tf.reduce_sum(weighted_wavetables, axis=-1)
+def _gather_linear_lookup(phase: tf.Tensor,
+                          wavetables: tf.Tensor,
+                          rows: tf.Tensor) -> tf.Tensor:
+  """Linearly interpolated lookup, reading two samples of a wavetable row.
+
+  Args:
+    phase: Position to lookup in the wavetable, ranging from 0 to 1.0, where
+      1.0 wraps around to the first sample. Shape [batch_size, n_samples].
+    wavetables: Rows of wavetables. Shape [batch_size, n_rows, n_wavetable].
+    rows: Row of the wavetables to read at each timestep. Integer tensor of
+      shape [n_samples].
+
+  Returns:
+    Interpolated audio. Shape [batch_size, n_samples].
+  """
+  n_wavetable = int(wavetables.shape[-1])
+  batch_size = tf.shape(wavetables)[0]
+  wavetables = tf.reshape(wavetables, [batch_size, -1])
+
+  # Split the position into a sample index and an interpolation weight. Floor
+  # has no gradient, so the gradient w.r.t. phase is the local slope.
+  position = phase * float(n_wavetable)
+  index = tf.floor(position)
+  weight = position - index
+  index = tf.math.floormod(tf.cast(index, tf.int32), n_wavetable)
+  next_index = tf.math.floormod(index + 1, n_wavetable)
+
+  # Offset indices to the rows of the flattened wavetables.
+  offset = rows[tf.newaxis, :] * n_wavetable
+  sample = tf.gather(wavetables, index + offset, batch_dims=1)
+  next_sample = tf.gather(wavetables, next_index + offset, batch_dims=1)
+  return sample + weight * (next_sample - sample)
 
 
 def harmonic_distribution_to_wavetable(harmonic_distribution, n_wavetable=2048):
@@ -1262,11 +1647,6 @@ def wavetable_synthesis(frequencies: tf.Tensor,
   amplitude_envelope = resample(amplitudes, n_samples, method='window')[:, :, 0]
   frequency_envelope = resample(frequencies, n_samples)  # cycles / sec
 
-  # Create intermediate wavetables.
-  wavetable_shape = wavetables.shape.as_list()
-  if len(wavetable_shape) == 3 and wavetable_shape[1] > 1:
-    wavetables = resample(wavetables, n_samples)
-
   # Accumulate phase (in cycles which range from 0.0 to 1.0).
   phase_velocity = frequency_envelope / float(sample_rate)  # cycles / sample
 
@@ -1274,8 +1654,23 @@ def wavetable_synthesis(frequencies: tf.Tensor,
   # On the order of milli-Hertz.
   phase = tf.cumsum(phase_velocity, axis=1, exclusive=True) % 1.0
 
-  # Synthesize with linear lookup.
-  audio = linear_lookup(phase, wavetables)
+  wavetable_shape = wavetables.shape.as_list()
+  if len(wavetable_shape) == 3 and wavetable_shape[1] > 1:
+    # Lookup from the two neighboring frames and crossfade, same as linearly
+    # resampling the wavetables to n_samples, without creating a wavetable for
+    # every sample.
+    n_frames = wavetable_shape[1]
+    position = tf.range(n_samples, dtype=tf.float32) * (n_frames / n_samples)
+    frame = tf.floor(position)
+    crossfade = (position - frame)[tf.newaxis, :]
+    frame = tf.cast(frame, tf.int32)
+    next_frame = tf.minimum(frame + 1, n_frames - 1)
+    audio = _gather_linear_lookup(phase[:, :, 0], wavetables, frame)
+    next_audio = _gather_linear_lookup(phase[:, :, 0], wavetables, next_frame)
+    audio += crossfade * (next_audio - audio)
+  else:
+    # Synthesize with linear lookup, the phase is wrapped to [0, 1).
+    audio = linear_lookup(phase, wavetables, method='gather')
 
   # Modulate with amplitude envelope.
   audio *= amplitude_envelope
@@ -1287,7 +1682,10 @@ def variable_length_delay(phase: tf.Tensor,
                           max_length: int = 512) -> tf.Tensor:
   """Delay audio by a time-vaying amount using linear interpolation.
 
-  Useful for modulation effects such as vibrato, chorus, and flanging.
+  Useful for modulation effects such as vibrato, chorus, and flanging. Reads
+  the two samples of a delay line on either side of each fractional delay, so
+  memory is linear in n_samples regardless of max_length.
+
   Args:
     phase: The normlaized instantaneous length of the delay, ranging from 0 to
       1.0. This corresponds to a delay of 0 to max_length samples. Shape
@@ -1298,19 +1696,54 @@ def variable_length_delay(phase: tf.Tensor,
   Returns:
     The delayed audio signal. Shape [batch_size, n_samples].
   """
-  phase, audio = tf_float32(phase), tf_float32(audio)
+  audio_out, _ = variable_length_delay_step(phase, audio, max_length)
+  return audio_out
+
 
-  # Make causal by zero-padding audio up front.
-  audio = tf.pad(audio, [(0, 0), (max_length - 1, 0)])
-  # Cut audio up into frames of max_length.
-  frames = tf.signal.frame(audio,
-                           frame_length=max_length,
-                           frame_step=1,
-                           pad_end=False)
-  # Reverse frames so that [0, 1] phase corresponds to [0, max_length] delay.
-  frames = frames[..., ::-1]
-  # Read audio from the past frames.
-  return linear_lookup(phase, frames)
+def variable_length_delay_step(
+    phase: tf.Tensor,
+    audio_block: tf.Tensor,
+    max_length: int = 512,
+    state: Optional[tf.Tensor] = None) -> Tuple[tf.Tensor, tf.Tensor]:
+  """Delay one block of streaming audio by a time-varying amount.
+
+  Streaming version of variable_length_delay(). The delay line holds the last
+  max_length input samples, which are passed between calls, so consecutive
+  blocks give the same output as a single call on the whole audio.
+
+  Args:
+    phase: The normalized instantaneous length of the delay, clipped to the
+      range 0 to 1.0, corresponding to a delay of 0 to max_length samples.
+      Shape [batch_size, block_size, 1].
+    audio_block: Block of input audio. Shape [batch_size, block_size].
+    max_length: Maximimum delay in samples.
+    state: Delay line returned by the previous call, or None (silence) for the
+      first block. Shape [batch_size, max_length].
+
+  Returns:
+    audio_out: The delayed block of audio. Shape [batch_size, block_size].
+    state: The last max_length input samples, to pass to the next call.
+  """
+  phase, audio_block = tf_float32(phase), tf_float32(audio_block)
+  if state is None:
+    state = tf.zeros([tf.shape(audio_block)[0], max_length])
+  delay_line = tf.concat([tf_float32(state), audio_block], axis=1)
+
+  # Split the delay into whole samples and an interpolation weight. Floor has
+  # no gradient, so the gradient w.r.t. phase is the local slope.
+  delay = tf.clip_by_value(phase[:, :, 0], 0.0, 1.0) * float(max_length)
+  delay_samples = tf.floor(delay)
+  weight = delay - delay_samples
+  delay_samples = tf.cast(delay_samples, tf.int32)
+
+  # Input sample t is at position max_length + t of the delay line.
+  position = max_length + tf.range(tf.shape(audio_block)[1])[tf.newaxis, :]
+  sample = tf.gather(delay_line, position - delay_samples, batch_dims=1)
+  next_sample = tf.gather(
+      delay_line, position - tf.minimum(delay_samples + 1, max_length),
+      batch_dims=1)
+  audio_out = sample + weight * (next_sample - sample)
+  return audio_out, delay_line[:, -max_length:]
 
 
 # Time-varying convolution -----------------------------------------------------
@@ -1371,18 +1804,33 @@ def crop_and_compensate_delay(audio: tf.Tensor, audio_size: int, ir_size: int,
   # Compensate for the group delay of the filter by trimming the front.
   # For an impulse response produced by frequency_impulse_response(),
   # the group delay is constant because the filter is linear phase.
-  total_size = int(audio.shape[-1])
-  crop = total_size - crop_size
   start = ((ir_size - 1) // 2 -
            1 if delay_compensation < 0 else delay_compensation)
-  end = crop - start
-  return audio[:, start:-end]
+  return audio[:, start:start + crop_size]
+
+
+def get_fft_convolve_size(audio_size: int, ir_shape: Sequence[int]) -> int:
+  """FFT size used by fft_convolve().
+
+  Args:
+    audio_size: Number of audio samples.
+    ir_shape: Shape of the impulse response, [batch, ir_size] or
+      [batch, ir_frames, ir_size].
+
+  Returns:
+    fft_size: Size of the FFT of each frame of audio and impulse response.
+  """
+  n_ir_frames = ir_shape[1] if len(ir_shape) == 3 else 1
+  frame_size = int(np.ceil(audio_size / n_ir_frames))
+  return get_fft_size(frame_size, ir_shape[-1], power_of_2=True)
 
 
 def fft_convolve(audio: tf.Tensor,
                  impulse_response: tf.Tensor,
                  padding: Text = 'same',
-                 delay_compensation: int = -1) -> tf.Tensor:
+                 delay_compensation: int = -1,
+                 impulse_response_fft: Optional[tf.Tensor] = None
+                 ) -> tf.Tensor:
   """Filter audio with frames of time-varying impulse responses.
 
   Time-varying filter. Given audio [batch, n_samples], and a series of impulse
@@ -1398,7 +1846,7 @@ def fft_convolve(audio: tf.Tensor,
       ir_frames, ir_size]. A 2-D tensor will apply a single linear
       time-invariant filter to the audio. A 3-D Tensor will apply a linear
       time-varying filter. Automatically chops the audio into equally shaped
-      blocks to match ir_frames.
+      blocks to match ir_frames. A batch size of 1 broadcasts across the audio.
     padding: Either 'valid' or 'same'. For 'same' the final output to be the
       same size as the input audio (audio_timesteps). For 'valid' the audio is
       extended to include the tail of the impulse response (audio_timesteps +
@@ -1407,6 +1855,10 @@ def fft_convolve(audio: tf.Tensor,
       for group delay of the impulse response. If delay_compensation is less
       than 0 it defaults to automatically calculating a constant group delay of
       the windowed linear phase filter from frequency_impulse_response().
+    impulse_response_fft: Optional precomputed spectrum of the impulse
+      response, tf.signal.rfft(impulse_response, [fft_size]) with fft_size from
+      get_fft_convolve_size(). Saves recomputing it for every call with the same
+      impulse response.
 
   Returns:
     audio_out: Convolved audio. Tensor of shape
@@ -1415,6 +1867,7 @@ def fft_convolve(audio: tf.Tensor,
 
   Raises:
     ValueError: If audio and impulse response have different batch size.
+    ValueError: If impulse_response_fft has the wrong FFT size.
     ValueError: If audio cannot be split into evenly spaced frames. (i.e. the
       number of impulse response frames is on the order of the audio size and
       not a multiple of the audio size.)
@@ -1429,16 +1882,13 @@ def fft_convolve(audio: tf.Tensor,
   if len(ir_shape) == 2:
     impulse_response = impulse_response[:, tf.newaxis, :]
 
-  # Broadcast impulse response.
-  if ir_shape[0] == 1 and batch_size > 1:
-    impulse_response = tf.tile(impulse_response, [batch_size, 1, 1])
-
   # Get shapes of impulse response.
   ir_shape = impulse_response.shape.as_list()
   batch_size_ir, n_ir_frames, ir_size = ir_shape
 
-  # Validate that batch sizes match.
-  if batch_size != batch_size_ir:
+  # Validate that batch sizes match, an impulse response of batch size 1 is
+  # broadcast when multiplying the spectra.
+  if batch_size_ir not in (1, batch_size):
     raise ValueError('Batch size of audio ({}) and impulse response ({}) must '
                      'be the same.'.format(batch_size, batch_size_ir))
 
@@ -1459,7 +1909,16 @@ def fft_convolve(audio: tf.Tensor,
   # Pad and FFT the audio and impulse responses.
   fft_size = get_fft_size(frame_size, ir_size, power_of_2=True)
   audio_fft = tf.signal.rfft(audio_frames, [fft_size])
-  ir_fft = tf.signal.rfft(impulse_response, [fft_size])
+  if impulse_response_fft is None:
+    ir_fft = tf.signal.rfft(impulse_response, [fft_size])
+  else:
+    ir_fft = impulse_response_fft
+    if len(ir_fft.shape) == 2:
+      ir_fft = ir_fft[:, tf.newaxis, :]
+    if int(ir_fft.shape[-1]) != fft_size // 2 + 1:
+      raise ValueError('impulse_response_fft has {} frequency bins, but the '
+                       'FFT size {} requires {}.'.format(
+                           ir_fft.shape[-1], fft_size, fft_size // 2 + 1))
 
   # Multiply the FFTs (same as convolution in time).
   audio_ir_fft = tf.multiply(audio_fft, ir_fft)
@@ -1473,6 +1932,271 @@ def fft_convolve(audio: tf.Tensor,
                                    delay_compensation)
 
 
+# Partitioned convolution ------------------------------------------------------
+def partition_impulse_response(impulse_response: tf.Tensor,
+                               block_size: int) -> tf.Tensor:
+  """Spectra of an impulse response split into uniform partitions.
+
+  Each partition of block_size samples is zero-padded to 2 * block_size, as
+  required by overlap-save convolution with blocks of block_size samples.
+
+  Args:
+    impulse_response: Linear time-invariant impulse response. Tensor of shape
+      [batch, ir_size], where batch can be 1 to broadcast across audio.
+    block_size: Number of samples per a partition.
+
+  Returns:
+    ir_fft: Complex Tensor of shape [batch, n_partitions, block_size + 1],
+      where n_partitions = ceil(ir_size / block_size).
+  """
+  impulse_response = tf_float32(impulse_response)
+  ir_size = int(impulse_response.shape[-1])
+  n_partitions = int(np.ceil(ir_size / block_size))
+  impulse_response = pad_axis(
+      impulse_response, (0, n_partitions * block_size - ir_size), axis=1)
+  partitions = tf.reshape(impulse_response, [-1, n_partitions, block_size])
+  return tf.signal.rfft(partitions, [2 * block_size])
+
+
+def get_partition_schedule(ir_size: int,
+                           block_size: int,
+                           max_block_size: Optional[int] = None
+                           ) -> Sequence[Sequence[int]]:
+  """Segments of a non-uniformly partitioned impulse response.
+
+  The first two partitions have block_size samples, and the block size then
+  doubles every two partitions up to max_block_size. Every later segment starts
+  at least one of its own blocks after the start of the impulse response, so a
+  streaming implementation only has the latency of the first block.
+
+  Args:
+    ir_size: Size of the impulse response.
+    block_size: Smallest block size, which determines the latency.
+    max_block_size: Largest block size. Defaults to block_size, for uniform
+      partitions.
+
+  Returns:
+    List of segments (offset, size, block_size), covering [0, ir_size).
+  """
+  max_block_size = max_block_size or block_size
+  schedule = []
+  offset = 0
+  while offset < ir_size:
+    if block_size >= max_block_size:
+      # Uniform partitions for the rest of the impulse response.
+      schedule.append((offset, ir_size - offset, block_size))
+      break
+    size = min(2 * block_size, ir_size - offset)
+    schedule.append((offset, size, block_size))
+    offset += size
+    block_size *= 2
+  return schedule
+
+
+def partition_impulse_response_schedule(
+    impulse_response: tf.Tensor,
+    block_size: int,
+    max_block_size: Optional[int] = None) -> Sequence[tf.Tensor]:
+  """Spectra of the segments of get_partition_schedule().
+
+  Args:
+    impulse_response: Linear time-invariant impulse response. Tensor of shape
+      [batch, ir_size], where batch can be 1 to broadcast across audio.
+    block_size: Smallest block size.
+    max_block_size: Largest block size. Defaults to block_size, for uniform
+      partitions.
+
+  Returns:
+    List of the partition_impulse_response() of each segment, with its own
+    block size.
+  """
+  impulse_response = tf_float32(impulse_response)
+  ir_size = int(impulse_response.shape[-1])
+  return [
+      partition_impulse_response(impulse_response[:, offset:offset + size],
+                                 segment_block_size)
+      for offset, size, segment_block_size in get_partition_schedule(
+          ir_size, block_size, max_block_size)
+  ]
+
+
+def _uniform_partitioned_convolve(audio: tf.Tensor, ir_fft: tf.Tensor,
+                                  block_size: int, n_output: int) -> tf.Tensor:
+  """Overlap-save convolution of audio with a uniformly partitioned IR.
+
+  Args:
+    audio: Input audio. Tensor of shape [batch, audio_size].
+    ir_fft: Output of partition_impulse_response(). Complex Tensor of shape
+      [batch, n_partitions, block_size + 1].
+    block_size: Number of samples per a partition.
+    n_output: Number of output samples of the full convolution to compute.
+
+  Returns:
+    Tensor of shape [batch, n_output].
+  """
+  n_blocks = int(np.ceil(n_output / block_size))
+  n_partitions = min(int(ir_fft.shape[1]), n_blocks)
+  # Each input block is preceded by the previous block (overlap-save).
+  audio = audio[:, :n_blocks * block_size]
+  padding = (block_size, (n_blocks + 1) * block_size - int(audio.shape[1]))
+  audio = pad_axis(audio, padding, axis=1)
+  audio_blocks = tf.signal.frame(audio, 2 * block_size, block_size)
+  audio_fft = tf.signal.rfft(audio_blocks, [2 * block_size])
+
+  # Frequency domain delay line, output block k is the sum over partitions p
+  # of input block (k - p) times the spectrum of partition p.
+  delayed_fft = pad_axis(audio_fft, (n_partitions - 1, 0), axis=1)
+  output_fft = 0.0
+  for p in range(n_partitions):
+    start = n_partitions - 1 - p
+    output_fft += (delayed_fft[:, start:start + n_blocks] *
+                   ir_fft[:, p:p + 1])
+
+  # The second half of each block is free of circular aliasing.
+  audio_out = tf.signal.irfft(output_fft, [2 * block_size])[..., block_size:]
+  audio_out = tf.reshape(audio_out, [-1, n_blocks * block_size])
+  return audio_out[:, :n_output]
+
+
+def partitioned_convolve(
+    audio: tf.Tensor,
+    impulse_response: tf.Tensor,
+    block_size: int = 1024,
+    max_block_size: Optional[int] = None,
+    padding: Text = 'same',
+    delay_compensation: int = -1,
+    impulse_response_fft: Optional[Sequence[tf.Tensor]] = None) -> tf.Tensor:
+  """Filter audio with a long impulse response, block by block.
+
+  Uniformly partitioned overlap-save convolution. The impulse response is split
+  into partitions of block_size samples, whose spectra are computed once, and
+  each block of audio is convolved with all the partitions in the frequency
+  domain. Unlike fft_convolve(), whose FFT size grows with the audio and
+  impulse response, the FFT size is always 2 * block_size. If max_block_size
+  is larger than block_size, later partitions of the impulse response use
+  larger blocks (see get_partition_schedule()), which reduces the number of
+  partitions for long impulse responses.
+
+  Args:
+    audio: Input audio. Tensor of shape [batch, audio_timesteps].
+    impulse_response: Linear time-invariant impulse response. Tensor of shape
+      [batch, ir_size], where batch can be 1 to broadcast across audio.
+    block_size: Number of samples per a block of audio.
+    max_block_size: Largest block size for non-uniform partitions. Defaults to
+      block_size, for uniform partitions.
+    padding: Either 'valid' or 'same'. For 'same' the final output to be the
+      same size as the input audio (audio_timesteps). For 'valid' the audio is
+      extended to include the tail of the impulse response (audio_timesteps +
+      ir_timesteps - 1).
+    delay_compensation: Samples to crop from start of output audio to compensate
+      for group delay of the impulse response. If delay_compensation is less
+      than 0 it defaults to automatically calculating a constant group delay of
+      the windowed linear phase filter from frequency_impulse_response().
+    impulse_response_fft: Optional precomputed spectra of the impulse response,
+      partition_impulse_response_schedule(impulse_response, block_size,
+      max_block_size). Reusing them saves partitioning the same impulse
+      response on every call.
+
+  Returns:
+    audio_out: Convolved audio. Tensor of shape
+        [batch, audio_timesteps + ir_timesteps - 1] ('valid' padding) or shape
+        [batch, audio_timesteps] ('same' padding).
+
+  Raises:
+    ValueError: If the impulse response is time-varying, if audio and
+      impulse response have different batch size, or if impulse_response_fft
+      doesn't match the partition schedule.
+  """
+  audio, impulse_response = tf_float32(audio), tf_float32(impulse_response)
+  batch_size, audio_size = audio.shape.as_list()
+  if len(impulse_response.shape) != 2:
+    raise ValueError('Partitioned convolution requires a 2-D impulse response '
+                     '[batch, ir_size], not shape {}.'.format(
+                         impulse_response.shape))
+  batch_size_ir, ir_size = impulse_response.shape.as_list()
+  if batch_size_ir not in (1, batch_size):
+    raise ValueError('Batch size of audio ({}) and impulse response ({}) must '
+                     'be the same.'.format(batch_size, batch_size_ir))
+
+  # Only compute the output that is kept after cropping.
+  n_output = audio_size + ir_size - 1
+  if padding == 'same':
+    start = ((ir_size - 1) // 2 -
+             1 if delay_compensation < 0 else delay_compensation)
+    n_output = min(n_output, max(start, 0) + audio_size)
+
+  schedule = get_partition_schedule(ir_size, block_size, max_block_size)
+  if impulse_response_fft is not None:
+    expected_shapes = [[int(np.ceil(size / segment_block_size)),
+                        segment_block_size + 1]
+                       for _, size, segment_block_size in schedule]
+    shapes = [ir_fft.shape.as_list()[1:] for ir_fft in impulse_response_fft]
+    if shapes != expected_shapes:
+      raise ValueError('impulse_response_fft has partitions of shapes {}, but '
+                       'the partition schedule needs {}.'.format(
+                           shapes, expected_shapes))
+
+  audio_out = 0.0
+  for i, (offset, size, segment_block_size) in enumerate(schedule):
+    if offset >= n_output:
+      break
+    if impulse_response_fft is None:
+      ir_fft = partition_impulse_response(
+          impulse_response[:, offset:offset + size], segment_block_size)
+    else:
+      ir_fft = impulse_response_fft[i]
+    segment_out = _uniform_partitioned_convolve(
+        audio, ir_fft, segment_block_size, n_output - offset)
+    audio_out += pad_axis(segment_out, (offset, 0), axis=1)
+
+  return crop_and_compensate_delay(audio_out, audio_size, ir_size, padding,
+                                   delay_compensation)
+
+
+def partitioned_convolve_step(
+    audio_block: tf.Tensor,
+    ir_fft: tf.Tensor,
+    state: Optional[Sequence[tf.Tensor]] = None
+) -> Sequence[Any]:
+  """Convolve one block of streaming audio with a partitioned impulse response.
+
+  Streaming version of partitioned_convolve() with uniform partitions. The
+  latency is block_size samples, and the memory is bounded by the size of the
+  impulse response, regardless of the length of the stream.
+
+  Only uniform partitions are supported, so every step costs n_partitions
+  spectral products. Non-uniform partitions (max_block_size in
+  partitioned_convolve()) would need a delay line per block size, with the
+  FFTs of larger blocks spread over several steps to keep the cost per step
+  bounded, and are not implemented.
+
+  Args:
+    audio_block: Block of input audio. Tensor of shape [batch, block_size].
+    ir_fft: Output of partition_impulse_response() with the same block_size.
+      Complex Tensor of shape [batch, n_partitions, block_size + 1].
+    state: State returned by the previous call, or None for the first block.
+
+  Returns:
+    audio_out: Block of output audio, the full ('valid') convolution delayed by
+      0 samples. Tensor of shape [batch, block_size].
+    state: Tuple of the input block, and the spectra of the previous
+      n_partitions input blocks, to pass to the next call.
+  """
+  audio_block = tf_float32(audio_block)
+  batch_size, block_size = audio_block.shape.as_list()
+  n_partitions, n_bins = ir_fft.shape.as_list()[1:]
+  if state is None:
+    state = (tf.zeros([batch_size, block_size]),
+             tf.zeros([batch_size, n_partitions, n_bins], tf.complex64))
+  previous_block, delay_line = state
+
+  audio_fft = tf.signal.rfft(tf.concat([previous_block, audio_block], axis=1))
+  delay_line = tf.concat([audio_fft[:, tf.newaxis], delay_line[:, :-1]], axis=1)
+  output_fft = tf.reduce_sum(delay_line * ir_fft, axis=1)
+  audio_out = tf.signal.irfft(output_fft)[:, block_size:]
+  return audio_out, (audio_block, delay_line)
+
+
 # Filter Design ----------------------------------------------------------------
 def apply_window_to_impulse_response(impulse_response: tf.Tensor,
                                      window_size: int = 0,
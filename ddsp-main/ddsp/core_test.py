@@ -588,6 +588,226 @@ class HarmonicSynthTest(parameterized.TestCase, tf.test.TestCase):
     pad = self.n_samples // n_frames  # Ignore edge effects.
     self.assertAllClose(wav_np[pad:-pad], wav_tf[pad:-pad])
 
+  def _sparse_harmonic_synthesis_inputs(self):
+    n_frames = 100
+    n_harmonics = 60
+    # Pitch glide from 100Hz to 1kHz, harmonics above 8kHz are silent.
+    frequencies = np.geomspace(100.0, 1000.0, n_frames)
+    frequencies = np.tile(frequencies[np.newaxis, :, np.newaxis],
+                          [self.batch_size, 1, 1])
+    amplitudes = np.linspace(0.1, 1.0, n_frames)
+    amplitudes = np.tile(amplitudes[np.newaxis, :, np.newaxis],
+                         [self.batch_size, 1, 1])
+    harmonic_distribution = 0.8**np.arange(n_harmonics)
+    harmonic_distribution = np.tile(
+        harmonic_distribution[np.newaxis, np.newaxis, :],
+        [self.batch_size, n_frames, 1])
+    return frequencies, amplitudes, harmonic_distribution
+
+  def test_sparse_harmonic_synthesis_without_pruning_matches_dense(self):
+    frequencies, amplitudes, harmonic_distribution = (
+        self._sparse_harmonic_synthesis_inputs())
+    kwargs = dict(n_samples=self.n_samples, sample_rate=self.sample_rate,
+                  use_angular_cumsum=True)
+    dense = core.harmonic_synthesis(
+        frequencies, amplitudes, harmonic_distribution=harmonic_distribution,
+        **kwargs)
+    sparse, error_bound = core.sparse_harmonic_synthesis(
+        frequencies, amplitudes, harmonic_distribution=harmonic_distribution,
+        amplitude_floor_db=-300.0, **kwargs)
+
+    self.assertAllEqual(dense.shape, sparse.shape)
+    self.assertAllEqual(np.zeros([self.batch_size]), error_bound)
+    # Phase is accumulated for the fundamental instead of for each harmonic,
+    # float32 rounding differs by ~0.1% of the peak amplitude (~5.0).
+    self.assertAllClose(dense, sparse, atol=1e-2)
+
+  @parameterized.named_parameters(
+      ('floor_20db', -20.0, 1000),
+      ('floor_40db', -40.0, 1000),
+      ('floor_80db', -80.0, 1000),
+      ('uneven_blocks', -40.0, 3000),
+  )
+  def test_sparse_harmonic_synthesis_error_is_bounded(self, amplitude_floor_db,
+                                                      block_size):
+    frequencies, amplitudes, harmonic_distribution = (
+        self._sparse_harmonic_synthesis_inputs())
+    kwargs = dict(harmonic_distribution=harmonic_distribution,
+                  n_samples=self.n_samples, sample_rate=self.sample_rate,
+                  block_size=block_size)
+    reference, _ = core.sparse_harmonic_synthesis(
+        frequencies, amplitudes, amplitude_floor_db=-300.0, **kwargs)
+    sparse, error_bound = core.sparse_harmonic_synthesis(
+        frequencies, amplitudes, amplitude_floor_db=amplitude_floor_db,
+        **kwargs)
+
+    error = np.max(np.abs(reference - sparse), axis=1)
+    self.assertTrue(np.all(error <= error_bound + 1e-6))
+    self.assertTrue(np.all(error_bound > 0.0))
+    n_harmonics = harmonic_distribution.shape[-1]
+    self.assertTrue(np.all(
+        error_bound <= n_harmonics * core.db_to_amplitude(amplitude_floor_db)))
+
+  def test_sparse_harmonic_synthesis_prunes_each_batch_element(self):
+    frequencies, amplitudes, harmonic_distribution = (
+        self._sparse_harmonic_synthesis_inputs())
+    # Silence the last batch element, and the second half of the first one.
+    amplitudes[-1] = 0.0
+    amplitudes[0, amplitudes.shape[1] // 2:] = 0.0
+    kwargs = dict(n_samples=self.n_samples, sample_rate=self.sample_rate,
+                  amplitude_floor_db=-40.0)
+
+    audio, error_bound = core.sparse_harmonic_synthesis(
+        frequencies, amplitudes, harmonic_distribution, **kwargs)
+    for i in range(self.batch_size):
+      # Same as synthesizing each batch element alone.
+      expected, expected_error_bound = core.sparse_harmonic_synthesis(
+          frequencies[i:i + 1], amplitudes[i:i + 1],
+          harmonic_distribution[i:i + 1], **kwargs)
+      self.assertAllClose(expected[0], audio[i], atol=1e-5)
+      self.assertAllClose(expected_error_bound[0], error_bound[i])
+    self.assertAllEqual(np.zeros([self.n_samples]), audio[-1])
+
+  def test_sparse_harmonic_synthesis_has_gradients(self):
+    frequencies, amplitudes, harmonic_distribution = (
+        self._sparse_harmonic_synthesis_inputs())
+    amplitudes = tf.constant(amplitudes, tf.float32)
+    with tf.GradientTape() as tape:
+      tape.watch(amplitudes)
+      audio, _ = core.sparse_harmonic_synthesis(
+          frequencies, amplitudes, harmonic_distribution,
+          n_samples=self.n_samples, sample_rate=self.sample_rate)
+      loss = tf.reduce_sum(audio**2)
+    grads = tape.gradient(loss, amplitudes)
+    self.assertTrue(np.all(np.isfinite(grads)))
+    self.assertGreater(np.max(np.abs(grads)), 0.0)
+
+  def test_sparse_harmonic_synthesis_is_silent_above_nyquist(self):
+    n_frames = 10
+    frequencies = self.sample_rate * np.ones([self.batch_size, n_frames, 1])
+    amplitudes = np.ones([self.batch_size, n_frames, 1])
+    harmonic_distribution = np.ones([self.batch_size, n_frames, 8])
+    audio, error_bound = core.sparse_harmonic_synthesis(
+        frequencies,
+        amplitudes,
+        harmonic_distribution=harmonic_distribution,
+        n_samples=self.n_samples,
+        sample_rate=self.sample_rate)
+    self.assertAllEqual(np.zeros_like(audio), audio)
+    self.assertAllEqual(np.zeros_like(error_bound), error_bound)
+
+  @parameterized.named_parameters(
+      ('harmonic_sin_20_harmonics', 'harmonic_sin', 20, 110.0),
+      ('harmonic_sin_60_harmonics', 'harmonic_sin', 60, 220.0),
+      ('harmonic_sin_100_harmonics', 'harmonic_sin', 100, 440.0),
+  )
+  def test_harmonic_synthesis_fundamental_phase_kernels_are_accurate(
+      self, kernel, n_harmonics, frequency):
+    n_frames = 100
+    harmonic_distribution = np.random.uniform(size=[n_harmonics])
+    harmonic_distribution /= harmonic_distribution.sum()
+    audio = core.harmonic_synthesis(
+        frequency * np.ones([self.batch_size, n_frames, 1]),
+        np.ones([self.batch_size, n_frames, 1]),
+        harmonic_distribution=np.tile(harmonic_distribution,
+                                      [self.batch_size, n_frames, 1]),
+        n_samples=self.n_samples,
+        sample_rate=self.sample_rate,
+        kernel=kernel)
+
+    # Phase is the cumulative sum of the angular frequency.
+    time = np.arange(1, self.n_samples + 1) / self.sample_rate
+    harmonic_frequencies = frequency * np.arange(1, n_harmonics + 1)
+    harmonic_distribution *= harmonic_frequencies < self.sample_rate / 2.0
+    audio_np = np.sum(harmonic_distribution * np.sin(
+        2.0 * np.pi * harmonic_frequencies * time[:, np.newaxis]), axis=-1)
+    self.assertAllClose(np.tile(audio_np, [self.batch_size, 1]), audio,
+                        atol=1e-4)
+
+  def test_harmonic_synthesis_harmonic_sin_kernel_is_silent_above_nyquist(
+      self):
+    n_frames = 10
+    audio = core.harmonic_synthesis(
+        self.sample_rate * np.ones([self.batch_size, n_frames, 1]),
+        np.ones([self.batch_size, n_frames, 1]),
+        harmonic_distribution=np.ones([self.batch_size, n_frames, 8]),
+        n_samples=self.n_samples,
+        sample_rate=self.sample_rate,
+        kernel='harmonic_sin')
+    self.assertAllEqual(np.zeros_like(audio), audio)
+
+  @parameterized.named_parameters(
+      ('one_harmonic_4_bins', 1, 440.0, 4, 1e-2),
+      ('one_harmonic_16_bins', 1, 440.0, 16, 1e-3),
+      ('low_frequency', 1, 5.0, 8, 2e-3),
+      ('near_nyquist', 1, 7990.0, 8, 2e-3),
+      ('sixty_harmonics', 60, 110.0, 8, 2e-3),
+  )
+  def test_ifft_harmonic_synthesis_is_accurate(self, n_harmonics, frequency,
+                                               n_lobe_bins, tolerance):
+    n_frames = 250
+    harmonic_distribution = np.random.uniform(size=[n_harmonics])
+    harmonic_distribution /= harmonic_distribution.sum()
+    audio = core.ifft_harmonic_synthesis(
+        frequency * np.ones([self.batch_size, n_frames, 1]),
+        np.ones([self.batch_size, n_frames, 1]),
+        harmonic_distribution=np.tile(harmonic_distribution,
+                                      [self.batch_size, n_frames, 1]),
+        n_samples=self.n_samples,
+        sample_rate=self.sample_rate,
+        n_lobe_bins=n_lobe_bins)
+
+    time = np.arange(1, self.n_samples + 1) / self.sample_rate
+    harmonic_frequencies = frequency * np.arange(1, n_harmonics + 1)
+    harmonic_distribution *= harmonic_frequencies < self.sample_rate / 2.0
+    audio_np = np.sum(harmonic_distribution * np.sin(
+        2.0 * np.pi * harmonic_frequencies * time[:, np.newaxis]), axis=-1)
+    self.assertAllClose(np.tile(audio_np, [self.batch_size, 1]), audio,
+                        atol=tolerance)
+
+  def test_ifft_harmonic_synthesis_phase_is_continuous(self):
+    n_frames = 250
+    # Vibrato, frequency changes by up to 5Hz per a frame.
+    frequencies = 440.0 * 2.0 ** (
+        np.sin(np.linspace(0.0, 10.0 * np.pi, n_frames)) / 6.0)
+    audio = core.ifft_harmonic_synthesis(
+        frequencies[np.newaxis, :, np.newaxis],
+        np.ones([1, n_frames, 1]),
+        n_samples=self.n_samples,
+        sample_rate=self.sample_rate)
+
+    # Mismatched phases would cancel out in the crossfades between frames.
+    envelope = np.abs(signal.hilbert(audio[0]))
+    pad = self.n_samples // 10  # Ignore edge effects of the hilbert transform.
+    self.assertAllClose(np.ones_like(envelope[pad:-pad]), envelope[pad:-pad],
+                        atol=1e-2)
+
+  def test_ifft_harmonic_synthesis_is_silent_above_nyquist(self):
+    n_frames = 10
+    audio = core.ifft_harmonic_synthesis(
+        self.sample_rate * np.ones([self.batch_size, n_frames, 1]),
+        np.ones([self.batch_size, n_frames, 1]),
+        harmonic_distribution=np.ones([self.batch_size, n_frames, 8]),
+        n_samples=self.n_samples,
+        sample_rate=self.sample_rate)
+    self.assertAllClose(np.zeros_like(audio), audio)
+
+  def test_ifft_harmonic_synthesis_checks_number_of_frames(self):
+    with self.assertRaises(ValueError):
+      core.ifft_harmonic_synthesis(
+          np.ones([1, 7, 1]), np.ones([1, 7, 1]), n_samples=self.n_samples)
+
+  def test_harmonic_synthesis_harmonic_sin_kernel_disallows_shifts(self):
+    with self.assertRaises(ValueError):
+      core.harmonic_synthesis(
+          np.ones([1, 10, 1]), np.ones([1, 10, 1]),
+          harmonic_shifts=np.zeros([1, 10, 8]), kernel='harmonic_sin')
+
+  def test_harmonic_synthesis_disallows_unknown_kernels(self):
+    with self.assertRaises(ValueError):
+      core.harmonic_synthesis(np.ones([1, 10, 1]), np.ones([1, 10, 1]),
+                              kernel='cos')
+
 
 class InterpolatingLookupTest(parameterized.TestCase, tf.test.TestCase):
 
@@ -628,6 +848,73 @@ class InterpolatingLookupTest(parameterized.TestCase, tf.test.TestCase):
     difference = np.abs(wav_np - wav_tf).mean()
     self.assertLessEqual(difference, threshold)
 
+  @parameterized.named_parameters(
+      ('no_frames', [2, 64]),
+      ('one_frame', [2, 1, 64]),
+      ('many_frames', [2, 500, 64]),
+  )
+  def test_gather_lookup_matches_dense(self, wavetable_shape):
+    """Gather lookup has the same values and gradients as dense lookup."""
+    rng = np.random.RandomState(0)
+    wavetables = tf.constant(rng.randn(*wavetable_shape).astype(np.float32))
+    # Include both ends of the phase range.
+    phase = rng.uniform(size=[2, 500, 1]).astype(np.float32)
+    phase[:, :2, 0] = [0.0, 1.0]
+    phase = tf.constant(phase)
+    weights = tf.constant(rng.randn(2, 500).astype(np.float32))
+
+    results = []
+    for method in ['gather', 'dense']:
+      with tf.GradientTape() as tape:
+        tape.watch([phase, wavetables])
+        audio = core.linear_lookup(phase, wavetables, method=method)
+        loss = tf.reduce_sum(weights * audio)
+      results.append([audio] + tape.gradient(loss, [phase, wavetables]))
+
+    (gather_audio, gather_dphase, gather_dtable), (
+        dense_audio, dense_dphase, dense_dtable) = results
+    self.assertAllClose(gather_audio, dense_audio, atol=1e-4)
+    self.assertAllClose(gather_dtable, dense_dtable, atol=1e-4)
+    # Dense lookup has zero gradient w.r.t. phase exactly on a wavetable
+    # sample, where gather lookup uses the slope to the next sample.
+    self.assertAllClose(gather_dphase[:, 2:], dense_dphase[:, 2:], atol=1e-4)
+
+  def test_linear_lookup_outside_phase_range(self):
+    """Dense lookup (default) fades to zero, gather lookup wraps around."""
+    n_wavetable = 64
+    wavetable = np.sin(np.linspace(0, 2.0 * np.pi, n_wavetable))
+    wavetable = tf.constant(wavetable[np.newaxis, :], tf.float32)
+    phase = np.array([-1.5, -0.25, 1.25, 2.5], np.float32)
+    phase = tf.constant(phase[np.newaxis, :, np.newaxis])
+
+    self.assertAllEqual(
+        np.zeros([1, 4]), core.linear_lookup(phase, wavetable))
+    self.assertAllEqual(
+        np.zeros([1, 4]), core.linear_lookup(phase, wavetable, method='dense'))
+    self.assertAllClose(
+        core.linear_lookup(phase % 1.0, wavetable, method='gather'),
+        core.linear_lookup(phase, wavetable, method='gather'), atol=1e-6)
+
+  def test_linear_lookup_raises_on_unknown_method(self):
+    with self.assertRaises(ValueError):
+      core.linear_lookup(tf.zeros([1, 10, 1]), tf.zeros([1, 64]),
+                         method='cubic')
+
+  def test_wavetable_synthesis_crossfades_frames(self):
+    """Framewise wavetables match wavetables resampled to every sample."""
+    rng = np.random.RandomState(0)
+    n_frames, n_samples = 100, 16000
+    wavetables = rng.randn(2, n_frames, 256).astype(np.float32)
+    frequencies = rng.uniform(100.0, 1000.0, [2, n_frames, 1])
+    amplitudes = np.ones([2, n_frames, 1])
+
+    audio = core.wavetable_synthesis(frequencies, amplitudes, wavetables,
+                                     n_samples)
+    audio_resampled = core.wavetable_synthesis(
+        frequencies, amplitudes, core.resample(wavetables, n_samples),
+        n_samples)
+    self.assertAllClose(audio, audio_resampled, atol=1e-5)
+
   @parameterized.named_parameters(
       ('single_wavetable_no_frames', 1, 440.0, 0.5, 2048, 0),
       ('one_frame', 2, 1000.0, 0.1, 1024, 1),
@@ -718,6 +1005,72 @@ class InterpolatingLookupTest(parameterized.TestCase, tf.test.TestCase):
       difference = np.abs(difference).mean()
       self.assertLessEqual(difference, threshold)
 
+  def test_variable_length_delay_matches_numpy(self):
+    """Fractional delays interpolate between the two neighboring samples."""
+    rng = np.random.RandomState(0)
+    n_samples, max_length = 2000, 40
+    audio = rng.randn(2, n_samples).astype(np.float32)
+    phase = rng.uniform(size=[2, n_samples, 1]).astype(np.float32)
+    phase[:, :2, 0] = [0.0, 1.0]
+
+    # Read each delayed sample from the zero padded past.
+    past = np.arange(n_samples) - phase[..., 0] * max_length
+    padded = np.pad(audio, [(0, 0), (max_length, 0)])
+    time = np.arange(-max_length, n_samples)
+    expected = np.stack([np.interp(p, time, a) for p, a in zip(past, padded)])
+
+    delayed = core.variable_length_delay(phase, audio, max_length)
+    self.assertAllClose(delayed, expected, atol=1e-4)
+
+  def test_variable_length_delay_gradients_match_frame_lookup(self):
+    """Same gradients as a linear lookup of every past frame of audio."""
+    rng = np.random.RandomState(0)
+    n_samples, max_length = 500, 32
+    audio = tf.constant(rng.randn(1, n_samples).astype(np.float32))
+    # Stay below the wrap around of the last frame sample to the first.
+    phase = tf.constant(rng.uniform(
+        0.01, 0.95, [1, n_samples, 1]).astype(np.float32))
+
+    def frame_lookup(phase, audio, max_length):
+      audio = tf.pad(audio, [(0, 0), (max_length - 1, 0)])
+      frames = tf.signal.frame(audio, max_length, 1, pad_end=False)
+      return core.linear_lookup(phase, frames[..., ::-1], method='dense')
+
+    results = []
+    for delay_fn in [core.variable_length_delay, frame_lookup]:
+      with tf.GradientTape() as tape:
+        tape.watch([phase, audio])
+        loss = tf.reduce_sum(tf.sin(tf.range(float(n_samples))) *
+                             delay_fn(phase, audio, max_length))
+      results.append(tape.gradient(loss, [phase, audio]))
+
+    for delay_gradient, frame_gradient in zip(*results):
+      self.assertAllClose(delay_gradient, frame_gradient, atol=1e-4)
+
+  @parameterized.named_parameters(
+      ('blocks_shorter_than_delay', 16),
+      ('blocks_longer_than_delay', 300),
+  )
+  def test_variable_length_delay_step_matches_full(self, block_size):
+    """Streaming block by block gives the same output."""
+    rng = np.random.RandomState(0)
+    n_samples, max_length = 1200, 100
+    audio = rng.randn(2, n_samples).astype(np.float32)
+    phase = rng.uniform(size=[2, n_samples, 1]).astype(np.float32)
+
+    expected = core.variable_length_delay(phase, audio, max_length)
+    state = None
+    blocks = []
+    for start in range(0, n_samples, block_size):
+      block, state = core.variable_length_delay_step(
+          phase[:, start:start + block_size],
+          audio[:, start:start + block_size],
+          max_length,
+          state)
+      blocks.append(block)
+    self.assertAllClose(np.concatenate(blocks, axis=1), expected, atol=1e-6)
+    self.assertAllEqual(state, audio[:, -max_length:])
+
 
 class FiniteImpulseResponseTest(parameterized.TestCase, tf.test.TestCase):
 
@@ -810,6 +1163,110 @@ class FiniteImpulseResponseTest(parameterized.TestCase, tf.test.TestCase):
     with self.assertRaises(ValueError):
       _ = core.fft_convolve(self.audio, self.audio, padding=padding)
 
+  def test_fft_convolve_broadcasts_impulse_response(self):
+    """Tests an impulse response of batch size 1 applies to all audio."""
+    audio = np.random.randn(3, self.audio_size).astype(np.float32)
+    impulse_response = np.random.randn(1, 100).astype(np.float32)
+    output_broadcast = core.fft_convolve(audio, impulse_response)
+    output_tiled = core.fft_convolve(audio, np.tile(impulse_response, [3, 1]))
+    self.assertAllClose(output_tiled, output_broadcast)
+
+  def test_fft_convolve_uses_impulse_response_fft(self):
+    """Tests a precomputed spectrum gives the same output."""
+    impulse_response = np.random.randn(1, 100).astype(np.float32)
+    fft_size = core.get_fft_convolve_size(self.audio_size,
+                                          impulse_response.shape)
+    impulse_response_fft = tf.signal.rfft(impulse_response, [fft_size])
+    expected = core.fft_convolve(self.audio, impulse_response)
+    output = core.fft_convolve(self.audio, impulse_response,
+                               impulse_response_fft=impulse_response_fft)
+    self.assertAllClose(expected, output)
+
+    with self.assertRaises(ValueError):
+      _ = core.fft_convolve(self.audio, impulse_response,
+                            impulse_response_fft=impulse_response_fft[..., :-1])
+
+  @parameterized.named_parameters(
+      ('uniform_same', 256, None, 'same'),
+      ('uniform_valid', 256, None, 'valid'),
+      ('non_uniform_same', 64, 512, 'same'),
+      ('non_uniform_valid', 64, 512, 'valid'),
+      ('block_longer_than_audio', 4096, None, 'valid'),
+  )
+  def test_partitioned_convolve_is_accurate(self, block_size, max_block_size,
+                                            padding):
+    """Tests partitioned convolution against the implementation in scipy."""
+    audio = np.random.randn(3, self.audio_size).astype(np.float32)
+    impulse_response = np.random.randn(1, 2500).astype(np.float32)
+
+    output_tf = core.partitioned_convolve(
+        audio, impulse_response, block_size, max_block_size, padding=padding,
+        delay_compensation=0)
+
+    output_np = np.stack(
+        [signal.fftconvolve(a, impulse_response[0]) for a in audio])
+    if padding == 'same':
+      output_np = output_np[:, :self.audio_size]
+    self.assertAllClose(output_np, output_tf, atol=1e-4)
+
+  def test_partitioned_convolve_matches_fft_convolve(self):
+    """Tests same cropping as fft_convolve() with delay compensation."""
+    impulse_response = np.random.randn(1, 255).astype(np.float32)
+    output_fft = core.fft_convolve(self.audio, impulse_response)
+    output_partitioned = core.partitioned_convolve(
+        self.audio, impulse_response, block_size=128)
+    self.assertAllClose(output_fft, output_partitioned, atol=1e-4)
+
+  def test_partitioned_convolve_step_matches_partitioned_convolve(self):
+    """Tests streaming block by block gives the same output."""
+    block_size = 100
+    impulse_response = np.random.randn(2, 350).astype(np.float32)
+    audio = np.random.randn(2, self.audio_size).astype(np.float32)
+    ir_fft = core.partition_impulse_response(impulse_response, block_size)
+
+    state = None
+    audio_out = []
+    for i in range(0, self.audio_size, block_size):
+      audio_block, state = core.partitioned_convolve_step(
+          audio[:, i:i + block_size], ir_fft, state)
+      audio_out.append(audio_block)
+
+    expected = core.partitioned_convolve(
+        audio, impulse_response, block_size, delay_compensation=0)
+    self.assertAllClose(expected, tf.concat(audio_out, axis=1), atol=1e-4)
+
+  def test_partition_schedule_covers_impulse_response(self):
+    schedule = core.get_partition_schedule(10000, 256, 2048)
+    self.assertEqual(schedule[0], (0, 512, 256))
+    self.assertEqual(schedule[-1][2], 2048)
+    for (offset, size, _), (next_offset, _, _) in zip(schedule, schedule[1:]):
+      self.assertEqual(offset + size, next_offset)
+    self.assertEqual(schedule[-1][0] + schedule[-1][1], 10000)
+    # Streaming needs every segment to start no earlier than its block size.
+    for offset, _, block_size in schedule[1:]:
+      self.assertGreaterEqual(offset, block_size)
+
+  def test_partitioned_convolve_uses_precomputed_spectra(self):
+    impulse_response = np.random.randn(1, 3000).astype(np.float32)
+    ir_fft = core.partition_impulse_response_schedule(
+        impulse_response, 128, 512)
+    expected = core.partitioned_convolve(
+        self.audio, impulse_response, 128, 512)
+    output = core.partitioned_convolve(
+        self.audio, impulse_response, 128, 512, impulse_response_fft=ir_fft)
+    self.assertAllClose(expected, output, atol=1e-5)
+
+    # Spectra of a different schedule.
+    with self.assertRaises(ValueError):
+      _ = core.partitioned_convolve(
+          self.audio, impulse_response, 128, 1024, impulse_response_fft=ir_fft)
+
+  def test_partitioned_convolve_checks_batch_size(self):
+    impulse_response = np.random.randn(2, 10).astype(np.float32)
+    audio = np.random.randn(3, 100).astype(np.float32)
+    with self.assertRaises(ValueError):
+      _ = core.partitioned_convolve(audio, impulse_response)
+
   @parameterized.named_parameters(
       ('more_frames_than_timesteps', 1010),
       ('not_even_multiple', 999),
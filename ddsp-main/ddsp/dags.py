@@ -47,7 +47,7 @@ is_processor = lambda v: hasattr(v, 'get_signal') and hasattr(v, 'get_controls')
 def split_keras_kwargs(kwargs):
   """Strip keras specific kwargs."""
   keras_kwargs = {}
-  for key in ['training', 'mask', 'name']:
+  for key in ['training', 'mask', 'name', 'dtype']:
     if kwargs.get(key) is not None:
       keras_kwargs[key] = kwargs.pop(key)
   return keras_kwargs, kwargs
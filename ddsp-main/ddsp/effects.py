@@ -18,6 +18,7 @@ from ddsp import core
 from ddsp import processors
 from ddsp import synths
 import gin
+import numpy as np
 import tensorflow.compat.v2 as tf
 
 tf_float32 = core.tf_float32
@@ -32,7 +33,11 @@ class Reverb(processors.Processor):
                trainable=False,
                reverb_length=48000,
                add_dry=True,
-               name='reverb'):
+               name='reverb',
+               convolution_method='fft',
+               block_size=1024,
+               max_block_size=None,
+               cache_ir_fft=False):
     """Takes neural network outputs directly as the impulse response.
 
     Args:
@@ -42,10 +47,37 @@ class Reverb(processors.Processor):
         trainable=True.
       add_dry: Add dry signal to reverberated signal on output.
       name: Name of processor module.
+      convolution_method: 'fft' convolves the whole signal with a single FFT
+        (core.fft_convolve). 'partitioned' convolves blocks of audio with
+        partitions of the impulse response (core.partitioned_convolve), which
+        bounds the FFT size for long impulse responses.
+      block_size: Samples per a block, for 'partitioned' convolution.
+      max_block_size: Largest block size of non-uniform partitions, for
+        'partitioned' convolution. Defaults to uniform partitions.
+      cache_ir_fft: Keep the spectrum of the last impulse response in
+        non-trainable variables of the layer, or its partition spectra for
+        'partitioned' convolution. They are reused while calls have the same
+        impulse response, and recomputed when it changes, also inside a
+        tf.function. Only the impulse response shape and FFT size of the first
+        call are cached. Speeds up rendering many clips with a fixed impulse
+        response. Gradients do not flow through reused spectra, so only use
+        for inference.
+
+    Raises:
+      ValueError: If convolution_method is not 'fft' or 'partitioned'.
     """
     super().__init__(name=name, trainable=trainable)
+    if convolution_method not in ('fft', 'partitioned'):
+      raise ValueError('convolution_method must be "fft" or "partitioned", '
+                       f'not "{convolution_method}".')
     self._reverb_length = reverb_length
     self._add_dry = add_dry
+    self._convolution_method = convolution_method
+    self._block_size = block_size
+    self._max_block_size = max_block_size
+    self._cache_ir_fft = cache_ir_fft
+    self._cached_ir = None
+    self._cached_ir_fft = None
 
   def _mask_dry_ir(self, ir):
     """Set first impulse response to zero to mask the dry signal."""
@@ -58,14 +90,96 @@ class Reverb(processors.Processor):
     dry_mask = tf.zeros([int(ir.shape[0]), 1], tf.float32)
     return tf.concat([dry_mask, ir[:, 1:]], axis=1)
 
-  def _match_dimensions(self, audio, ir):
-    """Tile the impulse response variable to match the batch size."""
-    # Add batch dimension.
+  def _match_dimensions(self, unused_audio, ir):
+    """Add a batch dimension to the impulse response variable.
+
+    The impulse response of batch size 1 is broadcast across the audio batch
+    when convolving, instead of being tiled.
+
+    Args:
+      unused_audio: Dry audio. 2-D Tensor of shape [batch, n_samples].
+      ir: Impulse response of shape [ir_size] or [1, ir_size].
+
+    Returns:
+      Impulse response of shape [1, ir_size].
+    """
     if len(ir.shape) == 1:
       ir = ir[tf.newaxis, :]
-    # Match batch dimension.
-    batch_size = int(audio.shape[0])
-    return tf.tile(ir, [batch_size, 1])
+    return ir
+
+  def _compute_ir_spectra(self, audio, ir):
+    """Spectra of the impulse response for the convolution method.
+
+    Args:
+      audio: Dry audio, 2-D Tensor of shape [batch, n_samples].
+      ir: Masked impulse response, 2-D Tensor of shape [batch, ir_size].
+
+    Returns:
+      List with the spectrum of shape [batch, fft_size // 2 + 1] for 'fft'
+      convolution, or the partition spectra of each segment of the partition
+      schedule for 'partitioned' convolution.
+    """
+    if self._convolution_method == 'partitioned':
+      return core.partition_impulse_response_schedule(
+          ir, self._block_size, self._max_block_size)
+    fft_size = core.get_fft_convolve_size(int(audio.shape[1]), ir.shape)
+    return [tf.signal.rfft(ir, [fft_size])]
+
+  def _ir_spectra_shapes(self, audio, ir):
+    """Static shapes of the spectra from _compute_ir_spectra()."""
+    batch_size = int(ir.shape[0])
+    if self._convolution_method == 'partitioned':
+      return [
+          tf.TensorShape([batch_size, int(np.ceil(size / block_size)),
+                          block_size + 1])
+          for _, size, block_size in core.get_partition_schedule(
+              int(ir.shape[1]), self._block_size, self._max_block_size)]
+    fft_size = core.get_fft_convolve_size(int(audio.shape[1]), ir.shape)
+    return [tf.TensorShape([batch_size, fft_size // 2 + 1])]
+
+  def _get_ir_spectra(self, audio, ir):
+    """Spectra of the impulse response from the cache, or None if not cached.
+
+    The cache variables are created on first use, with the shapes of that call.
+    The impulse response is compared with the one of the cached spectra, and
+    the spectra are recomputed if they differ.
+
+    Args:
+      audio: Dry audio, 2-D Tensor of shape [batch, n_samples].
+      ir: Masked impulse response, 2-D Tensor of shape [batch, ir_size].
+
+    Returns:
+      List of spectra from _compute_ir_spectra(), or None if cache_ir_fft is
+      False or the shapes differ from those of the first call.
+    """
+    if not (self._cache_ir_fft and ir.shape.is_fully_defined()):
+      return None
+    shapes = self._ir_spectra_shapes(audio, ir)
+    if self._cached_ir is None:
+      with tf.init_scope():
+        # NaN never equals an impulse response, so the first call updates.
+        self._cached_ir = tf.Variable(
+            tf.fill(ir.shape, np.nan), trainable=False, name='cached_ir')
+        self._cached_ir_fft = [
+            tf.Variable(tf.zeros(shape, tf.complex64), trainable=False,
+                        name='cached_ir_fft') for shape in shapes]
+    if (self._cached_ir.shape != ir.shape or
+        [v.shape for v in self._cached_ir_fft] != shapes):
+      return None
+
+    def cached():
+      return [v.value() for v in self._cached_ir_fft]
+
+    def update():
+      ir_spectra = self._compute_ir_spectra(audio, ir)
+      assigns = [self._cached_ir.assign(ir)] + [
+          v.assign(ir_fft) for v, ir_fft in zip(self._cached_ir_fft,
+                                                ir_spectra)]
+      with tf.control_dependencies(assigns):
+        return [tf.identity(ir_fft) for ir_fft in ir_spectra]
+
+    is_cached = tf.reduce_all(tf.equal(self._cached_ir, ir))
+    return tf.cond(is_cached, cached, update)
 
   def build(self, unused_input_shape):
     """Initialize impulse response."""
@@ -84,7 +198,7 @@ class Reverb(processors.Processor):
     Args:
       audio: Dry audio. 2-D Tensor of shape [batch, n_samples].
       ir: 3-D Tensor of shape [batch, ir_size, 1] or 2D Tensor of shape
-        [batch, ir_size].
+        [batch, ir_size]. A batch size of 1 is broadcast across the audio.
 
     Returns:
       controls: Dictionary of effect controls.
@@ -113,7 +227,18 @@ class Reverb(processors.Processor):
     """
     audio, ir = tf_float32(audio), tf_float32(ir)
     ir = self._mask_dry_ir(ir)
-    wet = core.fft_convolve(audio, ir, padding='same', delay_compensation=0)
+    ir_spectra = self._get_ir_spectra(audio, ir)
+    if self._convolution_method == 'partitioned':
+      wet = core.partitioned_convolve(audio, ir,
+                                      block_size=self._block_size,
+                                      max_block_size=self._max_block_size,
+                                      padding='same',
+                                      delay_compensation=0,
+                                      impulse_response_fft=ir_spectra)
+    else:
+      wet = core.fft_convolve(
+          audio, ir, padding='same', delay_compensation=0,
+          impulse_response_fft=ir_spectra and ir_spectra[0])
     return (wet + audio) if self._add_dry else wet
 
 
@@ -376,19 +501,47 @@ class ModDelay(processors.Processor):
     Returns:
       signal: Modulated audio of shape [batch, n_samples].
     """
+    signal, _ = self.get_signal_step(audio, gain, phase)
+    return signal
+
+  @property
+  def max_length_samples(self):
+    """Length of the delay line in samples."""
     max_delay_ms = self.center_ms + self.depth_ms
-    max_length_samples = int(self.sample_rate / 1000.0 * max_delay_ms)
+    return int(self.sample_rate / 1000.0 * max_delay_ms)
+
+  def get_signal_step(self, audio, gain, phase, state=None):
+    """Modulate one block of streaming audio.
+
+    Streaming version of get_signal(), the delay line is carried between
+    consecutive blocks of audio.
+
+    Args:
+      audio: Block of dry audio. 2-D Tensor of shape [batch, block_size].
+      gain: Amplitude of modulated signal. Shape [batch_size, block_size, 1].
+      phase: The normlaized instantaneous length of the delay, as in
+        get_signal(). Shape [batch_size, block_size, 1].
+      state: Delay line returned by the previous call, or None for the first
+        block. Shape [batch_size, max_length_samples].
 
+    Returns:
+      signal: Modulated audio of shape [batch, block_size].
+      state: Delay line to pass to the next call.
+    """
+    max_delay_ms = self.center_ms + self.depth_ms
     depth_phase = self.depth_ms / max_delay_ms
     center_phase = self.center_ms / max_delay_ms
     phase = phase * depth_phase + center_phase
-    wet_audio = core.variable_length_delay(audio=audio,
-                                           phase=phase,
-                                           max_length=max_length_samples)
+    wet_audio, state = core.variable_length_delay_step(
+        audio_block=audio,
+        phase=phase,
+        max_length=self.max_length_samples,
+        state=state)
     # Remove channel dimension.
     if len(gain.shape) == 3:
       gain = gain[..., 0]
 
     wet_audio *= gain
-    return (wet_audio + audio) if self.add_dry else wet_audio
+    signal = (wet_audio + audio) if self.add_dry else wet_audio
+    return signal, state
 
@@ -16,6 +16,7 @@
 
 from absl.testing import parameterized
 from ddsp import effects
+import numpy as np
 import tensorflow.compat.v2 as tf
 
 
@@ -92,6 +93,81 @@ class FilteredNoiseReverbTest(ReverbTest):
     self.call_args = {'magnitudes': tf.zeros((3, 10, 20))}
 
 
+class PartitionedReverbTest(parameterized.TestCase, tf.test.TestCase):
+
+  @parameterized.named_parameters(
+      ('uniform', None),
+      ('non_uniform', 4096),
+  )
+  def test_partitioned_matches_fft(self, max_block_size):
+    audio = tf.random.normal((2, 16000))
+    ir = 0.1 * tf.random.normal((2, 8000))
+    fft_reverb = effects.Reverb()
+    partitioned_reverb = effects.Reverb(convolution_method='partitioned',
+                                        block_size=512,
+                                        max_block_size=max_block_size)
+    self.assertAllClose(fft_reverb(audio, ir=ir),
+                        partitioned_reverb(audio, ir=ir), atol=1e-4)
+
+  def test_unknown_convolution_method_raises_value_error(self):
+    with self.assertRaises(ValueError):
+      _ = effects.Reverb(convolution_method='direct')
+
+
+class CachedReverbTest(parameterized.TestCase, tf.test.TestCase):
+
+  @parameterized.named_parameters(
+      ('fft', {}),
+      ('partitioned', dict(convolution_method='partitioned', block_size=256,
+                           max_block_size=1024)),
+  )
+  def test_cached_ir_fft_matches_uncached(self, kwargs):
+    reverb = effects.Reverb(**kwargs)
+    cached_reverb = effects.Reverb(cache_ir_fft=True, **kwargs)
+    # The last impulse response has a different, uncached, shape.
+    for ir_seed, ir_size in [(0, 4000), (0, 4000), (1, 4000), (1, 2000)]:
+      ir = 0.1 * tf.random.stateless_normal((1, ir_size), seed=(ir_seed, 0))
+      # New audio every call.
+      audio = tf.random.normal((4, 8000))
+      self.assertAllClose(reverb(audio, ir=ir), cached_reverb(audio, ir=ir),
+                          atol=1e-5)
+
+  @parameterized.named_parameters(
+      ('fft', {}),
+      ('partitioned', dict(convolution_method='partitioned', block_size=256,
+                           max_block_size=1024)),
+  )
+  def test_cached_ir_fft_is_reused_in_tf_function(self, kwargs):
+    reverb = effects.Reverb(cache_ir_fft=True, **kwargs)
+    uncached_reverb = effects.Reverb(**kwargs)
+    reverb_fn = tf.function(reverb)
+    ir = 0.1 * tf.random.normal((1, 4000))
+    audio = tf.random.normal((4, 8000))
+    self.assertAllClose(reverb_fn(audio, ir=ir), uncached_reverb(audio, ir=ir),
+                        atol=1e-5)
+
+    # Zero the cached spectra, which are only read for the same impulse
+    # response, leaving the dry audio.
+    for cached_ir_fft in reverb._cached_ir_fft:
+      cached_ir_fft.assign(tf.zeros_like(cached_ir_fft))
+    self.assertAllClose(reverb_fn(audio, ir=ir), audio)
+
+    # A new impulse response updates the cache.
+    new_ir = 0.1 * tf.random.normal((1, 4000))
+    self.assertAllClose(reverb_fn(audio, ir=new_ir),
+                        uncached_reverb(audio, ir=new_ir), atol=1e-5)
+    self.assertAllClose(
+        reverb._cached_ir_fft,
+        reverb._compute_ir_spectra(audio, reverb._mask_dry_ir(new_ir)))
+
+  def test_trainable_ir_is_broadcast(self):
+    reverb = effects.Reverb(trainable=True, reverb_length=100)
+    reverb.build(None)
+    controls = reverb.get_controls(tf.zeros((4, 1000)))
+    self.assertEqual(controls['ir'].shape, (1, 100))
+    self.assertEqual(reverb(tf.zeros((4, 1000))).shape, (4, 1000))
+
+
 class FIRFilterTest(tf.test.TestCase):
 
   def test_output_shape_is_correct(self):
@@ -116,6 +192,31 @@ class ModDelayTest(tf.test.TestCase):
 
     self.assertListEqual([3, 16000], output.shape.as_list())
 
+  def test_streaming_matches_full(self):
+    processor = effects.ModDelay()
+    rng = np.random.RandomState(0)
+    audio = tf.constant(rng.randn(2, 4000).astype(np.float32))
+    gain = tf.constant(rng.randn(2, 4000, 1).astype(np.float32))
+    phase = tf.constant(rng.randn(2, 4000, 1).astype(np.float32))
+
+    with tf.GradientTape() as tape:
+      tape.watch([gain, phase])
+      output = processor(audio, gain, phase)
+    gradients = tape.gradient(output, [gain, phase])
+    for gradient in gradients:
+      self.assertGreater(np.abs(gradient).max(), 0.0)
+
+    controls = processor.get_controls(audio, gain, phase)
+    state = None
+    blocks = []
+    for start in range(0, 4000, 1000):
+      block, state = processor.get_signal_step(
+          **{k: v[:, start:start + 1000] for k, v in controls.items()},
+          state=state)
+      blocks.append(block)
+    self.assertEqual(state.shape[1], processor.max_length_samples)
+    self.assertAllClose(np.concatenate(blocks, axis=1), output, atol=1e-6)
+
 
 if __name__ == '__main__':
   tf.test.main()
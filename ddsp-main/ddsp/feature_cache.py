@@ -0,0 +1,171 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Persistent on-disk cache of audio features, such as CREPE f0 and loudness.
+
+Features are keyed by a hash of the audio content and the parameters used to
+compute them, so rendering the same input many times (with different model
+checkpoints, impulse responses, etc.) only computes the features once.
+
+Each entry is stored as a single `.npy` file that is memory-mapped on read.
+When the total size of the cache exceeds `max_size_bytes`, the least recently
+used entries are deleted. File modification times record the last use, so the
+eviction order persists between processes.
+
+Usage:
+  cache = FeatureCache('/tmp/ddsp_feature_cache')
+  f0_hz, f0_confidence = spectral_ops.compute_f0(audio, 250, cache=cache)
+  print(cache.stats)
+"""
+
+import hashlib
+import os
+import tempfile
+from typing import Any, Dict, Optional, Text
+
+import gin
+import numpy as np
+
+
+@gin.register
+class FeatureCache(object):
+  """LRU cache of numpy features stored in a directory."""
+
+  def __init__(self, cache_dir: Text, max_size_bytes: int = 2**30):
+    """Constructor.
+
+    Args:
+      cache_dir: Directory to store the cached features. Created if it doesn't
+        exist. Can be shared by multiple processes.
+      max_size_bytes: Maximum total size of the cached features. Least recently
+        used entries are evicted once it is exceeded.
+    """
+    self.cache_dir = os.path.expanduser(cache_dir)
+    self.max_size_bytes = max_size_bytes
+    os.makedirs(self.cache_dir, exist_ok=True)
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+
+  @staticmethod
+  def get_key(audio, **params: Any) -> Text:
+    """Key from the content of the audio and the feature parameters.
+
+    Args:
+      audio: Numpy array of audio. Shape [audio_length,] or
+        [batch, audio_length].
+      **params: Parameters that change the value of the feature, such as the
+        name of the feature, frame_rate, padding, etc.
+
+    Returns:
+      Hex digest string.
+    """
+    audio = np.ascontiguousarray(audio, dtype=np.float32)
+    h = hashlib.blake2b(digest_size=20)
+    h.update(str(audio.shape).encode())
+    h.update(audio.tobytes())
+    h.update(repr(sorted(params.items())).encode())
+    return h.hexdigest()
+
+  def _path(self, key: Text) -> Text:
+    return os.path.join(self.cache_dir, key + '.npy')
+
+  def get(self, key: Text) -> Optional[np.ndarray]:
+    """Look up a feature in the cache.
+
+    Args:
+      key: Key from `get_key()`.
+
+    Returns:
+      Copy-on-write memory-mapped array, or None if the key is not cached.
+    """
+    path = self._path(key)
+    try:
+      value = np.load(path, mmap_mode='c')
+    except (FileNotFoundError, ValueError):
+      # Missing, or evicted/written by another process while loading.
+      self.misses += 1
+      return None
+    # Mark as recently used.
+    try:
+      os.utime(path)
+    except FileNotFoundError:
+      pass
+    self.hits += 1
+    return value
+
+  def put(self, key: Text, value: np.ndarray):
+    """Add a feature to the cache, and evict old entries if needed.
+
+    Args:
+      key: Key from `get_key()`.
+      value: Numpy array of the feature.
+    """
+    value = np.asarray(value)
+    # Write atomically so that concurrent readers never see partial files.
+    fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+      np.save(f, value)
+    os.replace(tmp_path, self._path(key))
+    self.evict()
+
+  def _entries(self):
+    """List of (last_used, size, path) for all entries in the cache."""
+    entries = []
+    for entry in os.scandir(self.cache_dir):
+      if entry.name.endswith('.npy'):
+        try:
+          stat = entry.stat()
+        except FileNotFoundError:
+          continue
+        entries.append((stat.st_mtime, stat.st_size, entry.path))
+    return entries
+
+  def evict(self):
+    """Delete least recently used entries until under max_size_bytes."""
+    entries = self._entries()
+    total_size = sum(e[1] for e in entries)
+    for _, size, path in sorted(entries):
+      if total_size <= self.max_size_bytes:
+        break
+      try:
+        os.remove(path)
+        self.evictions += 1
+      except FileNotFoundError:
+        pass
+      total_size -= size
+
+  def clear(self):
+    """Delete all entries in the cache."""
+    for _, _, path in self._entries():
+      try:
+        os.remove(path)
+      except FileNotFoundError:
+        pass
+
+  @property
+  def size_bytes(self) -> int:
+    return sum(e[1] for e in self._entries())
+
+  @property
+  def stats(self) -> Dict[Text, int]:
+    """Hit and miss counters of this cache object, and the size on disk."""
+    entries = self._entries()
+    return {
+        'hits': self.hits,
+        'misses': self.misses,
+        'evictions': self.evictions,
+        'entries': len(entries),
+        'size_bytes': sum(e[1] for e in entries),
+    }
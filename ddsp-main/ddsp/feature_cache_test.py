@@ -0,0 +1,104 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for ddsp.feature_cache."""
+
+import os
+import tempfile
+
+from absl.testing import parameterized
+from ddsp import feature_cache
+from ddsp import spectral_ops
+import numpy as np
+import tensorflow.compat.v2 as tf
+
+
+class FeatureCacheTest(parameterized.TestCase, tf.test.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.cache_dir = tempfile.mkdtemp(dir=self.get_temp_dir())
+    self.audio = np.sin(np.linspace(0, 1000, 16000)).astype(np.float32)
+
+  def test_get_returns_put_value(self):
+    cache = feature_cache.FeatureCache(self.cache_dir)
+    key = cache.get_key(self.audio, feature='f0', frame_rate=250)
+    self.assertIsNone(cache.get(key))
+    value = np.random.randn(2, 251).astype(np.float32)
+    cache.put(key, value)
+    self.assertAllEqual(value, cache.get(key))
+    self.assertEqual(cache.hits, 1)
+    self.assertEqual(cache.misses, 1)
+
+  def test_persists_between_objects(self):
+    key = feature_cache.FeatureCache.get_key(self.audio, feature='f0')
+    feature_cache.FeatureCache(self.cache_dir).put(key, np.ones(10))
+    cache = feature_cache.FeatureCache(self.cache_dir)
+    self.assertAllEqual(np.ones(10), cache.get(key))
+    self.assertEqual(cache.stats['entries'], 1)
+
+  @parameterized.named_parameters(
+      ('frame_rate', dict(frame_rate=100)),
+      ('viterbi', dict(viterbi=False)),
+      ('padding', dict(padding='same')),
+      ('model_capacity', dict(model_capacity='tiny')),
+  )
+  def test_key_depends_on_params(self, new_params):
+    params = dict(frame_rate=250, viterbi=True, padding='center',
+                  model_capacity='full')
+    key = feature_cache.FeatureCache.get_key(self.audio, **params)
+    params.update(new_params)
+    self.assertNotEqual(
+        key, feature_cache.FeatureCache.get_key(self.audio, **params))
+
+  def test_key_depends_on_audio(self):
+    key = feature_cache.FeatureCache.get_key(self.audio)
+    audio = self.audio.copy()
+    audio[100] += 1e-3
+    self.assertNotEqual(key, feature_cache.FeatureCache.get_key(audio))
+
+  def test_evicts_least_recently_used(self):
+    value = np.zeros(1000, dtype=np.float32)
+    entry_size = 4000 + 128  # Data and npy header.
+    cache = feature_cache.FeatureCache(self.cache_dir,
+                                       max_size_bytes=int(2.5 * entry_size))
+    keys = [cache.get_key(self.audio, i=i) for i in range(3)]
+    cache.put(keys[0], value)
+    cache.put(keys[1], value)
+    # Make the second entry the least recently used.
+    os.utime(cache._path(keys[1]), (0, 0))
+    cache.put(keys[2], value)
+    self.assertIsNotNone(cache.get(keys[0]))
+    self.assertIsNone(cache.get(keys[1]))
+    self.assertIsNotNone(cache.get(keys[2]))
+    self.assertEqual(cache.evictions, 1)
+    self.assertLessEqual(cache.size_bytes, cache.max_size_bytes)
+
+  def test_compute_loudness_uses_cache(self):
+    cache = feature_cache.FeatureCache(self.cache_dir)
+    expected = spectral_ops.compute_loudness(self.audio, use_tf=False)
+    for _ in range(2):
+      loudness = spectral_ops.compute_loudness(self.audio, use_tf=False,
+                                               cache=cache)
+      self.assertAllClose(expected, loudness)
+    self.assertEqual(cache.hits, 1)
+    self.assertEqual(cache.misses, 1)
+
+    # Different parameters are a different entry.
+    _ = spectral_ops.compute_loudness(self.audio, frame_rate=50, cache=cache)
+    self.assertEqual(cache.misses, 2)
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -0,0 +1,86 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Helpers to defer importing modules until they are first used.
+
+Importing TensorFlow, TensorFlow Probability, librosa, CREPE, etc. takes several
+seconds, which dominates the run time of short jobs that only need a small
+part of the library. This module must not import anything heavy itself.
+
+Usage:
+  # Third party module, imported on first attribute access.
+  librosa = lazy_imports.LazyModule('librosa')
+
+  # Submodules of a package, imported on first attribute access.
+  __getattr__, __dir__ = lazy_imports.lazy_submodules(__name__, ['core'])
+"""
+
+import importlib
+import types
+from typing import Callable, List, Sequence, Text, Tuple
+
+
+class LazyModule(types.ModuleType):
+  """Proxy for a module that is imported on first attribute access."""
+
+  def __init__(self, name: Text):
+    """Constructor.
+
+    Args:
+      name: Absolute name of the module, such as 'note_seq.sequences_lib'.
+    """
+    super().__init__(name)
+
+  def _load(self) -> types.ModuleType:
+    module = importlib.import_module(self.__name__)
+    # Later lookups of these attributes skip __getattr__().
+    self.__dict__.update(module.__dict__)
+    return module
+
+  def __getattr__(self, attr: Text):
+    return getattr(self._load(), attr)
+
+  def __dir__(self) -> List[Text]:
+    return dir(self._load())
+
+  def __repr__(self) -> Text:
+    return f'<lazy module {self.__name__!r}>'
+
+
+def lazy_submodules(
+    package_name: Text, submodules: Sequence[Text]
+) -> Tuple[Callable[[Text], types.ModuleType], Callable[[], List[Text]]]:
+  """Module-level __getattr__ and __dir__ that import submodules on access.
+
+  Args:
+    package_name: Name of the package, usually `__name__` of its __init__.py.
+    submodules: Names of the submodules to import lazily.
+
+  Returns:
+    getattr_fn: Use as the `__getattr__` of the package.
+    dir_fn: Use as the `__dir__` of the package.
+  """
+  submodules = frozenset(submodules)
+
+  def getattr_fn(name):
+    if name in submodules:
+      # Also sets the submodule as an attribute of the package.
+      return importlib.import_module(f'{package_name}.{name}')
+    raise AttributeError(f'module {package_name!r} has no attribute {name!r}')
+
+  def dir_fn():
+    package = importlib.import_module(package_name)
+    return sorted(set(package.__dict__) | submodules)
+
+  return getattr_fn, dir_fn
@@ -0,0 +1,93 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for ddsp.lazy_imports."""
+
+import json
+import subprocess
+import sys
+import textwrap
+
+from absl.testing import parameterized
+from ddsp import lazy_imports
+import tensorflow.compat.v2 as tf
+
+
+def run_python(code):
+  """Run code in a fresh interpreter, and return what it prints as JSON."""
+  output = subprocess.run([sys.executable, '-c', textwrap.dedent(code)],
+                          check=True, capture_output=True, text=True).stdout
+  return json.loads(output.strip().splitlines()[-1])
+
+
+class LazyModuleTest(tf.test.TestCase):
+
+  def test_module_is_imported_on_attribute_access(self):
+    imported = run_python("""
+        import json, sys
+        from ddsp import lazy_imports
+        colorsys = lazy_imports.LazyModule('colorsys')
+        before = 'colorsys' in sys.modules
+        _ = colorsys.rgb_to_hsv(0.0, 0.0, 0.0)
+        print(json.dumps([before, 'colorsys' in sys.modules]))
+        """)
+    self.assertEqual(imported, [False, True])
+
+  def test_repr_does_not_import(self):
+    module = lazy_imports.LazyModule('not_a_module_that_exists')
+    self.assertIn('not_a_module_that_exists', repr(module))
+    with self.assertRaises(ImportError):
+      _ = module.anything
+
+
+class PackageImportTest(parameterized.TestCase, tf.test.TestCase):
+
+  @parameterized.named_parameters(
+      ('ddsp', 'ddsp'),
+      ('losses', 'ddsp.losses'),
+      ('training', 'ddsp.training'),
+  )
+  def test_heavy_dependencies_are_not_imported(self, module):
+    heavy_modules = ['tensorflow_probability', 'librosa', 'crepe']
+    imported = run_python(f"""
+        import json, sys
+        import {module}
+        print(json.dumps([m for m in {heavy_modules} if m in sys.modules]))
+        """)
+    self.assertEqual(imported, [])
+
+  def test_gin_configs_parse_after_import_ddsp(self):
+    values = run_python("""
+        import json
+        import ddsp
+        import gin
+        gin.parse_config('''
+            ProcessorGroup.dag = [(@synths.Harmonic(), ['amps', 'hd', 'f0'])]
+            Harmonic.n_samples = 320
+            SpectralLoss.fft_sizes = (256,)
+            Reverb.trainable = True
+            FeatureCache.max_size_bytes = 10
+        ''')
+        print(json.dumps([
+            gin.query_parameter('synths.Harmonic.n_samples'),
+            gin.query_parameter('losses.SpectralLoss.fft_sizes'),
+            gin.query_parameter('effects.Reverb.trainable'),
+            gin.query_parameter('feature_cache.FeatureCache.max_size_bytes'),
+        ]))
+        """)
+    self.assertEqual(values, [320, [256], True, 10])
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -14,12 +14,11 @@
 
 """Library of loss functions."""
 
-import functools
 from typing import Dict, Text
 
-import crepe
 from ddsp import core
 from ddsp import dags
+from ddsp import lazy_imports
 from ddsp import spectral_ops
 from ddsp.core import hz_to_midi
 from ddsp.core import safe_divide
@@ -28,9 +27,11 @@ from ddsp.core import tf_float32
 import gin
 import numpy as np
 import tensorflow.compat.v2 as tf
-import tensorflow_probability as tfp
 
-tfd = tfp.distributions
+# Slow to import, and only needed by some losses.
+crepe = lazy_imports.LazyModule('crepe')
+tfp = lazy_imports.LazyModule('tensorflow_probability')
+
 tfkl = tf.keras.layers
 
 # Define Types.
@@ -41,6 +42,11 @@ TensorDict = Dict[Text, tf.Tensor]
 class Loss(tfkl.Layer):
   """Base class. Duck typing: Losses just must implement get_losses_dict()."""
 
+  def __init__(self, name=None, **kwargs):
+    # Compare signals in float32, also under a mixed precision policy.
+    kwargs.setdefault('dtype', 'float32')
+    super().__init__(name=name, **kwargs)
+
   def get_losses_dict(self, *args, **kwargs):
     """Returns a dictionary of losses for the model."""
     loss = self(*args, **kwargs)
@@ -69,6 +75,7 @@ class LossGroup(dags.DAGLayer):
         `loss_group.kwarg`. Also, other keras kwargs such as 'name' are split
         off before adding modules.
     """
+    kwarg_losses.setdefault('dtype', 'float32')
     super().__init__(dag, **kwarg_losses)
     self.loss_names = self.module_names
 
@@ -186,21 +193,43 @@ class SpectralLoss(Loss):
     self.logmag_weight = logmag_weight
     self.loudness_weight = loudness_weight
 
-    self.spectrogram_ops = []
-    for size in self.fft_sizes:
-      spectrogram_op = functools.partial(spectral_ops.compute_mag, size=size)
-      self.spectrogram_ops.append(spectrogram_op)
+    # All fft sizes, and loudness, from a single pass over the audio.
+    self.spectrogram = spectral_ops.MultiResolutionSpectrogram(
+        fft_sizes=self.fft_sizes,
+        loudness_n_fft=2048 if self.loudness_weight > 0 else None)
 
   def call(self, target_audio, audio, weights=None):
+    return self.compare_outputs(target_audio, [audio], weights=weights)[0]
+
+  def compare_outputs(self, target_audio, outputs, weights=None):
+    """Losses of several outputs against the same target.
+
+    The spectrograms of the target are computed once and compared against
+    each output, rather than once per output as in separate calls.
+
+    Args:
+      target_audio: Target audio of shape [batch_size, n_samples].
+      outputs: List of output audio, each the shape of target_audio.
+      weights: Optional weights of the differences, as in mean_difference().
+
+    Returns:
+      List of scalar losses, one for each of outputs.
+    """
+    target_mags, target_loudness = self.spectrogram(target_audio)
+    return [self._compare(target_mags, target_loudness,
+                          *self.spectrogram(audio), weights=weights)
+            for audio in outputs]
+
+  def _compare(self, target_mags, target_loudness, value_mags, value_loudness,
+               weights=None):
+    """Loss between spectrograms and loudness of a target and an output."""
     loss = 0.0
 
     diff = core.diff
     cumsum = tf.math.cumsum
 
     # Compute loss for each fft size.
-    for loss_op in self.spectrogram_ops:
-      target_mag = loss_op(target_audio)
-      value_mag = loss_op(audio)
+    for target_mag, value_mag in zip(target_mags, value_mags):
 
       # Add magnitude loss.
       if self.mag_weight > 0:
@@ -234,18 +263,21 @@ class SpectralLoss(Loss):
             target, value, self.loss_type, weights=weights)
 
     if self.loudness_weight > 0:
-      target = spectral_ops.compute_loudness(target_audio, n_fft=2048,
-                                             use_tf=True)
-      value = spectral_ops.compute_loudness(audio, n_fft=2048, use_tf=True)
       loss += self.loudness_weight * mean_difference(
-          target, value, self.loss_type, weights=weights)
+          target_loudness, value_loudness, self.loss_type, weights=weights)
 
     return loss
 
 
 @gin.register
-class HmmTranscriber(tfp.distributions.HiddenMarkovModel):
-  """HMM initialized for decoding MIDI from Pitch and Amps."""
+class HmmTranscriber(object):
+  """HMM initialized for decoding MIDI from Pitch and Amps.
+
+  Wraps a `tfp.distributions.HiddenMarkovModel`, created in the constructor so
+  that TensorFlow Probability is only imported when it is used. Other
+  attributes, such as `log_prob()` and `posterior_mode()`, are those of the
+  HMM.
+  """
 
   def __init__(self,
                avg_length=200,
@@ -303,7 +335,7 @@ class HmmTranscriber(tfp.distributions.HiddenMarkovModel):
     observation_distribution = tfp.distributions.MultivariateNormalDiag(
         loc=loc, scale_diag=scale)
 
-    super().__init__(
+    self.hmm = tfp.distributions.HiddenMarkovModel(
         initial_distribution=initial_distribution,
         transition_distribution=transition_distribution,
         observation_distribution=observation_distribution,
@@ -320,6 +352,12 @@ class HmmTranscriber(tfp.distributions.HiddenMarkovModel):
     self.n_pitches = n_pitches
     self.weight = weight
 
+  def __getattr__(self, name):
+    # Only called for attributes that are not found on the transcriber.
+    if name == 'hmm':
+      raise AttributeError(name)
+    return getattr(self.hmm, name)
+
   def __call__(self, pitch, amps):
     return self.nll(pitch, amps)
 
@@ -331,22 +369,20 @@ class HmmTranscriber(tfp.distributions.HiddenMarkovModel):
   def nll(self, pitch, amps, per_example_loss=False):
     """Negative log-likelihood per a timestep."""
     pa = tf.concat([pitch, amps], axis=-1)
-    avg_nll = -self.log_prob(pa) / pitch.shape[1]
+    avg_nll = -self.hmm.log_prob(pa) / pitch.shape[1]
     loss = avg_nll if per_example_loss else tf.reduce_mean(avg_nll)
     return self.weight * loss
 
   def predict_midi(self, pitch, amps, channel_dim=True, dtype=tf.float32):
     """Viterbi decode most likely hidden state as the quantized MIDI signal."""
     pa = tf.concat([pitch, amps], axis=-1)
-    q_pitch = self.posterior_mode(pa)
+    q_pitch = self.hmm.posterior_mode(pa)
     q_pitch = tf.cast(q_pitch, dtype)
     if channel_dim:
       q_pitch = q_pitch[:, :, tf.newaxis]
     return q_pitch
 
 
-
-
 # ------------------------------------------------------------------------------
 # Peceptual Losses
 # ------------------------------------------------------------------------------
@@ -809,6 +845,7 @@ class KDEConsistencyLoss(Loss):
     amps_norm = safe_divide(amps, tf.reduce_sum(amps, axis=-1, keepdims=True))
 
     # P(candidate_harmonics | freqs)
+    tfd = tfp.distributions
     return tfd.MixtureSameFamily(tfd.Categorical(probs=amps_norm),
                                  tfd.Normal(loc=freqs_midi, scale=scale))
 
@@ -1022,6 +1059,7 @@ class TWMLoss(Loss):
     harmonics_loc = tf.range(1, self.n_harmonic_gaussians + 1, dtype=tf.float32)
 
     # P(sinusoids | candidate_harmonics).
+    tfd = tfp.distributions
     return tfd.MixtureSameFamily(
         tfd.Categorical(harmonics_probs),
         tfd.Normal(loc=harmonics_loc, scale=self.harmonics_scale))
@@ -1046,6 +1084,7 @@ class TWMLoss(Loss):
     amps_norm = safe_divide(amps, tf.reduce_sum(amps, axis=-1, keepdims=True))
 
     # P(candidate_harmonics | sinusoids)
+    tfd = tfp.distributions
     return tfd.MixtureSameFamily(
         tfd.Categorical(probs=amps_norm),
         tfd.Normal(loc=sinusoids_midi, scale=self.sinusoids_scale))
@@ -16,6 +16,7 @@
 
 from ddsp import core
 from ddsp import losses
+from ddsp import spectral_ops
 import numpy as np
 import tensorflow as tf
 
@@ -84,7 +85,57 @@ class SpectralLossTest(tf.test.TestCase):
     self.assertListEqual([], loss.shape.as_list())
     self.assertTrue(np.isfinite(loss))
 
+  def test_matches_separate_spectrograms(self):
+    """Same loss as computing each spectrogram of each signal separately."""
+    rng = np.random.RandomState(0)
+    target_audio = tf.constant(rng.randn(2, 8000).astype(np.float32))
+    audio = tf.constant(rng.randn(2, 8000).astype(np.float32))
+    loss_obj = losses.SpectralLoss(
+        mag_weight=1.0,
+        delta_time_weight=1.0,
+        delta_freq_weight=1.0,
+        cumsum_freq_weight=1.0,
+        logmag_weight=1.0,
+        loudness_weight=1.0,
+    )
 
+    expected = 0.0
+    for size in loss_obj.fft_sizes:
+      target = spectral_ops.compute_mag(target_audio, size=size)
+      value = spectral_ops.compute_mag(audio, size=size)
+      expected += losses.mean_difference(target, value)
+      for axis in [1, 2]:
+        expected += losses.mean_difference(core.diff(target, axis=axis),
+                                           core.diff(value, axis=axis))
+      expected += losses.mean_difference(tf.cumsum(target, axis=2),
+                                         tf.cumsum(value, axis=2))
+      expected += losses.mean_difference(spectral_ops.safe_log(target),
+                                         spectral_ops.safe_log(value))
+    expected += losses.mean_difference(
+        spectral_ops.compute_loudness(target_audio, n_fft=2048),
+        spectral_ops.compute_loudness(audio, n_fft=2048))
+
+    self.assertAllClose(loss_obj(target_audio, audio), expected, rtol=1e-4)
+
+  def test_compare_outputs_matches_separate_calls(self):
+    rng = np.random.RandomState(0)
+    target_audio = tf.constant(rng.randn(2, 8000).astype(np.float32))
+    outputs = [tf.constant(rng.randn(2, 8000).astype(np.float32))
+               for _ in range(3)]
+    loss_obj = losses.SpectralLoss(logmag_weight=1.0, loudness_weight=1.0)
+
+    expected = [loss_obj(target_audio, audio) for audio in outputs]
+    self.assertAllClose(loss_obj.compare_outputs(target_audio, outputs),
+                        expected)
+
+  def test_compare_outputs_computes_target_spectrograms_once(self):
+    loss_obj = losses.SpectralLoss(fft_sizes=(256, 64))
+    spec = tf.TensorSpec([2, 8000], tf.float32)
+    graph = tf.function(loss_obj.compare_outputs).get_concrete_function(
+        spec, [spec, spec]).graph
+    n_rfft = sum(op.type == 'RFFT' for op in graph.get_operations())
+    # Two fft sizes of the target, and of each of two outputs.
+    self.assertEqual(n_rfft, 2 * 3)
 
 
 class PretrainedCREPEEmbeddingLossTest(tf.test.TestCase):
@@ -101,5 +152,20 @@ class PretrainedCREPEEmbeddingLossTest(tf.test.TestCase):
     self.assertTrue(np.isfinite(loss))
 
 
+class HmmTranscriberTest(tf.test.TestCase):
+
+  def test_predicts_midi_of_steady_notes(self):
+    transcriber = losses.HmmTranscriber(n_timesteps=40, n_pitches=80)
+    pitch = np.concatenate([np.full([20], 60.0), np.full([20], 67.0)])
+    pitch = tf.constant(pitch[np.newaxis, :, np.newaxis], tf.float32)
+    amps = 1.5 * tf.ones_like(pitch)
+
+    midi = transcriber.predict_midi(pitch, amps)
+
+    self.assertAllEqual(midi[0, :, 0], pitch[0, :, 0])
+    self.assertListEqual([], transcriber(pitch, amps).shape.as_list())
+    self.assertEqual(transcriber.num_steps, 40)
+
+
 if __name__ == '__main__':
   tf.test.main()
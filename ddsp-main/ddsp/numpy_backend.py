@@ -0,0 +1,1032 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""NumPy implementation of the synthesis and effects forward pass.
+
+Mirrors the inference path of `ddsp.core`, `ddsp.synths`, `ddsp.effects` and
+`ddsp.processors.ProcessorGroup` with NumPy and SciPy only, so that a worker
+that renders audio from precomputed synthesizer controls doesn't run any
+TensorFlow ops. Outputs match the TensorFlow versions up to floating point
+precision.
+
+Processors can be created directly:
+
+  processor_group = numpy_backend.ProcessorGroup(dag=[
+      (numpy_backend.Harmonic(n_samples=64000), ['amps', 'hd', 'f0_hz']),
+      (numpy_backend.FilteredNoise(n_samples=64000), ['noise_magnitudes']),
+      (numpy_backend.Add(), ['filtered_noise/signal', 'harmonic/signal']),
+  ])
+  audio = processor_group(controls)
+
+or converted from a TensorFlow `ddsp.processors.ProcessorGroup` (including
+trained Reverb impulse responses) with `ProcessorGroup.from_tf()`. Setting
+`backend='numpy'` on a `ddsp.processors.ProcessorGroup` does this conversion
+on its first call.
+
+Only the forward pass used for inference is supported, and only the processors
+and scale functions defined in this module.
+"""
+
+from typing import Any, Dict, Optional, Sequence, Text
+
+import numpy as np
+from scipy import fft as scipy_fft
+
+# Define Types.
+ArrayDict = Dict[Text, Any]
+
+
+# Utility Functions ------------------------------------------------------------
+def np_float32(x):
+  """Ensure array of float32 for any input."""
+  return np.asarray(x, dtype=np.float32)
+
+
+def nested_lookup(nested_key: Text,
+                  nested_dict: Dict[Text, Any],
+                  delimiter: Text = '/') -> Any:
+  """Returns the value of a nested dict according to a parsed input string.
+
+  Args:
+    nested_key: String of the form "key/key/key...".
+    nested_dict: Nested dictionary.
+    delimiter: String that splits the nested keys.
+
+  Returns:
+    value: Value of the key from the nested dictionary.
+
+  Raises:
+    KeyError: If the key does not exist in the nested dictionary.
+  """
+  value = nested_dict
+  for key in nested_key.split(delimiter):
+    try:
+      value = value[key]
+    except (KeyError, TypeError) as e:
+      raise KeyError(f'Key ({nested_key}) not found in the dag outputs, with '
+                     f'top level keys {list(nested_dict.keys())}.') from e
+  return value
+
+
+def sigmoid(x):
+  """Numerically stable logistic sigmoid."""
+  x = np_float32(x)
+  return (0.5 * (np.tanh(0.5 * x) + 1.0)).astype(np.float32)
+
+
+def exp_sigmoid(x, exponent=10.0, max_value=2.0, threshold=1e-7):
+  """Exponentiated Sigmoid pointwise nonlinearity, see core.exp_sigmoid()."""
+  x = np_float32(x)
+  return (max_value * sigmoid(x)**np.log(exponent) +
+          threshold).astype(np.float32)
+
+
+def safe_divide(numerator, denominator, eps=1e-7):
+  """Avoid dividing by zero by adding a small epsilon."""
+  safe_denominator = np.where(denominator == 0.0, eps, denominator)
+  return numerator / safe_denominator
+
+
+# Resampling -------------------------------------------------------------------
+def _linear_indices(n_frames, n_timesteps, add_endpoint):
+  """Source indices and interpolation weights, like tf.image.resize."""
+  if add_endpoint:
+    scale = n_frames / n_timesteps
+  else:
+    scale = (n_frames - 1) / (n_timesteps - 1) if n_timesteps > 1 else 0.0
+  position = np.arange(n_timesteps, dtype=np.float32) * np.float32(scale)
+  lower = np.floor(position).astype(np.int64)
+  upper = np.minimum(lower + 1, n_frames - 1)
+  weight = (position - lower).astype(np.float32)
+  return position, lower, upper, weight
+
+
+def resample(inputs: np.ndarray,
+             n_timesteps: int,
+             method: Text = 'linear',
+             add_endpoint: bool = True) -> np.ndarray:
+  """Interpolates an array from n_frames to n_timesteps.
+
+  Args:
+    inputs: Framewise 1-D, 2-D, or 3-D array. Shape [n_frames],
+      [batch_size, n_frames], or [batch_size, n_frames, channels].
+    n_timesteps: Time resolution of the output signal.
+    method: Type of resampling, must be in ['nearest', 'linear', 'window'].
+    add_endpoint: Hold the last timestep for an additional step as the endpoint.
+      Then, n_timesteps is divided evenly into n_frames segments. If false, use
+      the last timestep as the endpoint, producing (n_frames - 1) segments with
+      each having a length of n_timesteps / (n_frames - 1).
+
+  Returns:
+    Interpolated 1-D, 2-D, or 3-D array. Shape [n_timesteps],
+      [batch_size, n_timesteps], or [batch_size, n_timesteps, channels].
+
+  Raises:
+    ValueError: If method is not one of 'nearest', 'linear', or 'window'.
+  """
+  inputs = np_float32(inputs)
+  is_1d = inputs.ndim == 1
+  is_2d = inputs.ndim == 2
+
+  # Ensure inputs are at least 3d.
+  if is_1d:
+    inputs = inputs[np.newaxis, :, np.newaxis]
+  elif is_2d:
+    inputs = inputs[:, :, np.newaxis]
+
+  n_frames = inputs.shape[1]
+  if method == 'nearest':
+    position, lower, _, _ = _linear_indices(n_frames, n_timesteps,
+                                            add_endpoint)
+    if add_endpoint:
+      idx = lower
+    else:
+      idx = np.minimum(np.round(position).astype(np.int64), n_frames - 1)
+    outputs = inputs[:, idx]
+  elif method == 'linear':
+    _, lower, upper, weight = _linear_indices(n_frames, n_timesteps,
+                                              add_endpoint)
+    weight = weight[np.newaxis, :, np.newaxis]
+    outputs = inputs[:, lower] + (inputs[:, upper] - inputs[:, lower]) * weight
+  elif method == 'window':
+    outputs = upsample_with_windows(inputs, n_timesteps, add_endpoint)
+  else:
+    raise ValueError('Method ({}) is invalid. Must be one of {}.'.format(
+        method, "['nearest', 'linear', 'window']"))
+
+  # Return outputs to the same dimensionality of the inputs.
+  if is_1d:
+    outputs = outputs[0, :, 0]
+  elif is_2d:
+    outputs = outputs[:, :, 0]
+
+  return outputs.astype(np.float32)
+
+
+def hann_window(window_length: int) -> np.ndarray:
+  """Same as tf.signal.hann_window(), periodic only for even lengths."""
+  if window_length == 1:
+    return np.ones([1], np.float32)
+  denominator = window_length - (window_length % 2)
+  n = np.arange(window_length, dtype=np.float32)
+  return (0.5 - 0.5 * np.cos(2.0 * np.pi * n / denominator)).astype(
+      np.float32)
+
+
+def overlap_and_add(frames: np.ndarray, hop_size: int) -> np.ndarray:
+  """Overlap-add frames [..., n_frames, frame_size] to a signal [..., time]."""
+  *batch_shape, n_frames, frame_size = frames.shape
+  n_hops = -(-frame_size // hop_size)  # Ceil.
+  pad = n_hops * hop_size - frame_size
+  if pad:
+    frames = np.pad(frames, [(0, 0)] * len(batch_shape) + [(0, 0), (0, pad)])
+  # Each frame spans n_hops hops, add them to the output hop by hop.
+  frames = frames.reshape(batch_shape + [n_frames, n_hops, hop_size])
+  output = np.zeros(batch_shape + [n_frames + n_hops - 1, hop_size],
+                    dtype=frames.dtype)
+  for i in range(n_hops):
+    output[..., i:i + n_frames, :] += frames[..., i, :]
+  output = output.reshape(batch_shape + [-1])
+  return output[..., :(n_frames - 1) * hop_size + frame_size]
+
+
+def upsample_with_windows(inputs: np.ndarray,
+                          n_timesteps: int,
+                          add_endpoint: bool = True) -> np.ndarray:
+  """Upsample a series of frames using using overlapping hann windows.
+
+  Args:
+    inputs: Framewise 3-D array. Shape [batch_size, n_frames, n_channels].
+    n_timesteps: The time resolution of the output signal.
+    add_endpoint: Hold the last timestep for an additional step as the endpoint.
+
+  Returns:
+    Upsampled 3-D array. Shape [batch_size, n_timesteps, n_channels].
+
+  Raises:
+    ValueError: If input does not have 3 dimensions.
+    ValueError: If attempting to use function for downsampling.
+    ValueError: If n_timesteps is not divisible by n_frames (if add_endpoint is
+      true) or n_frames - 1 (if add_endpoint is false).
+  """
+  inputs = np_float32(inputs)
+
+  if inputs.ndim != 3:
+    raise ValueError('Upsample_with_windows() only supports 3 dimensions, '
+                     'not {}.'.format(inputs.shape))
+
+  # Mimic behavior of tf.image.resize.
+  # For forward (not endpointed), hold value for last interval.
+  if add_endpoint:
+    inputs = np.concatenate([inputs, inputs[:, -1:, :]], axis=1)
+
+  n_frames = inputs.shape[1]
+  n_intervals = (n_frames - 1)
+
+  if n_frames >= n_timesteps:
+    raise ValueError('Upsample with windows cannot be used for downsampling'
+                     'More input frames ({}) than output timesteps ({})'.format(
+                         n_frames, n_timesteps))
+
+  if n_timesteps % n_intervals != 0.0:
+    minus_one = '' if add_endpoint else ' - 1'
+    raise ValueError(
+        'For upsampling, the target the number of timesteps must be divisible '
+        'by the number of input frames{}. (timesteps:{}, frames:{}, '
+        'add_endpoint={}).'.format(minus_one, n_timesteps, n_frames,
+                                   add_endpoint))
+
+  # Constant overlap-add, half overlapping windows.
+  hop_size = n_timesteps // n_intervals
+  window = hann_window(2 * hop_size)
+
+  # [batch_size, n_channels, n_frames, window].
+  x = np.transpose(inputs, [0, 2, 1])[..., np.newaxis] * window
+  x = overlap_and_add(x, hop_size)
+
+  # [batch_size, n_timesteps, n_channels], trim the first and last window.
+  return np.transpose(x, [0, 2, 1])[:, hop_size:-hop_size, :]
+
+
+# Harmonic Synthesizer ---------------------------------------------------------
+def remove_above_nyquist(frequency_envelopes: np.ndarray,
+                         amplitude_envelopes: np.ndarray,
+                         sample_rate: int = 16000) -> np.ndarray:
+  """Set amplitudes for oscillators above nyquist to 0."""
+  frequency_envelopes = np_float32(frequency_envelopes)
+  amplitude_envelopes = np_float32(amplitude_envelopes)
+  return np.where(frequency_envelopes >= sample_rate / 2.0,
+                  np.zeros_like(amplitude_envelopes), amplitude_envelopes)
+
+
+def get_harmonic_frequencies(frequencies: np.ndarray,
+                             n_harmonics: int) -> np.ndarray:
+  """Create integer multiples of the fundamental frequency."""
+  frequencies = np_float32(frequencies)
+  f_ratios = np.linspace(1.0, float(n_harmonics), int(n_harmonics),
+                         dtype=np.float32)
+  return frequencies * f_ratios[np.newaxis, np.newaxis, :]
+
+
+def normalize_harmonics(harmonic_distribution, f0_hz=None, sample_rate=None):
+  """Normalize the harmonic distribution, optionally removing above nyquist."""
+  harmonic_distribution = np_float32(harmonic_distribution)
+  # Bandlimit the harmonic distribution.
+  if sample_rate is not None and f0_hz is not None:
+    n_harmonics = int(harmonic_distribution.shape[-1])
+    harmonic_frequencies = get_harmonic_frequencies(f0_hz, n_harmonics)
+    harmonic_distribution = remove_above_nyquist(
+        harmonic_frequencies, harmonic_distribution, sample_rate)
+
+  # Normalize
+  return safe_divide(
+      harmonic_distribution,
+      np.sum(harmonic_distribution, axis=-1, keepdims=True))
+
+
+OSCILLATOR_KERNELS = ('sin', 'harmonic_sin')
+
+
+def oscillator_bank(frequency_envelopes: np.ndarray,
+                    amplitude_envelopes: np.ndarray,
+                    sample_rate: int = 16000,
+                    sum_sinusoids: bool = True) -> np.ndarray:
+  """Generates audio from sample-wise frequencies for a bank of oscillators.
+
+  Phase is accumulated in float64 and wrapped to [0, 2pi), so there is no need
+  for the chunked `angular_cumsum` of the TensorFlow version.
+
+  Args:
+    frequency_envelopes: Sample-wise oscillator frequencies (Hz). Shape
+      [batch_size, n_samples, n_sinusoids].
+    amplitude_envelopes: Sample-wise oscillator amplitude. Shape [batch_size,
+      n_samples, n_sinusoids].
+    sample_rate: Sample rate in samples per a second.
+    sum_sinusoids: Add up audio from all the sinusoids.
+
+  Returns:
+    wav: Sample-wise audio. Shape [batch_size, n_samples, n_sinusoids] if
+      sum_sinusoids=False, else shape is [batch_size, n_samples].
+  """
+  frequency_envelopes = np_float32(frequency_envelopes)
+  amplitude_envelopes = np_float32(amplitude_envelopes)
+
+  # Don't exceed Nyquist.
+  amplitude_envelopes = remove_above_nyquist(frequency_envelopes,
+                                             amplitude_envelopes,
+                                             sample_rate)
+
+  # Angular frequency, Hz -> radians per sample.
+  omegas = frequency_envelopes.astype(np.float64) * (2.0 * np.pi / sample_rate)
+  phases = np.cumsum(omegas, axis=1) % (2.0 * np.pi)
+
+  # Convert to waveforms.
+  audio = amplitude_envelopes * np.sin(phases).astype(np.float32)
+  if sum_sinusoids:
+    audio = np.sum(audio, axis=-1)  # [mb, n_samples]
+  return audio
+
+
+def harmonic_synthesis(frequencies: np.ndarray,
+                       amplitudes: np.ndarray,
+                       harmonic_distribution: Optional[np.ndarray] = None,
+                       n_samples: int = 64000,
+                       sample_rate: int = 16000,
+                       amp_resample_method: Text = 'window',
+                       kernel: Text = 'sin') -> np.ndarray:
+  """Generate audio from frame-wise monophonic harmonic oscillator bank.
+
+  Args:
+    frequencies: Frame-wise fundamental frequency in Hz. Shape [batch_size,
+      n_frames, 1].
+    amplitudes: Frame-wise oscillator peak amplitude. Shape [batch_size,
+      n_frames, 1].
+    harmonic_distribution: Harmonic amplitude variations, ranged zero to one.
+      Shape [batch_size, n_frames, n_harmonics].
+    n_samples: Total length of output audio. Interpolates and crops to this.
+    sample_rate: Sample rate.
+    amp_resample_method: Mode with which to resample amplitude envelopes.
+    kernel: One of OSCILLATOR_KERNELS, see core.harmonic_synthesis(). 'sin'
+      accumulates the phase of each harmonic, 'harmonic_sin' only the phase of
+      the fundamental.
+
+  Returns:
+    audio: Output audio. Shape [batch_size, n_samples]
+
+  Raises:
+    ValueError: If kernel is not in OSCILLATOR_KERNELS.
+  """
+  if kernel not in OSCILLATOR_KERNELS:
+    raise ValueError(f'Oscillator kernel ({kernel}) must be in '
+                     f'{OSCILLATOR_KERNELS}.')
+  frequencies = np_float32(frequencies)
+  amplitudes = np_float32(amplitudes)
+
+  if harmonic_distribution is not None:
+    harmonic_distribution = np_float32(harmonic_distribution)
+    n_harmonics = int(harmonic_distribution.shape[-1])
+    harmonic_amplitudes = amplitudes * harmonic_distribution
+  else:
+    n_harmonics = 1
+    harmonic_amplitudes = amplitudes
+
+  if kernel == 'harmonic_sin':
+    # Only the phase of the fundamental, harmonics are integer multiples.
+    frequency_envelope = resample(frequencies, n_samples)
+    amplitude_envelopes = resample(harmonic_amplitudes, n_samples,
+                                   method=amp_resample_method)
+    amplitude_envelopes = remove_above_nyquist(
+        get_harmonic_frequencies(frequency_envelope, n_harmonics),
+        amplitude_envelopes, sample_rate)
+    omega = frequency_envelope.astype(np.float64) * (2.0 * np.pi / sample_rate)
+    phase = np.cumsum(omega, axis=1) % (2.0 * np.pi)
+    wavs = np.sin(phase * np.arange(1, n_harmonics + 1)).astype(np.float32)
+    return np.sum(amplitude_envelopes * wavs, axis=-1)
+
+  harmonic_frequencies = get_harmonic_frequencies(frequencies, n_harmonics)
+
+  # Create sample-wise envelopes.
+  frequency_envelopes = resample(harmonic_frequencies, n_samples)
+  amplitude_envelopes = resample(harmonic_amplitudes, n_samples,
+                                 method=amp_resample_method)
+  return oscillator_bank(frequency_envelopes,
+                         amplitude_envelopes,
+                         sample_rate=sample_rate)
+
+
+# Time-varying convolution -----------------------------------------------------
+def get_fft_size(frame_size: int, ir_size: int) -> int:
+  """Next power of 2 for the linear convolution of a frame and an IR."""
+  convolved_frame_size = ir_size + frame_size - 1
+  return int(2**np.ceil(np.log2(convolved_frame_size)))
+
+
+def crop_and_compensate_delay(audio: np.ndarray, audio_size: int, ir_size: int,
+                              padding: Text,
+                              delay_compensation: int) -> np.ndarray:
+  """Crop audio output from convolution to compensate for group delay.
+
+  Args:
+    audio: Audio after convolution. Array of shape [batch, time_steps].
+    audio_size: Initial size of the audio before convolution.
+    ir_size: Size of the convolving impulse response.
+    padding: Either 'valid' or 'same'.
+    delay_compensation: Samples to crop from start of output audio to compensate
+      for group delay of the impulse response. If delay_compensation < 0 it
+      defaults to the group delay of frequency_impulse_response().
+
+  Returns:
+    Array of cropped and shifted audio.
+
+  Raises:
+    ValueError: If padding is not either 'valid' or 'same'.
+  """
+  if padding == 'valid':
+    crop_size = ir_size + audio_size - 1
+  elif padding == 'same':
+    crop_size = audio_size
+  else:
+    raise ValueError('Padding must be \'valid\' or \'same\', instead '
+                     'of {}.'.format(padding))
+
+  start = ((ir_size - 1) // 2 -
+           1 if delay_compensation < 0 else delay_compensation)
+  return audio[:, start:start + crop_size]
+
+
+def fft_convolve(audio: np.ndarray,
+                 impulse_response: np.ndarray,
+                 padding: Text = 'same',
+                 delay_compensation: int = -1) -> np.ndarray:
+  """Filter audio with frames of time-varying impulse responses.
+
+  Args:
+    audio: Input audio. Array of shape [batch, audio_timesteps].
+    impulse_response: Finite impulse response to convolve. Either a 2-D array
+      of shape [batch, ir_size], or a 3-D array of shape [batch, ir_frames,
+      ir_size]. A batch size of 1 is broadcast to the batch size of the audio.
+    padding: Either 'valid' or 'same'.
+    delay_compensation: Samples to crop from start of output audio to compensate
+      for group delay of the impulse response.
+
+  Returns:
+    audio_out: Convolved audio. Array of shape
+        [batch, audio_timesteps + ir_timesteps - 1] ('valid' padding) or shape
+        [batch, audio_timesteps] ('same' padding).
+
+  Raises:
+    ValueError: If audio and impulse response have different batch size.
+    ValueError: If audio cannot be split into evenly spaced frames.
+  """
+  audio = np_float32(audio)
+  impulse_response = np_float32(impulse_response)
+  batch_size, audio_size = audio.shape
+
+  # Add a frame dimension to impulse response if it doesn't have one.
+  if impulse_response.ndim == 2:
+    impulse_response = impulse_response[:, np.newaxis, :]
+  batch_size_ir, n_ir_frames, ir_size = impulse_response.shape
+
+  # Validate that batch sizes match, or broadcast.
+  if batch_size_ir not in (1, batch_size):
+    raise ValueError('Batch size of audio ({}) and impulse response ({}) must '
+                     'be the same.'.format(batch_size, batch_size_ir))
+
+  # Cut audio into frames.
+  frame_size = int(np.ceil(audio_size / n_ir_frames))
+  n_audio_frames = int(np.ceil(audio_size / frame_size))
+  if n_audio_frames != n_ir_frames:
+    raise ValueError(
+        'Number of Audio frames ({}) and impulse response frames ({}) do not '
+        'match. For small hop size = ceil(audio_size / n_ir_frames), '
+        'number of impulse response frames must be a multiple of the audio '
+        'size.'.format(n_audio_frames, n_ir_frames))
+  audio_frames = np.pad(audio,
+                        [(0, 0), (0, n_audio_frames * frame_size - audio_size)])
+  audio_frames = audio_frames.reshape([batch_size, n_audio_frames, frame_size])
+
+  # Multiply the FFTs (same as convolution in time).
+  fft_size = get_fft_size(frame_size, ir_size)
+  audio_fft = scipy_fft.rfft(audio_frames, fft_size)
+  ir_fft = scipy_fft.rfft(impulse_response, fft_size)
+  audio_frames_out = scipy_fft.irfft(audio_fft * ir_fft, fft_size)
+  audio_out = overlap_and_add(audio_frames_out.astype(np.float32), frame_size)
+
+  # Crop and shift the output audio.
+  return crop_and_compensate_delay(audio_out, audio_size, ir_size, padding,
+                                   delay_compensation)
+
+
+# Filter Design ----------------------------------------------------------------
+def apply_window_to_impulse_response(impulse_response: np.ndarray,
+                                     window_size: int = 0,
+                                     causal: bool = False) -> np.ndarray:
+  """Apply a window to an impulse response and put in causal form.
+
+  Args:
+    impulse_response: A series of impulse responses frames to window, of shape
+      [batch, n_frames, ir_size].
+    window_size: Size of the window to apply in the time domain. If window_size
+      is less than 1, it defaults to the impulse_response size.
+    causal: Impulse responnse input is in causal form (peak in the middle).
+
+  Returns:
+    impulse_response: Windowed impulse response in causal form, with last
+      dimension cropped to window_size if window_size is greater than 0 and less
+      than ir_size.
+  """
+  impulse_response = np_float32(impulse_response)
+
+  # If IR is in causal form, put it in zero-phase form.
+  if causal:
+    impulse_response = np.fft.fftshift(impulse_response, axes=-1)
+
+  # Window defaults to IR size, cannot be bigger.
+  ir_size = int(impulse_response.shape[-1])
+  if (window_size <= 0) or (window_size > ir_size):
+    window_size = ir_size
+  window = hann_window(window_size)
+
+  # Zero pad the window and put in in zero-phase form.
+  padding = ir_size - window_size
+  if padding > 0:
+    half_idx = (window_size + 1) // 2
+    window = np.concatenate([window[half_idx:],
+                             np.zeros([padding], np.float32),
+                             window[:half_idx]], axis=0)
+  else:
+    window = np.fft.fftshift(window, axes=-1)
+
+  # Apply the window, to get new IR (both in zero-phase form).
+  impulse_response = window * impulse_response
+
+  # Put IR in causal form and trim zero padding.
+  if padding > 0:
+    first_half_start = (ir_size - (half_idx - 1)) + 1
+    second_half_end = half_idx + 1
+    impulse_response = np.concatenate(
+        [impulse_response[..., first_half_start:],
+         impulse_response[..., :second_half_end]], axis=-1)
+  else:
+    impulse_response = np.fft.fftshift(impulse_response, axes=-1)
+
+  return impulse_response
+
+
+def frequency_impulse_response(magnitudes: np.ndarray,
+                               window_size: int = 0) -> np.ndarray:
+  """Get windowed impulse responses using the frequency sampling method.
+
+  Args:
+    magnitudes: Frequency transfer curve. Array of shape [batch, n_frames,
+      n_frequencies] or [batch, n_frequencies].
+    window_size: Size of the window to apply in the time domain. If window_size
+      is less than 1, it defaults to the impulse_response size.
+
+  Returns:
+    impulse_response: Time-domain FIR filter of shape
+      [batch, frames, window_size] or [batch, window_size].
+  """
+  magnitudes = np_float32(magnitudes)
+  n_fft = 2 * (magnitudes.shape[-1] - 1)
+  impulse_response = scipy_fft.irfft(magnitudes, n_fft).astype(np.float32)
+  return apply_window_to_impulse_response(impulse_response, window_size)
+
+
+def frequency_filter(audio: np.ndarray,
+                     magnitudes: np.ndarray,
+                     window_size: int = 0,
+                     padding: Text = 'same') -> np.ndarray:
+  """Filter audio with a finite impulse response filter.
+
+  Args:
+    audio: Input audio. Array of shape [batch, audio_timesteps].
+    magnitudes: Frequency transfer curve. Array of shape [batch, n_frames,
+      n_frequencies] or [batch, n_frequencies].
+    window_size: Size of the window to apply in the time domain. If window_size
+      is less than 1, it is set as the default (n_frequencies).
+    padding: Either 'valid' or 'same'.
+
+  Returns:
+    Filtered audio. Array of shape
+        [batch, audio_timesteps + window_size - 1] ('valid' padding) or shape
+        [batch, audio_timesteps] ('same' padding).
+  """
+  impulse_response = frequency_impulse_response(magnitudes,
+                                                window_size=window_size)
+  return fft_convolve(audio, impulse_response, padding=padding)
+
+
+# Processors -------------------------------------------------------------------
+# Scale functions that can be converted from their TensorFlow versions by name.
+SCALE_FNS = {
+    'exp_sigmoid': exp_sigmoid,
+}
+
+
+def _convert_scale_fn(scale_fn):
+  """NumPy version of a scale function from ddsp.core."""
+  if scale_fn is None:
+    return None
+  name = getattr(scale_fn, '__name__', None)
+  if name not in SCALE_FNS:
+    raise ValueError(f'Scale function ({scale_fn}) has no NumPy version. '
+                     f'Must be None or one of {list(SCALE_FNS.keys())}.')
+  return SCALE_FNS[name]
+
+
+class Processor(object):
+  """Base class for NumPy versions of processors.Processor."""
+
+  def __init__(self, name: Text):
+    self.name = name
+
+  def __call__(self, *args, return_outputs_dict: bool = False, **kwargs):
+    """Convert input arrays into a signal array."""
+    controls = self.get_controls(*args, **kwargs)
+    signal = self.get_signal(**controls)
+    if return_outputs_dict:
+      return dict(signal=signal, controls=controls)
+    else:
+      return signal
+
+  def get_controls(self, *args, **kwargs) -> ArrayDict:
+    """Convert input array arguments into a dict of processor controls."""
+    raise NotImplementedError
+
+  def get_signal(self, *args, **kwargs) -> np.ndarray:
+    """Convert control arrays into a signal array."""
+    raise NotImplementedError
+
+  @classmethod
+  def from_tf(cls, processor):
+    """Create from a TensorFlow processor of the same name."""
+    raise NotImplementedError
+
+
+class ProcessorGroup(Processor):
+  """NumPy version of processors.ProcessorGroup."""
+
+  def __init__(self, dag: Sequence[Any], name: Text = 'processor_group'):
+    """Constructor.
+
+    Args:
+      dag: List of nodes (processor, ['input_key', ...]), in the same format as
+        for processors.ProcessorGroup. Processors must be instances, as there
+        are no kwarg processors.
+      name: Name of the processor group.
+    """
+    super().__init__(name=name)
+    self.dag = []
+    self.processors = {}
+    for node in dag:
+      processor, input_keys = node[0], node[1]
+      self.processors[processor.name] = processor
+      self.dag.append((processor.name, list(input_keys)))
+
+  @classmethod
+  def from_tf(cls, processor_group):
+    """Convert a processors.ProcessorGroup, including trained variables."""
+    dag = []
+    for node in processor_group.dag:
+      processor = getattr(processor_group, node[0])
+      dag.append((from_tf(processor), node[1]))
+    return cls(dag, name=processor_group.name)
+
+  def __call__(self, inputs: ArrayDict,
+               return_outputs_dict: bool = False) -> np.ndarray:
+    controls = self.get_controls(inputs)
+    signal = self.get_signal(controls)
+    if return_outputs_dict:
+      return dict(signal=signal, controls=controls)
+    else:
+      return signal
+
+  def get_controls(self, inputs: ArrayDict) -> ArrayDict:
+    """Run the DAG and get complete outputs dictionary.
+
+    Args:
+      inputs: A dictionary of input arrays fed to the processor_group.
+
+    Returns:
+      A nested dictionary of all the output arrays.
+    """
+    outputs = {'inputs': inputs}
+    outputs.update(inputs)
+    module_outputs = None
+    for processor_name, input_keys in self.dag:
+      args = [np.asarray(nested_lookup(key, outputs)) for key in input_keys]
+      module_outputs = self.processors[processor_name](
+          *args, return_outputs_dict=True)
+      outputs[processor_name] = module_outputs
+    outputs['out'] = module_outputs
+    return outputs
+
+  def get_signal(self, outputs: ArrayDict) -> np.ndarray:
+    """Extract the output signal from the dag outputs."""
+    return outputs['out']['signal']
+
+
+class Add(Processor):
+  """Sum two signals."""
+
+  def __init__(self, name: Text = 'add'):
+    super().__init__(name=name)
+
+  @classmethod
+  def from_tf(cls, processor):
+    return cls(name=processor.name)
+
+  def get_controls(self, signal_one, signal_two):
+    return {'signal_one': signal_one, 'signal_two': signal_two}
+
+  def get_signal(self, signal_one, signal_two):
+    return signal_one + signal_two
+
+
+class Mix(Processor):
+  """Constant-power crossfade between two signals."""
+
+  def __init__(self, name: Text = 'mix'):
+    super().__init__(name=name)
+
+  @classmethod
+  def from_tf(cls, processor):
+    return cls(name=processor.name)
+
+  def get_controls(self, signal_one, signal_two, nn_out_mix_level):
+    n_time_one = int(signal_one.shape[1])
+    n_time_two = int(signal_two.shape[1])
+    if n_time_one != n_time_two:
+      raise ValueError('The two signals must have the same length instead of'
+                       '{} and {}'.format(n_time_one, n_time_two))
+    mix_level = resample(sigmoid(nn_out_mix_level), n_time_one)
+    return {
+        'signal_one': signal_one,
+        'signal_two': signal_two,
+        'mix_level': mix_level
+    }
+
+  def get_signal(self, signal_one, signal_two, mix_level):
+    mix_level_one = np.sqrt(np.abs(mix_level))
+    mix_level_two = 1.0 - np.sqrt(np.abs(mix_level - 1.0))
+    return mix_level_one * signal_one + mix_level_two * signal_two
+
+
+class Crop(Processor):
+  """Remove audio generated from padding frames."""
+
+  def __init__(self,
+               frame_size: int,
+               crop_location: Text = 'back',
+               name: Text = 'crop'):
+    super().__init__(name=name)
+    self.frame_size = frame_size
+    self.crop_location = crop_location
+
+  @classmethod
+  def from_tf(cls, processor):
+    return cls(frame_size=processor.frame_size,
+               crop_location=processor.crop_location,
+               name=processor.name)
+
+  def get_controls(self, audio):
+    return {'audio': audio}
+
+  def get_signal(self, audio):
+    half_pad_amount = int(self.frame_size // 2)  # Symmetric even.
+    pad_amount = 2 * half_pad_amount
+    if self.crop_location == 'front':
+      return audio[:, pad_amount:]
+    elif self.crop_location == 'center':
+      return audio[:, half_pad_amount:-half_pad_amount]
+    elif self.crop_location == 'back':
+      return audio[:, :-pad_amount]
+    else:
+      raise ValueError(f'Crop_location: ({self.crop_location}), must be '
+                       '"front", "center", or "back".')
+
+
+class TensorToAudio(Processor):
+  """Identity "synth" returning input samples with channel dimension removed."""
+
+  def __init__(self, name: Text = 'tensor_to_audio'):
+    super().__init__(name=name)
+
+  @classmethod
+  def from_tf(cls, processor):
+    return cls(name=processor.name)
+
+  def get_controls(self, samples):
+    return {'samples': samples}
+
+  def get_signal(self, samples):
+    return np_float32(samples)[:, :, 0]
+
+
+class Harmonic(Processor):
+  """Synthesize audio with a bank of harmonic sinusoidal oscillators."""
+
+  def __init__(self,
+               n_samples=64000,
+               sample_rate=16000,
+               scale_fn=exp_sigmoid,
+               normalize_below_nyquist=True,
+               amp_resample_method='window',
+               oscillator_kernel='sin',
+               name='harmonic'):
+    super().__init__(name=name)
+    self.n_samples = n_samples
+    self.sample_rate = sample_rate
+    self.scale_fn = scale_fn
+    self.normalize_below_nyquist = normalize_below_nyquist
+    self.amp_resample_method = amp_resample_method
+    self.oscillator_kernel = oscillator_kernel
+
+  @classmethod
+  def from_tf(cls, processor):
+    """Create from a synths.Harmonic.
+
+    Phase is always accumulated in float64, so use_angular_cumsum is not
+    needed.
+
+    Args:
+      processor: A synths.Harmonic.
+
+    Returns:
+      The NumPy Harmonic.
+
+    Raises:
+      ValueError: If the processor synthesizes with pruned harmonics
+        (amplitude_floor_db) or an inverse FFT (ifft_lobe_bins), which have no
+        NumPy version.
+    """
+    for option in ['amplitude_floor_db', 'ifft_lobe_bins']:
+      if getattr(processor, option) is not None:
+        raise ValueError(f'Harmonic {processor.name} has {option}='
+                         f'{getattr(processor, option)}, which has no NumPy '
+                         'version. Must be None.')
+    return cls(n_samples=processor.n_samples,
+               sample_rate=processor.sample_rate,
+               scale_fn=_convert_scale_fn(processor.scale_fn),
+               normalize_below_nyquist=processor.normalize_below_nyquist,
+               amp_resample_method=processor.amp_resample_method,
+               oscillator_kernel=processor.oscillator_kernel,
+               name=processor.name)
+
+  def get_controls(self, amplitudes, harmonic_distribution, f0_hz):
+    if self.scale_fn is not None:
+      amplitudes = self.scale_fn(amplitudes)
+      harmonic_distribution = self.scale_fn(harmonic_distribution)
+
+    harmonic_distribution = normalize_harmonics(
+        harmonic_distribution, f0_hz,
+        self.sample_rate if self.normalize_below_nyquist else None)
+
+    return {'amplitudes': amplitudes,
+            'harmonic_distribution': harmonic_distribution,
+            'f0_hz': f0_hz}
+
+  def get_signal(self, amplitudes, harmonic_distribution, f0_hz):
+    return harmonic_synthesis(
+        frequencies=f0_hz,
+        amplitudes=amplitudes,
+        harmonic_distribution=harmonic_distribution,
+        n_samples=self.n_samples,
+        sample_rate=self.sample_rate,
+        amp_resample_method=self.amp_resample_method,
+        kernel=self.oscillator_kernel)
+
+
+class FilteredNoise(Processor):
+  """Synthesize audio by filtering white noise."""
+
+  def __init__(self,
+               n_samples=64000,
+               window_size=257,
+               scale_fn=exp_sigmoid,
+               initial_bias=-5.0,
+               seed=None,
+               name='filtered_noise'):
+    """Constructor.
+
+    Args:
+      n_samples: Fixed length of output audio.
+      window_size: Size of the window of the noise filters.
+      scale_fn: Scale function for the filter magnitudes.
+      initial_bias: Added to the magnitudes before scaling.
+      seed: Optional seed of the random noise.
+      name: Synth name.
+    """
+    super().__init__(name=name)
+    self.n_samples = n_samples
+    self.window_size = window_size
+    self.scale_fn = scale_fn
+    self.initial_bias = initial_bias
+    self._rng = np.random.default_rng(seed)
+
+  @classmethod
+  def from_tf(cls, processor):
+    return cls(n_samples=processor.n_samples,
+               window_size=processor.window_size,
+               scale_fn=_convert_scale_fn(processor.scale_fn),
+               initial_bias=processor.initial_bias,
+               name=processor.name)
+
+  def _noise(self, batch_size):
+    """Uniform white noise in [-1, 1]."""
+    return self._rng.uniform(-1.0, 1.0, [batch_size, self.n_samples]).astype(
+        np.float32)
+
+  def get_controls(self, magnitudes):
+    if self.scale_fn is not None:
+      magnitudes = self.scale_fn(magnitudes + self.initial_bias)
+    return {'magnitudes': magnitudes}
+
+  def get_signal(self, magnitudes):
+    signal = self._noise(int(magnitudes.shape[0]))
+    return frequency_filter(signal, magnitudes, window_size=self.window_size)
+
+
+class Reverb(Processor):
+  """Convolutional (FIR) reverb."""
+
+  def __init__(self,
+               ir=None,
+               add_dry=True,
+               name='reverb'):
+    """Constructor.
+
+    Args:
+      ir: Optional fixed impulse response, such as the trained variable of a
+        `trainable` TensorFlow Reverb. Shape [ir_size] or [1, ir_size]. If None,
+        the impulse response must be an input.
+      add_dry: Add dry signal to reverberated signal on output.
+      name: Name of processor module.
+    """
+    super().__init__(name=name)
+    self._ir = None if ir is None else np_float32(ir)
+    self._add_dry = add_dry
+
+  @classmethod
+  def from_tf(cls, processor):
+    """Create from an effects.Reverb, with its impulse response if trainable.
+
+    Any convolution_method is converted to a single FFT convolution, which
+    has the same output.
+
+    Args:
+      processor: An effects.Reverb.
+
+    Returns:
+      The NumPy Reverb.
+    """
+    ir = None
+    if processor.trainable:
+      if not processor.built:
+        processor.build(None)
+      ir = processor._ir.numpy()  # pylint: disable=protected-access
+    return cls(ir=ir,
+               add_dry=processor._add_dry,  # pylint: disable=protected-access
+               name=processor.name)
+
+  def _mask_dry_ir(self, ir):
+    """Set first impulse response to zero to mask the dry signal."""
+    if ir.ndim == 1:
+      ir = ir[np.newaxis, :]  # Add a batch dimension
+    if ir.ndim == 3:
+      ir = ir[:, :, 0]  # Remove unnessary channel dimension.
+    ir = np.array(ir, dtype=np.float32)
+    ir[:, 0] = 0.0
+    return ir
+
+  def get_controls(self, audio, ir=None):
+    if self._ir is not None:
+      ir = self._ir
+    elif ir is None:
+      raise ValueError('Must provide "ir" array if Reverb has no fixed ir.')
+    return {'audio': audio, 'ir': ir}
+
+  def get_signal(self, audio, ir):
+    audio = np_float32(audio)
+    ir = self._mask_dry_ir(np_float32(ir))
+    wet = fft_convolve(audio, ir, padding='same', delay_compensation=0)
+    return (wet + audio) if self._add_dry else wet
+
+
+# Processors that can be converted from TensorFlow, by class name.
+PROCESSORS = {
+    cls.__name__: cls for cls in [
+        Add, Mix, Crop, TensorToAudio, Harmonic, FilteredNoise, Reverb,
+        ProcessorGroup]
+}
+
+
+def from_tf(processor) -> Processor:
+  """Convert a TensorFlow processor to its NumPy version.
+
+  Args:
+    processor: Instance of a processors.Processor or processors.ProcessorGroup.
+
+  Returns:
+    Processor of this module with the same settings and variables.
+
+  Raises:
+    ValueError: If the processor has no NumPy version.
+  """
+  name = type(processor).__name__
+  if name not in PROCESSORS:
+    raise ValueError(f'Processor {name} has no NumPy version. Must be one of '
+                     f'{list(PROCESSORS.keys())}.')
+  return PROCESSORS[name].from_tf(processor)
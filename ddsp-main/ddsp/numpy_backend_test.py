@@ -0,0 +1,226 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for ddsp.numpy_backend, compared to the TensorFlow versions."""
+
+from unittest import mock
+
+from absl.testing import parameterized
+from ddsp import core
+from ddsp import effects
+from ddsp import numpy_backend
+from ddsp import processors
+from ddsp import synths
+import numpy as np
+import tensorflow.compat.v2 as tf
+
+
+class CoreTest(parameterized.TestCase, tf.test.TestCase):
+
+  @parameterized.named_parameters(
+      ('linear_1d', 'linear', True, [10]),
+      ('linear_2d', 'linear', True, [2, 10]),
+      ('linear_no_endpoint', 'linear', False, [2, 10, 3]),
+      ('nearest', 'nearest', True, [2, 10, 3]),
+      ('nearest_no_endpoint', 'nearest', False, [2, 10, 3]),
+      ('window', 'window', True, [2, 10, 3]),
+      ('window_no_endpoint', 'window', False, [2, 11, 3]),
+  )
+  def test_resample(self, method, add_endpoint, shape):
+    inputs = np.random.randn(*shape).astype(np.float32)
+    expected = core.resample(inputs, 200, method, add_endpoint)
+    outputs = numpy_backend.resample(inputs, 200, method, add_endpoint)
+    self.assertAllClose(expected, outputs, atol=1e-5)
+
+  def test_oscillator_bank(self):
+    frequencies = np.linspace(20.0, 9000.0, 16000).reshape([2, 8000, 1])
+    frequencies = np.tile(frequencies, [1, 1, 3]) * [1.0, 2.0, 3.0]
+    amplitudes = np.random.uniform(size=frequencies.shape)
+    expected = core.oscillator_bank(frequencies, amplitudes,
+                                    use_angular_cumsum=True)
+    outputs = numpy_backend.oscillator_bank(frequencies, amplitudes)
+    self.assertAllClose(expected, outputs, atol=1e-3)
+
+  @parameterized.named_parameters(('sin', 'sin'),
+                                  ('harmonic_sin', 'harmonic_sin'))
+  def test_harmonic_synthesis(self, kernel):
+    frequencies = np.linspace(100.0, 800.0, 100).reshape([2, 50, 1])
+    amplitudes = np.random.uniform(size=[2, 50, 1])
+    harmonic_distribution = np.random.uniform(size=[2, 50, 20])
+    harmonic_distribution /= np.sum(harmonic_distribution, axis=-1,
+                                    keepdims=True)
+    expected = core.harmonic_synthesis(
+        frequencies, amplitudes, harmonic_distribution=harmonic_distribution,
+        n_samples=4000, use_angular_cumsum=True, kernel=kernel)
+    outputs = numpy_backend.harmonic_synthesis(
+        frequencies, amplitudes, harmonic_distribution=harmonic_distribution,
+        n_samples=4000, kernel=kernel)
+    self.assertAllClose(expected, outputs, atol=1e-3)
+
+  def test_oscillator_bank_has_no_phase_drift(self):
+    """Long signals match a float64 reference, unlike float32 cumsum."""
+    n_samples = 16000 * 60
+    frequencies = np.full([1, n_samples, 1], 4321.0, np.float32)
+    amplitudes = np.ones_like(frequencies)
+    phase = 2.0 * np.pi * 4321.0 * np.arange(1, n_samples + 1) / 16000.0
+    outputs = numpy_backend.oscillator_bank(frequencies, amplitudes)
+    self.assertAllClose(np.sin(phase)[np.newaxis], outputs, atol=1e-4)
+
+  @parameterized.named_parameters(
+      ('lti_same', [2, 1000], [2, 100], 'same', -1),
+      ('ltv_same', [2, 1000], [2, 10, 100], 'same', -1),
+      ('ltv_valid', [2, 1000], [2, 10, 100], 'valid', -1),
+      ('broadcast_batch', [3, 1000], [1, 10, 64], 'same', 0),
+  )
+  def test_fft_convolve(self, audio_shape, ir_shape, padding,
+                        delay_compensation):
+    audio = np.random.randn(*audio_shape).astype(np.float32)
+    ir = np.random.randn(*ir_shape).astype(np.float32)
+    if ir_shape[0] == 1:
+      # The TensorFlow version only broadcasts 2-D impulse responses.
+      tf_ir = np.tile(ir, [audio_shape[0], 1, 1])
+    else:
+      tf_ir = ir
+    expected = core.fft_convolve(audio, tf_ir, padding, delay_compensation)
+    outputs = numpy_backend.fft_convolve(audio, ir, padding, delay_compensation)
+    self.assertAllClose(expected, outputs, atol=1e-4)
+
+  @parameterized.named_parameters(
+      ('default_window', 0),
+      ('short_window', 65),
+  )
+  def test_frequency_impulse_response(self, window_size):
+    magnitudes = np.random.uniform(size=[2, 10, 129]).astype(np.float32)
+    expected = core.frequency_impulse_response(magnitudes, window_size)
+    outputs = numpy_backend.frequency_impulse_response(magnitudes, window_size)
+    self.assertAllClose(expected, outputs, atol=1e-5)
+
+
+class ProcessorGroupTest(parameterized.TestCase, tf.test.TestCase):
+
+  def setUp(self):
+    """Create some dummy input data for the chain."""
+    super().setUp()
+    self.n_batch = 2
+    # TensorFlow accumulates phase errors for long audio, keep it short.
+    self.n_frames = 50
+    self.n_samples = 4000
+    rand_signal = lambda ch: np.random.randn(self.n_batch, self.n_frames, ch)
+    self.nn_outputs = {
+        'amps': rand_signal(1),
+        'harmonic_distribution': rand_signal(20),
+        'magnitudes': rand_signal(33),
+        'f0_hz': 100 + 400 * np.random.uniform(size=[self.n_batch,
+                                                      self.n_frames, 1]),
+    }
+
+  def _get_dag(self, ir_size=1000):
+    harmonic = synths.Harmonic(n_samples=self.n_samples, name='harmonic',
+                               use_angular_cumsum=True)
+    noise = synths.FilteredNoise(n_samples=self.n_samples, name='noise')
+    add = processors.Add(name='add')
+    reverb = effects.Reverb(trainable=True, reverb_length=ir_size,
+                            name='reverb')
+    crop = processors.Crop(frame_size=200, crop_location='center')
+    return [
+        (harmonic, ['amps', 'harmonic_distribution', 'f0_hz']),
+        (noise, ['magnitudes']),
+        (add, ['noise/signal', 'harmonic/signal']),
+        (reverb, ['add/signal']),
+        (crop, ['reverb/signal']),
+    ]
+
+  def test_numpy_backend_matches_tensorflow(self):
+    # Use constant noise so that both backends render the same audio.
+    constant_noise = lambda shape, **unused_kwargs: 0.5 * tf.ones(shape)
+    group = processors.ProcessorGroup(dag=self._get_dag())
+    # Build the variables.
+    _ = group(self.nn_outputs)
+    group.reverb.set_weights([np.random.randn(1000) * 0.1])
+    with mock.patch.object(tf.random, 'uniform', constant_noise):
+      expected = group(self.nn_outputs).numpy()
+
+    np_group = numpy_backend.from_tf(group)
+    noise = 0.5 * np.ones([self.n_batch, self.n_samples], np.float32)
+    with mock.patch.object(np_group.processors['noise'], '_noise',
+                           return_value=noise):
+      outputs = np_group(self.nn_outputs)
+
+    self.assertIsInstance(outputs, np.ndarray)
+    self.assertEqual(outputs.shape, (self.n_batch, self.n_samples - 200))
+    # Differences are dominated by float32 phase accumulation in TensorFlow.
+    self.assertAllClose(expected, outputs, atol=5e-3)
+
+  def test_backend_argument(self):
+    group = processors.ProcessorGroup(dag=self._get_dag(), backend='numpy')
+    outputs = group(self.nn_outputs, return_outputs_dict=True)
+    self.assertIsInstance(outputs['signal'], np.ndarray)
+    self.assertEqual(outputs['signal'].shape,
+                     (self.n_batch, self.n_samples - 200))
+    self.assertIn('harmonic_distribution',
+                  outputs['controls']['harmonic']['controls'])
+
+  def test_backend_argument_converts_once(self):
+    group = processors.ProcessorGroup(dag=self._get_dag(), backend='numpy')
+    with mock.patch.object(numpy_backend, 'from_tf',
+                           wraps=numpy_backend.from_tf) as from_tf:
+      outputs = [group(self.nn_outputs) for _ in range(2)]
+    # Once for the group, which converts each of its processors.
+    converted = [args[0] for args, _ in from_tf.call_args_list]
+    self.assertEqual(converted.count(group), 1)
+    self.assertLen(converted, 1 + len(group.processors))
+    self.assertEqual(outputs[0].shape, outputs[1].shape)
+
+  def test_converts_processor_options(self):
+    harmonic = synths.Harmonic(n_samples=self.n_samples,
+                               oscillator_kernel='harmonic_sin')
+    reverb = effects.Reverb(trainable=True, reverb_length=1000,
+                            convolution_method='partitioned', block_size=256)
+    group = processors.ProcessorGroup(dag=[
+        (harmonic, ['amps', 'harmonic_distribution', 'f0_hz']),
+        (reverb, ['harmonic/signal']),
+    ])
+    _ = group(self.nn_outputs)
+    group.reverb.set_weights([np.random.randn(1000) * 0.1])
+    expected = group(self.nn_outputs).numpy()
+
+    np_group = numpy_backend.from_tf(group)
+    self.assertEqual(np_group.processors['harmonic'].oscillator_kernel,
+                     'harmonic_sin')
+    self.assertAllClose(expected, np_group(self.nn_outputs), atol=1e-3)
+
+  @parameterized.named_parameters(
+      ('amplitude_floor_db', dict(amplitude_floor_db=-80.0)),
+      ('ifft_lobe_bins', dict(ifft_lobe_bins=4)),
+  )
+  def test_raises_error_for_unsupported_harmonic_option(self, kwargs):
+    dag = [(synths.Harmonic(**kwargs), ['amps', 'harmonic_distribution',
+                                        'f0_hz'])]
+    group = processors.ProcessorGroup(dag=dag)
+    with self.assertRaisesRegex(ValueError, list(kwargs)[0]):
+      _ = numpy_backend.from_tf(group)
+
+  def test_raises_error_for_unsupported_processor(self):
+    dag = [(effects.ExpDecayReverb(), ['audio', 'gain', 'decay'])]
+    group = processors.ProcessorGroup(dag=dag)
+    with self.assertRaises(ValueError):
+      _ = numpy_backend.from_tf(group)
+
+  def test_raises_error_for_unknown_backend(self):
+    with self.assertRaises(ValueError):
+      _ = processors.ProcessorGroup(dag=self._get_dag(), backend='jax')
+
+
+if __name__ == '__main__':
+  tf.test.main()
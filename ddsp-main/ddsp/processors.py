@@ -24,7 +24,9 @@ from typing import Dict, Text
 
 from ddsp import core
 from ddsp import dags
+from ddsp import numpy_backend
 import gin
+import numpy as np
 import tensorflow as tf
 
 tfkl = tf.keras.layers
@@ -48,7 +50,10 @@ class Processor(tfkl.Layer):
   """
 
   def __init__(self, name: Text, trainable: bool = False):
-    super().__init__(name=name, trainable=trainable, autocast=False)
+    # Synthesize in float32 also under a mixed precision policy, since phase
+    # accumulation needs the precision.
+    super().__init__(name=name, trainable=trainable, autocast=False,
+                     dtype='float32')
 
   def call(self,
            *args: tf.Tensor,
@@ -80,7 +85,8 @@ class Processor(tfkl.Layer):
 class ProcessorGroup(dags.DAGLayer):
   """String Proccesor() objects together into a processor_group."""
 
-  def __init__(self, dag: dags.DAG, **kwarg_processors):
+  def __init__(self, dag: dags.DAG, backend: Text = 'tensorflow',
+               **kwarg_processors):
     """Constructor, completely configurable via gin.
 
     Args:
@@ -105,13 +111,27 @@ class ProcessorGroup(dags.DAGLayer):
         The graph is read sequentially and must be topologically sorted. This
         means that all inputs for a module must already be generated by earlier
         modules (or in the input dictionary).
+      backend: 'tensorflow' or 'numpy'. The 'numpy' backend runs the forward
+        pass of the processors with `ddsp.numpy_backend` and returns numpy
+        arrays. It is only for inference on CPU, and not differentiable. The
+        processors are converted on the first call, so later changes to their
+        variables are not used.
       **kwarg_processors: Processor instances to add to ProcessorGroup. Each
         kwarg Processor will be added as a property of the layer, so that it
         will be accessible as `processor_group.kwarg`. Also, other keras kwargs
         such as 'name' are split off before adding modules.
+
+    Raises:
+      ValueError: If backend is not 'tensorflow' or 'numpy'.
     """
+    if backend not in ('tensorflow', 'numpy'):
+      raise ValueError(f'Backend ({backend}) must be "tensorflow" or "numpy".')
+    # Cast controls from networks in a mixed precision policy to float32.
+    kwarg_processors.setdefault('dtype', 'float32')
     super().__init__(dag, **kwarg_processors)
     self.processor_names = self.module_names
+    self.backend = backend
+    self._numpy_processor_group = None
 
   @property
   def processors(self):
@@ -143,6 +163,11 @@ class ProcessorGroup(dags.DAGLayer):
     """
     # Also build layer on get_controls(), instead of just __call__().
     self.built = True
+    if self.backend == 'numpy':
+      if self._numpy_processor_group is None:
+        self._numpy_processor_group = numpy_backend.from_tf(self)
+      inputs = tf.nest.map_structure(np.asarray, inputs)
+      return self._numpy_processor_group.get_controls(inputs)
     return super().call(inputs, **kwargs)
 
   def get_signal(self, outputs: TensorDict) -> tf.Tensor:
@@ -14,15 +14,21 @@
 
 """Library of FFT operations for loss functions and conditioning."""
 
-import crepe
+import collections
+import functools
+
 from ddsp import core
+from ddsp import lazy_imports
 from ddsp.core import safe_log
 from ddsp.core import tf_float32
 import gin
-import librosa
 import numpy as np
 import tensorflow.compat.v2 as tf
-import tensorflow_probability as tfp
+
+# Slow to import, and only needed by some functions.
+crepe = lazy_imports.LazyModule('crepe')
+librosa = lazy_imports.LazyModule('librosa')
+tfp = lazy_imports.LazyModule('tensorflow_probability')
 
 CREPE_SAMPLE_RATE = 16000
 CREPE_FRAME_SIZE = 1024
@@ -257,10 +263,11 @@ def compute_loudness(audio,
                      range_db=DB_RANGE,
                      ref_db=0.0,
                      use_tf=True,
-                     padding='center'):
+                     padding='center',
+                     cache=None):
   """Perceptual loudness (weighted power) in dB.
 
-  Function is differentiable if use_tf=True.
+  Function is differentiable if use_tf=True (and not read from the cache).
   Args:
     audio: Numpy ndarray or tensor. Shape [batch_size, audio_length] or
       [audio_length,].
@@ -276,10 +283,24 @@ def compute_loudness(audio,
       calculations that have a natural scale for 0 dB being amplitude=1.0.
     use_tf: Make function differentiable by using tensorflow.
     padding: 'same', 'valid', or 'center'.
+    cache: Optional feature_cache.FeatureCache to look up and store the
+      loudness. Requires audio to be a numpy array or eager tensor.
 
   Returns:
     Loudness in decibels. Shape [batch_size, n_frames] or [n_frames,].
   """
+  if cache is not None:
+    audio = np.asarray(audio)
+    key = cache.get_key(audio, feature='loudness_db', sample_rate=sample_rate,
+                        frame_rate=frame_rate, n_fft=n_fft, range_db=range_db,
+                        ref_db=ref_db, use_tf=use_tf, padding=padding)
+    loudness = cache.get(key)
+    if loudness is None:
+      loudness = compute_loudness(audio, sample_rate, frame_rate, n_fft,
+                                  range_db, ref_db, use_tf, padding)
+      cache.put(key, np.asarray(loudness, dtype=np.float32))
+    return tf.constant(loudness) if use_tf else loudness
+
   # Pick tensorflow or numpy.
   lib = tf if use_tf else np
   reduce_mean = tf.reduce_mean if use_tf else np.mean
@@ -324,8 +345,112 @@ def compute_loudness(audio,
   return loudness
 
 
+class MultiResolutionSpectrogram(object):
+  """Magnitude spectrograms at several FFT sizes, and loudness, in one pass.
+
+  Computes the same values as compute_mag() at each FFT size, and
+  compute_loudness(use_tf=True, padding='center'), sharing the preprocessing
+  of the audio. Windows and A-weighting are created once at construction
+  instead of on every call.
+  """
+
+  def __init__(self,
+               fft_sizes=(2048, 1024, 512, 256, 128, 64),
+               overlap=0.75,
+               pad_end=True,
+               loudness_n_fft=None,
+               sample_rate=16000,
+               frame_rate=250,
+               range_db=DB_RANGE,
+               ref_db=0.0):
+    """Constructor.
+
+    Args:
+      fft_sizes: Frame sizes of the magnitude spectrograms.
+      overlap: Fraction of overlap of consecutive frames.
+      pad_end: Pad the end of the audio to fill the last frames.
+      loudness_n_fft: Fft size of the loudness, or None to skip loudness.
+      sample_rate: Audio sample rate in Hz, for the loudness.
+      frame_rate: Rate of loudness frames in Hz.
+      range_db: Dynamic range of the loudness in decibels.
+      ref_db: Reference maximum perceptual loudness.
+    """
+    self.fft_sizes = tuple(int(size) for size in fft_sizes)
+    self.overlap = overlap
+    self.pad_end = pad_end
+    self.loudness_n_fft = loudness_n_fft
+    self.sample_rate = sample_rate
+    self.frame_rate = frame_rate
+    self.range_db = range_db
+    self.ref_db = ref_db
+
+    # Numpy constants, so that they can be used in any graph.
+    self._windows = {size: self._hann_window(size) for size in self.fft_sizes}
+    if loudness_n_fft is not None:
+      self._windows[loudness_n_fft] = self._hann_window(loudness_n_fft)
+      frequencies = librosa.fft_frequencies(sr=sample_rate, n_fft=loudness_n_fft)
+      self._a_weighting = (10.0**(librosa.A_weighting(frequencies) / 10.0)
+                          ).astype(np.float32)
+
+  @staticmethod
+  def _hann_window(size):
+    """Periodic hann window, as in tf.signal.stft()."""
+    return (0.5 - 0.5 * np.cos(2.0 * np.pi * np.arange(size) / size)).astype(
+        np.float32)
+
+  def _stft(self, audio, frame_size, frame_step, pad_end):
+    """Windowed FFT of frames with a cached window."""
+    frames = tf.signal.frame(audio, frame_size, frame_step, pad_end=pad_end)
+    fft_size = int(2**np.ceil(np.log2(frame_size)))  # Enclosing power of 2.
+    return tf.signal.rfft(frames * self._windows[frame_size], [fft_size])
+
+  def __call__(self, audio):
+    """Compute spectrograms and loudness.
+
+    Args:
+      audio: Tensor of shape [batch_size, n_samples] or [batch_size, n_samples,
+        1].
+
+    Returns:
+      mags: List of magnitude spectrograms, one for each of fft_sizes. Shape
+        [batch_size, n_frames, n_bins].
+      loudness: Loudness in decibels of shape [batch_size, n_frames], or None if
+        loudness_n_fft is None.
+    """
+    audio = tf_float32(audio)
+    if len(audio.shape) == 3:
+      audio = tf.squeeze(audio, axis=-1)
+
+    mags = []
+    for size in self.fft_sizes:
+      frame_step = int(size * (1.0 - self.overlap))
+      mags.append(tf.abs(self._stft(audio, size, frame_step, self.pad_end)))
+
+    loudness = None
+    if self.loudness_n_fft is not None:
+      frame_size = self.loudness_n_fft
+      hop_size = self.sample_rate // self.frame_rate
+      # Same rounding of the hop size as compute_loudness().
+      overlap = 1 - hop_size / frame_size
+      frame_step = int(frame_size * (1.0 - overlap))
+      padded = pad(audio, frame_size, hop_size, padding='center')
+      s = self._stft(padded, frame_size, frame_step, pad_end=False)
+      power = tf.abs(s)**2 * self._a_weighting
+      loudness = core.power_to_db(tf.reduce_mean(power, axis=-1),
+                                  ref_db=self.ref_db,
+                                  range_db=self.range_db,
+                                  use_tf=True)
+    return mags, loudness
+
+
 @gin.register
-def compute_f0(audio, frame_rate, viterbi=True, padding='center'):
+def compute_f0(audio,
+               frame_rate,
+               viterbi=True,
+               padding='center',
+               model_capacity='full',
+               cache=None,
+               viterbi_method='full'):
   """Fundamental frequency (f0) estimate using CREPE.
 
   This function is non-differentiable and takes input as a numpy array.
@@ -335,11 +460,32 @@ def compute_f0(audio, frame_rate, viterbi=True, padding='center'):
     viterbi: Use Viterbi decoding to estimate f0.
     padding: Apply zero-padding for centered frames.
       'same', 'valid', or 'center'.
+    model_capacity: Size of the CREPE model, 'tiny', 'small', 'medium',
+      'large', or 'full'.
+    cache: Optional feature_cache.FeatureCache to look up and store the f0
+      and confidence.
+    viterbi_method: 'full' uses the viterbi decoding of the crepe package.
+      'banded' uses viterbi_decode_banded() with the hidden Markov model of the
+      crepe package, which is much faster for long audio.
 
   Returns:
     f0_hz: Fundamental frequency in Hz. Shape [n_frames,].
     f0_confidence: Confidence in Hz estimate (scaled [0, 1]). Shape [n_frames,].
   """
+  if cache is not None:
+    audio = np.asarray(audio)
+    key = cache.get_key(audio, feature='f0', estimator='crepe',
+                        frame_rate=frame_rate, viterbi=viterbi, padding=padding,
+                        model_capacity=model_capacity,
+                        viterbi_method=viterbi_method)
+    f0 = cache.get(key)
+    if f0 is None:
+      f0 = np.stack(compute_f0(audio, frame_rate, viterbi, padding,
+                               model_capacity, viterbi_method=viterbi_method))
+      cache.put(key, f0)
+    f0_hz, f0_confidence = f0
+    return f0_hz, f0_confidence
+
   sample_rate = CREPE_SAMPLE_RATE
   crepe_step_size = 1000 / frame_rate  # milliseconds
   hop_size = sample_rate // frame_rate
@@ -347,15 +493,28 @@ def compute_f0(audio, frame_rate, viterbi=True, padding='center'):
   audio = pad(audio, CREPE_FRAME_SIZE, hop_size, padding)
   audio = np.asarray(audio)
 
+  if viterbi_method not in ('full', 'banded'):
+    raise ValueError('`viterbi_method` must be one of [\'full\', \'banded\'], '
+                     f'received ({viterbi_method}).')
+  banded = viterbi and viterbi_method == 'banded'
+
   # Compute f0 with crepe.
-  _, f0_hz, f0_confidence, _ = crepe.predict(
+  _, f0_hz, f0_confidence, activation = crepe.predict(
       audio,
       sr=sample_rate,
-      viterbi=viterbi,
+      model_capacity=model_capacity,
+      viterbi=viterbi and not banded,
       step_size=crepe_step_size,
       center=False,
       verbose=0)
 
+  if banded:
+    centers = viterbi_decode_banded(activation[np.newaxis], min_transition=0.0,
+                                    argmax_observations=True)[0]
+    f0_hz, f0_confidence = PretrainedCREPE.activations_to_f0_and_confidence(
+        tf_float32(activation), centers)
+    f0_hz, f0_confidence = f0_hz.numpy(), f0_confidence.numpy()[:, 0]
+
   # Postprocessing.
   f0_hz = f0_hz.astype(np.float32)
   f0_confidence = f0_confidence.astype(np.float32)
@@ -364,6 +523,51 @@ def compute_f0(audio, frame_rate, viterbi=True, padding='center'):
   return f0_hz, f0_confidence
 
 
+@functools.lru_cache(maxsize=None)
+def _get_pretrained_crepe(model_capacity, hop_size):
+  return PretrainedCREPE(model_capacity, hop_size=hop_size)
+
+
+@gin.register
+def compute_f0_batched(audios,
+                       frame_rate,
+                       viterbi=True,
+                       padding='center',
+                       model_capacity='full',
+                       frames_per_batch=2048,
+                       viterbi_method='full'):
+  """Fundamental frequency (f0) estimates for many examples using CREPE.
+
+  Unlike compute_f0(), which runs `crepe.predict` one example at a time, this
+  packs the frames of all examples into fixed size batches for a single
+  PretrainedCREPE model, and scatters the results back to each example.
+
+  Args:
+    audios: Iterable (such as a list or generator) of audio examples at 16kHz.
+      Each example has shape [audio_length,].
+    frame_rate: Rate of f0 frames in Hz.
+    viterbi: Use Viterbi decoding to estimate f0.
+    padding: Apply zero-padding for centered frames.
+      'same', 'valid', or 'center'.
+    model_capacity: Size of the CREPE model, 'tiny', 'small', 'medium',
+      'large', or 'full'.
+    frames_per_batch: Number of frames per a batch through the network.
+    viterbi_method: 'full' or 'banded', see PretrainedCREPE.decode_activations.
+
+  Yields:
+    f0_hz: Fundamental frequency in Hz. Shape [n_frames,], for each example.
+    f0_confidence: Confidence in Hz estimate (scaled [0, 1]). Shape
+      [n_frames,], for each example.
+  """
+  hop_size = CREPE_SAMPLE_RATE // frame_rate
+  model = _get_pretrained_crepe(model_capacity, hop_size)
+  for f0_hz, f0_confidence in model.predict_f0_and_confidence_batched(
+      audios, frames_per_batch, viterbi=viterbi, padding=padding,
+      viterbi_method=viterbi_method):
+    f0_confidence = np.nan_to_num(f0_confidence)
+    yield f0_hz.astype(np.float32), f0_confidence.astype(np.float32)
+
+
 def pad_or_trim_to_expected_length(vector,
                                    expected_len,
                                    pad_value=0,
@@ -500,28 +704,146 @@ class PretrainedCREPE(tf.keras.Model):
     frames /= std[:, None]
     return frames
 
-  def predict_f0_and_confidence(self, audio, viterbi=False, padding='center'):
-    audio = audio[None, :] if len(audio.shape) == 1 else audio
-    batch_size = audio.shape[0]
-
-    audio = pad(audio, self.frame_size, self.hop_size, padding=padding)
-
-    frames = self.batch_frames(audio)
+  def predict_activations(self, frames):
+    """Run normalized frames of shape [n_frames, frame_size] through CREPE."""
     frames = self.normalize_frames(frames)
-    acts = self.core_model(frames, training=False)
-
+    return self.core_model(frames, training=False)
+
+  def decode_activations(self, acts, viterbi=False, viterbi_method='full'):
+    """Convert activations to f0 and confidence.
+
+    Args:
+      acts: CREPE activations. Shape [batch, n_frames, 360].
+      viterbi: Use viterbi decoding to estimate f0.
+      viterbi_method: 'full' decodes with a tfp HiddenMarkovModel of the dense
+        360x360 transition matrix. 'banded' uses viterbi_decode_banded(), which
+        gives the same results in O(n_frames * 360 * 25).
+
+    Returns:
+      f0_hz: Shape [batch, n_frames].
+      confidence: Shape [batch, n_frames].
+
+    Raises:
+      ValueError: If viterbi_method is not 'full' or 'banded'.
+    """
+    batch_size = acts.shape[0]
     if viterbi:
-      acts_viterbi = tf.reshape(acts, [batch_size, -1, 360])
-      centers = self.viterbi_decode(acts_viterbi)
+      if viterbi_method == 'full':
+        centers = self.viterbi_decode(acts)
+      elif viterbi_method == 'banded':
+        centers = viterbi_decode_banded(acts)
+      else:
+        raise ValueError('`viterbi_method` must be one of [\'full\', '
+                         f'\'banded\'], received ({viterbi_method}).')
       centers = tf.reshape(centers, [-1])
     else:
       centers = None
 
+    acts = tf.reshape(acts, [-1, 360])
     f0_hz, confidence = self.activations_to_f0_and_confidence(acts, centers)
     f0_hz = tf.reshape(f0_hz, [batch_size, -1])
     confidence = tf.reshape(confidence, [batch_size, -1])
     return f0_hz, confidence
 
+  def predict_f0_and_confidence(self, audio, viterbi=False, padding='center',
+                                viterbi_method='full'):
+    audio = audio[None, :] if len(audio.shape) == 1 else audio
+    batch_size = audio.shape[0]
+
+    audio = pad(audio, self.frame_size, self.hop_size, padding=padding)
+
+    frames = self.batch_frames(audio)
+    acts = self.predict_activations(frames)
+    acts = tf.reshape(acts, [batch_size, -1, 360])
+    return self.decode_activations(acts, viterbi, viterbi_method)
+
+  def predict_f0_and_confidence_batched(self,
+                                        audios,
+                                        frames_per_batch=2048,
+                                        viterbi=False,
+                                        padding='center',
+                                        viterbi_method='full'):
+    """Predict f0 for many examples of different lengths.
+
+    Frames from all the examples are packed into a single stream of batches
+    with a fixed number of frames, so the network runs on full batches
+    regardless of the length of each example. The activations are then
+    scattered back to each example and decoded separately.
+
+    Args:
+      audios: Iterable (such as a list or generator) of audio examples at
+        16kHz. Each example has shape [audio_length,].
+      frames_per_batch: Number of frames per a batch through the network.
+      viterbi: Use viterbi decoding to estimate f0.
+      padding: Apply zero-padding for centered frames.
+        'same', 'valid', or 'center'.
+      viterbi_method: 'full' or 'banded', see decode_activations().
+
+    Yields:
+      f0_hz: Numpy array of shape [n_frames,] for each example, in order.
+      confidence: Numpy array of shape [n_frames,] for each example, in order.
+    """
+    frames = collections.deque()  # Frames waiting for a batch.
+    n_frames_per_example = collections.deque()  # Examples waiting for acts.
+    acts = collections.deque()  # Activations waiting for an example.
+    n_acts = 0
+
+    def take(chunks, n):
+      """Remove the first n rows of a deque of arrays, copying only those."""
+      taken = []
+      while n > 0:
+        chunk = chunks.popleft()
+        if chunk.shape[0] > n:
+          chunks.appendleft(chunk[n:])
+          chunk = chunk[:n]
+        taken.append(chunk)
+        n -= chunk.shape[0]
+      return np.concatenate(taken, axis=0)
+
+    def run_batch(n_frames):
+      """Run a batch of frames, padding the final batch with silence."""
+      nonlocal n_acts
+      batch = take(frames, n_frames)
+      if n_frames < frames_per_batch:
+        batch = np.pad(batch, [(0, frames_per_batch - n_frames), (0, 0)])
+      acts.append(self.predict_activations(batch)[:n_frames].numpy())
+      n_acts += n_frames
+
+    def scatter():
+      """Decode examples that have all of their activations."""
+      nonlocal n_acts
+      while n_frames_per_example and n_frames_per_example[0] <= n_acts:
+        n_frames = n_frames_per_example.popleft()
+        if n_frames == 0:
+          yield np.zeros([0], np.float32), np.zeros([0], np.float32)
+          continue
+        example_acts = tf.constant(take(acts, n_frames)[np.newaxis])
+        n_acts -= n_frames
+        f0_hz, confidence = self.decode_activations(example_acts, viterbi,
+                                                    viterbi_method)
+        yield f0_hz[0].numpy(), confidence[0].numpy()
+
+    n_buffered = 0
+    for audio in audios:
+      audio = pad(audio, self.frame_size, self.hop_size, padding=padding)
+      if audio.shape[0] >= self.frame_size:
+        example_frames = tf.signal.frame(
+            audio, self.frame_size, self.hop_size).numpy()
+      else:
+        example_frames = np.zeros([0, self.frame_size], np.float32)
+      frames.append(example_frames)
+      n_frames_per_example.append(example_frames.shape[0])
+      n_buffered += example_frames.shape[0]
+
+      while n_buffered >= frames_per_batch:
+        run_batch(frames_per_batch)
+        n_buffered -= frames_per_batch
+        yield from scatter()
+
+    if n_buffered:
+      run_batch(n_buffered)
+    yield from scatter()
+
   def create_hmm(self, num_steps):
     """Same as the original CREPE viterbi decdoding, but in TF."""
     # Initial distribution is uniform.
@@ -564,3 +886,165 @@ class PretrainedCREPE(tf.keras.Model):
     return centers
 
 
+def _running_max(x, prefer_earlier=True):
+  """Running max and argmax along the last axis, with log(n) shifted maxes.
+
+  Args:
+    x: Tensor of shape [batch, n].
+    prefer_earlier: Return the earliest index for ties, else the latest.
+
+  Returns:
+    values: Maximum of x[:, :i + 1] for each i. Shape [batch, n].
+    indices: Index of the maximum. Shape [batch, n].
+  """
+  n = int(x.shape[-1])
+  values = x
+  indices = tf.broadcast_to(tf.range(n), tf.shape(x))
+  shift = 1
+  while shift < n:
+    shifted_values = tf.pad(values[:, :-shift], [[0, 0], [shift, 0]],
+                            constant_values=-np.inf)
+    shifted_indices = tf.pad(indices[:, :-shift], [[0, 0], [shift, 0]])
+    if prefer_earlier:
+      take = shifted_values >= values
+    else:
+      take = shifted_values > values
+    values = tf.where(take, shifted_values, values)
+    indices = tf.where(take, shifted_indices, indices)
+    shift *= 2
+  return values, indices
+
+
+@tf.function(reduce_retracing=True)
+def _banded_viterbi(emissions, log_band, log_off_band, band_width):
+  """Viterbi decoding with a banded (plus constant) transition matrix.
+
+  Args:
+    emissions: Log emission probabilities. Shape [batch, n_steps, n_states].
+    log_band: Log transition probabilities into state j from states
+      i = j - band_width, ..., j + band_width. Shape
+      [n_states, 2 * band_width + 1], -inf for states out of range.
+    log_off_band: Log transition probability out of state i for all states
+      further than band_width. Shape [n_states].
+    band_width: Number of states to each side with a banded transition.
+
+  Returns:
+    Most likely states. Shape [batch, n_steps].
+  """
+  n_states = int(emissions.shape[-1])
+  offset = band_width + 1  # Nearest state outside the band.
+  states = tf.range(n_states)
+
+  def forward(carry, emission):
+    delta, _ = carry
+    # Within the band, gather the 2 * band_width + 1 neighbors of each state.
+    padded = tf.pad(delta, [[0, 0], [band_width, band_width]],
+                    constant_values=-np.inf)
+    neighbors = tf.signal.frame(padded, 2 * band_width + 1, 1)
+    band_scores = neighbors + log_band[tf.newaxis]
+    band_max = tf.reduce_max(band_scores, axis=-1)
+    band_arg = tf.cast(tf.argmax(band_scores, axis=-1), tf.int32)
+    band_arg += states[tf.newaxis] - band_width
+
+    # Outside the band, the running max of all states below and above.
+    off = delta + log_off_band[tf.newaxis]
+    below, below_arg = _running_max(off)
+    above, above_arg = _running_max(off[:, ::-1], prefer_earlier=False)
+    above, above_arg = above[:, ::-1], n_states - 1 - above_arg[:, ::-1]
+    below = tf.pad(below[:, :-offset], [[0, 0], [offset, 0]],
+                   constant_values=-np.inf)
+    below_arg = tf.pad(below_arg[:, :-offset], [[0, 0], [offset, 0]])
+    above = tf.pad(above[:, offset:], [[0, 0], [0, offset]],
+                   constant_values=-np.inf)
+    above_arg = tf.pad(above_arg[:, offset:], [[0, 0], [0, offset]])
+
+    # Combine, preferring the lowest state for ties.
+    take_below = (below >= band_max) & (below >= above)
+    take_band = tf.logical_not(take_below) & (band_max >= above)
+    best = tf.maximum(tf.maximum(below, band_max), above)
+    best_arg = tf.where(take_below, below_arg,
+                        tf.where(take_band, band_arg, above_arg))
+    return best + emission, best_arg
+
+  emissions = tf.transpose(emissions, [1, 0, 2])  # [n_steps, batch, n_states]
+  delta_0 = emissions[0] - tf.math.log(float(n_states))
+  deltas, backpointers = tf.scan(
+      forward, emissions[1:],
+      initializer=(delta_0, tf.zeros_like(delta_0, dtype=tf.int32)))
+
+  # Backtrack from the most likely final state.
+  last_delta = tf.concat([delta_0[tf.newaxis], deltas], axis=0)[-1]
+  last_state = tf.cast(tf.argmax(last_delta, axis=-1), tf.int32)
+  backtrack = lambda state, pointers: tf.gather(pointers, state, batch_dims=1)
+  path = tf.scan(backtrack, backpointers, initializer=last_state,
+                 reverse=True)
+  path = tf.concat([path, last_state[tf.newaxis]], axis=0)
+  return tf.transpose(path)
+
+
+def viterbi_decode_banded(acts, band_width=12, min_transition=1e-5,
+                          self_emission=0.1, argmax_observations=False):
+  """Viterbi decoding of CREPE activations with a banded transition matrix.
+
+  By default, decodes the same hidden Markov model as
+  PretrainedCREPE.create_hmm(), whose transition probabilities are
+  proportional to max(12 - |i - j|, min_transition), and which observes all
+  activations of a frame. With min_transition=0 and argmax_observations=True,
+  decodes the model of the crepe package (crepe.core.to_viterbi_cents()),
+  which only observes the most likely bin of each frame. Instead of a dense 360x360 transition matrix, transitions
+  within `band_width` bins are gathered explicitly, and the constant transition
+  probability to all further bins is found with a running max over states.
+  This takes O(n_frames * 360 * (2 * band_width + 1)) instead of
+  O(n_frames * 360^2), and works on a batch of examples.
+
+  Args:
+    acts: CREPE activations. Shape [batch, n_frames, 360].
+    band_width: Bins to each side with a transition probability larger than
+      min_transition. Must be at least 11 to reproduce create_hmm().
+    min_transition: Transition probability (before normalizing) to bins further
+      than band_width.
+    self_emission: Probability of observing the hidden bin.
+    argmax_observations: Observe only the most likely bin of each frame, as in
+      the crepe package, instead of all activations.
+
+  Returns:
+    Most likely bin for each frame. Int32 Tensor of shape [batch, n_frames].
+  """
+  acts = tf_float32(acts)
+  n_bins = int(acts.shape[-1])
+  if argmax_observations:
+    acts = tf.one_hot(tf.argmax(acts, axis=-1), n_bins)
+  if int(acts.shape[1]) <= 1:
+    # No transitions, the initial distribution is uniform.
+    return tf.cast(tf.argmax(acts, axis=-1), tf.int32)
+
+  # Transition matrix of create_hmm(), normalized over the destination bins.
+  bins = np.arange(n_bins, dtype=np.float32)
+  distance = np.abs(bins[:, np.newaxis] - bins[np.newaxis, :])
+  transition = np.maximum(12.0 - distance, min_transition).astype(np.float32)
+  transition /= np.sum(transition, axis=1, keepdims=True)
+  with np.errstate(divide='ignore'):  # Impossible transitions are -inf.
+    log_transition = np.log(transition)
+
+  # Band of sources i = j + k - band_width for each destination j.
+  k = np.arange(2 * band_width + 1)
+  sources = bins.astype(np.int32)[:, np.newaxis] + k - band_width
+  in_range = (sources >= 0) & (sources < n_bins)
+  log_band = np.where(
+      in_range,
+      log_transition[np.clip(sources, 0, n_bins - 1),
+                     np.arange(n_bins)[:, np.newaxis]],
+      -np.inf).astype(np.float32)
+  with np.errstate(divide='ignore'):
+    log_off_band = np.log(
+        min_transition / np.sum(np.maximum(12.0 - distance, min_transition),
+                                axis=1)).astype(np.float32)
+
+  # Log-likelihood of the multinomial observation model in create_hmm(), up
+  # to a constant that is the same for all bins.
+  other_emission = (1.0 - self_emission) / n_bins
+  emissions = acts * float(np.log((self_emission + other_emission) /
+                                  other_emission))
+
+  return _banded_viterbi(emissions, tf.constant(log_band),
+                         tf.constant(log_off_band), band_width)
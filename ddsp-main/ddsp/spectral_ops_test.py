@@ -14,7 +14,11 @@
 
 """Tests for ddsp.losses."""
 
+import os
+import tempfile
+
 from absl.testing import parameterized
+from ddsp import feature_cache
 from ddsp import spectral_ops
 from ddsp.test_util import gen_np_sinusoid
 import numpy as np
@@ -57,6 +61,42 @@ class LoudnessTest(tf.test.TestCase):
 
     self.assertAllClose(np.abs(ld_np), np.abs(ld_tf), rtol=1e-3, atol=1e-3)
 
+  def test_cache_keeps_tf_and_np_loudness_apart(self):
+    audio = np.random.RandomState(0).randn(16000).astype(np.float32)
+    cache = feature_cache.FeatureCache(tempfile.mkdtemp(dir=self.get_temp_dir()))
+
+    ld_np = spectral_ops.compute_loudness(audio, use_tf=False, cache=cache)
+    ld_tf = spectral_ops.compute_loudness(audio, use_tf=True, cache=cache)
+
+    self.assertEqual(cache.misses, 2)
+    self.assertIsInstance(ld_np, np.ndarray)
+    self.assertAllClose(ld_tf, spectral_ops.compute_loudness(audio))
+
+
+class MultiResolutionSpectrogramTest(tf.test.TestCase):
+
+  def test_matches_compute_mag_and_loudness(self):
+    audio = np.random.RandomState(0).randn(2, 8000).astype(np.float32)
+    fft_sizes = (2048, 512, 64)
+    spectrogram = spectral_ops.MultiResolutionSpectrogram(
+        fft_sizes=fft_sizes, loudness_n_fft=2048)
+
+    mags, loudness = spectrogram(audio[..., np.newaxis])
+
+    for size, mag in zip(fft_sizes, mags):
+      self.assertAllClose(mag, spectral_ops.compute_mag(audio, size=size),
+                          rtol=1e-4, atol=1e-4)
+    self.assertAllClose(
+        loudness,
+        spectral_ops.compute_loudness(audio, n_fft=2048, use_tf=True),
+        rtol=1e-4, atol=1e-4)
+
+  def test_loudness_is_optional(self):
+    spectrogram = spectral_ops.MultiResolutionSpectrogram(fft_sizes=(256,))
+    mags, loudness = spectrogram(tf.zeros([1, 1000]))
+    self.assertLen(mags, 1)
+    self.assertIsNone(loudness)
+
 
 class PadOrTrimVectorToExpectedLengthTest(parameterized.TestCase,
                                           tf.test.TestCase):
@@ -289,5 +329,163 @@ class PadTest(parameterized.TestCase, tf.test.TestCase):
     self.assertEqual(n_t_pad, exp_n_t_pad)
 
 
+def crepe_hmm(salience):
+  """Log probabilities of the HMM of crepe.core.to_viterbi_cents().
+
+  Args:
+    salience: CREPE activations of shape [n_frames, 360].
+
+  Returns:
+    log_transition: Shape [360, 360], from state i to state j.
+    log_emission: Log probability of the observation of each frame (the most
+      likely bin) in each state. Shape [n_frames, 360].
+  """
+  xx, yy = np.meshgrid(range(360), range(360))
+  transition = np.maximum(12 - abs(xx - yy), 0)
+  transition = transition / np.sum(transition, axis=1)[:, None]
+  self_emission = 0.1
+  emission = (np.eye(360) * self_emission + np.ones(shape=(360, 360)) *
+              ((1 - self_emission) / 360))
+  with np.errstate(divide='ignore'):
+    log_transition = np.log(transition)
+  observations = np.argmax(salience, axis=1)
+  return log_transition, np.log(emission[:, observations]).T
+
+
+def crepe_viterbi_path(salience):
+  """Viterbi path of crepe.core.to_viterbi_cents(), without hmmlearn.
+
+  The same algorithm and tie breaking as hmmlearn's MultinomialHMM.predict(),
+  in float64.
+
+  Args:
+    salience: CREPE activations of shape [n_frames, 360].
+
+  Returns:
+    Most likely bin for each frame. Shape [n_frames].
+  """
+  log_transition, log_emission = crepe_hmm(salience)
+  lattice = np.log(np.ones(360) / 360) + log_emission[0]
+  lattices = [lattice]
+  for t in range(1, len(salience)):
+    lattice = np.max(lattice[:, None] + log_transition, axis=0)
+    lattice += log_emission[t]
+    lattices.append(lattice)
+  path = [int(np.argmax(lattices[-1]))]
+  for lattice in lattices[-2::-1]:
+    path.append(int(np.argmax(lattice + log_transition[:, path[-1]])))
+  return np.array(path[::-1])
+
+
+def crepe_path_log_prob(salience, path):
+  """Log probability of a path and the observations in the crepe HMM."""
+  log_transition, log_emission = crepe_hmm(salience)
+  return (np.log(1 / 360) + np.sum(log_emission[np.arange(len(path)), path]) +
+          np.sum(log_transition[path[:-1], path[1:]]))
+
+
+class PretrainedCREPEBatchedTest(parameterized.TestCase, tf.test.TestCase):
+
+  def setUp(self):
+    """Create a small stand-in for the CREPE network."""
+    super().setUp()
+    core_model = tf.keras.Sequential([
+        tf.keras.layers.Dense(360, activation='sigmoid', input_shape=[1024]),
+    ])
+    model_path = os.path.join(tempfile.mkdtemp(dir=self.get_temp_dir()),
+                              'crepe.keras')
+    core_model.save(model_path)
+    self.model = spectral_ops.PretrainedCREPE(model_path, hop_size=64)
+    lengths = [16000, 300, 5000, 0, 12345]
+    self.audios = [np.random.randn(n).astype(np.float32) for n in lengths]
+
+  @parameterized.named_parameters(
+      ('small_batches', 7, 'center'),
+      ('large_batches', 1000, 'center'),
+      ('same', 50, 'same'),
+      ('valid', 50, 'valid'),
+  )
+  def test_batched_matches_single_examples(self, frames_per_batch, padding):
+    results = list(self.model.predict_f0_and_confidence_batched(
+        iter(self.audios), frames_per_batch=frames_per_batch, padding=padding))
+    self.assertLen(results, len(self.audios))
+
+    for audio, (f0_hz, confidence) in zip(self.audios, results):
+      n_frames, _ = spectral_ops.get_framed_lengths(
+          len(audio), 1024, 64, padding)
+      n_frames = max(n_frames, 0)
+      self.assertEqual(f0_hz.shape, (n_frames,))
+      self.assertEqual(confidence.shape, (n_frames,))
+      if n_frames:
+        expected_f0_hz, expected_confidence = (
+            self.model.predict_f0_and_confidence(audio, padding=padding))
+        self.assertAllClose(expected_f0_hz[0], f0_hz, rtol=1e-4)
+        self.assertAllClose(expected_confidence[0], confidence, rtol=1e-4)
+
+  def test_batched_banded_viterbi_matches_single_examples(self):
+    results = list(self.model.predict_f0_and_confidence_batched(
+        iter(self.audios), frames_per_batch=100, viterbi=True,
+        viterbi_method='banded'))
+    for audio, (f0_hz, confidence) in zip(self.audios, results):
+      if len(f0_hz):
+        expected_f0_hz, expected_confidence = (
+            self.model.predict_f0_and_confidence(
+                audio, viterbi=True, viterbi_method='banded'))
+        self.assertAllClose(expected_f0_hz[0], f0_hz, rtol=1e-4)
+        self.assertAllClose(expected_confidence[0], confidence, rtol=1e-4)
+
+  @parameterized.named_parameters(
+      ('single_frame', 1),
+      ('short', 20),
+      ('long', 500),
+  )
+  def test_banded_viterbi_matches_full_viterbi(self, n_frames):
+    """Compare to the dense HMM on activations peaked around a pitch contour."""
+    rng = np.random.RandomState(0)
+    batch_size = 3
+    acts = 0.2 * rng.rand(batch_size, n_frames, 360)
+    for b in range(batch_size):
+      contour = 180 + 100 * np.sin(np.arange(n_frames) / (10.0 + b))
+      # Octave jumps.
+      contour[n_frames // 2:] += 60 * (b - 1)
+      contour = np.clip(contour.astype(np.int32), 0, 359)
+      acts[b, np.arange(n_frames), contour] += rng.uniform(0.3, 1.0, n_frames)
+    acts = acts.astype(np.float32)
+
+    expected = self.model.viterbi_decode(acts)
+    centers = spectral_ops.viterbi_decode_banded(acts)
+    self.assertEqual(centers.shape, (batch_size, n_frames))
+    self.assertAllEqual(expected, centers)
+
+  @parameterized.named_parameters(
+      ('single_frame', 1),
+      ('short', 20),
+      ('long', 500),
+  )
+  def test_banded_viterbi_matches_crepe_viterbi(self, n_frames):
+    """Compare to the argmax observation HMM of the crepe package."""
+    rng = np.random.RandomState(1)
+    batch_size = 3
+    acts = 0.2 * rng.rand(batch_size, n_frames, 360)
+    for b in range(batch_size):
+      contour = 180 + 100 * np.sin(np.arange(n_frames) / (10.0 + b))
+      # Octave jumps, and frames observing an unrelated bin.
+      contour[n_frames // 2:] += 60 * (b - 1)
+      outliers = rng.rand(n_frames) < 0.1
+      contour[outliers] = rng.randint(0, 360, np.sum(outliers))
+      contour = np.clip(contour.astype(np.int32), 0, 359)
+      acts[b, np.arange(n_frames), contour] += rng.uniform(0.3, 1.0, n_frames)
+    acts = acts.astype(np.float32)
+
+    centers = spectral_ops.viterbi_decode_banded(
+        acts, min_transition=0.0, argmax_observations=True).numpy()
+    for b in range(batch_size):
+      expected = crepe_viterbi_path(acts[b])
+      # Equally likely paths, up to ties broken differently in float32.
+      self.assertAllClose(crepe_path_log_prob(acts[b], expected),
+                          crepe_path_log_prob(acts[b], centers[b]), rtol=1e-9)
+      self.assertGreaterEqual(np.mean(expected == centers[b]), 0.99)
+
+
 if __name__ == '__main__':
   tf.test.main()
@@ -63,6 +63,10 @@ class Harmonic(processors.Processor):
                normalize_below_nyquist=True,
                amp_resample_method='window',
                use_angular_cumsum=False,
+               amplitude_floor_db=None,
+               prune_block_size=1024,
+               oscillator_kernel='sin',
+               ifft_lobe_bins=None,
                name='harmonic'):
     """Constructor.
 
@@ -81,6 +85,25 @@ class Harmonic(processors.Processor):
         audio samples, consider use_angular_cumsum to avoid accumulating
         noticible phase errors due to the limited precision of tf.cumsum.
         However, using angular cumulative sum is slower on accelerators.
+      amplitude_floor_db: If not None, use core.sparse_harmonic_synthesis() to
+        skip synthesizing harmonics that stay below this amplitude (dB) or
+        above nyquist for a block of samples. Faster for inference, but
+        harmonics are pruned without gradients. The outputs dict of the
+        processor then also has the 'error_bound' of the pruning, of shape
+        [batch].
+      prune_block_size: Samples per a block of harmonic pruning, only used if
+        amplitude_floor_db is not None.
+      oscillator_kernel: How to compute the harmonic sinusoids, one of
+        core.OSCILLATOR_KERNELS, see core.harmonic_synthesis(). 'harmonic_sin'
+        only accumulates the phase of the fundamental, which is more accurate
+        for long audio and faster on CPU (about 4-6x for 20-100 harmonics),
+        but doesn't support harmonic shifts. Not used if amplitude_floor_db is
+        not None.
+      ifft_lobe_bins: If not None, use core.ifft_harmonic_synthesis() with
+        this many bins per a side of each harmonic, instead of an oscillator
+        bank. Fastest for many harmonics and high sample rates, but n_samples
+        must be a multiple of the number of frames, and amp_resample_method,
+        use_angular_cumsum, and amplitude_floor_db are not used.
       name: Synth name.
     """
     super().__init__(name=name)
@@ -90,6 +113,37 @@ class Harmonic(processors.Processor):
     self.normalize_below_nyquist = normalize_below_nyquist
     self.amp_resample_method = amp_resample_method
     self.use_angular_cumsum = use_angular_cumsum
+    self.amplitude_floor_db = amplitude_floor_db
+    self.prune_block_size = prune_block_size
+    self.oscillator_kernel = oscillator_kernel
+    self.ifft_lobe_bins = ifft_lobe_bins
+
+  def call(self, *args, return_outputs_dict=False, **kwargs):
+    """Processor.call(), with the error bound of pruned harmonics."""
+    prunes_harmonics = (self.ifft_lobe_bins is None and
+                        self.amplitude_floor_db is not None)
+    if not (return_outputs_dict and prunes_harmonics):
+      return super().call(
+          *args, return_outputs_dict=return_outputs_dict, **kwargs)
+    for k in ['training', 'mask']:
+      kwargs.pop(k, None)
+    controls = self.get_controls(*args, **kwargs)
+    signal, error_bound = self._sparse_harmonic_synthesis(**controls)
+    return dict(signal=signal, controls=controls, error_bound=error_bound)
+
+  def _sparse_harmonic_synthesis(self, amplitudes, harmonic_distribution,
+                                 f0_hz):
+    """Audio and error bound of core.sparse_harmonic_synthesis()."""
+    return core.sparse_harmonic_synthesis(
+        frequencies=f0_hz,
+        amplitudes=amplitudes,
+        harmonic_distribution=harmonic_distribution,
+        n_samples=self.n_samples,
+        sample_rate=self.sample_rate,
+        amp_resample_method=self.amp_resample_method,
+        use_angular_cumsum=self.use_angular_cumsum,
+        amplitude_floor_db=self.amplitude_floor_db,
+        block_size=self.prune_block_size)
 
   def get_controls(self,
                    amplitudes,
@@ -135,6 +189,20 @@ class Harmonic(processors.Processor):
     Returns:
       signal: A tensor of harmonic waves of shape [batch, n_samples].
     """
+    if self.ifft_lobe_bins is not None:
+      return core.ifft_harmonic_synthesis(
+          frequencies=f0_hz,
+          amplitudes=amplitudes,
+          harmonic_distribution=harmonic_distribution,
+          n_samples=self.n_samples,
+          sample_rate=self.sample_rate,
+          n_lobe_bins=self.ifft_lobe_bins)
+
+    if self.amplitude_floor_db is not None:
+      signal, _ = self._sparse_harmonic_synthesis(
+          amplitudes, harmonic_distribution, f0_hz)
+      return signal
+
     signal = core.harmonic_synthesis(
         frequencies=f0_hz,
         amplitudes=amplitudes,
@@ -142,7 +210,8 @@ class Harmonic(processors.Processor):
         n_samples=self.n_samples,
         sample_rate=self.sample_rate,
         amp_resample_method=self.amp_resample_method,
-        use_angular_cumsum=self.use_angular_cumsum)
+        use_angular_cumsum=self.use_angular_cumsum,
+        kernel=self.oscillator_kernel)
     return signal
 
 
@@ -248,7 +317,6 @@ class Wavetable(processors.Processor):
     Returns:
       signal: A tensor of of shape [batch, n_samples].
     """
-    wavetables = core.resample(wavetables, self.n_samples)
     signal = core.wavetable_synthesis(amplitudes=amplitudes,
                                       wavetables=wavetables,
                                       frequencies=f0_hz,
@@ -39,6 +39,69 @@ class HarmonicTest(tf.test.TestCase):
 
     self.assertAllEqual([batch_size, 64000], output.shape.as_list())
 
+  def test_pruned_output_is_close_to_dense(self):
+    kwargs = dict(n_samples=16000, sample_rate=16000, scale_fn=None,
+                  use_angular_cumsum=True)
+    dense_synth = synths.Harmonic(**kwargs)
+    sparse_synth = synths.Harmonic(amplitude_floor_db=-60.0, **kwargs)
+    num_frames = 250
+    amp = tf.ones((2, num_frames, 1))
+    harmonic_distribution = tf.tile(
+        0.5**tf.range(60.0)[tf.newaxis, tf.newaxis, :], [2, num_frames, 1])
+    f0_hz = tf.ones((2, num_frames, 1)) * 110.0
+
+    dense = dense_synth(amp, harmonic_distribution, f0_hz)
+    sparse = sparse_synth(amp, harmonic_distribution, f0_hz)
+
+    self.assertAllEqual(dense.shape, sparse.shape)
+    self.assertAllClose(dense, sparse, atol=5e-3)
+
+    outputs = sparse_synth(amp, harmonic_distribution, f0_hz,
+                           return_outputs_dict=True)
+    self.assertAllEqual(sparse, outputs['signal'])
+    error_bound = outputs['error_bound']
+    self.assertAllEqual([2], error_bound.shape.as_list())
+    self.assertTrue(np.all(error_bound > 0.0))
+    # Up to the float32 phase rounding of the dense synth.
+    self.assertTrue(np.all(np.max(np.abs(dense - sparse), axis=1)
+                           <= error_bound + 5e-3))
+    self.assertNotIn('error_bound',
+                     dense_synth(amp, harmonic_distribution, f0_hz,
+                                 return_outputs_dict=True))
+
+  def test_harmonic_sin_kernel_is_close_to_sin(self):
+    kwargs = dict(n_samples=4000, sample_rate=16000, scale_fn=None,
+                  use_angular_cumsum=True)
+    sin_synth = synths.Harmonic(oscillator_kernel='sin', **kwargs)
+    harmonic_sin_synth = synths.Harmonic(oscillator_kernel='harmonic_sin',
+                                        **kwargs)
+    num_frames = 100
+    amp = tf.ones((2, num_frames, 1))
+    harmonic_distribution = tf.random.uniform((2, num_frames, 60))
+    f0_hz = tf.ones((2, num_frames, 1)) * 220.0
+
+    sin_audio = sin_synth(amp, harmonic_distribution, f0_hz)
+    harmonic_sin_audio = harmonic_sin_synth(amp, harmonic_distribution, f0_hz)
+    # The sin kernel accumulates the phase of each harmonic in float32.
+    self.assertAllClose(sin_audio, harmonic_sin_audio, atol=5e-2)
+
+  def test_ifft_synthesis_is_close_to_oscillators(self):
+    kwargs = dict(n_samples=16000, sample_rate=16000, scale_fn=None,
+                  amp_resample_method='linear')
+    oscillator_synth = synths.Harmonic(oscillator_kernel='harmonic_sin',
+                                       **kwargs)
+    ifft_synth = synths.Harmonic(ifft_lobe_bins=16, **kwargs)
+    num_frames = 250
+    amp = tf.ones((2, num_frames, 1))
+    harmonic_distribution = tf.random.uniform((2, 1, 60))
+    harmonic_distribution = tf.tile(harmonic_distribution, [1, num_frames, 1])
+    f0_hz = tf.ones((2, num_frames, 1)) * 220.0
+
+    oscillator_audio = oscillator_synth(amp, harmonic_distribution, f0_hz)
+    ifft_audio = ifft_synth(amp, harmonic_distribution, f0_hz)
+    self.assertAllEqual(oscillator_audio.shape, ifft_audio.shape)
+    self.assertAllClose(oscillator_audio, ifft_audio, atol=1e-3)
+
 
 class FilteredNoiseTest(tf.test.TestCase):
 
@@ -12,21 +12,30 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""Training code for DDSP models."""
+"""Training code for DDSP models.
 
-from ddsp.training import cloud
+Modules with gin configurables are imported eagerly, so that gin configs can be
+parsed after `import ddsp.training`. Other modules are imported on first access.
+"""
+
+from ddsp import lazy_imports
 from ddsp.training import data
 from ddsp.training import decoders
 from ddsp.training import encoders
 from ddsp.training import eval_util
 from ddsp.training import evaluators
 from ddsp.training import inference
-from ddsp.training import metrics
 from ddsp.training import models
 from ddsp.training import nn
-from ddsp.training import plotting
-from ddsp.training import postprocessing
 from ddsp.training import preprocessing
-from ddsp.training import summaries
 from ddsp.training import train_util
 from ddsp.training import trainers
+
+# Module imports without gin configurables.
+__getattr__, __dir__ = lazy_imports.lazy_submodules(__name__, [
+    'cloud',
+    'metrics',
+    'plotting',
+    'postprocessing',
+    'summaries',
+])
@@ -18,8 +18,11 @@ import os
 import re
 
 from absl import logging
-from google.cloud import storage
-import hypertune
+from ddsp import lazy_imports
+
+# Only needed when running on Google Cloud.
+hypertune = lazy_imports.LazyModule('hypertune')
+storage = lazy_imports.LazyModule('google.cloud.storage')
 
 
 def download_from_gstorage(gstorage_path, local_path):
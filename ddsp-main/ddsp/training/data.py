@@ -13,16 +13,22 @@
 # limitations under the License.
 
 """Library of functions to help loading data."""
+import hashlib
+import json
 import os
+import struct
 
 from absl import logging
+from ddsp import lazy_imports
 from ddsp.spectral_ops import CREPE_FRAME_SIZE
 from ddsp.spectral_ops import CREPE_SAMPLE_RATE
 from ddsp.spectral_ops import get_framed_lengths
 import gin
+import numpy as np
 import tensorflow.compat.v2 as tf
-import tensorflow_datasets as tfds
 
+# Slow to import, and only needed for TFDS datasets.
+tfds = lazy_imports.LazyModule('tensorflow_datasets')
 
 _AUTOTUNE = tf.data.experimental.AUTOTUNE
 
@@ -210,13 +216,41 @@ class TFRecordProvider(DataProvider):
                example_secs=4,
                sample_rate=16000,
                frame_rate=250,
-               centered=False):
-    """RecordProvider constructor."""
+               centered=False,
+               parse_batches=False,
+               cache=None,
+               cache_shuffle_buffer=1000):
+    """RecordProvider constructor.
+
+    Args:
+      file_pattern: Pattern of the TFRecord files.
+      example_secs: Length of the examples in seconds.
+      sample_rate: Sample rate of the audio.
+      frame_rate: Frame rate of the f0 and loudness features.
+      centered: Whether the features were computed with center padding.
+      parse_batches: Whether get_batch() batches the serialized records and
+        parses each batch at once with tf.io.parse_example(), instead of
+        parsing each record before batching. Only for providers whose examples
+        are the parsed features, without any per-example processing.
+      cache: Cache the parsed examples (or parsed batches with parse_batches)
+        after the first pass. None disables caching, '' caches in memory, and
+        any other string is a directory on the local filesystem for cache
+        files. Each file is named from the provider class, its file pattern
+        and features, the batch size, and whether files are shuffled, so that
+        providers (such as those of training and evaluation) sharing a
+        directory don't read each other's cache.
+      cache_shuffle_buffer: With shuffle, cached examples (or batches with
+        parse_batches) are shuffled again in every pass with a buffer of this
+        size, since the cache replays the order of the first pass.
+    """
     super().__init__(sample_rate, frame_rate)
     self._file_pattern = file_pattern or self.default_file_pattern
     self._audio_length = example_secs * sample_rate
     self._audio_16k_length = example_secs * CREPE_SAMPLE_RATE
     self._feature_length = self.get_feature_length(centered)
+    self._parse_batches = parse_batches
+    self._cache = cache
+    self._cache_shuffle_buffer = cache_shuffle_buffer
 
   def get_feature_length(self, centered):
     """Take into account center padding to get number of frames."""
@@ -233,11 +267,47 @@ class TFRecordProvider(DataProvider):
         'You must pass a "file_pattern" argument to the constructor or '
         'choose a FileDataProvider with a default_file_pattern.')
 
+  def get_cache_path(self, shuffle, batch_size=None):
+    """Cache file of a dataset, '' for caching in memory.
+
+    Args:
+      shuffle: Whether the files are shuffled.
+      batch_size: Size of the cached batches, None for cached examples.
+
+    Returns:
+      Filename for tf.data.Dataset.cache().
+    """
+    if not self._cache:
+      return ''
+    tf.io.gfile.makedirs(self._cache)
+    features = sorted((k, repr(v)) for k, v in self.features_dict.items())
+    digest = hashlib.sha1(
+        repr((self._file_pattern, features)).encode()).hexdigest()[:16]
+    examples = f'batch{batch_size}' if batch_size else 'examples'
+    order = 'shuffled' if shuffle else 'ordered'
+    return os.path.join(
+        self._cache, f'{type(self).__name__}-{digest}-{examples}-{order}')
+
+  def get_records(self, shuffle=True):
+    """Read serialized records.
+
+    Args:
+      shuffle: Whether to shuffle the files.
+
+    Returns:
+      dataset: A tf.dataset of serialized tf.train.Examples.
+    """
+    filenames = tf.data.Dataset.list_files(self._file_pattern, shuffle=shuffle)
+    return filenames.interleave(
+        map_func=tf.data.TFRecordDataset,
+        cycle_length=40,
+        num_parallel_calls=_AUTOTUNE)
+
   def get_dataset(self, shuffle=True):
     """Read dataset.
 
     Args:
-      shuffle: Whether to shuffle the files.
+      shuffle: Whether to shuffle the files, and the cached examples.
 
     Returns:
       dataset: A tf.dataset that reads from the TFRecord.
@@ -245,14 +315,62 @@ class TFRecordProvider(DataProvider):
     def parse_tfexample(record):
       return tf.io.parse_single_example(record, self.features_dict)
 
-    filenames = tf.data.Dataset.list_files(self._file_pattern, shuffle=shuffle)
-    dataset = filenames.interleave(
-        map_func=tf.data.TFRecordDataset,
-        cycle_length=40,
-        num_parallel_calls=_AUTOTUNE)
+    dataset = self.get_records(shuffle)
     dataset = dataset.map(parse_tfexample, num_parallel_calls=_AUTOTUNE)
+    if self._cache is not None:
+      dataset = dataset.cache(self.get_cache_path(shuffle))
+      if shuffle:
+        dataset = dataset.shuffle(self._cache_shuffle_buffer)
     return dataset
 
+  def get_batch(self,
+                batch_size,
+                shuffle=True,
+                repeats=-1,
+                drop_remainder=True):
+    """Read dataset.
+
+    With parse_batches, the records are batched before parsing. If the
+    batches are also cached, each pass drops its own remainder when
+    drop_remainder is True, and only the order of the batches is shuffled
+    after the first pass.
+
+    Args:
+      batch_size: Size of batch.
+      shuffle: Whether to shuffle the files, and the cached examples or
+        batches.
+      repeats: Number of times to repeat dataset. -1 for endless repeats.
+      drop_remainder: Whether the last batch should be dropped.
+
+    Returns:
+      A batched tf.data.Dataset.
+
+    Raises:
+      ValueError: With parse_batches, if the provider processes the parsed
+        examples in get_dataset().
+    """
+    if not self._parse_batches:
+      return super().get_batch(batch_size, shuffle, repeats, drop_remainder)
+    if type(self).get_dataset is not TFRecordProvider.get_dataset:
+      raise ValueError(f'{type(self).__name__} processes each example in '
+                       'get_dataset(), and does not support parse_batches.')
+
+    def parse_tfexamples(records):
+      return tf.io.parse_example(records, self.features_dict)
+
+    dataset = self.get_records(shuffle)
+    if self._cache is None:
+      dataset = dataset.repeat(repeats)
+    dataset = dataset.batch(batch_size, drop_remainder=drop_remainder)
+    dataset = dataset.map(parse_tfexamples, num_parallel_calls=_AUTOTUNE)
+    if self._cache is not None:
+      # Cache whole batches, rebatching cached examples is much slower.
+      dataset = dataset.cache(self.get_cache_path(shuffle, batch_size))
+      if shuffle:
+        dataset = dataset.shuffle(self._cache_shuffle_buffer)
+      dataset = dataset.repeat(repeats)
+    return dataset.prefetch(buffer_size=_AUTOTUNE)
+
   @property
   def features_dict(self):
     """Dictionary of features to read from dataset."""
@@ -289,6 +407,219 @@ class LegacyTFRecordProvider(TFRecordProvider):
     }
 
 
+# ------------------------------------------------------------------------------
+# Columnar Shards
+# ------------------------------------------------------------------------------
+# A columnar shard is a little-endian uint64 header size, a JSON header, and a
+# data section with one contiguous float32 block of shape [n_examples, ...] per
+# feature. The header maps each feature to the shape of its block and its byte
+# offset in the data section. The data section and the blocks start at
+# multiples of _COLUMNAR_ALIGNMENT bytes.
+_COLUMNAR_ALIGNMENT = 64
+
+
+def _align(n_bytes):
+  """Round up a number of bytes to a multiple of _COLUMNAR_ALIGNMENT."""
+  return -(-n_bytes // _COLUMNAR_ALIGNMENT) * _COLUMNAR_ALIGNMENT
+
+
+def write_columnar_shard(path, examples):
+  """Write examples with fixed-shape float features to a columnar shard.
+
+  Args:
+    path: Path of the shard file.
+    examples: List of dictionaries of float arrays. All examples must have the
+      same features, with the same shapes.
+
+  Raises:
+    ValueError: If there are no examples, or their shapes differ.
+  """
+  if not examples:
+    raise ValueError(f'No examples to write to columnar shard {path}.')
+  blocks = {}
+  for k in examples[0]:
+    try:
+      blocks[k] = np.stack([ex[k] for ex in examples]).astype('<f4')
+    except ValueError as e:
+      raise ValueError(f'Feature {k} must have the same shape in all examples '
+                       f'of a columnar shard.') from e
+
+  features = {}
+  offset = 0
+  for k, v in blocks.items():
+    features[k] = {'offset': offset, 'shape': list(v.shape)}
+    offset += _align(v.nbytes)
+  header = json.dumps({'n_examples': len(examples),
+                       'features': features}).encode('utf-8')
+  header = struct.pack('<Q', len(header)) + header
+
+  with tf.io.gfile.GFile(path, 'wb') as f:
+    f.write(header + b'\0' * (_align(len(header)) - len(header)))
+    for v in blocks.values():
+      f.write(v.tobytes() + b'\0' * (_align(v.nbytes) - v.nbytes))
+
+
+def read_columnar_shard(path):
+  """Memory map the feature blocks of a local columnar shard.
+
+  Args:
+    path: Path of the shard file on a local filesystem.
+
+  Returns:
+    Dictionary of read-only float32 arrays of shape [n_examples, ...], one for
+    each feature, backed by the file. Examples are only read from disk when
+    they are accessed.
+  """
+  with open(path, 'rb') as f:
+    header_size, = struct.unpack('<Q', f.read(8))
+    header = json.loads(f.read(header_size).decode('utf-8'))
+  data_start = _align(8 + header_size)
+  return {k: np.memmap(path, dtype='<f4', mode='r',
+                       offset=data_start + v['offset'],
+                       shape=tuple(v['shape']))
+          for k, v in header['features'].items()}
+
+
+@gin.register
+class ColumnarShardProvider(TFRecordProvider):
+  """Read columnar shards through memory mapping instead of TFRecords.
+
+  Shards are written by `ddsp_prepare_tfrecord --output_format=columnar`, and
+  hold the same features as the TFRecords of TFRecordProvider. Batches are
+  gathered from memory mapped files, without deserializing protocol buffers,
+  and shuffling is over all examples instead of over files. Shards must be on
+  a local filesystem.
+  """
+
+  def __init__(self,
+               file_pattern=None,
+               example_secs=4,
+               sample_rate=16000,
+               frame_rate=250,
+               centered=False,
+               block_size=64):
+    """Constructor.
+
+    Args:
+      file_pattern: Pattern of the shard files.
+      example_secs: Length of the examples in seconds.
+      sample_rate: Sample rate of the audio.
+      frame_rate: Frame rate of the f0 and loudness features.
+      centered: Whether the features were computed with center padding.
+      block_size: Examples gathered at a time by get_dataset(), to amortize
+        the overhead of each read. get_batch() gathers whole batches.
+    """
+    super().__init__(file_pattern, example_secs, sample_rate, frame_rate,
+                     centered)
+    self._block_size = block_size
+
+  def open_shards(self):
+    """Memory map the features of every shard.
+
+    Returns:
+      List of dictionaries of arrays of shape [n_examples, ...], one for each
+      shard.
+
+    Raises:
+      ValueError: If no shards match the file pattern, or a feature is missing
+        from a shard.
+    """
+    paths = sorted(tf.io.gfile.glob(self._file_pattern))
+    if not paths:
+      raise ValueError(f'No columnar shards match {self._file_pattern}.')
+    shards = []
+    for path in paths:
+      shard = read_columnar_shard(path)
+      features = {}
+      for k, feature in self.features_dict.items():
+        if k not in shard:
+          raise ValueError(f'Feature {k} is missing from columnar shard '
+                           f'{path}.')
+        features[k] = shard[k].reshape([-1] + list(feature.shape))
+      shards.append(features)
+    return shards
+
+  def read_batches(self, batch_size, shuffle, repeats, drop_remainder):
+    """Dataset of batches gathered from the shards.
+
+    Args:
+      batch_size: Size of batch.
+      shuffle: Whether to shuffle the examples.
+      repeats: Number of times to repeat dataset. -1 for endless repeats.
+      drop_remainder: Whether the last batch should be dropped.
+
+    Returns:
+      A batched tf.data.Dataset.
+    """
+    shards = self.open_shards()
+    features_dict = self.features_dict
+    keys = list(features_dict)
+    shard_starts = np.cumsum([0] + [len(s[keys[0]]) for s in shards])
+    n_examples = int(shard_starts[-1])
+
+    def gather(indices):
+      # Read each mapped file forward in sorted order, and write each example
+      # back to its position in the (shuffled) indices.
+      order = np.argsort(indices, kind='stable')
+      sorted_indices = indices[order]
+      bounds = np.searchsorted(sorted_indices, shard_starts)
+      values = [np.empty((len(indices),) + shards[0][k].shape[1:],
+                         shards[0][k].dtype) for k in keys]
+      for shard_id, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+        if start == end:
+          continue
+        shard_indices = sorted_indices[start:end] - shard_starts[shard_id]
+        for k, v in zip(keys, values):
+          v[order[start:end]] = shards[shard_id][k][shard_indices]
+      return values
+
+    def read_batch(indices):
+      values = tf.numpy_function(
+          gather, [indices], [features_dict[k].dtype for k in keys])
+      batch_dim = batch_size if drop_remainder else None
+      for k, v in zip(keys, values):
+        v.set_shape([batch_dim] + list(features_dict[k].shape))
+      return dict(zip(keys, values))
+
+    dataset = tf.data.Dataset.range(n_examples)
+    if shuffle:
+      dataset = dataset.shuffle(n_examples, reshuffle_each_iteration=True)
+    dataset = dataset.repeat(repeats)
+    dataset = dataset.batch(batch_size, drop_remainder=drop_remainder)
+    return dataset.map(read_batch, num_parallel_calls=_AUTOTUNE)
+
+  def get_dataset(self, shuffle=True):
+    """Read dataset.
+
+    Args:
+      shuffle: Whether to shuffle the examples.
+
+    Returns:
+      dataset: A tf.dataset of examples from the columnar shards.
+    """
+    return self.read_batches(
+        self._block_size, shuffle, repeats=1, drop_remainder=False).unbatch()
+
+  def get_batch(self,
+                batch_size,
+                shuffle=True,
+                repeats=-1,
+                drop_remainder=True):
+    """Read dataset, gathering each batch from the shards at once.
+
+    Args:
+      batch_size: Size of batch.
+      shuffle: Whether to shuffle the examples.
+      repeats: Number of times to repeat dataset. -1 for endless repeats.
+      drop_remainder: Whether the last batch should be dropped.
+
+    Returns:
+      A batched tf.data.Dataset.
+    """
+    dataset = self.read_batches(batch_size, shuffle, repeats, drop_remainder)
+    return dataset.prefetch(buffer_size=_AUTOTUNE)
+
+
 # ------------------------------------------------------------------------------
 # Multi-dataset DataProviders
 # ------------------------------------------------------------------------------
@@ -400,6 +731,105 @@ class MixedProvider(BaseMultiProvider):
         datasets, self._batch_size_ratios)
 
 
+# ------------------------------------------------------------------------------
+# Variable-length DataProviders
+# ------------------------------------------------------------------------------
+@gin.register
+class BucketedProvider(DataProvider):
+  """Batches variable length examples of a provider, grouped by length.
+
+  Examples are assigned to buckets by their number of frames, and each batch
+  is taken from a single bucket and padded with zeros to its longest example.
+  With max_frames_per_batch, the batch size of each bucket is chosen so that
+  a padded batch has at most that many frames, to keep the compute of each
+  step roughly constant.
+  """
+
+  def __init__(self,
+               data_provider,
+               bucket_boundaries,
+               max_frames_per_batch=None,
+               length_key='f0_hz'):
+    """Constructor.
+
+    Args:
+      data_provider: Provider of examples with a variable number of frames,
+        such as UrmpMidiUnsegmented.
+      bucket_boundaries: Increasing upper bounds (exclusive) of the number of
+        frames of each bucket. Examples as long as the last boundary or longer
+        are in an extra last bucket.
+      max_frames_per_batch: Maximum frames of a padded batch, the batch size
+        of each bucket is this divided by its longest example. Examples of the
+        last bucket, and of buckets longer than this, are batched alone. If
+        None, every bucket has the batch size passed to get_batch().
+      length_key: Feature whose first dimension is the number of frames.
+
+    Raises:
+      ValueError: If bucket_boundaries is empty or not increasing.
+    """
+    bucket_boundaries = list(bucket_boundaries)
+    if not bucket_boundaries or any(
+        b1 <= b0 for b0, b1 in zip(bucket_boundaries, bucket_boundaries[1:])):
+      raise ValueError('bucket_boundaries must be a nonempty increasing list, '
+                       f'not {bucket_boundaries}.')
+    super().__init__(data_provider.sample_rate, data_provider.frame_rate)
+    self._data_provider = data_provider
+    self._bucket_boundaries = bucket_boundaries
+    self._max_frames_per_batch = max_frames_per_batch
+    self._length_key = length_key
+
+  def get_bucket_batch_sizes(self, batch_size):
+    """Batch size of each bucket, including the last bucket."""
+    n_buckets = len(self._bucket_boundaries) + 1
+    if self._max_frames_per_batch is None:
+      return [batch_size] * n_buckets
+    # The longest example of a bucket is one frame shorter than its boundary.
+    return [max(1, self._max_frames_per_batch // max(boundary - 1, 1))
+            for boundary in self._bucket_boundaries] + [1]
+
+  def get_dataset(self, shuffle=True):
+    """Read dataset.
+
+    Args:
+      shuffle: Whether to shuffle the examples.
+
+    Returns:
+      dataset: The unbatched tf.data.Dataset of the wrapped provider.
+    """
+    return self._data_provider.get_dataset(shuffle)
+
+  def get_batch(self,
+                batch_size,
+                shuffle=True,
+                repeats=-1,
+                drop_remainder=True):
+    """Read dataset, batching examples of similar length.
+
+    Args:
+      batch_size: Size of the batches of every bucket, unused with
+        max_frames_per_batch.
+      shuffle: Whether to shuffle the examples.
+      repeats: Number of times to repeat dataset. -1 for endless repeats.
+      drop_remainder: Whether the last batch of each bucket should be dropped.
+
+    Returns:
+      A batched tf.data.Dataset, with a different batch size and number of
+      frames in each batch.
+    """
+    def get_length(ex):
+      return tf.shape(ex[self._length_key])[0]
+
+    dataset = self.get_dataset(shuffle)
+    dataset = dataset.repeat(repeats)
+    dataset = dataset.bucket_by_sequence_length(
+        element_length_func=get_length,
+        bucket_boundaries=self._bucket_boundaries,
+        bucket_batch_sizes=self.get_bucket_batch_sizes(batch_size),
+        drop_remainder=drop_remainder)
+    dataset = dataset.prefetch(buffer_size=_AUTOTUNE)
+    return dataset
+
+
 # ------------------------------------------------------------------------------
 # Synthetic Data for InverseSynthesis
 # ------------------------------------------------------------------------------
@@ -554,11 +984,13 @@ class UrmpMidi(Urmp):
     return ds
 
 
+@gin.register
 class UrmpMidiUnsegmented(Urmp):
   """Urmp dataset using unsegmented data.
 
   Unsegmented here means that the data samples are not segmented to 4-second
-  chunks as in UrmpMidi dataset.
+  chunks as in UrmpMidi dataset. Batch the variable length examples with
+  BucketedProvider.
   """
 
   _INSTRUMENTS = ['vn', 'va', 'vc', 'db', 'fl', 'ob', 'cl', 'sax', 'bn', 'tpt',
@@ -75,6 +75,13 @@ flags.DEFINE_boolean(
 flags.DEFINE_boolean(
     'viterbi', True,
     'Use viterbi decoding of pitch.')
+flags.DEFINE_string(
+    'feature_cache_dir', None,
+    'Optional directory to cache f0 and loudness features between runs.')
+flags.DEFINE_enum(
+    'output_format', 'tfrecord', ['tfrecord', 'columnar'],
+    'Write TFRecords, or columnar shards that are read through memory mapping '
+    'by data.ColumnarShardProvider. Columnar shards require --num_shards.')
 flags.DEFINE_list(
     'pipeline_options', '--runner=DirectRunner',
     'A comma-separated list of command line arguments to be used as options '
@@ -98,6 +105,8 @@ def run():
       chunk_secs=FLAGS.chunk_secs,
       center=FLAGS.center,
       viterbi=FLAGS.viterbi,
+      feature_cache_dir=FLAGS.feature_cache_dir,
+      output_format=FLAGS.output_format,
       pipeline_options=FLAGS.pipeline_options)
 
 
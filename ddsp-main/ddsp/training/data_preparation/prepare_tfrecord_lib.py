@@ -14,9 +14,13 @@
 
 """Apache Beam pipeline for computing TFRecord dataset from audio files."""
 
+import functools
+
 from absl import logging
 import apache_beam as beam
+from ddsp import feature_cache
 from ddsp import spectral_ops
+from ddsp.training import data
 import numpy as np
 import pydub
 import tensorflow.compat.v2 as tf
@@ -80,13 +84,32 @@ def _chunk_audio(ex, sample_rate, chunk_secs):
     yield {'audio': chunks[i], 'audio_16k': chunks_16k[i]}
 
 
-def _add_f0_estimate(ex, frame_rate, center, viterbi):
+@functools.lru_cache(maxsize=None)
+def _get_feature_cache(feature_cache_dir):
+  """One FeatureCache per a directory for each worker process."""
+  if not feature_cache_dir:
+    return None
+  return feature_cache.FeatureCache(feature_cache_dir)
+
+
+def _count_cache_lookup(cache, hits_before, name):
+  """Report a feature cache hit or miss to beam metrics."""
+  if cache is not None:
+    result = 'hit' if cache.hits > hits_before else 'miss'
+    beam.metrics.Metrics.counter('prepare-tfrecord',
+                                 f'{name}-cache-{result}').inc()
+
+
+def _add_f0_estimate(ex, frame_rate, center, viterbi, feature_cache_dir=None):
   """Add fundamental frequency (f0) estimate using CREPE."""
   beam.metrics.Metrics.counter('prepare-tfrecord', 'estimate-f0').inc()
   audio = ex['audio_16k']
   padding = 'center' if center else 'same'
+  cache = _get_feature_cache(feature_cache_dir)
+  hits_before = cache.hits if cache is not None else 0
   f0_hz, f0_confidence = spectral_ops.compute_f0(
-      audio, frame_rate, viterbi=viterbi, padding=padding)
+      audio, frame_rate, viterbi=viterbi, padding=padding, cache=cache)
+  _count_cache_lookup(cache, hits_before, 'f0')
   ex = dict(ex)
   ex.update({
       'f0_hz': f0_hz.astype(np.float32),
@@ -95,13 +118,17 @@ def _add_f0_estimate(ex, frame_rate, center, viterbi):
   return ex
 
 
-def _add_loudness(ex, frame_rate, n_fft, center):
+def _add_loudness(ex, frame_rate, n_fft, center, feature_cache_dir=None):
   """Add loudness in dB."""
   beam.metrics.Metrics.counter('prepare-tfrecord', 'compute-loudness').inc()
   audio = ex['audio_16k']
   padding = 'center' if center else 'same'
+  cache = _get_feature_cache(feature_cache_dir)
+  hits_before = cache.hits if cache is not None else 0
   loudness_db = spectral_ops.compute_loudness(
-      audio, CREPE_SAMPLE_RATE, frame_rate, n_fft, padding=padding)
+      audio, CREPE_SAMPLE_RATE, frame_rate, n_fft, padding=padding,
+      cache=cache)
+  _count_cache_lookup(cache, hits_before, 'loudness')
   ex = dict(ex)
   ex['loudness_db'] = loudness_db.numpy().astype(np.float32)
   return ex
@@ -148,6 +175,19 @@ def _float_dict_to_tfexample(float_dict):
           }))
 
 
+def _add_shard_key(example, num_shards):
+  """Assign an example to a columnar shard by the hash of its audio."""
+  return hash(example['audio'].tobytes()) % num_shards, example
+
+
+def _write_columnar_shard(shard_examples, output_path, num_shards):
+  """Write the (shard, examples) of a shard to a columnar shard file."""
+  beam.metrics.Metrics.counter('prepare-tfrecord', 'write-shard').inc()
+  shard, examples = shard_examples
+  path = f'{output_path}-{shard:05d}-of-{num_shards:05d}'
+  data.write_columnar_shard(path, list(examples))
+
+
 def _add_key(example):
   """Add a key to this example by taking the hash of the values."""
   return hash(example['audio'].tobytes()), example
@@ -175,6 +215,8 @@ def prepare_tfrecord(input_audio_paths,
                      chunk_secs=20.0,
                      center=False,
                      viterbi=True,
+                     feature_cache_dir=None,
+                     output_format='tfrecord',
                      pipeline_options=()):
   """Prepares a TFRecord for use in training, evaluation, and prediction.
 
@@ -199,9 +241,26 @@ def prepare_tfrecord(input_audio_paths,
     center: Provide zero-padding to audio so that frame timestamps will be
       centered.
     viterbi: Use viterbi decoding of pitch.
+    feature_cache_dir: Optional directory of a feature_cache.FeatureCache, to
+      reuse f0 and loudness features computed for the same audio in previous
+      runs.
+    output_format: 'tfrecord' for TFRecords of tf.train.Examples, or
+      'columnar' for columnar shards read with data.ColumnarShardProvider.
+      Columnar shards need examples of a fixed length (example_secs > 0), and
+      each shard is collected in memory before writing.
     pipeline_options: An iterable of command line arguments to be used as
       options for the Beam Pipeline.
+
+  Raises:
+    ValueError: If output_format is unknown, or num_shards is not given for
+      columnar shards.
   """
+  if output_format not in ('tfrecord', 'columnar'):
+    raise ValueError(f'Output format ({output_format}) must be "tfrecord" or '
+                     '"columnar".')
+  if output_format == 'columnar' and not num_shards:
+    raise ValueError('Columnar shards need a number of shards (num_shards).')
+
   def postprocess_pipeline(examples, output_path, stage_name=''):
     """After chunking, features, and train-eval split, create TFExamples."""
     if stage_name:
@@ -215,14 +274,25 @@ def prepare_tfrecord(input_audio_paths,
           example_secs=example_secs,
           hop_secs=hop_secs,
           center=center)
-    _ = (
-        examples
-        | f'reshuffle{stage_name}' >> beam.Reshuffle()
-        | f'make_tfexample{stage_name}' >> beam.Map(_float_dict_to_tfexample)
-        | f'write{stage_name}' >> beam.io.tfrecordio.WriteToTFRecord(
-            output_path,
-            num_shards=num_shards,
-            coder=beam.coders.ProtoCoder(tf.train.Example)))
+    examples |= f'reshuffle{stage_name}' >> beam.Reshuffle()
+    if output_format == 'columnar':
+      _ = (
+          examples
+          | f'add_shard_key{stage_name}' >> beam.Map(
+              _add_shard_key, num_shards=num_shards)
+          | f'group_shards{stage_name}' >> beam.GroupByKey()
+          | f'write{stage_name}' >> beam.Map(
+              _write_columnar_shard,
+              output_path=output_path,
+              num_shards=num_shards))
+    else:
+      _ = (
+          examples
+          | f'make_tfexample{stage_name}' >> beam.Map(_float_dict_to_tfexample)
+          | f'write{stage_name}' >> beam.io.tfrecordio.WriteToTFRecord(
+              output_path,
+              num_shards=num_shards,
+              coder=beam.coders.ProtoCoder(tf.train.Example)))
 
   # Start the pipeline.
   pipeline_options = beam.options.pipeline_options.PipelineOptions(
@@ -247,11 +317,13 @@ def prepare_tfrecord(input_audio_paths,
           | beam.Map(_add_f0_estimate,
                      frame_rate=frame_rate,
                      center=center,
-                     viterbi=viterbi)
+                     viterbi=viterbi,
+                     feature_cache_dir=feature_cache_dir)
           | beam.Map(_add_loudness,
                      frame_rate=frame_rate,
                      n_fft=512,
-                     center=center))
+                     center=center,
+                     feature_cache_dir=feature_cache_dir))
 
     # Create train/eval split.
     if eval_split_fraction:
@@ -21,6 +21,7 @@ from absl import flags
 from absl.testing import absltest
 from absl.testing import parameterized
 from ddsp import spectral_ops
+from ddsp.training import data
 from ddsp.training.data_preparation import prepare_tfrecord_lib
 import numpy as np
 import scipy.io.wavfile
@@ -231,6 +232,40 @@ class PrepareTFRecordBeamTest(parameterized.TestCase):
             'audio_16k': int(self.wav_secs * CREPE_SAMPLE_RATE),
         })
 
+  def test_columnar_shards(self):
+    sample_rate = 16000
+    frame_rate = 250
+    example_secs = 0.3
+    hop_secs = 0.1
+    n_batch = self.get_n_per_chunk(self.wav_secs, example_secs, hop_secs)
+    prepare_tfrecord_lib.prepare_tfrecord(
+        [self.wav_path],
+        os.path.join(self.test_dir, 'output'),
+        num_shards=2,
+        sample_rate=sample_rate,
+        frame_rate=frame_rate,
+        example_secs=example_secs,
+        hop_secs=hop_secs,
+        chunk_secs=None,
+        output_format='columnar')
+
+    n_t = int(example_secs * sample_rate)
+    n_frames = self.get_expected_length(n_t, frame_rate)
+    shards = [data.read_columnar_shard(path) for path in
+              tf.io.gfile.glob(os.path.join(self.test_dir, 'output-*'))]
+    self.assertEqual(n_batch, sum(len(s['audio']) for s in shards))
+    for shard in shards:
+      self.assertEqual(shard['audio'].shape[1:], (n_t,))
+      self.assertEqual(shard['f0_hz'].shape[1:], (n_frames,))
+      self.assertEqual(shard['loudness_db'].shape[1:], (n_frames,))
+
+  def test_columnar_shards_need_num_shards(self):
+    with self.assertRaises(ValueError):
+      prepare_tfrecord_lib.prepare_tfrecord(
+          [self.wav_path],
+          os.path.join(self.test_dir, 'output'),
+          output_format='columnar')
+
 
 if __name__ == '__main__':
   absltest.main()
@@ -0,0 +1,301 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for ddsp.training.data."""
+
+import os
+
+from absl.testing import parameterized
+from ddsp.training import data
+import numpy as np
+import tensorflow.compat.v2 as tf
+
+
+def random_examples(n_examples):
+  """One second examples of every feature, as in TFRecordProvider."""
+  rng = np.random.RandomState(0)
+  return [{
+      'audio': rng.randn(16000).astype(np.float32),
+      'audio_16k': rng.randn(16000).astype(np.float32),
+      'f0_hz': rng.uniform(100, 1000, 250).astype(np.float32),
+      'f0_confidence': rng.uniform(0, 1, 250).astype(np.float32),
+      'loudness_db': rng.uniform(-80, 0, 250).astype(np.float32),
+  } for _ in range(n_examples)]
+
+
+def write_tfrecord(path, examples):
+  """Write dictionaries of float arrays as tf.train.Examples."""
+  with tf.io.TFRecordWriter(path) as writer:
+    for ex in examples:
+      features = {
+          k: tf.train.Feature(float_list=tf.train.FloatList(value=v))
+          for k, v in ex.items()
+      }
+      writer.write(tf.train.Example(
+          features=tf.train.Features(feature=features)).SerializeToString())
+
+
+class TFRecordProviderTest(parameterized.TestCase, tf.test.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.test_dir = self.get_temp_dir()
+    self.examples = random_examples(7)
+    self.tfrecord_path = os.path.join(self.test_dir, 'examples.tfrecord')
+    write_tfrecord(self.tfrecord_path, self.examples)
+
+  def get_ids(self, batch):
+    """Index of each example of a batch, from its first sample."""
+    ids = {ex['audio'][0]: i for i, ex in enumerate(self.examples)}
+    return [ids[audio[0]] for audio in batch['audio']]
+
+  def get_batches(self, batch_size=3, shuffle=False, repeats=1,
+                  drop_remainder=False, **kwargs):
+    provider = data.TFRecordProvider(self.tfrecord_path, example_secs=1,
+                                     **kwargs)
+    dataset = provider.get_batch(batch_size, shuffle=shuffle, repeats=repeats,
+                                 drop_remainder=drop_remainder)
+    return dataset, list(dataset.as_numpy_iterator())
+
+  @parameterized.named_parameters(
+      ('examples_no_cache', False, None),
+      ('examples_memory_cache', False, ''),
+      ('examples_file_cache', False, 'cache'),
+      ('batches_no_cache', True, None),
+      ('batches_memory_cache', True, ''),
+      ('batches_file_cache', True, 'cache'))
+  def test_batches_match_parsed_examples(self, parse_batches, cache):
+    if cache:
+      cache = os.path.join(self.test_dir, cache)
+    _, batches = self.get_batches(repeats=2, parse_batches=parse_batches,
+                                  cache=cache)
+
+    self.assertLen(batches, 6 if parse_batches and cache is not None else 5)
+    self.assertEqual(sum([self.get_ids(b) for b in batches], []),
+                     list(range(7)) * 2)
+    for batch in batches:
+      for k, v in batch.items():
+        self.assertAllEqual(
+            v, [self.examples[i][k] for i in self.get_ids(batch)])
+
+  @parameterized.named_parameters(('examples', False), ('batches', True))
+  def test_shuffled_cache_is_reshuffled_each_pass(self, parse_batches):
+    tf.random.set_seed(0)
+    batch_size = 2 if parse_batches else 7
+    _, batches = self.get_batches(
+        batch_size=batch_size, shuffle=True, repeats=4, drop_remainder=True,
+        parse_batches=parse_batches, cache='')
+
+    # Examples are only shuffled within the single file by the cache shuffle.
+    ids = [self.get_ids(b) for b in batches]
+    passes = [sum(ids[i:i + len(ids) // 4], []) for i in
+              range(0, len(ids), len(ids) // 4)]
+    self.assertLen(passes, 4)
+    self.assertGreater(len(set(map(tuple, passes))), 1)
+
+  def test_cached_batches_drop_remainder_of_each_pass(self):
+    dataset, batches = self.get_batches(
+        repeats=2, drop_remainder=True, parse_batches=True, cache='')
+
+    self.assertEqual(dataset.element_spec['audio'].shape.as_list(),
+                     [3, 16000])
+    self.assertLen(batches, 4)
+    self.assertAllEqual(batches[0]['audio'], batches[2]['audio'])
+
+  def test_cache_files_are_named_per_provider(self):
+    cache_dir = os.path.join(self.test_dir, 'cache')
+    provider = data.TFRecordProvider(self.tfrecord_path, example_secs=1,
+                                     parse_batches=True, cache=cache_dir)
+    legacy_provider = data.LegacyTFRecordProvider(
+        self.tfrecord_path, example_secs=1, parse_batches=True,
+        cache=cache_dir)
+    paths = [provider.get_cache_path(shuffle=True, batch_size=3),
+             provider.get_cache_path(shuffle=False, batch_size=3),
+             provider.get_cache_path(shuffle=True, batch_size=2),
+             provider.get_cache_path(shuffle=True),
+             legacy_provider.get_cache_path(shuffle=True, batch_size=3)]
+
+    self.assertLen(set(paths), len(paths))
+    for path in paths:
+      self.assertEqual(os.path.dirname(path), cache_dir)
+
+    # A training and an evaluation dataset both fill their own cache.
+    for shuffle, batch_size in [(True, 3), (False, 2)]:
+      _ = list(provider.get_batch(batch_size, shuffle=shuffle, repeats=1))
+    cache_files = tf.io.gfile.listdir(cache_dir)
+    self.assertTrue(any(f.startswith(os.path.basename(paths[0]))
+                        for f in cache_files))
+    self.assertFalse(any(f.startswith(os.path.basename(paths[1]))
+                         for f in cache_files))
+    self.assertTrue(any(
+        f.startswith(os.path.basename(
+            provider.get_cache_path(shuffle=False, batch_size=2)))
+        for f in cache_files))
+
+  def test_parse_batches_with_example_processing_raises_value_error(self):
+
+    class ProcessedProvider(data.TFRecordProvider):
+
+      def get_dataset(self, shuffle=True):
+        return super().get_dataset(shuffle).map(lambda ex: ex)
+
+    provider = ProcessedProvider(self.tfrecord_path, example_secs=1,
+                                 parse_batches=True)
+    with self.assertRaises(ValueError):
+      _ = provider.get_batch(3)
+
+
+class ColumnarShardTest(parameterized.TestCase, tf.test.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.test_dir = self.get_temp_dir()
+    self.examples = random_examples(7)
+
+  def get_ids(self, examples):
+    """Index of each example in self.examples, from its first sample."""
+    ids = {ex['audio'][0]: i for i, ex in enumerate(self.examples)}
+    return [ids[audio[0]] for audio in examples]
+
+  @parameterized.named_parameters(('block_1', 1), ('block_4', 4))
+  def test_matches_tfrecord_provider(self, block_size):
+    tfrecord_path = os.path.join(self.test_dir, 'examples.tfrecord')
+    write_tfrecord(tfrecord_path, self.examples)
+    for i, start in enumerate([0, 4]):
+      data.write_columnar_shard(
+          os.path.join(self.test_dir, f'examples.columnar-{i:05d}-of-00002'),
+          self.examples[start:start + 4])
+
+    expected = list(data.TFRecordProvider(
+        tfrecord_path, example_secs=1).get_dataset(
+            shuffle=False).as_numpy_iterator())
+    columnar = list(data.ColumnarShardProvider(
+        os.path.join(self.test_dir, 'examples.columnar-*'), example_secs=1,
+        block_size=block_size).get_dataset(shuffle=False).as_numpy_iterator())
+
+    self.assertLen(columnar, len(self.examples))
+    for ex, expected_ex in zip(columnar, expected):
+      self.assertCountEqual(ex.keys(), expected_ex.keys())
+      for k, v in ex.items():
+        self.assertAllEqual(v, expected_ex[k])
+
+  def test_shuffled_batches_read_every_example_once(self):
+    path = os.path.join(self.test_dir, 'examples.columnar')
+    data.write_columnar_shard(path, self.examples)
+    provider = data.ColumnarShardProvider(path, example_secs=1)
+    dataset = provider.get_batch(3, shuffle=True, repeats=1,
+                                 drop_remainder=False)
+    batches = list(dataset.as_numpy_iterator())
+
+    self.assertEqual([len(b['audio']) for b in batches], [3, 3, 1])
+    self.assertEqual(dataset.element_spec['f0_hz'].shape.as_list(),
+                     [None, 250])
+    self.assertCountEqual(
+        self.get_ids(np.concatenate([b['audio'] for b in batches])),
+        range(len(self.examples)))
+
+  def test_shuffled_examples_are_not_sorted_within_blocks(self):
+    tf.random.set_seed(0)
+    for i, start in enumerate([0, 4]):
+      data.write_columnar_shard(
+          os.path.join(self.test_dir, f'examples.columnar-{i:05d}-of-00002'),
+          self.examples[start:start + 4])
+    provider = data.ColumnarShardProvider(
+        os.path.join(self.test_dir, 'examples.columnar-*'), example_secs=1,
+        block_size=7)
+    dataset = provider.get_dataset(shuffle=True)
+
+    orders = [self.get_ids([ex['audio'] for ex in dataset.as_numpy_iterator()])
+              for _ in range(3)]
+    for order in orders:
+      self.assertCountEqual(order, range(len(self.examples)))
+    self.assertNotIn(list(range(len(self.examples))), orders)
+
+  def test_different_shapes_raise_value_error(self):
+    examples = [{'audio': np.zeros(10)}, {'audio': np.zeros(11)}]
+    with self.assertRaises(ValueError):
+      data.write_columnar_shard(
+          os.path.join(self.test_dir, 'examples.columnar'), examples)
+
+
+class VariableLengthProvider(data.DataProvider):
+  """Examples of audio and f0 with a different number of frames each."""
+
+  def __init__(self, lengths):
+    super().__init__(sample_rate=16000, frame_rate=250)
+    self.lengths = lengths
+
+  def get_dataset(self, shuffle=True):
+    del shuffle
+
+    def generator():
+      for n_frames in self.lengths:
+        yield {
+            'audio': np.ones(n_frames * 64, np.float32),
+            'f0_hz': np.ones([n_frames, 1], np.float32),
+            'instrument_id': 1,
+        }
+
+    return tf.data.Dataset.from_generator(generator, output_signature={
+        'audio': tf.TensorSpec([None], tf.float32),
+        'f0_hz': tf.TensorSpec([None, 1], tf.float32),
+        'instrument_id': tf.TensorSpec([], tf.int32),
+    })
+
+
+class BucketedProviderTest(parameterized.TestCase, tf.test.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.lengths = [10, 90, 20, 80, 15, 95, 30, 250, 12, 70]
+    self.data_provider = VariableLengthProvider(self.lengths)
+
+  def get_batches(self, batch_size=2, **kwargs):
+    provider = data.BucketedProvider(self.data_provider,
+                                     bucket_boundaries=[50, 100], **kwargs)
+    dataset = provider.get_batch(batch_size, shuffle=False, repeats=1,
+                                 drop_remainder=False)
+    return list(dataset.as_numpy_iterator())
+
+  def test_batches_are_padded_within_buckets(self):
+    batches = self.get_batches()
+
+    n_examples = 0
+    for batch in batches:
+      n_frames = np.sum(batch['f0_hz'][..., 0], axis=1)
+      n_examples += len(n_frames)
+      self.assertLen(set(np.digitize(n_frames, [50, 100])), 1)
+      self.assertEqual(batch['f0_hz'].shape[1], max(n_frames))
+      self.assertEqual(batch['audio'].shape[1], 64 * max(n_frames))
+      self.assertAllEqual(np.sum(batch['audio'], axis=1), 64 * n_frames)
+    self.assertEqual(n_examples, len(self.lengths))
+
+  def test_max_frames_per_batch(self):
+    batches = self.get_batches(max_frames_per_batch=200)
+
+    self.assertCountEqual(
+        [len(b['f0_hz']) for b in batches], [4, 1, 2, 2, 1])
+    for batch in batches:
+      if batch['f0_hz'].shape[1] < 100:
+        self.assertLessEqual(batch['f0_hz'].shape[0] * batch['f0_hz'].shape[1],
+                             200)
+
+  @parameterized.named_parameters(('empty', []), ('decreasing', [100, 50]))
+  def test_bad_bucket_boundaries_raise_value_error(self, bucket_boundaries):
+    with self.assertRaises(ValueError):
+      _ = data.BucketedProvider(self.data_provider, bucket_boundaries)
+
+
+if __name__ == '__main__':
+  tf.test.main()
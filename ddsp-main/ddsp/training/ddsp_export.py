@@ -25,6 +25,17 @@ Example Usage (TFLite model):
 ddsp_export --model_path=/path/to/model --inference_model=streaming_f0_pw \
 --tflite --tfjs=false
 
+Example Usage (VST synthesis of 16 frames per call):
+ddsp_export --model_path=/path/to/model --inference_model=vst_synthesize_frames \
+--gin_param="VSTSynthesizeFrames.n_frames=16" --tflite --tfjs=false
+
+Example Usage (Quantized TFLite models, with an accuracy report on held-out
+clips):
+ddsp_export --model_path=/path/to/model --inference_model=vst_extract_features \
+--tflite --tfjs=false --tflite_quantization=dynamic_range \
+--tflite_quantization=float16 --quantization_report \
+--dataset_path=/path/to/test.tfrecord*
+
 Example Usage (SavedModel Only):
 ddsp_export --model_path=/path/to/model --inference_model=[model_type] \
 --tflite=false --tfjs=false
@@ -41,6 +52,7 @@ import ddsp
 from ddsp.training import data
 from ddsp.training import inference
 from ddsp.training import postprocessing
+from ddsp.training import quantization
 from ddsp.training import train_util
 import gin
 import librosa
@@ -76,7 +88,9 @@ flags.DEFINE_enum(
         'vst_extract_features',
         'vst_predict_controls',
         'vst_stateless_predict_controls',
+        'vst_stateless_predict_controls_frames',
         'vst_synthesize',
+        'vst_synthesize_frames',
         'vst_synthesize_harmonic',
         'vst_synthesize_noise',
     ],
@@ -96,6 +110,18 @@ flags.DEFINE_boolean('tflite', True,
                      'Convert SavedModel to TFLite for embedded C++ apps.')
 flags.DEFINE_string('metadata_file', None,
                     'Optional metadata file to pack into TFLite model.')
+flags.DEFINE_multi_enum('tflite_quantization', ['none'],
+                        quantization.QUANTIZATION_MODES,
+                        'Post-training quantization of the TFLite model. Each '
+                        'mode other than "none" is saved as '
+                        '"[name]_[mode].tflite".')
+flags.DEFINE_boolean('quantization_report', False,
+                     'Compare the size, latency, and accuracy of each '
+                     '--tflite_quantization against the float model on '
+                     'clips from --dataset_path, and save the report as '
+                     '"tflite/quantization_report.json".')
+flags.DEFINE_integer('report_n_clips', 8,
+                     'Number of dataset clips in the quantization report.')
 
 FLAGS = flags.FLAGS
 
@@ -216,7 +242,10 @@ def get_inference_model(ckpt):
       'vst_extract_features': inference.VSTExtractFeatures,
       'vst_predict_controls': inference.VSTPredictControls,
       'vst_stateless_predict_controls': inference.VSTStatelessPredictControls,
+      'vst_stateless_predict_controls_frames':
+          inference.VSTStatelessPredictControlsFrames,
       'vst_synthesize': inference.VSTSynthesize,
+      'vst_synthesize_frames': inference.VSTSynthesizeFrames,
       'vst_synthesize_harmonic': inference.VSTSynthesizeHarmonic,
       'vst_synthesize_noise': inference.VSTSynthesizeNoise,
   }
@@ -247,18 +276,18 @@ def saved_model_to_tfjs(input_dir, save_dir):
 def saved_model_to_tflite(input_dir,
                           save_dir,
                           metadata_file=None,
-                          name=''):
-  """Convert SavedModel to TFLite model."""
-  print(f'\nConverting to TFLite:\nInput:{input_dir}\nOutput:{save_dir}\n')
+                          name='',
+                          quantization_mode='none'):
+  """Convert SavedModel to TFLite model, returns the model byte string."""
+  print(f'\nConverting to TFLite ({quantization_mode}):\nInput:{input_dir}'
+        f'\nOutput:{save_dir}\n')
   # Convert the model.
-  tflite_converter = tf.lite.TFLiteConverter.from_saved_model(input_dir)
-  tflite_converter.target_spec.supported_ops = [
-      tf.lite.OpsSet.TFLITE_BUILTINS,  # Enable TensorFlow Lite ops.
-      tf.lite.OpsSet.SELECT_TF_OPS,  # Enable extended TensorFlow ops.
-  ]
-  tflite_model = tflite_converter.convert()  # Byte string.
+  tflite_model = quantization.convert_saved_model(input_dir,
+                                                  quantization_mode)
   # Save the model.
   name = name if name else 'model'
+  if quantization_mode != 'none':
+    name = f'{name}_{quantization_mode}'
   save_path = os.path.join(save_dir, f'{name}.tflite')
   with tf.io.gfile.GFile(save_path, 'wb') as f:
     f.write(tflite_model)
@@ -268,6 +297,22 @@ def saved_model_to_tflite(input_dir,
     populator.load_associated_files([metadata_file])
     populator.populate()
   print('TFLite Conversion Success!')
+  return tflite_model
+
+
+def get_quantization_report(tflite_models, dataset_path, model_path, n_clips):
+  """Evaluate TFLite models on held-out clips, see quantization module."""
+  data_provider = get_data_provider(dataset_path, model_path)
+  dataset = data_provider.get_dataset(shuffle=False).take(n_clips)
+  clips = list(dataset.as_numpy_iterator())
+
+  inference.parse_operative_config(model_path)
+  return quantization.evaluate_tflite_models(
+      tflite_models,
+      clips,
+      sample_rate=gin.query_parameter('%sample_rate'),
+      frame_rate=gin.query_parameter('%frame_rate'),
+      frame_size=gin.query_parameter('%frame_size'))
 
 
 def export_impulse_response(model_path, save_dir, target_sr=None):
@@ -357,10 +402,24 @@ def main(unused_argv):
   if FLAGS.tflite:
     tflite_dir = os.path.join(save_dir, 'tflite')
     ensure_exits(tflite_dir)
-    saved_model_to_tflite(save_dir,
-                          tflite_dir,
-                          metadata_path if FLAGS.metadata else '',
-                          name=FLAGS.name)
+    # Always convert the float model, the reference of the report.
+    modes = ['none'] + [m for m in FLAGS.tflite_quantization if m != 'none']
+    tflite_models = {}
+    for mode in modes:
+      tflite_models[mode] = saved_model_to_tflite(
+          save_dir,
+          tflite_dir,
+          metadata_path if FLAGS.metadata else None,
+          name=FLAGS.name,
+          quantization_mode=mode)
+
+    if FLAGS.quantization_report:
+      report = get_quantization_report(tflite_models, FLAGS.dataset_path,
+                                       model_path, FLAGS.report_n_clips)
+      report_path = os.path.join(tflite_dir, 'quantization_report.json')
+      with tf.io.gfile.GFile(report_path, 'w') as f:
+        f.write(json.dumps(report, indent=2))
+      print('Quantization Report:\n', json.dumps(report, indent=2))
 
 
 def console_entry_point():
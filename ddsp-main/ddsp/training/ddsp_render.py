@@ -0,0 +1,485 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""Render many audio inputs with many trained models (tone transfer).
+
+Features (f0 and loudness) are extracted once per input and shared by all
+models. Each model is restored once, and renders clips of equal length together
+in batches with the block-streaming StreamingAutoencoderInference, so inputs of
+any length are supported. Reports throughput (clips/sec and realtime factor)
+per model.
+
+Usage:
+================================================================================
+ddsp_render \
+--manifest=/path/to/manifest.json \
+--batch_size=8 \
+--num_workers=2
+
+# Without a manifest.
+ddsp_render \
+--input=/path/to/audio/*.wav \
+--model=/path/to/models/flute \
+--model=/path/to/models/violin \
+--output_dir=/path/to/renders
+
+================================================================================
+The manifest is a JSON file, relative paths are relative to the manifest:
+{
+  "inputs": ["audio/input1.flac", "audio/*.wav"],
+  "models": [
+    "models/flute",
+    {"path": "models/violin", "name": "violin_low", "pitch_shift": -12,
+     "loudness_shift": 0}
+  ],
+  "output_dir": "renders"
+}
+Each model writes `{output_dir}/{model name}/{input name}.wav`, and the
+throughput report is logged and saved to `{output_dir}/render_report.json`.
+"""
+
+import collections
+import json
+import multiprocessing
+import os
+import time
+
+from absl import app
+from absl import flags
+from absl import logging
+import ddsp
+from ddsp.training import inference
+import librosa
+import note_seq
+import numpy as np
+import tensorflow as tf
+
+gfile = tf.io.gfile
+FLAGS = flags.FLAGS
+
+# Inputs and outputs.
+flags.DEFINE_string('manifest', None,
+                    'JSON file listing "inputs", "models", and "output_dir".')
+flags.DEFINE_multi_string('input', [],
+                          'Audio files or glob patterns, used in addition to '
+                          'the manifest inputs.')
+flags.DEFINE_multi_string('model', [],
+                          'Model checkpoint directories, used in addition to '
+                          'the manifest models.')
+flags.DEFINE_string('output_dir', None,
+                    'Directory for rendered audio. Overrides the manifest.')
+
+# Features.
+flags.DEFINE_integer('frame_rate', 250, 'Rate of feature frames in Hz.')
+flags.DEFINE_integer('frames_per_batch', 2048,
+                     'CREPE frames per a batch when extracting f0.')
+flags.DEFINE_enum('viterbi_method', 'banded', ['full', 'banded'],
+                  'Viterbi decoding of CREPE activations.')
+flags.DEFINE_string('feature_cache_dir', None,
+                    'Optional directory of a persistent f0/loudness cache.')
+
+# Rendering.
+flags.DEFINE_integer('batch_size', 8,
+                     'Maximum number of equal length clips per a batch.')
+flags.DEFINE_integer('block_frames', 1000,
+                     'Frames per a block of streaming rendering.')
+flags.DEFINE_integer('num_workers', 1,
+                     'Number of worker processes. Models are divided among '
+                     'the workers, each restores its models once.')
+
+# Each model renders with the sample rate of its gin config.
+_FEATURE_SAMPLE_RATE = ddsp.spectral_ops.CREPE_SAMPLE_RATE
+
+
+def resolve_paths(patterns, root_dir=''):
+  """Expand glob patterns relative to root_dir, keeping their order."""
+  paths = []
+  for pattern in patterns:
+    pattern = os.path.join(root_dir, os.path.expanduser(pattern))
+    matches = sorted(gfile.glob(pattern))
+    if not matches:
+      raise ValueError(f'No files found for input "{pattern}".')
+    paths.extend(matches)
+  return paths
+
+
+def _model_spec(spec, root_dir=''):
+  """Model dictionary from a path or a (partial) dictionary.
+
+  Args:
+    spec: Checkpoint directory, or dictionary with a 'path' and optional
+      'name', 'pitch_shift' and 'loudness_shift'.
+    root_dir: Directory that relative paths are relative to.
+
+  Returns:
+    Dictionary with 'path', 'name', 'pitch_shift' and 'loudness_shift'.
+
+  Raises:
+    ValueError: If the spec is not a path or a dictionary with a path, has
+      unknown keys, or has non-numeric shifts.
+  """
+  if isinstance(spec, str):
+    spec = {'path': spec}
+  elif not isinstance(spec, dict) or not isinstance(spec.get('path'), str):
+    raise ValueError(f'Model "{spec}" must be a path, or a dictionary with a '
+                     '"path".')
+  spec = dict(spec)
+  unknown = set(spec) - {'path', 'name', 'pitch_shift', 'loudness_shift'}
+  if unknown:
+    raise ValueError(f'Model "{spec["path"]}" has unknown keys '
+                     f'{sorted(unknown)}.')
+  spec['path'] = os.path.join(root_dir, os.path.expanduser(spec['path']))
+  spec.setdefault('name', os.path.basename(os.path.normpath(spec['path'])))
+  spec.setdefault('pitch_shift', 0.0)
+  spec.setdefault('loudness_shift', 0.0)
+  for k in ['pitch_shift', 'loudness_shift']:
+    if isinstance(spec[k], bool) or not isinstance(spec[k], (int, float)):
+      raise ValueError(f'Model "{spec["path"]}" has a non-numeric {k} '
+                       f'"{spec[k]}".')
+  return spec
+
+
+def load_manifest(manifest_path, inputs=(), models=(), output_dir=None):
+  """Combine the manifest with inputs, models and output_dir from flags.
+
+  Args:
+    manifest_path: Path to a JSON manifest, or None.
+    inputs: Additional audio paths or glob patterns.
+    models: Additional model checkpoint directories.
+    output_dir: Output directory, overrides the manifest.
+
+  Returns:
+    input_paths: List of audio file paths.
+    model_specs: List of dictionaries with 'path', 'name', 'pitch_shift' and
+      'loudness_shift' of each model.
+    output_dir: Output directory.
+
+  Raises:
+    ValueError: If the manifest is malformed, or there are no inputs, models or
+      output directory.
+  """
+  manifest = {}
+  root_dir = ''
+  if manifest_path:
+    with gfile.GFile(manifest_path, 'r') as f:
+      try:
+        manifest = json.load(f)
+      except json.JSONDecodeError as e:
+        raise ValueError(f'Manifest {manifest_path} is not valid JSON: '
+                         f'{e}') from e
+    root_dir = os.path.dirname(manifest_path)
+    if not isinstance(manifest, dict):
+      raise ValueError(f'Manifest {manifest_path} must be a JSON object.')
+    for k in ['inputs', 'models']:
+      if not isinstance(manifest.get(k, []), list):
+        raise ValueError(f'"{k}" of manifest {manifest_path} must be a list.')
+    if not all(isinstance(p, str) for p in manifest.get('inputs', [])):
+      raise ValueError(f'"inputs" of manifest {manifest_path} must be paths.')
+
+  input_paths = (resolve_paths(manifest.get('inputs', []), root_dir) +
+                 resolve_paths(inputs))
+
+  model_specs = [_model_spec(spec, root_dir)
+                 for spec in manifest.get('models', [])]
+  model_specs += [_model_spec(spec) for spec in models]
+  # Each model writes to a directory of its name.
+  names = deduplicate([spec['name'] for spec in model_specs])
+  for spec, name in zip(model_specs, names):
+    spec['name'] = name
+
+  if not output_dir and 'output_dir' in manifest:
+    output_dir = os.path.join(root_dir,
+                              os.path.expanduser(manifest['output_dir']))
+
+  if not input_paths:
+    raise ValueError('No inputs, provide --manifest or --input.')
+  if not model_specs:
+    raise ValueError('No models, provide --manifest or --model.')
+  if not output_dir:
+    raise ValueError('No output directory, provide --output_dir.')
+  return input_paths, model_specs, output_dir
+
+
+def load_audio(path, sample_rate=_FEATURE_SAMPLE_RATE):
+  """Load an audio file as a mono float32 array."""
+  with gfile.GFile(path, 'rb') as f:
+    audio, _ = librosa.load(f, sr=sample_rate, mono=True)
+  return audio.astype(np.float32)
+
+
+def extract_features(audios,
+                     frame_rate=250,
+                     frames_per_batch=2048,
+                     viterbi_method='banded',
+                     cache=None):
+  """Compute f0 and loudness of every input, in batches for CREPE.
+
+  Args:
+    audios: List of 16kHz audio arrays.
+    frame_rate: Rate of feature frames in Hz.
+    frames_per_batch: CREPE frames per a batch.
+    viterbi_method: Viterbi decoding of CREPE activations.
+    cache: Optional feature_cache.FeatureCache. Only inputs missing from the
+      cache are run through CREPE.
+
+  Returns:
+    List of dictionaries of 'f0_hz', 'f0_confidence' and 'loudness_db', each of
+    shape [n_frames].
+  """
+  f0_kwargs = dict(frame_rate=frame_rate, viterbi=True, padding='center',
+                   model_capacity='full', viterbi_method=viterbi_method)
+
+  # Look up f0 in the cache. Batched PretrainedCREPE gives slightly different
+  # values than the crepe package of spectral_ops.compute_f0(), so the
+  # estimator is part of the key.
+  f0s = [None] * len(audios)
+  keys = [None] * len(audios)
+  if cache is not None:
+    for i, audio in enumerate(audios):
+      keys[i] = cache.get_key(audio, feature='f0',
+                              estimator='pretrained_crepe', **f0_kwargs)
+      f0s[i] = cache.get(keys[i])
+
+  missing = [i for i, f0 in enumerate(f0s) if f0 is None]
+  batched_f0 = ddsp.spectral_ops.compute_f0_batched(
+      (audios[i] for i in missing), frames_per_batch=frames_per_batch,
+      **f0_kwargs)
+  for i, (f0_hz, f0_confidence) in zip(missing, batched_f0):
+    f0s[i] = np.stack([f0_hz, f0_confidence])
+    if cache is not None:
+      cache.put(keys[i], f0s[i])
+
+  features = []
+  for audio, (f0_hz, f0_confidence) in zip(audios, f0s):
+    loudness_db = ddsp.spectral_ops.compute_loudness(
+        audio, _FEATURE_SAMPLE_RATE, frame_rate, cache=cache)
+    loudness_db = np.asarray(loudness_db)
+    n_frames = min(len(f0_hz), len(loudness_db))
+    features.append({'f0_hz': np.asarray(f0_hz[:n_frames], np.float32),
+                     'f0_confidence': np.asarray(f0_confidence[:n_frames],
+                                                 np.float32),
+                     'loudness_db': loudness_db[:n_frames].astype(np.float32)})
+  return features
+
+
+def make_batches(features, batch_size):
+  """Group equal length inputs into batches of up to batch_size.
+
+  Args:
+    features: List of feature dictionaries, from extract_features().
+    batch_size: Maximum number of inputs per a batch.
+
+  Returns:
+    List of lists of indices into features.
+  """
+  by_length = collections.defaultdict(list)
+  for i, f in enumerate(features):
+    by_length[len(f['f0_hz'])].append(i)
+  batches = []
+  for indices in by_length.values():
+    for start in range(0, len(indices), batch_size):
+      batches.append(indices[start:start + batch_size])
+  return batches
+
+
+def write_audio(path, audio, sample_rate):
+  """Save float audio as a 16 bit wav file."""
+  audio = np.clip(audio, -1.0, 1.0)
+  with gfile.GFile(path, 'wb') as f:
+    f.write(note_seq.audio_io.samples_to_wav_data(audio, sample_rate))
+
+
+def render_model(model_spec, features, names, output_dir, batch_size=8,
+                 block_frames=1000, frame_rate=250):
+  """Restore one model and render all inputs with it.
+
+  Args:
+    model_spec: Dictionary with 'path', 'name', 'pitch_shift' (semitones) and
+      'loudness_shift' (dB) of the model.
+    features: List of feature dictionaries, from extract_features().
+    names: Output file name (without extension) of each input.
+    output_dir: Directory in which to create a subdirectory for the model.
+    batch_size: Maximum number of equal length clips per a batch.
+    block_frames: Frames per a block of streaming rendering.
+    frame_rate: Rate of feature frames in Hz.
+
+  Returns:
+    Dictionary of throughput statistics of the model.
+
+  Raises:
+    ValueError: If the model has a different frame rate than the features.
+  """
+  # Models are rendered one after another, so only keep one in memory.
+  registry = inference.ModelRegistry(max_models=1, block_frames=block_frames,
+                                     verbose=False)
+  model = registry.get(model_spec['path'])
+  load_stats = registry.stats[registry.checkpoints[0]]
+
+  sample_rate = model.sample_rate
+  if sample_rate != model.hop_size * frame_rate:
+    raise ValueError(
+        f'Model {model_spec["name"]} has a frame rate of '
+        f'{sample_rate / model.hop_size} Hz, features have {frame_rate} Hz.')
+
+  model_dir = os.path.join(output_dir, model_spec['name'])
+  gfile.makedirs(model_dir)
+
+  n_clips = 0
+  n_samples = 0
+  start_time = time.time()
+  for indices in make_batches(features, batch_size):
+    f0_midi = np.stack([ddsp.core.hz_to_midi(features[i]['f0_hz'])
+                        for i in indices])
+    f0_midi = np.clip(f0_midi + model_spec['pitch_shift'], 0.0, 127.0)
+    loudness_db = np.stack([features[i]['loudness_db'] for i in indices])
+    batch = {
+        'f0_hz': ddsp.core.midi_to_hz(f0_midi),
+        'loudness_db': loudness_db + model_spec['loudness_shift'],
+    }
+    audio = model.render(batch)
+    for i, clip in zip(indices, audio):
+      write_audio(os.path.join(model_dir, f'{names[i]}.wav'), clip,
+                  sample_rate)
+    n_clips += len(indices)
+    n_samples += audio.size
+  render_seconds = time.time() - start_time
+
+  audio_seconds = n_samples / sample_rate
+  return {
+      'model': model_spec['name'],
+      'path': model_spec['path'],
+      'clips': n_clips,
+      'audio_seconds': audio_seconds,
+      'load_seconds': load_stats['load_seconds'],
+      'variable_bytes': load_stats['variable_bytes'],
+      'rss_bytes': load_stats['rss_bytes'],
+      'render_seconds': render_seconds,
+      'clips_per_second': n_clips / render_seconds,
+      'realtime_factor': audio_seconds / render_seconds,
+  }
+
+
+def _render_models(args):
+  """Render a list of models in a worker process."""
+  model_specs, features, names, output_dir, render_kwargs = args
+  return [render_model(spec, features, names, output_dir, **render_kwargs)
+          for spec in model_specs]
+
+
+def render_all(model_specs, features, names, output_dir, num_workers=1,
+               **render_kwargs):
+  """Render the inputs with every model, dividing models among workers.
+
+  Args:
+    model_specs: List of model dictionaries, from load_manifest().
+    features: List of feature dictionaries, from extract_features().
+    names: Output file name (without extension) of each input.
+    output_dir: Output directory.
+    num_workers: Number of worker processes. Renders in this process if 1.
+    **render_kwargs: Other arguments for render_model().
+
+  Returns:
+    List of throughput statistics of each model.
+  """
+  num_workers = max(1, min(num_workers, len(model_specs)))
+  jobs = [(model_specs[i::num_workers], features, names, output_dir,
+           render_kwargs) for i in range(num_workers)]
+  if num_workers == 1:
+    results = [_render_models(job) for job in jobs]
+  else:
+    # Spawn, as forking a process that already initialized TensorFlow hangs.
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(num_workers) as pool:
+      results = pool.map(_render_models, jobs)
+  return [stats for worker_stats in results for stats in worker_stats]
+
+
+def deduplicate(names):
+  """Add a numeric suffix to repeated names."""
+  counts = collections.Counter()
+  unique = []
+  for name in names:
+    counts[name] += 1
+    unique.append(name if counts[name] == 1 else f'{name}_{counts[name] - 1}')
+  return unique
+
+
+def unique_names(paths):
+  """Output names from input file names, with a suffix for duplicates."""
+  return deduplicate(
+      [os.path.splitext(os.path.basename(path))[0] for path in paths])
+
+
+def main(unused_argv):
+  """Extract features once, and render them with every model."""
+  input_paths, model_specs, output_dir = load_manifest(
+      FLAGS.manifest, FLAGS.input, FLAGS.model, FLAGS.output_dir)
+  gfile.makedirs(output_dir)
+  logging.info('Rendering %d inputs with %d models to %s',
+               len(input_paths), len(model_specs), output_dir)
+
+  start_time = time.time()
+  audios = [load_audio(p) for p in input_paths]
+  cache = None
+  if FLAGS.feature_cache_dir:
+    cache = ddsp.feature_cache.FeatureCache(FLAGS.feature_cache_dir)
+  features = extract_features(audios,
+                              frame_rate=FLAGS.frame_rate,
+                              frames_per_batch=FLAGS.frames_per_batch,
+                              viterbi_method=FLAGS.viterbi_method,
+                              cache=cache)
+  feature_seconds = time.time() - start_time
+  logging.info('Extracted features of %d inputs in %.1f seconds',
+               len(features), feature_seconds)
+  del audios
+
+  start_time = time.time()
+  stats = render_all(model_specs, features, unique_names(input_paths),
+                     output_dir,
+                     num_workers=FLAGS.num_workers,
+                     batch_size=FLAGS.batch_size,
+                     block_frames=FLAGS.block_frames,
+                     frame_rate=FLAGS.frame_rate)
+  total_seconds = time.time() - start_time
+
+  logging.info('model | clips | audio (s) | load (s) | render (s) | '
+               'clips/s | x realtime')
+  for s in stats:
+    logging.info('%s | %d | %.1f | %.2f | %.2f | %.2f | %.1f', s['model'],
+                 s['clips'], s['audio_seconds'], s['load_seconds'],
+                 s['render_seconds'], s['clips_per_second'],
+                 s['realtime_factor'])
+  n_clips = sum(s['clips'] for s in stats)
+  logging.info('Total: %d clips in %.1f s (%.2f clips/s), features %.1f s',
+               n_clips, total_seconds, n_clips / total_seconds,
+               feature_seconds)
+
+  report = {'feature_seconds': feature_seconds,
+            'render_seconds': total_seconds,
+            'models': stats}
+  if cache is not None:
+    report['feature_cache'] = cache.stats
+  report_path = os.path.join(output_dir, 'render_report.json')
+  with gfile.GFile(report_path, 'w') as f:
+    json.dump(report, f, indent=2)
+  logging.info('Wrote report to %s', report_path)
+
+
+def console_entry_point():
+  """From pip installed script."""
+  app.run(main)
+
+
+if __name__ == '__main__':
+  console_entry_point()
@@ -0,0 +1,225 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for ddsp.training.ddsp_render."""
+
+import json
+import os
+from unittest import mock
+
+from absl.testing import parameterized
+import ddsp
+from ddsp.training import ddsp_render
+from ddsp.training import models
+import gin
+import numpy as np
+import tensorflow.compat.v2 as tf
+
+
+def save_model(ckpt_dir):
+  """Save a small harmonic model, with 64 samples per frame, and its config."""
+  config = """
+  Autoencoder.preprocessor = @preprocessing.F0LoudnessPreprocessor()
+  F0LoudnessPreprocessor.time_steps = 10
+  F0LoudnessPreprocessor.compute_loudness = False
+  Autoencoder.decoder = @decoders.RnnFcDecoder()
+  RnnFcDecoder.rnn_channels = 8
+  RnnFcDecoder.ch = 8
+  RnnFcDecoder.layers_per_stack = 1
+  RnnFcDecoder.input_keys = ('ld_scaled', 'f0_scaled')
+  RnnFcDecoder.output_splits = (('amps', 1), ('harmonic_distribution', 4))
+  Autoencoder.processor_group = @processors.ProcessorGroup()
+  ProcessorGroup.dag = [
+      (@synths.Harmonic(), ['amps', 'harmonic_distribution', 'f0_hz'])]
+  Harmonic.n_samples = 640
+  """
+  with gin.unlock_config():
+    gin.clear_config()
+    gin.parse_config(config)
+  model = models.Autoencoder()
+  _ = model({'f0_hz': np.zeros([1, 10]), 'loudness_db': np.zeros([1, 10])},
+            training=False)
+  tf.train.Checkpoint(model=model).save(os.path.join(ckpt_dir, 'ckpt'))
+  with tf.io.gfile.GFile(
+      os.path.join(ckpt_dir, 'operative_config-0.gin'), 'w') as f:
+    f.write(gin.config_str())
+  gin.clear_config()
+
+
+class LoadManifestTest(parameterized.TestCase, tf.test.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.test_dir = self.get_temp_dir()
+    tf.io.gfile.makedirs(os.path.join(self.test_dir, 'audio'))
+    for name in ['a.wav', 'b.wav', 'c.flac']:
+      with tf.io.gfile.GFile(os.path.join(self.test_dir, 'audio', name),
+                             'w') as f:
+        f.write('')
+
+  def write_manifest(self, manifest):
+    path = os.path.join(self.test_dir, 'manifest.json')
+    with tf.io.gfile.GFile(path, 'w') as f:
+      f.write(manifest if isinstance(manifest, str) else json.dumps(manifest))
+    return path
+
+  def test_combines_manifest_and_flags(self):
+    path = self.write_manifest({
+        'inputs': ['audio/*.wav'],
+        'models': ['models/flute',
+                   {'path': 'models/violin', 'pitch_shift': -12}],
+        'output_dir': 'renders',
+    })
+    input_paths, model_specs, output_dir = ddsp_render.load_manifest(
+        path, inputs=[os.path.join(self.test_dir, 'audio', 'c.flac')],
+        models=['/other/flute'])
+
+    self.assertEqual([os.path.basename(p) for p in input_paths],
+                     ['a.wav', 'b.wav', 'c.flac'])
+    self.assertEqual(
+        [(s['path'], s['name'], s['pitch_shift']) for s in model_specs],
+        [(os.path.join(self.test_dir, 'models/flute'), 'flute', 0.0),
+         (os.path.join(self.test_dir, 'models/violin'), 'violin', -12),
+         ('/other/flute', 'flute_1', 0.0)])
+    self.assertEqual(output_dir, os.path.join(self.test_dir, 'renders'))
+
+  def test_output_dir_flag_overrides_manifest(self):
+    path = self.write_manifest({'inputs': ['audio/a.wav'],
+                                'models': ['flute'],
+                                'output_dir': 'renders'})
+    _, _, output_dir = ddsp_render.load_manifest(path, output_dir='/out')
+    self.assertEqual(output_dir, '/out')
+
+  @parameterized.named_parameters(
+      ('not_json', '{"inputs": ["audio/a.wav"],'),
+      ('not_an_object', ['audio/a.wav']),
+      ('inputs_not_a_list', {'inputs': 'audio/a.wav', 'models': ['m']}),
+      ('input_not_a_path', {'inputs': [{'path': 'audio/a.wav'}],
+                            'models': ['m']}),
+      ('models_not_a_list', {'inputs': ['audio/a.wav'], 'models': 'm'}),
+      ('model_without_path', {'inputs': ['audio/a.wav'],
+                              'models': [{'name': 'm'}]}),
+      ('model_not_a_path', {'inputs': ['audio/a.wav'], 'models': [3]}),
+      ('unknown_model_key', {'inputs': ['audio/a.wav'],
+                             'models': [{'path': 'm', 'pitch': 12}]}),
+      ('non_numeric_shift', {'inputs': ['audio/a.wav'],
+                             'models': [{'path': 'm', 'pitch_shift': 'up'}]}),
+      ('no_matching_inputs', {'inputs': ['audio/*.mp3'], 'models': ['m']}),
+      ('no_inputs', {'models': ['m']}),
+      ('no_models', {'inputs': ['audio/a.wav']}),
+      ('no_output_dir', {'inputs': ['audio/a.wav'], 'models': ['m']}),
+  )
+  def test_malformed_manifest_raises_value_error(self, manifest):
+    path = self.write_manifest(manifest)
+    with self.assertRaises(ValueError):
+      _ = ddsp_render.load_manifest(path)
+
+
+class BatchingTest(tf.test.TestCase):
+
+  def test_make_batches_groups_equal_lengths(self):
+    features = [{'f0_hz': np.zeros(n)} for n in [10, 20, 10, 10, 20, 10]]
+    batches = ddsp_render.make_batches(features, batch_size=2)
+    self.assertEqual(batches, [[0, 2], [3, 5], [1, 4]])
+
+  def test_deduplicate(self):
+    self.assertEqual(ddsp_render.deduplicate(['a', 'b', 'a', 'a', 'b']),
+                     ['a', 'b', 'a_1', 'a_2', 'b_1'])
+
+  def test_unique_names(self):
+    paths = ['/x/song.wav', '/y/song.flac', '/x/other.wav']
+    self.assertEqual(ddsp_render.unique_names(paths),
+                     ['song', 'song_1', 'other'])
+
+
+class ExtractFeaturesTest(tf.test.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    rng = np.random.RandomState(0)
+    # Two seconds at 16kHz, 501 centered frames at 250Hz.
+    self.audios = [rng.uniform(-0.5, 0.5, 32000).astype(np.float32)
+                   for _ in range(3)]
+    self.n_frames = 501
+    self.n_computed = []
+
+  def fake_compute_f0_batched(self, audios, **unused_kwargs):
+    """Constant f0 of 440 Hz plus the first sample of each audio."""
+    audios = list(audios)
+    self.n_computed.append(len(audios))
+    return [(np.full(self.n_frames, 440.0 + audio[0], np.float32),
+             np.ones(self.n_frames, np.float32)) for audio in audios]
+
+  def test_only_missing_inputs_are_run_through_crepe(self):
+    cache = ddsp.feature_cache.FeatureCache(self.get_temp_dir())
+    with mock.patch.object(ddsp.spectral_ops, 'compute_f0_batched',
+                           side_effect=self.fake_compute_f0_batched):
+      _ = ddsp_render.extract_features(self.audios[:2], cache=cache)
+      features = ddsp_render.extract_features(self.audios, cache=cache)
+
+    self.assertEqual(self.n_computed, [2, 1])
+    self.assertLen(features, 3)
+    for audio, f in zip(self.audios, features):
+      self.assertAllClose(f['f0_hz'], np.full(self.n_frames, 440.0 + audio[0]))
+      self.assertEqual(f['loudness_db'].shape, (self.n_frames,))
+      self.assertEqual(f['f0_confidence'].dtype, np.float32)
+
+  def test_batched_f0_is_not_shared_with_compute_f0(self):
+    cache = ddsp.feature_cache.FeatureCache(self.get_temp_dir())
+    with mock.patch.object(ddsp.spectral_ops, 'compute_f0_batched',
+                           side_effect=self.fake_compute_f0_batched):
+      _ = ddsp_render.extract_features(self.audios[:1], cache=cache)
+
+    # On a cache miss, compute_f0() calls itself without the cache.
+    compute_f0 = ddsp.spectral_ops.compute_f0
+    with mock.patch.object(ddsp.spectral_ops, 'compute_f0',
+                           side_effect=RuntimeError('cache miss')):
+      with self.assertRaisesRegex(RuntimeError, 'cache miss'):
+        _ = compute_f0(self.audios[0], frame_rate=250, viterbi=True,
+                       padding='center', model_capacity='full', cache=cache,
+                       viterbi_method='banded')
+
+
+class RenderAllTest(tf.test.TestCase):
+
+  def test_renders_every_input_with_every_model(self):
+    ckpt_dir = os.path.join(self.get_temp_dir(), 'models')
+    save_model(os.path.join(ckpt_dir, 'flute'))
+    model_specs = [
+        ddsp_render._model_spec('flute', ckpt_dir),
+        ddsp_render._model_spec({'path': 'flute', 'name': 'flute_low',
+                                 'pitch_shift': -12}, ckpt_dir),
+    ]
+    features = [{'f0_hz': np.full(n, 440.0, np.float32),
+                 'f0_confidence': np.ones(n, np.float32),
+                 'loudness_db': np.full(n, -20.0, np.float32)}
+                for n in [12, 7, 12]]
+    names = ['a', 'b', 'c']
+    output_dir = os.path.join(self.get_temp_dir(), 'renders')
+
+    stats = ddsp_render.render_all(model_specs, features, names, output_dir,
+                                   batch_size=2, block_frames=5)
+
+    self.assertEqual([s['model'] for s in stats], ['flute', 'flute_low'])
+    for s in stats:
+      self.assertEqual(s['clips'], 3)
+      self.assertAllClose(s['audio_seconds'], 31 * 64 / 16000)
+      self.assertGreater(s['realtime_factor'], 0.0)
+      self.assertCountEqual(
+          tf.io.gfile.listdir(os.path.join(output_dir, s['model'])),
+          ['a.wav', 'b.wav', 'c.wav'])
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -186,6 +186,9 @@ def main(unused_argv):
   if FLAGS.allow_memory_growth:
     allow_memory_growth()
 
+  # Before creating the model, so that its layers use the policy.
+  train_util.set_mixed_precision_policy()
+
   # Training.
   if FLAGS.mode == 'train':
     strategy = train_util.get_strategy(tpu=FLAGS.tpu,
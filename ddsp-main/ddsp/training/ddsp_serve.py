@@ -0,0 +1,110 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+r"""Serve tone transfer over HTTP, batching concurrent requests.
+
+See ddsp.training.serving for the endpoints.
+
+Usage:
+================================================================================
+ddsp_serve \
+--model=flute=/path/to/models/flute \
+--model=/path/to/models/violin \
+--port=8000 \
+--max_batch_size=8 \
+--max_wait_ms=10
+
+# Render pre-extracted features with the violin.
+curl -X POST -H 'Content-Type: application/json' \
+-d '{"f0_hz": [440, 440, 440], "loudness_db": [-30, -30, -30]}' \
+'http://localhost:8000/render?model=violin' > violin.wav
+
+# Tone transfer of an audio file, an octave down.
+curl -X POST -H 'Content-Type: audio/wav' --data-binary @input.wav \
+'http://localhost:8000/render?model=flute&pitch_shift=-12' > flute.wav
+
+curl http://localhost:8000/metrics
+================================================================================
+"""
+
+import asyncio
+import os
+
+from absl import app
+from absl import flags
+from ddsp.training import serving
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_multi_string('model', [],
+                          'Model checkpoint directories, as "name=path" or '
+                          'just "path" to use the directory name.')
+flags.DEFINE_string('host', '127.0.0.1', 'Address to listen on.')
+flags.DEFINE_integer('port', 8000, 'Port to listen on.')
+flags.DEFINE_integer('max_batch_size', 8,
+                     'Maximum number of requests rendered together.')
+flags.DEFINE_float('max_wait_ms', 10.0,
+                   'Longest time that a request waits for other requests to '
+                   'fill its batch.')
+flags.DEFINE_integer('bucket_frames', 250,
+                     'Requests are padded to a multiple of this many frames, '
+                     'and only requests of the same padded length are '
+                     'batched.')
+flags.DEFINE_integer('block_frames', 1000,
+                     'Frames per a block of streaming rendering.')
+flags.DEFINE_integer('max_models', 4,
+                     'Maximum number of models kept in memory at once.')
+flags.DEFINE_integer('frame_rate', 250,
+                     'Rate in Hz of features extracted from audio requests, '
+                     'must match the models.')
+flags.DEFINE_enum('viterbi_method', 'banded', ['full', 'banded'],
+                  'Viterbi decoding of CREPE activations.')
+
+
+def parse_models(model_flags):
+  """Dictionary of model names to checkpoint directories."""
+  models = {}
+  for spec in model_flags:
+    name, sep, path = spec.partition('=')
+    if not sep:
+      path = spec
+      name = os.path.basename(spec.rstrip('/'))
+    if name in models:
+      raise ValueError(f'Duplicate model name {name!r}, use --model=name=path.')
+    models[name] = path
+  return models
+
+
+def main(unused_argv):
+  models = parse_models(FLAGS.model)
+  if not models:
+    raise ValueError('No models, provide --model.')
+  server = serving.RenderServer(models,
+                                max_batch_size=FLAGS.max_batch_size,
+                                max_wait_ms=FLAGS.max_wait_ms,
+                                bucket_frames=FLAGS.bucket_frames,
+                                block_frames=FLAGS.block_frames,
+                                max_models=FLAGS.max_models,
+                                frame_rate=FLAGS.frame_rate,
+                                viterbi_method=FLAGS.viterbi_method)
+  asyncio.run(server.serve_forever(FLAGS.host, FLAGS.port))
+
+
+def console_entry_point():
+  """From pip installed script."""
+  app.run(main)
+
+
+if __name__ == '__main__':
+  console_entry_point()
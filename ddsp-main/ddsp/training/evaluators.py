@@ -95,7 +95,9 @@ class BasicEvaluator(BaseEvaluator):
 class F0LdEvaluator(BaseEvaluator):
   """Computes F0 and loudness metrics."""
 
-  def __init__(self, sample_rate, frame_rate, run_f0_crepe=True):
+  def __init__(self, sample_rate, frame_rate, run_f0_crepe=True,
+               feature_cache_dir=None, crepe_frames_per_batch=None,
+               crepe_viterbi_method='full'):
     super().__init__(sample_rate, frame_rate)
     self._loudness_metrics = metrics.LoudnessMetrics(
         sample_rate=sample_rate, frame_rate=frame_rate)
@@ -103,8 +105,12 @@ class F0LdEvaluator(BaseEvaluator):
         sample_rate=sample_rate, frame_rate=frame_rate)
     self._run_f0_crepe = run_f0_crepe
     if self._run_f0_crepe:
+      cache = (ddsp.feature_cache.FeatureCache(feature_cache_dir)
+               if feature_cache_dir else None)
       self._f0_crepe_metrics = metrics.F0CrepeMetrics(
-          sample_rate=sample_rate, frame_rate=frame_rate)
+          sample_rate=sample_rate, frame_rate=frame_rate, cache=cache,
+          frames_per_batch=crepe_frames_per_batch,
+          viterbi_method=crepe_viterbi_method)
 
   def evaluate(self, batch, outputs, losses):
     del losses  # Unused.
@@ -15,11 +15,13 @@
 """Library containing DDSP output -> MIDI heurstics."""
 
 import ddsp
+from ddsp import lazy_imports
 import gin
-import note_seq
 import numpy as np
 import tensorflow.compat.v2 as tf
 
+note_seq = lazy_imports.LazyModule('note_seq')
+
 DDSP_DEFAULT_FRAME_RATE = 250
 
 
@@ -27,12 +27,23 @@ Interface:
   Create SavedModel: `model.save_model(save_dir)`
 
 Need to use model.save_model() as can't override keras model.save().
+
+ModelRegistry holds several restored models side by side, see its docstring.
 """
 
+import collections
+import contextlib
+import functools
+import inspect
+import os
+import threading
+import time
+
 import ddsp
 from ddsp.training import models
 from ddsp.training import train_util
 import gin
+import numpy as np
 import tensorflow as tf
 
 
@@ -127,6 +138,521 @@ class AutoencoderInference(models.Autoencoder):
     return super().call(inputs, training=False)
 
 
+class _OverlapAddBuffer(object):
+  """Accumulates overlapping chunks of a signal and releases finished samples.
+
+  Positions are sample indices from the start of the signal. Samples that fall
+  before the first unreleased sample are discarded.
+  """
+
+  def __init__(self):
+    self.start = 0
+    self.buffer = None
+
+  def add(self, chunk, position):
+    """Overlap-add a chunk of shape [batch, n_samples] starting at position."""
+    if position < self.start:
+      chunk = chunk[:, self.start - position:]
+      position = self.start
+    if self.buffer is None:
+      self.buffer = np.zeros([chunk.shape[0], 0], dtype=np.float32)
+    offset = position - self.start
+    end = offset + chunk.shape[1]
+    if end > self.buffer.shape[1]:
+      padding = [(0, 0), (0, end - self.buffer.shape[1])]
+      self.buffer = np.pad(self.buffer, padding)
+    self.buffer[:, offset:end] += chunk
+
+  def pop(self, n_samples):
+    """Release the next n_samples of the signal."""
+    if n_samples > self.buffer.shape[1]:
+      padding = [(0, 0), (0, n_samples - self.buffer.shape[1])]
+      self.buffer = np.pad(self.buffer, padding)
+    chunk = self.buffer[:, :n_samples]
+    self.buffer = self.buffer[:, n_samples:]
+    self.start += n_samples
+    return chunk
+
+
+@gin.configurable
+class StreamingAutoencoderInference(models.Autoencoder):
+  """Render arbitrarily long inputs with an Autoencoder, one block at a time.
+
+  Only `block_frames` frames of controls are synthesized at once, so memory
+  scales with the block size instead of the input length. The RNN state, the
+  oscillator phase, and the tails of the noise filters and reverb are carried
+  between blocks, so the concatenated chunks match rendering the whole input in
+  a single call (up to float precision, and the randomness of the noise).
+
+  Supports models whose processor group is built from `Harmonic`,
+  `FilteredNoise`, `Add`, and a trainable `Reverb`, with an `RnnFcDecoder`.
+  """
+
+  def __init__(self,
+               ckpt=None,
+               block_frames=250,
+               verbose=True,
+               **kwargs):
+    """Constructor.
+
+    Args:
+      ckpt: Path to a checkpoint directory or file. If None, the model is built
+        from kwargs and not restored.
+      block_frames: Number of frames of features to render per a block.
+      verbose: Warn about missing variables when restoring.
+      **kwargs: Arguments for models.Autoencoder.
+    """
+    self.block_frames = block_frames
+    if ckpt is not None:
+      self.configure_gin(ckpt)
+    super().__init__(**kwargs)
+    if ckpt is not None:
+      self.restore(ckpt, verbose=verbose)
+
+  def configure_gin(self, ckpt):
+    """Parse the model operative config with a stateless RNN decoder."""
+    parse_operative_config(ckpt)
+    config = [
+        'RnnFcDecoder.stateless = True',
+    ]
+    with gin.unlock_config():
+      gin.parse_config(config)
+
+  @property
+  def hop_size(self):
+    """Audio samples per a frame of features."""
+    harmonic = self.processor_group.harmonic
+    return harmonic.n_samples // self.preprocessor.time_steps
+
+  @property
+  def sample_rate(self):
+    return self.processor_group.harmonic.sample_rate
+
+  def _check_model(self):
+    """Raise an error for models that can't be rendered in blocks."""
+    if self.encoder is not None:
+      raise ValueError('Streaming rendering does not support encoders.')
+    if not getattr(self.decoder, 'stateless', False):
+      raise ValueError('Streaming rendering requires a stateless RnnFcDecoder, '
+                       'set `RnnFcDecoder.stateless = True`.')
+    supported = (ddsp.synths.Harmonic, ddsp.synths.FilteredNoise,
+                 ddsp.processors.Add, ddsp.effects.Reverb)
+    for module in self.processor_group.modules:
+      if type(module) not in supported:  # pylint: disable=unidiomatic-typecheck
+        raise ValueError(f'Streaming rendering does not support the processor '
+                         f'{module.name} of type {type(module).__name__}.')
+      if isinstance(module, ddsp.effects.Reverb) and not module.trainable:
+        raise ValueError('Streaming rendering only supports trainable reverb.')
+    if 'harmonic' not in self.processor_group.module_names:
+      raise ValueError('Streaming rendering requires a `harmonic` processor.')
+
+  @tf.function(reduce_retracing=True)
+  def _predict_controls(self, features, state):
+    """Run a block of features through the decoder and get synth controls."""
+    features = dict(features)
+    features['f0_scaled'] = ddsp.training.preprocessing.scale_f0_hz(
+        features['f0_hz'])
+    if 'loudness_db' in features:
+      features['ld_scaled'] = ddsp.training.preprocessing.scale_db(
+          features['loudness_db'])
+    if 'power_db' in features:
+      features['pw_scaled'] = ddsp.training.preprocessing.scale_db(
+          features['power_db'])
+    features['state'] = state
+
+    outputs = self.decoder(features, training=False)
+    state = outputs.pop('state')
+    features.update(outputs)
+
+    # Apply the nonlinearities of each synthesizer.
+    controls = {}
+    for node in self.processor_group.dag:
+      module_key, input_keys = node[0], node[1]
+      if module_key in ('harmonic', 'filtered_noise'):
+        module = getattr(self.processor_group, module_key)
+        inputs = [ddsp.core.nested_lookup(k, features) for k in input_keys]
+        controls[module_key] = module.get_controls(*inputs)
+    return controls, state
+
+  def _synthesize(self, controls, n_intervals, phase, position, buffer):
+    """Synthesize the first n_intervals frames of controls into the buffer.
+
+    Each frame is interpolated towards the next, so the final frame of the
+    controls is only used as an endpoint unless n_intervals equals the number
+    of frames.
+
+    Args:
+      controls: Dictionary of frame-wise synth controls, from
+        `_predict_controls()`.
+      n_intervals: Number of frames to synthesize.
+      phase: Oscillator phase at the end of the previous block. Shape
+        [batch, 1, 1].
+      position: Sample index of the first synthesized sample.
+      buffer: _OverlapAddBuffer of dry audio to add the synthesized audio to.
+
+    Returns:
+      phase: Oscillator phase at the end of the synthesized audio.
+      delay: Number of samples at the end of the buffer still waiting on the
+        filter tails of the next block.
+    """
+    n_frames = int(controls['harmonic']['f0_hz'].shape[1])
+    n_samples = n_frames * self.hop_size
+    n_keep = n_intervals * self.hop_size
+
+    # Harmonic synthesizer, replicates core.harmonic_synthesis().
+    harmonic = self.processor_group.harmonic
+    harm_controls = controls['harmonic']
+    amplitudes = (harm_controls['amplitudes'] *
+                  harm_controls['harmonic_distribution'])
+    n_harmonics = int(amplitudes.shape[-1])
+    f0_env = ddsp.core.resample(harm_controls['f0_hz'], n_samples)
+    amp_env = ddsp.core.resample(amplitudes, n_samples,
+                                 method=harmonic.amp_resample_method)
+    f0_env, amp_env = f0_env[:, :n_keep], amp_env[:, :n_keep]
+    amp_env = ddsp.core.remove_above_nyquist(
+        ddsp.core.get_harmonic_frequencies(f0_env, n_harmonics),
+        amp_env,
+        self.sample_rate)
+    audio, phase = ddsp.core.harmonic_oscillator_bank(
+        f0_env, amp_env, phase, sample_rate=self.sample_rate)
+    buffer.add(audio.numpy(), position)
+
+    # Filtered noise, the filter tail is overlap-added with the next block.
+    delay = 0
+    if 'filtered_noise' in controls:
+      noise = self.processor_group.filtered_noise
+      magnitudes = controls['filtered_noise']['magnitudes'][:, :n_intervals]
+      batch_size = int(magnitudes.shape[0])
+      signal = tf.random.uniform(
+          [batch_size, n_keep], minval=-1.0, maxval=1.0)
+      ir = ddsp.core.frequency_impulse_response(magnitudes, noise.window_size)
+      signal = ddsp.core.fft_convolve(
+          signal, ir, padding='valid', delay_compensation=0)
+      # Compensate for group delay as in core.frequency_filter().
+      delay = (int(ir.shape[-1]) - 1) // 2 - 1
+      buffer.add(signal.numpy(), position - delay)
+
+    return phase, max(delay, 0)
+
+  def render_blocks(self, features):
+    """Render audio one block of frames at a time.
+
+    Args:
+      features: Dictionary of frame-wise features, 'f0_hz' and either
+        'loudness_db' or 'power_db'. Shape [n_frames] or [batch, n_frames].
+
+    Yields:
+      Chunks of audio as numpy arrays of shape [batch, n_samples_chunk]. The
+        chunks concatenate to shape [batch, n_frames * hop_size].
+    """
+    self._check_model()
+    keys = ('f0_hz', 'loudness_db', 'power_db')
+    features = {k: ddsp.training.preprocessing.at_least_3d(
+        ddsp.core.tf_float32(v)) for k, v in features.items() if k in keys}
+    batch_size = int(features['f0_hz'].shape[0])
+    n_frames = int(features['f0_hz'].shape[1])
+
+    # Reverb impulse response.
+    reverb = getattr(self.processor_group, 'reverb', None)
+    if reverb is not None:
+      if not reverb.built:
+        reverb.build(None)
+      ir = reverb.get_controls(tf.zeros([batch_size, 1]))['ir']
+      ir = reverb._mask_dry_ir(ir)  # pylint: disable=protected-access
+      add_dry = reverb._add_dry  # pylint: disable=protected-access
+
+    # Carried state.
+    state = tf.zeros([batch_size, self.decoder.rnn.rnn.units])
+    phase = tf.zeros([batch_size, 1, 1])
+    dry = _OverlapAddBuffer()
+    wet = _OverlapAddBuffer()
+    pending = None  # Controls of the last frame, not yet synthesized.
+    position = 0  # Samples synthesized so far.
+    delay = 0
+
+    def release(n_samples):
+      """Release the next n_samples of dry audio, and apply reverb."""
+      offset = dry.start
+      audio = dry.pop(n_samples)
+      if reverb is None:
+        return audio
+      wet_audio = ddsp.core.fft_convolve(
+          audio, ir, padding='valid', delay_compensation=0)
+      wet.add(wet_audio.numpy(), offset)
+      wet_audio = wet.pop(n_samples)
+      return audio + wet_audio if add_dry else wet_audio
+
+    for start in range(0, n_frames, self.block_frames):
+      block = {k: v[:, start:start + self.block_frames]
+               for k, v in features.items()}
+      controls, state = self._predict_controls(block, state)
+
+      # Synthesis lags one frame behind, as the last frame of each block is
+      # interpolated towards the first frame of the next block.
+      if pending is not None:
+        controls = tf.nest.map_structure(
+            lambda x, y: tf.concat([x, y], axis=1), pending, controls)
+      pending = tf.nest.map_structure(lambda x: x[:, -1:], controls)
+
+      n_intervals = int(controls['harmonic']['f0_hz'].shape[1]) - 1
+      if n_intervals > 0:
+        phase, delay = self._synthesize(
+            controls, n_intervals, phase, position, dry)
+        position += n_intervals * self.hop_size
+        n_ready = position - delay - dry.start
+        if n_ready > 0:
+          yield release(n_ready)
+
+    # Hold the last frame for one interval, and flush the filter tails.
+    self._synthesize(pending, 1, phase, position, dry)
+    position += self.hop_size
+    yield release(position - dry.start)
+
+  def render(self, features):
+    """Render the whole input, see `render_blocks()`."""
+    return np.concatenate(list(self.render_blocks(features)), axis=1)
+
+  def warm_up(self):
+    """Build and trace the model by rendering a single block of silence."""
+    db_key = 'power_db' if 'pw_scaled' in self.decoder.input_keys else (
+        'loudness_db')
+    n_frames = min(self.block_frames, 10)
+    features = {'f0_hz': np.zeros([1, n_frames], np.float32),
+                db_key: np.full([1, n_frames], -120.0, np.float32)}
+    _ = self.render(features)
+
+
+def _get_rss_bytes():
+  """Current resident set size of the process, or None if unavailable."""
+  try:
+    with open('/proc/self/statm') as f:
+      return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+  except (OSError, ValueError, IndexError):
+    return None
+
+
+@contextlib.contextmanager
+def _isolated_gin_config(config_str=None):
+  """Run with a separate global gin config, restoring the previous one after.
+
+  Gin bindings are global, so the config of the host program is saved,
+  cleared, and restored on exit, rather than lost.
+
+  Args:
+    config_str: Gin config to parse into the cleared config, or None to leave
+      it empty.
+
+  Yields:
+    Nothing, the separate config is the global config inside the context.
+  """
+  # pylint: disable=protected-access
+  gin_config = gin.config
+  saved = (
+      {k: dict(v) for k, v in gin_config._CONFIG.items()},
+      dict(gin_config._OPERATIVE_CONFIG),
+      dict(gin_config._SINGLETONS),
+      set(gin_config._IMPORTS),
+      gin.config_is_locked(),
+  )
+  try:
+    with gin.unlock_config():
+      gin.clear_config()
+      if config_str is not None:
+        gin.parse_config(config_str)
+    yield
+  finally:
+    config, operative_config, singletons, imports, locked = saved
+    gin.clear_config()
+    gin_config._CONFIG.update(config)
+    gin_config._OPERATIVE_CONFIG.update(operative_config)
+    gin_config._SINGLETONS.update(singletons)
+    gin_config._IMPORTS.update(imports)
+    gin_config._set_config_is_locked(locked)
+  # pylint: enable=protected-access
+
+
+class _RegisteredModel(object):
+  """A model of a ModelRegistry that activates its gin config when called.
+
+  Attributes are read from the model. Methods (and calling the model itself)
+  run holding the registry lock, with the model's gin config active. Methods
+  that return generators, such as `render_blocks()`, return generators that
+  hold the lock and activate the config for each step.
+  """
+
+  def __init__(self, model, registry, gin_config):
+    self._model = model
+    self._registry = registry
+    self._gin_config = gin_config
+
+  def _activated(self):
+    """Context holding the registry lock with the model's gin config."""
+    stack = contextlib.ExitStack()
+    stack.enter_context(self._registry._lock)  # pylint: disable=protected-access
+    stack.enter_context(_isolated_gin_config(self._gin_config))
+    return stack
+
+  def _iterate(self, generator):
+    """Advance a generator of the model with its gin config active."""
+    while True:
+      with self._activated():
+        try:
+          item = next(generator)
+        except StopIteration:
+          return
+      yield item
+
+  def _run(self, fn, *args, **kwargs):
+    with self._activated():
+      result = fn(*args, **kwargs)
+    if inspect.isgenerator(result):
+      return self._iterate(result)
+    return result
+
+  def __getattr__(self, name):
+    attr = getattr(self._model, name)
+    if not inspect.ismethod(attr):
+      return attr
+
+    @functools.wraps(attr)
+    def method(*args, **kwargs):
+      return self._run(attr, *args, **kwargs)
+    return method
+
+  def __call__(self, *args, **kwargs):
+    return self._run(self._model, *args, **kwargs)
+
+
+class ModelRegistry(object):
+  """Keep several restored models in memory, each with its own gin config.
+
+  Models are restored once and kept warm in a least recently used (LRU) cache
+  keyed by checkpoint path. Gin bindings are global, so each model is built in
+  a separate gin config, and its config is saved. Some gin configurables (such
+  as `oscillator_bank`) are read at call time, so `get()` returns the model
+  wrapped to make its config the global config around every method call. The
+  gin config of the host program is restored after loading and after each
+  call. Only one model is active at a time: model calls hold the registry
+  lock, so calls from concurrent threads run one after another.
+
+  Usage:
+    registry = ModelRegistry(max_models=4)
+    audio = registry.get('/path/to/flute').render(features)
+    print(registry.stats)
+  """
+
+  def __init__(self,
+               max_models=4,
+               model_class=StreamingAutoencoderInference,
+               warm_up=True,
+               **model_kwargs):
+    """Constructor.
+
+    Args:
+      max_models: Maximum number of models to keep in memory. The least
+        recently used model is evicted when loading another model.
+      model_class: Class of the models, constructed as
+        `model_class(ckpt=ckpt, **model_kwargs)`.
+      warm_up: Call `model.warm_up()` after loading, if the model has one, so
+        that variables are restored and functions traced before first use.
+      **model_kwargs: Other arguments for model_class.
+    """
+    self.max_models = max_models
+    self.model_class = model_class
+    self.warm_up = warm_up
+    self.model_kwargs = model_kwargs
+    self._models = collections.OrderedDict()
+    self._lock = threading.RLock()
+
+  @staticmethod
+  def _get_key(ckpt):
+    return ckpt.rstrip('/')
+
+  def __contains__(self, ckpt):
+    return self._get_key(ckpt) in self._models
+
+  def __len__(self):
+    return len(self._models)
+
+  @property
+  def checkpoints(self):
+    """Checkpoint paths of the loaded models, least recently used first."""
+    return list(self._models.keys())
+
+  def _load(self, key):
+    """Restore a model in a separate gin config, and record its statistics."""
+    start_rss = _get_rss_bytes()
+    start_time = time.time()
+    with _isolated_gin_config():
+      model = self.model_class(ckpt=key, **self.model_kwargs)
+      if self.warm_up and hasattr(model, 'warm_up'):
+        model.warm_up()
+      gin_config = gin.config_str()
+    load_seconds = time.time() - start_time
+    end_rss = _get_rss_bytes()
+
+    n_parameters = sum(int(np.prod(v.shape)) for v in model.variables)
+    variable_bytes = sum(int(np.prod(v.shape)) * v.dtype.size
+                         for v in model.variables)
+    return {
+        'model': model,
+        'registered_model': _RegisteredModel(model, self, gin_config),
+        'gin_config': gin_config,
+        'stats': {
+            'load_seconds': load_seconds,
+            'n_parameters': n_parameters,
+            'variable_bytes': variable_bytes,
+            'rss_bytes': (None if start_rss is None else end_rss - start_rss),
+            'n_uses': 0,
+        },
+    }
+
+  def get(self, ckpt):
+    """Get a model, restoring it if it is not loaded.
+
+    Args:
+      ckpt: Path to a checkpoint directory or file.
+
+    Returns:
+      The restored model, wrapped so that each of its method calls runs with
+      its own gin config active, holding the registry lock.
+    """
+    key = self._get_key(ckpt)
+    with self._lock:
+      if key in self._models:
+        self._models.move_to_end(key)
+      else:
+        while len(self._models) >= self.max_models:
+          self.evict(next(iter(self._models)))
+        self._models[key] = self._load(key)
+      self._models[key]['stats']['n_uses'] += 1
+      return self._models[key]['registered_model']
+
+  def evict(self, ckpt):
+    """Remove a model from memory."""
+    key = self._get_key(ckpt)
+    with self._lock:
+      del self._models[key]
+
+  def clear(self):
+    """Remove all models from memory."""
+    with self._lock:
+      self._models.clear()
+
+  @property
+  def stats(self):
+    """Load time, memory, and number of uses of each loaded model.
+
+    Returns:
+      Dictionary of checkpoint path to a dictionary of 'load_seconds',
+      'n_parameters', 'variable_bytes' (size of the model variables),
+      'rss_bytes' (increase in process memory while loading, None if not
+      available), and 'n_uses'.
+    """
+    with self._lock:
+      return {k: dict(v['stats']) for k, v in self._models.items()}
+
+
 class VSTBaseModule(models.Autoencoder):
   """VST inference modules, for models trained with `models/vst/vst.gin`."""
 
@@ -569,3 +1095,344 @@ class VSTSynthesizeNoise(VSTSynthesize):
     return audio_out
 
 
+@gin.configurable
+class VSTStatelessPredictControlsFrames(VSTStatelessPredictControls):
+  """Predict controls for `n_frames` frames per call, carrying RNN state.
+
+  Amortizes the per-call overhead of `VSTStatelessPredictControls`. The state
+  returned after n_frames matches calling it once per frame.
+  """
+
+  def __init__(self, ckpt, n_frames=16, **kwargs):
+    self.n_frames = n_frames
+    super().__init__(ckpt, **kwargs)
+
+  @property
+  def _signatures(self):
+    return {'call': self.call.get_concrete_function(
+        f0_scaled=tf.TensorSpec(shape=[self.n_frames], dtype=tf.float32),
+        pw_scaled=tf.TensorSpec(shape=[self.n_frames], dtype=tf.float32),
+        state=tf.TensorSpec(shape=[self.state_size], dtype=tf.float32),
+    )}
+
+  def build_network(self):
+    """Run a fake batch through the network."""
+    f0_scaled = tf.zeros([self.n_frames])
+    pw_scaled = tf.zeros([self.n_frames])
+    state = tf.zeros([self.state_size])
+    self._build_network(f0_scaled, pw_scaled, state)
+
+  @tf.function
+  def call(self, f0_scaled, pw_scaled, state):
+    """Convert frames of f0 and loudness to synthesizer parameters."""
+    f0_scaled = tf.reshape(f0_scaled, [1, self.n_frames, 1])
+    pw_scaled = tf.reshape(pw_scaled, [1, self.n_frames, 1])
+    state = tf.reshape(state, [1, self.state_size])
+
+    f0_hz = ddsp.training.preprocessing.inv_scale_f0_hz(f0_scaled)
+
+    inputs = {
+        'f0_scaled': f0_scaled,
+        'pw_scaled': pw_scaled,
+        'state': state,
+    }
+
+    # Run through the model.
+    outputs = self.decoder(inputs, training=False)
+
+    # Apply the nonlinearities.
+    harm_controls = self.processor_group.harmonic.get_controls(
+        outputs['amps'], outputs['harmonic_distribution'], f0_hz)
+
+    noise_controls = self.processor_group.filtered_noise.get_controls(
+        outputs['noise_magnitudes']
+    )
+
+    # Return 2-D tensors, [n_frames, channels].
+    amps = harm_controls['amplitudes'][0]
+    hd = harm_controls['harmonic_distribution'][0]
+    noise = noise_controls['magnitudes'][0]
+    state = outputs['state'][0]
+    return amps, hd, noise, state
+
+
+@gin.configurable
+class VSTSynthesizeFrames(VSTSynthesize):
+  """Synthesize `n_frames` hops per call.
+
+  Each hop is interpolated from the previous frame exactly as in
+  `VSTSynthesize`, and the phase is handed from hop to hop in the same order,
+  so the audio and final phase match calling it once per frame.
+  """
+
+  def __init__(self, ckpt, n_frames=16, **kwargs):
+    self.n_frames = n_frames
+    super().__init__(ckpt, **kwargs)
+
+  @property
+  def _signatures(self):
+    return {'call': self.call.get_concrete_function(
+        amps=tf.TensorSpec(shape=[self.n_frames, 1], dtype=tf.float32),
+        prev_amps=tf.TensorSpec(shape=[1], dtype=tf.float32),
+        hd=tf.TensorSpec(shape=[self.n_frames, self.n_harmonics],
+                         dtype=tf.float32),
+        prev_hd=tf.TensorSpec(shape=[self.n_harmonics], dtype=tf.float32),
+        f0=tf.TensorSpec(shape=[self.n_frames, 1], dtype=tf.float32),
+        prev_f0=tf.TensorSpec(shape=[1], dtype=tf.float32),
+        noise=tf.TensorSpec(shape=[self.n_frames, self.n_noise],
+                            dtype=tf.float32),
+        prev_phase=tf.TensorSpec(shape=[1], dtype=tf.float32),
+    )}
+
+  def build_network(self):
+    """Run a fake batch through the network."""
+    amps = tf.zeros([self.n_frames, 1])
+    prev_amps = tf.zeros([1])
+    hd = tf.zeros([self.n_frames, self.n_harmonics])
+    prev_hd = tf.zeros([self.n_harmonics])
+    f0 = tf.zeros([self.n_frames, 1])
+    prev_f0 = tf.zeros([1])
+    noise = tf.zeros([self.n_frames, self.n_noise])
+    prev_phase = tf.zeros([1])
+    self._build_network(
+        amps, prev_amps, hd, prev_hd, f0, prev_f0, noise, prev_phase)
+
+  @tf.function
+  def call(self, amps, prev_amps, hd, prev_hd,
+           f0, prev_f0, noise, prev_phase):
+    """Compute n_frames hops of audio, single example."""
+    # Pair every frame with the frame before it, one hop per batch element.
+    def pairs(x, prev_x):
+      n_channels = int(x.shape[-1])
+      x = tf.concat([tf.reshape(prev_x, [1, n_channels]),
+                     tf.reshape(x, [self.n_frames, n_channels])], axis=0)
+      return tf.stack([x[:-1], x[1:]], axis=1)
+
+    amps = pairs(amps, prev_amps)  # [n_frames, 2, 1]
+    hd = pairs(hd, prev_hd)  # [n_frames, 2, n_harmonics]
+    f0 = pairs(f0, prev_f0)  # [n_frames, 2, 1]
+    noise = tf.reshape(noise, [self.n_frames, 1, self.n_noise])
+    noise = tf.concat([noise, noise], axis=1)  # [n_frames, 2, n_noise]
+
+    # Phase at the end of each hop, relative to its start, accumulated in the
+    # same order as single hops so that the phase handoff is identical.
+    omega = ddsp.core.resample(f0, self.hop_size) * (2.0 * np.pi)
+    omega = omega / float(self.sample_rate)
+    hop_phase = ddsp.core.angular_cumsum(omega)[:, -1, 0]
+    initial_phase = tf.scan(lambda phase, delta: phase + delta,
+                            hop_phase[:-1],
+                            initializer=tf.reshape(prev_phase, []))
+    initial_phase = tf.concat([tf.reshape(prev_phase, [1]), initial_phase],
+                              axis=0)
+
+    harm_audio, final_phase = ddsp.core.streaming_harmonic_synthesis(
+        frequencies=f0,
+        amplitudes=amps,
+        harmonic_distribution=hd,
+        initial_phase=initial_phase[:, None, None],
+        n_samples=self.hop_size,
+        sample_rate=self.sample_rate,
+        amp_resample_method=self.resample_method)
+
+    noise_audio = self.filtered_noise.get_signal(noise)
+    audio_out = harm_audio + noise_audio
+
+    # Return 1-D outputs.
+    audio_out = tf.reshape(audio_out, [self.n_frames * self.hop_size])
+    final_phase = final_phase[-1, 0]
+    return audio_out, final_phase
+
+
+class _RingBuffer(object):
+  """Fixed capacity first-in first-out buffer of audio samples."""
+
+  def __init__(self, capacity):
+    self.capacity = capacity
+    self.buffer = np.zeros([capacity], dtype=np.float32)
+    self.start = 0
+    self.size = 0
+
+  def __len__(self):
+    return self.size
+
+  def write(self, samples):
+    """Append samples to the end of the buffer."""
+    n = len(samples)
+    if self.size + n > self.capacity:
+      raise ValueError(f'Writing {n} samples overflows the ring buffer, which '
+                       f'holds {self.size} of {self.capacity} samples.')
+    end = (self.start + self.size) % self.capacity
+    first = min(n, self.capacity - end)
+    self.buffer[end:end + first] = samples[:first]
+    self.buffer[:n - first] = samples[first:]
+    self.size += n
+
+  def peek(self, n):
+    """Copy of the oldest n samples, without removing them."""
+    if n > self.size:
+      raise ValueError(f'Reading {n} samples from a ring buffer of '
+                       f'{self.size} samples.')
+    indices = (self.start + np.arange(n)) % self.capacity
+    return self.buffer[indices]
+
+  def discard(self, n):
+    """Remove the oldest n samples."""
+    n = min(n, self.size)
+    self.start = (self.start + n) % self.capacity
+    self.size -= n
+
+  def read(self, n):
+    """Remove and return the oldest n samples."""
+    samples = self.peek(n)
+    self.discard(n)
+    return samples
+
+
+class VSTStreamingSynthesizer(object):
+  """Real-time synthesizer that carries the state of the VST modules.
+
+  Wraps `VSTStatelessPredictControls` and `VSTSynthesize`, and threads the RNN
+  state, the previous frame of controls, and the oscillator phase between hops.
+  Audio of any buffer size goes in through a ring buffer, and each full hop of
+  input renders a hop of output from the features of the last `frame_size`
+  input samples. `process()` returns as many samples as it is given, delayed by
+  a fixed `buffer_delay_samples` (one hop), independent of the buffer sizes.
+  The features of each hop are analyzed over a window that ends where the hop
+  starts, so the sound of the input reaches the output `latency_samples` (one
+  hop plus half a frame) later.
+  """
+
+  def __init__(self,
+               ckpt,
+               crepe_saved_model_path=None,
+               feature_extractor=None,
+               max_buffer_size=4096,
+               verbose=False):
+    """Constructor.
+
+    Args:
+      ckpt: Path to the checkpoint of a model trained with `vst.gin`.
+      crepe_saved_model_path: Optional CREPE SavedModel for feature extraction.
+      feature_extractor: Optional function of a frame of audio, shape
+        [frame_size], that returns f0_hz, f0_scaled, power_db and pw_scaled.
+        Defaults to a `VSTExtractFeatures` model, which is only created on the
+        first call to `process()`.
+      max_buffer_size: Largest buffer handled at once, `process()` splits
+        larger inputs. Sets the capacity of the ring buffers.
+      verbose: Warn about missing variables when restoring.
+    """
+    self.ckpt = ckpt
+    self.crepe_saved_model_path = crepe_saved_model_path
+    self.feature_extractor = feature_extractor
+    self.max_buffer_size = max_buffer_size
+    self.predict_controls = VSTStatelessPredictControls(ckpt, verbose=verbose)
+    self.synthesize = VSTSynthesize(ckpt)
+
+    self.sample_rate = self.synthesize.sample_rate
+    self.hop_size = self.synthesize.hop_size
+    self.frame_size = self.synthesize.frame_size
+    self.state_size = self.predict_controls.state_size
+    self._input = _RingBuffer(self.frame_size + max_buffer_size)
+    self._output = _RingBuffer(2 * self.hop_size + max_buffer_size)
+    self.reset()
+
+  @property
+  def buffer_delay_samples(self):
+    """Delay in samples between the input and output of `process()`."""
+    return self.hop_size
+
+  @property
+  def latency_samples(self):
+    """Delay in samples from the input to the output that renders it.
+
+    The buffer delay, plus the lag of the center of the analysis window, of
+    `frame_size` samples, behind its end.
+    """
+    return self.buffer_delay_samples + self.frame_size // 2
+
+  @property
+  def latency_seconds(self):
+    return self.latency_samples / self.sample_rate
+
+  @property
+  def hop_budget_seconds(self):
+    """Wall time available to render a hop in real time."""
+    return self.hop_size / self.sample_rate
+
+  def reset(self):
+    """Clear the carried state and the buffered audio."""
+    self._state = tf.zeros([self.state_size])
+    self._prev_controls = None
+    self._phase = tf.zeros([1])
+    self._input.discard(len(self._input))
+    self._output.discard(len(self._output))
+    # The first hop of input completes the first frame of features, and the
+    # first hop of output is silence while it is being rendered.
+    self._input.write(np.zeros([self.frame_size - self.hop_size], np.float32))
+    self._output.write(np.zeros([self.hop_size], np.float32))
+
+  def _get_feature_extractor(self):
+    if self.feature_extractor is None:
+      self.feature_extractor = VSTExtractFeatures(
+          self.ckpt, crepe_saved_model_path=self.crepe_saved_model_path)
+    return self.feature_extractor
+
+  def render_scaled_frame(self, f0_hz, f0_scaled, pw_scaled):
+    """Render a hop of audio from a frame of scaled features.
+
+    Args:
+      f0_hz: Fundamental frequency in Hz, shape [1].
+      f0_scaled: Scaled f0, see `preprocessing.scale_f0_hz()`, shape [1].
+      pw_scaled: Scaled power, see `preprocessing.scale_db()`, shape [1].
+
+    Returns:
+      Audio of the hop as a numpy array of shape [hop_size].
+    """
+    f0_hz = tf.reshape(ddsp.core.tf_float32(f0_hz), [1])
+    amps, hd, noise, self._state = self.predict_controls(
+        tf.reshape(ddsp.core.tf_float32(f0_scaled), [1]),
+        tf.reshape(ddsp.core.tf_float32(pw_scaled), [1]),
+        self._state)
+
+    # Fade in from silence at the first frame.
+    if self._prev_controls is None:
+      self._prev_controls = (tf.zeros_like(amps), hd, f0_hz)
+    prev_amps, prev_hd, prev_f0 = self._prev_controls
+    audio, self._phase = self.synthesize(
+        amps, prev_amps, hd, prev_hd, f0_hz, prev_f0, noise, self._phase)
+    self._phase = tf.reshape(self._phase, [1])
+    self._prev_controls = (amps, hd, f0_hz)
+    return audio.numpy()
+
+  def render_frame(self, f0_hz, power_db):
+    """Render a hop of audio from a frame of f0 (Hz) and power (dB)."""
+    return self.render_scaled_frame(
+        f0_hz,
+        ddsp.training.preprocessing.scale_f0_hz(ddsp.core.tf_float32(f0_hz)),
+        ddsp.training.preprocessing.scale_db(ddsp.core.tf_float32(power_db)))
+
+  def process(self, audio):
+    """Tone transfer a buffer of audio of any size.
+
+    Args:
+      audio: Input audio, shape [n_samples].
+
+    Returns:
+      Output audio of shape [n_samples], `buffer_delay_samples` behind the
+      input.
+    """
+    audio = np.asarray(audio, dtype=np.float32).reshape([-1])
+    outputs = []
+    for start in range(0, len(audio), self.max_buffer_size):
+      chunk = audio[start:start + self.max_buffer_size]
+      self._input.write(chunk)
+      while len(self._input) >= self.frame_size:
+        frame = self._input.peek(self.frame_size)
+        self._input.discard(self.hop_size)
+        f0_hz, f0_scaled, _, pw_scaled = self._get_feature_extractor()(frame)
+        self._output.write(self.render_scaled_frame(f0_hz, f0_scaled,
+                                                    pw_scaled))
+      outputs.append(self._output.read(len(chunk)))
+    if not outputs:
+      return np.zeros([0], np.float32)
+    return np.concatenate(outputs)
@@ -0,0 +1,435 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for ddsp.training.inference."""
+
+import os
+import tempfile
+from unittest import mock
+
+from absl.testing import parameterized
+import ddsp
+from ddsp.training import decoders
+from ddsp.training import inference
+from ddsp.training import models
+from ddsp.training import preprocessing
+import gin
+import numpy as np
+import tensorflow.compat.v2 as tf
+
+
+class StreamingAutoencoderInferenceTest(parameterized.TestCase,
+                                        tf.test.TestCase):
+
+  def setUp(self):
+    """Create features for a short note."""
+    super().setUp()
+    self.n_frames = 50
+    self.hop_size = 64
+    self.state_size = 16
+    self.f0_hz = np.linspace(200.0, 600.0, self.n_frames)[np.newaxis, :]
+    self.loudness_db = np.linspace(-40.0, -10.0, self.n_frames)[np.newaxis, :]
+
+  def _get_model(self, block_frames, amp_resample_method='window',
+                 noise=False, reverb=False):
+    """Small stateless autoencoder that renders n_frames in one call."""
+    n_samples = self.n_frames * self.hop_size
+    dag = [(ddsp.synths.Harmonic(n_samples=n_samples,
+                                 amp_resample_method=amp_resample_method,
+                                 use_angular_cumsum=True),
+            ['amps', 'harmonic_distribution', 'f0_hz'])]
+    signal_key = 'harmonic/signal'
+    if noise:
+      dag.append((ddsp.synths.FilteredNoise(n_samples=n_samples,
+                                            window_size=0),
+                  ['noise_magnitudes']))
+      dag.append((ddsp.processors.Add(),
+                  ['filtered_noise/signal', 'harmonic/signal']))
+      signal_key = 'add/signal'
+    if reverb:
+      dag.append((ddsp.effects.Reverb(trainable=True, reverb_length=300),
+                  [signal_key]))
+
+    model = inference.StreamingAutoencoderInference(
+        block_frames=block_frames,
+        preprocessor=preprocessing.F0LoudnessPreprocessor(
+            time_steps=self.n_frames, compute_loudness=False),
+        decoder=decoders.RnnFcDecoder(
+            rnn_channels=self.state_size,
+            ch=16,
+            layers_per_stack=1,
+            stateless=True,
+            input_keys=('ld_scaled', 'f0_scaled'),
+            output_splits=(('amps', 1), ('harmonic_distribution', 20),
+                           ('noise_magnitudes', 10))),
+        processor_group=ddsp.processors.ProcessorGroup(dag=dag))
+
+    # Build the network with a single call.
+    _ = self._render_one_shot(model)
+    if reverb:
+      model.processor_group.reverb.set_weights([np.random.randn(300) * 0.1])
+    return model
+
+  def _render_one_shot(self, model):
+    features = {
+        'f0_hz': self.f0_hz,
+        'loudness_db': self.loudness_db,
+        'state': tf.zeros([1, self.state_size]),
+    }
+    return model(features, training=False)['audio_synth'].numpy()
+
+  def _render_blocks(self, model):
+    features = {'f0_hz': self.f0_hz, 'loudness_db': self.loudness_db}
+    return list(model.render_blocks(features))
+
+  @parameterized.named_parameters(
+      ('single_frame_window', 1, 'window'),
+      ('uneven_window', 7, 'window'),
+      ('whole_input_window', 50, 'window'),
+      ('single_frame_linear', 1, 'linear'),
+      ('uneven_linear', 7, 'linear'),
+      ('longer_than_input_linear', 100, 'linear'),
+  )
+  def test_blocks_match_one_shot_harmonic(self, block_frames,
+                                          amp_resample_method):
+    model = self._get_model(block_frames, amp_resample_method)
+    expected = self._render_one_shot(model)
+    chunks = self._render_blocks(model)
+    audio = np.concatenate(chunks, axis=1)
+    self.assertEqual(audio.shape, (1, self.n_frames * self.hop_size))
+    self.assertAllClose(expected, audio, atol=1e-3)
+
+  @parameterized.named_parameters(
+      ('noise', True, False),
+      ('reverb', False, True),
+      ('noise_reverb', True, True),
+  )
+  def test_blocks_match_one_shot_with_tails(self, noise, reverb):
+    # Use constant noise so that the filter tails are deterministic.
+    constant_noise = lambda shape, **unused_kwargs: 0.5 * tf.ones(shape)
+    with mock.patch.object(tf.random, 'uniform', constant_noise):
+      model = self._get_model(7, noise=noise, reverb=reverb)
+      expected = self._render_one_shot(model)
+      audio = np.concatenate(self._render_blocks(model), axis=1)
+    self.assertAllClose(expected, audio, atol=2e-3)
+
+  def test_chunks_are_block_sized(self):
+    model = self._get_model(10)
+    chunks = self._render_blocks(model)
+    block_size = 10 * self.hop_size
+    self.assertLen(chunks, self.n_frames // 10 + 1)
+    for chunk in chunks:
+      self.assertLessEqual(chunk.shape[1], block_size)
+
+  def test_raises_error_for_stateful_decoder(self):
+    model = self._get_model(10)
+    model.decoder.stateless = False
+    with self.assertRaises(ValueError):
+      _ = self._render_blocks(model)
+
+
+class ModelRegistryTest(tf.test.TestCase):
+
+  def _save_model(self, n_harmonics):
+    """Save a small model and its gin config to a new directory."""
+    ckpt_dir = tempfile.mkdtemp(dir=self.get_temp_dir())
+    config = f"""
+    Autoencoder.preprocessor = @preprocessing.F0LoudnessPreprocessor()
+    F0LoudnessPreprocessor.time_steps = 10
+    F0LoudnessPreprocessor.compute_loudness = False
+    Autoencoder.decoder = @decoders.RnnFcDecoder()
+    RnnFcDecoder.rnn_channels = 8
+    RnnFcDecoder.ch = 8
+    RnnFcDecoder.layers_per_stack = 1
+    RnnFcDecoder.input_keys = ('ld_scaled', 'f0_scaled')
+    RnnFcDecoder.output_splits = (('amps', 1),
+                                  ('harmonic_distribution', {n_harmonics}))
+    Autoencoder.processor_group = @processors.ProcessorGroup()
+    ProcessorGroup.dag = [
+        (@synths.Harmonic(), ['amps', 'harmonic_distribution', 'f0_hz'])]
+    Harmonic.n_samples = 640
+    """
+    with gin.unlock_config():
+      gin.clear_config()
+      gin.parse_config(config)
+    model = models.Autoencoder()
+    _ = model({'f0_hz': np.zeros([1, 10]), 'loudness_db': np.zeros([1, 10])},
+              training=False)
+    tf.train.Checkpoint(model=model).save(os.path.join(ckpt_dir, 'ckpt'))
+    with tf.io.gfile.GFile(
+        os.path.join(ckpt_dir, 'operative_config-0.gin'), 'w') as f:
+      f.write(gin.config_str())
+    gin.clear_config()
+    return ckpt_dir
+
+  def _n_harmonics(self, model):
+    return dict(model.decoder.output_splits)['harmonic_distribution']
+
+  def test_models_keep_their_own_gin_config(self):
+    ckpt_a, ckpt_b = self._save_model(4), self._save_model(6)
+    registry = inference.ModelRegistry(block_frames=5)
+    model_a = registry.get(ckpt_a)
+    model_b = registry.get(ckpt_b)
+    self.assertEqual(self._n_harmonics(model_a), 4)
+    self.assertEqual(self._n_harmonics(model_b), 6)
+
+    self.assertIs(registry.get(ckpt_a), model_a)
+
+    features = {'f0_hz': np.full([2, 12], 440.0),
+                'loudness_db': np.full([2, 12], -20.0)}
+    self.assertEqual(model_a.render(features).shape, (2, 12 * 64))
+    self.assertEqual(registry.get(ckpt_b).render(features).shape,
+                     (2, 12 * 64))
+
+  def test_models_are_called_with_their_own_gin_config(self):
+    ckpt_a, ckpt_b = self._save_model(4), self._save_model(6)
+    registry = inference.ModelRegistry(max_models=1, block_frames=5)
+    model_a = registry.get(ckpt_a)
+    model_b = registry.get(ckpt_b)
+
+    def n_harmonics_in_config(*unused_args):
+      output_splits = gin.query_parameter('RnnFcDecoder.output_splits')
+      return dict(output_splits)['harmonic_distribution']
+
+    with mock.patch.object(inference.StreamingAutoencoderInference, 'render',
+                           autospec=True, side_effect=n_harmonics_in_config):
+      # Even after model_a is evicted by model_b.
+      self.assertEqual(model_a.render({}), 4)
+      self.assertEqual(model_b.render({}), 6)
+      self.assertEqual(model_a.render({}), 4)
+
+  def test_generators_run_with_their_own_gin_config(self):
+    ckpt_a, ckpt_b = self._save_model(4), self._save_model(6)
+    registry = inference.ModelRegistry(block_frames=5)
+    model_a = registry.get(ckpt_a)
+    model_b = registry.get(ckpt_b)
+
+    def n_harmonics_in_config(*unused_args):
+      for _ in range(2):
+        output_splits = gin.query_parameter('RnnFcDecoder.output_splits')
+        yield dict(output_splits)['harmonic_distribution']
+
+    with mock.patch.object(inference.StreamingAutoencoderInference,
+                           'render_blocks', autospec=True,
+                           side_effect=n_harmonics_in_config):
+      blocks_a = model_a.render_blocks({})
+      blocks_b = model_b.render_blocks({})
+      # Steps of the two generators interleave.
+      self.assertEqual([next(blocks_a), next(blocks_b), next(blocks_a)],
+                       [4, 6, 4])
+      self.assertEqual(list(blocks_b), [6])
+
+  def test_host_gin_config_is_restored(self):
+    ckpt = self._save_model(4)
+    with gin.unlock_config():
+      gin.parse_config('RnnFcDecoder.rnn_channels = 123')
+    self.addCleanup(gin.clear_config)
+    registry = inference.ModelRegistry(block_frames=5)
+
+    model = registry.get(ckpt)
+    features = {'f0_hz': np.full([1, 10], 440.0),
+                'loudness_db': np.full([1, 10], -20.0)}
+    _ = model.render(features)
+    _ = list(model.render_blocks(features))
+
+    self.assertEqual(self._n_harmonics(model), 4)
+    self.assertEqual(gin.query_parameter('RnnFcDecoder.rnn_channels'), 123)
+    with self.assertRaises(ValueError):
+      gin.query_parameter('RnnFcDecoder.output_splits')
+
+  def test_evicts_least_recently_used(self):
+    ckpt_a, ckpt_b, ckpt_c = [self._save_model(4) for _ in range(3)]
+    registry = inference.ModelRegistry(max_models=2, block_frames=5)
+    registry.get(ckpt_a)
+    registry.get(ckpt_b)
+    registry.get(ckpt_a)
+    registry.get(ckpt_c)
+    self.assertEqual(registry.checkpoints, [ckpt_a, ckpt_c])
+    self.assertNotIn(ckpt_b, registry)
+
+    stats = registry.stats
+    self.assertEqual(stats[ckpt_a]['n_uses'], 2)
+    self.assertGreater(stats[ckpt_a]['load_seconds'], 0.0)
+    self.assertGreater(stats[ckpt_a]['n_parameters'], 0)
+    self.assertEqual(stats[ckpt_a]['variable_bytes'],
+                     4 * stats[ckpt_a]['n_parameters'])
+
+
+class RingBufferTest(tf.test.TestCase):
+
+  def test_reads_samples_in_order_across_the_wrap(self):
+    ring = inference._RingBuffer(8)
+    ring.write(np.arange(6))
+    self.assertAllEqual(ring.read(4), [0, 1, 2, 3])
+    ring.write(np.arange(6, 12))
+    self.assertLen(ring, 8)
+    self.assertAllEqual(ring.peek(3), [4, 5, 6])
+    self.assertAllEqual(ring.read(8), np.arange(4, 12))
+    with self.assertRaises(ValueError):
+      ring.write(np.arange(9))
+
+
+def save_vst_model(ckpt_dir):
+  """Save a small randomly initialized model trained with `vst.gin`."""
+  config = [
+      'RnnFcDecoder.rnn_channels = 8',
+      'RnnFcDecoder.ch = 8',
+      ("RnnFcDecoder.output_splits = (('amps', 1), "
+       "('harmonic_distribution', 6), ('noise_magnitudes', 5))"),
+  ]
+  with gin.unlock_config():
+    gin.clear_config()
+    gin.parse_config_files_and_bindings(
+        [os.path.join(os.path.dirname(inference.__file__), 'gin', 'models',
+                      'vst', 'vst.gin')], config)
+    config_str = gin.config_str()
+  model = models.Autoencoder()
+  _ = model.decoder({'f0_scaled': tf.zeros([1, 1, 1]),
+                     'pw_scaled': tf.zeros([1, 1, 1])})
+  tf.train.Checkpoint(model=model).save(os.path.join(ckpt_dir, 'ckpt'))
+  with tf.io.gfile.GFile(
+      os.path.join(ckpt_dir, 'operative_config-0.gin'), 'w') as f:
+    f.write(config_str)
+  gin.clear_config()
+
+
+class VSTStreamingSynthesizerTest(tf.test.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.ckpt_dir = tempfile.mkdtemp(dir=self.get_temp_dir())
+    save_vst_model(self.ckpt_dir)
+    # Use constant noise so that the noise synthesizer is deterministic.
+    constant_noise = lambda shape, **unused_kwargs: 0.5 * tf.ones(shape)
+    patcher = mock.patch.object(tf.random, 'uniform', constant_noise)
+    patcher.start()
+    self.addCleanup(patcher.stop)
+
+  def _get_synth(self):
+    def feature_extractor(frame):
+      """Louder frames are higher pitched."""
+      power_db = 20.0 * np.log10(np.abs(frame).mean() + 1e-3)
+      f0_hz = np.array([200.0 + 5.0 * (power_db + 60.0)], np.float32)
+      return (f0_hz, preprocessing.scale_f0_hz(f0_hz), power_db,
+              preprocessing.scale_db(np.array([power_db], np.float32)))
+    return inference.VSTStreamingSynthesizer(
+        self.ckpt_dir, feature_extractor=feature_extractor,
+        max_buffer_size=500)
+
+  def test_output_is_independent_of_buffer_sizes(self):
+    synth = self._get_synth()
+    self.assertEqual(synth.buffer_delay_samples, synth.hop_size)
+    self.assertEqual(synth.latency_samples,
+                     synth.hop_size + synth.frame_size // 2)
+    audio = np.sin(np.linspace(0.0, 300.0, 5000)).astype(np.float32)
+    audio *= np.linspace(0.0, 1.0, 5000)
+    expected = synth.process(audio)
+    self.assertEqual(expected.shape, (5000,))
+    self.assertAllEqual(expected[:synth.buffer_delay_samples],
+                        np.zeros([synth.buffer_delay_samples]))
+    self.assertGreater(np.abs(expected).max(), 0.0)
+
+    synth.reset()
+    sizes = [1, 64, 333, 7, 1024, 320, 999]
+    boundaries = np.cumsum(sizes)
+    chunks = [synth.process(x) for x in np.split(audio, boundaries)]
+    self.assertEqual([len(c) for c in chunks], sizes + [5000 - sum(sizes)])
+    self.assertAllClose(expected, np.concatenate(chunks), atol=1e-5)
+
+  def test_render_frame_matches_threading_state_by_hand(self):
+    synth = self._get_synth()
+    f0_hz = np.array([220.0, 330.0, 440.0], np.float32)
+    power_db = np.array([-30.0, -20.0, -25.0], np.float32)
+    audio = np.concatenate([synth.render_frame(f0_hz[i:i + 1],
+                                               power_db[i:i + 1])
+                            for i in range(3)])
+
+    predict_controls, synthesize = synth.predict_controls, synth.synthesize
+    state = tf.zeros([synth.state_size])
+    phase = tf.zeros([1])
+    f0_scaled = preprocessing.scale_f0_hz(f0_hz)
+    pw_scaled = preprocessing.scale_db(power_db)
+    expected = []
+    for i in range(3):
+      amps, hd, noise, state = predict_controls(
+          f0_scaled[i:i + 1], pw_scaled[i:i + 1], state)
+      if i == 0:
+        prev_amps, prev_hd, prev_f0 = tf.zeros_like(amps), hd, f0_hz[:1]
+      hop, phase = synthesize(amps, prev_amps, hd, prev_hd, f0_hz[i:i + 1],
+                              prev_f0, noise, tf.reshape(phase, [1]))
+      prev_amps, prev_hd, prev_f0 = amps, hd, f0_hz[i:i + 1]
+      expected.append(hop)
+    self.assertAllClose(np.concatenate(expected), audio)
+    self.assertEqual(audio.shape, (3 * synth.hop_size,))
+
+
+class VSTFramesTest(tf.test.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.ckpt_dir = tempfile.mkdtemp(dir=self.get_temp_dir())
+    save_vst_model(self.ckpt_dir)
+    constant_noise = lambda shape, **unused_kwargs: 0.5 * tf.ones(shape)
+    patcher = mock.patch.object(tf.random, 'uniform', constant_noise)
+    patcher.start()
+    self.addCleanup(patcher.stop)
+    self.n_frames = 4
+    self.f0_scaled = preprocessing.scale_f0_hz(
+        np.array([220.0, 230.0, 440.0, 445.0], np.float32))
+    self.pw_scaled = preprocessing.scale_db(
+        np.array([-40.0, -20.0, -25.0, -30.0], np.float32))
+
+  def test_predict_controls_frames_matches_single_frames(self):
+    single = inference.VSTStatelessPredictControls(self.ckpt_dir)
+    frames = inference.VSTStatelessPredictControlsFrames(
+        self.ckpt_dir, n_frames=self.n_frames)
+    state = tf.random.normal([single.state_size])
+    expected = []
+    single_state = state
+    for i in range(self.n_frames):
+      *controls, single_state = single(self.f0_scaled[i:i + 1],
+                                       self.pw_scaled[i:i + 1], single_state)
+      expected.append(controls)
+    *controls, frames_state = frames(self.f0_scaled, self.pw_scaled, state)
+    for j, x in enumerate(controls):
+      self.assertAllClose(np.stack([c[j] for c in expected]), x, atol=1e-6)
+    self.assertAllClose(single_state, frames_state, atol=1e-6)
+
+  def test_synthesize_frames_matches_single_hops(self):
+    single = inference.VSTSynthesize(self.ckpt_dir)
+    frames = inference.VSTSynthesizeFrames(self.ckpt_dir,
+                                           n_frames=self.n_frames)
+    n = self.n_frames
+    amps = np.random.uniform(0.0, 0.5, [n + 1, 1]).astype(np.float32)
+    hd = np.random.uniform(0.0, 1.0, [n + 1, single.n_harmonics])
+    hd = (hd / hd.sum(axis=1, keepdims=True)).astype(np.float32)
+    f0 = np.array([[220.0], [230.0], [440.0], [445.0], [300.0]], np.float32)
+    noise = np.random.uniform(0.0, 0.1, [n, single.n_noise]).astype(np.float32)
+    phase = np.array([1.5], np.float32)
+
+    expected = []
+    single_phase = phase
+    for i in range(n):
+      audio, single_phase = single(amps[i + 1], amps[i], hd[i + 1], hd[i],
+                                   f0[i + 1], f0[i], noise[i], single_phase)
+      single_phase = tf.reshape(single_phase, [1])
+      expected.append(audio)
+    audio, frames_phase = frames(amps[1:], amps[0], hd[1:], hd[0], f0[1:],
+                                 f0[0], noise, phase)
+    self.assertAllEqual(np.concatenate(expected), audio)
+    self.assertAllEqual(single_phase, tf.reshape(frames_phase, [1]))
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -18,13 +18,16 @@ import dataclasses
 
 from absl import logging
 import ddsp
-import librosa
-import mir_eval
-import note_seq
-from note_seq import sequences_lib
+from ddsp import lazy_imports
 import numpy as np
 import tensorflow.compat.v2 as tf
 
+# Slow to import, and only needed by some metrics.
+librosa = lazy_imports.LazyModule('librosa')
+mir_eval = lazy_imports.LazyModule('mir_eval')
+note_seq = lazy_imports.LazyModule('note_seq')
+sequences_lib = lazy_imports.LazyModule('note_seq.sequences_lib')
+
 # Global values for evaluation.
 MIN_F0_CONFIDENCE = 0.85
 OUTLIER_MIDI_THRESH = 12
@@ -213,12 +216,34 @@ class LoudnessMetrics(BaseMetrics):
 class F0CrepeMetrics(BaseMetrics):
   """Helper object for computing CREPE-based f0 metrics.
 
-  Note that batch operations are not possible when CREPE has viterbi argument
-  set to True.
+  By default, f0 is computed one example at a time with `crepe.predict`. With
+  `frames_per_batch`, the frames of the whole batch go through CREPE together.
+  Either way, `viterbi_method` chooses the Viterbi decoder.
   """
 
-  def __init__(self, sample_rate, frame_rate, name='f0_crepe'):
+  def __init__(self, sample_rate, frame_rate, name='f0_crepe', cache=None,
+               frames_per_batch=None, viterbi_method='full'):
+    """Constructor.
+
+    Args:
+      sample_rate: Audio sample rate.
+      frame_rate: Rate of f0 frames.
+      name: Name of the metrics.
+      cache: Optional feature_cache.FeatureCache, to reuse the f0 of ground
+        truth audio that has been analyzed before. Generated audio changes
+        with training and is never cached. Only used when computing f0 per
+        example.
+      frames_per_batch: Compute f0 for all examples of a batch with
+        `spectral_ops.compute_f0_batched`, using this many frames per batch
+        through CREPE. If None, compute f0 per example.
+      viterbi_method: Viterbi decoding of the CREPE activations, 'full' or
+        'banded'. See `spectral_ops.compute_f0` for computing f0 per example,
+        and `spectral_ops.PretrainedCREPE.decode_activations` for batches.
+    """
     super().__init__(sample_rate=sample_rate, frame_rate=frame_rate, name=name)
+    self._cache = cache
+    self._frames_per_batch = frames_per_batch
+    self._viterbi_method = viterbi_method
     self._metrics = {
         'f0_dist':
             tf.keras.metrics.Mean('f0_dist'),
@@ -230,6 +255,22 @@ class F0CrepeMetrics(BaseMetrics):
   def metrics(self):
     return self._metrics
 
+  def _compute_f0(self, audio, cache=None):
+    """List of (f0_hz, f0_confidence) for each example in a batch of audio."""
+    if self._frames_per_batch:
+      return list(ddsp.spectral_ops.compute_f0_batched(
+          (np.asarray(a) for a in audio),
+          frame_rate=self._frame_rate,
+          viterbi=True,
+          frames_per_batch=self._frames_per_batch,
+          viterbi_method=self._viterbi_method))
+    return [ddsp.spectral_ops.compute_f0(a,
+                                         frame_rate=self._frame_rate,
+                                         viterbi=True,
+                                         cache=cache,
+                                         viterbi_method=self._viterbi_method)
+            for a in audio]
+
   def update_state(self, batch, audio_gen):
     """Update metrics based on a batch of audio.
 
@@ -238,22 +279,19 @@ class F0CrepeMetrics(BaseMetrics):
       audio_gen: Batch of generated audio.
     """
     batch_size = int(audio_gen.shape[0])
-    # Compute metrics per sample. No batch operations possible.
+    # Extract f0 from generated audio.
+    f0_gen = self._compute_f0([audio_gen[i] for i in range(batch_size)])
+    if 'f0_hz' in batch and 'f0_confidence' in batch:
+      f0_gt = [(batch['f0_hz'][i], batch['f0_confidence'][i])
+               for i in range(batch_size)]
+    else:
+      # Missing f0 in ground truth, extract it.
+      f0_gt = self._compute_f0([batch['audio'][i] for i in range(batch_size)],
+                               cache=self._cache)
+
     for i in range(batch_size):
-      # Extract f0 from generated audio example.
-      f0_hz_gen, _ = ddsp.spectral_ops.compute_f0(
-          audio_gen[i],
-          frame_rate=self._frame_rate,
-          viterbi=True)
-      if 'f0_hz' in batch and 'f0_confidence' in batch:
-        f0_hz_gt = batch['f0_hz'][i]
-        f0_conf_gt = batch['f0_confidence'][i]
-      else:
-        # Missing f0 in ground truth, extract it.
-        f0_hz_gt, f0_conf_gt = ddsp.spectral_ops.compute_f0(
-            batch['audio'][i],
-            frame_rate=self._frame_rate,
-            viterbi=True)
+      f0_hz_gen, _ = f0_gen[i]
+      f0_hz_gt, f0_conf_gt = f0_gt[i]
 
       if is_outlier(f0_conf_gt):
         # Ground truth f0 was unreliable to begin with. Discard.
@@ -275,6 +313,8 @@ class F0CrepeMetrics(BaseMetrics):
   def flush(self, step):
     """Perform additional step of resetting CREPE."""
     super().flush(step)
+    if self._cache is not None:
+      logging.info('%s | feature cache: %s', self._name, self._cache.stats)
     ddsp.spectral_ops.reset_crepe()  # Reset CREPE global state
 
 
@@ -171,6 +171,54 @@ class MetricsObjectsTest(parameterized.TestCase, tf.test.TestCase):
 
     f0_crepe_metrics.flush(step=1)
 
+  @mock.patch('ddsp.spectral_ops.compute_f0')
+  def test_f0_crepe_metrics_only_caches_ground_truth(self, mock_compute_f0):
+    cache = mock.Mock()
+    f0_crepe_metrics = ddsp_metrics.F0CrepeMetrics(
+        self.sample_rate, self.frame_rate, cache=cache)
+    crepe_f0 = self.batch_of_sin_feats['f0_hz']
+    crepe_conf = np.ones_like(crepe_f0)
+    mock_compute_f0.side_effect = list(zip(crepe_f0, crepe_conf)) * 2
+    # Without f0 features, f0 of the ground truth audio is computed.
+    batch = {'audio': self.batch_of_sin}
+    f0_crepe_metrics.update_state(batch, self.batch_of_sin)
+
+    caches = [kwargs['cache'] for _, kwargs in mock_compute_f0.call_args_list]
+    # Generated audio first, then the ground truth audio.
+    self.assertEqual(caches, [None] * self.batch_size + [cache] *
+                     self.batch_size)
+
+  @mock.patch('ddsp.spectral_ops.compute_f0')
+  def test_f0_crepe_metrics_viterbi_method_per_example(self, mock_compute_f0):
+    f0_crepe_metrics = ddsp_metrics.F0CrepeMetrics(
+        self.sample_rate, self.frame_rate, viterbi_method='banded')
+    crepe_f0 = self.batch_of_sin_feats['f0_hz']
+    mock_compute_f0.side_effect = zip(crepe_f0, np.ones_like(crepe_f0))
+    f0_crepe_metrics.update_state(self.batch_of_sin_feats, self.batch_of_sin)
+
+    methods = [kwargs['viterbi_method']
+               for _, kwargs in mock_compute_f0.call_args_list]
+    self.assertEqual(methods, ['banded'] * self.batch_size)
+
+  @mock.patch('ddsp.spectral_ops.compute_f0_batched')
+  def test_f0_crepe_metrics_batched(self, mock_compute_f0_batched):
+    """Test F0CrepeMetrics computing f0 for the whole batch at once."""
+    f0_crepe_metrics = ddsp_metrics.F0CrepeMetrics(
+        self.sample_rate, self.frame_rate, frames_per_batch=512,
+        viterbi_method='banded')
+    crepe_f0 = self.batch_of_sin_feats['f0_hz'] * 2
+    crepe_conf = np.ones_like(crepe_f0)
+    mock_compute_f0_batched.return_value = zip(crepe_f0, crepe_conf)
+    f0_crepe_metrics.update_state(self.batch_of_sin_feats, self.batch_of_sin)
+
+    mock_compute_f0_batched.assert_called_once()
+    _, kwargs = mock_compute_f0_batched.call_args
+    self.assertEqual(kwargs['frames_per_batch'], 512)
+    self.assertEqual(kwargs['viterbi_method'], 'banded')
+    self.assertGreater(f0_crepe_metrics.metrics['f0_dist'].result(), 0)
+    self.assertAllClose(
+        f0_crepe_metrics.metrics['outlier_ratio'].result(), 0)
+
   def test_f0_metrics_has_expected_values(self):
     f0_metrics = ddsp_metrics.F0Metrics(self.sample_rate, self.frame_rate)
     # Batch 1: known sin features vs. batch of known sin f0_hz
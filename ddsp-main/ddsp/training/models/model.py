@@ -27,6 +27,9 @@ class Model(tf.keras.Model):
   """Base class for all models."""
 
   def __init__(self, **kwargs):
+    # Don't cast input features under a mixed precision policy, only the
+    # network layers inside the model compute in reduced precision.
+    kwargs.setdefault('dtype', 'float32')
     super().__init__(**kwargs)
     self._losses_dict = {}
 
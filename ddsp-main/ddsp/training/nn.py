@@ -17,11 +17,12 @@
 import inspect
 
 from ddsp import core
+from ddsp import lazy_imports
 from ddsp import losses
 import gin
 import tensorflow as tf
-import tensorflow_probability as tfp
 
+tfp = lazy_imports.LazyModule('tensorflow_probability')
 tfk = tf.keras
 tfkl = tfk.layers
 
@@ -15,12 +15,15 @@
 """Plotting utilities for the DDSP library. Useful in colab and elsewhere."""
 
 from ddsp import core
+from ddsp import lazy_imports
 from ddsp import spectral_ops
-from matplotlib import gridspec
-import matplotlib.pyplot as plt
 import numpy as np
 import tensorflow.compat.v2 as tf
 
+# Slow to import, and only needed when plotting.
+gridspec = lazy_imports.LazyModule('matplotlib.gridspec')
+plt = lazy_imports.LazyModule('matplotlib.pyplot')
+
 DEFAULT_SAMPLE_RATE = spectral_ops.CREPE_SAMPLE_RATE
 
 
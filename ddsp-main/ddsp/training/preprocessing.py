@@ -65,6 +65,8 @@ class F0LoudnessPreprocessor(nn.DictLayer):
                sample_rate=16000,
                compute_loudness=True,
                **kwargs):
+    # Keep f0 and loudness in float32 under a mixed precision policy.
+    kwargs.setdefault('dtype', 'float32')
     super().__init__(**kwargs)
     self.time_steps = time_steps
     self.frame_rate = frame_rate
@@ -163,7 +165,10 @@ class OnlineF0PowerPreprocessor(nn.DictLayer):
                compute_f0=True,
                crepe_saved_model_path='full',
                viterbi=False,
+               viterbi_method='full',
                **kwargs):
+    # Keep f0 and power in float32 under a mixed precision policy.
+    kwargs.setdefault('dtype', 'float32')
     super().__init__(**kwargs)
     # Preprocessing must happen at 16kHz because CREPE trained at 16kHz.
     self.sample_rate = ddsp.spectral_ops.CREPE_SAMPLE_RATE
@@ -182,8 +187,9 @@ class OnlineF0PowerPreprocessor(nn.DictLayer):
           model_size_or_path=crepe_saved_model_path, hop_size=self.hop_size
       )
 
-    # Use viterbi decoding.
+    # Use viterbi decoding, 'full' or 'banded'.
     self.viterbi = viterbi
+    self.viterbi_method = viterbi_method
 
   def call(
       self, audio, f0_hz=None, f0_confidence=None, audio_16k=None, pw_db=None
@@ -203,7 +209,8 @@ class OnlineF0PowerPreprocessor(nn.DictLayer):
 
     if self.compute_f0:
       f0_hz, f0_confidence = self.crepe_model.predict_f0_and_confidence(
-          audio, viterbi=self.viterbi, padding=self.padding)
+          audio, viterbi=self.viterbi, padding=self.padding,
+          viterbi_method=self.viterbi_method)
       # Stop gradients from flowing to CREPE.
       f0_hz = tf.stop_gradient(f0_hz)
       f0_confidence = tf.stop_gradient(f0_confidence)
@@ -0,0 +1,300 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Post-training quantization of TFLite models, and its effect on accuracy.
+
+Converts the SavedModels of the VST inference modules to TFLite with
+dynamic-range (int8 weights) or float16 quantization, and compares quantized
+models against the float model on a set of clips:
+  * Feature extractors (`VSTExtractFeatures`, CREPE and power) are compared
+    with `F0Metrics`, and the mean absolute error of the power.
+  * Control predictors (`VST*PredictControls*`, the `RnnFcDecoder`) are
+    compared with the `SpectralLoss` of audio synthesized from the controls.
+Every model also reports its size and TFLite interpreter latency on CPU.
+"""
+
+import time
+
+import ddsp
+from ddsp import losses
+from ddsp.training import metrics
+from ddsp.training import preprocessing
+import numpy as np
+import tensorflow as tf
+
+QUANTIZATION_MODES = ('none', 'dynamic_range', 'float16')
+
+
+def convert_saved_model(saved_model_dir, quantization='none'):
+  """Convert a SavedModel to TFLite, with optional post-training quantization.
+
+  Args:
+    saved_model_dir: Directory of the SavedModel.
+    quantization: One of QUANTIZATION_MODES. 'dynamic_range' stores weights as
+      int8 and quantizes activations on the fly, 'float16' stores weights as
+      float16.
+
+  Returns:
+    The TFLite model as a byte string.
+
+  Raises:
+    ValueError: If quantization is not one of QUANTIZATION_MODES.
+  """
+  if quantization not in QUANTIZATION_MODES:
+    raise ValueError(f'Quantization must be one of {QUANTIZATION_MODES}, not '
+                     f'{quantization!r}.')
+  converter = tf.lite.TFLiteConverter.from_saved_model(saved_model_dir)
+  converter.target_spec.supported_ops = [
+      tf.lite.OpsSet.TFLITE_BUILTINS,  # Enable TensorFlow Lite ops.
+      tf.lite.OpsSet.SELECT_TF_OPS,  # Enable extended TensorFlow ops.
+  ]
+  if quantization != 'none':
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+  if quantization == 'float16':
+    converter.target_spec.supported_types = [tf.float16]
+  return converter.convert()
+
+
+class TFLiteRunner(object):
+  """Runs the signature of a TFLite model and times every invocation."""
+
+  def __init__(self, tflite_model, num_threads=1):
+    interpreter = tf.lite.Interpreter(model_content=tflite_model,
+                                      num_threads=num_threads)
+    self.runner = interpreter.get_signature_runner()
+    self.input_shapes = {k: list(v['shape']) for k, v in
+                         self.runner.get_input_details().items()}
+    self.times = []
+
+  def __call__(self, **inputs):
+    """Run the model, returns the outputs in order."""
+    inputs = {k: np.asarray(v, np.float32).reshape(self.input_shapes[k])
+              for k, v in inputs.items()}
+    start_time = time.perf_counter()
+    outputs = self.runner(**inputs)
+    self.times.append(time.perf_counter() - start_time)
+    return [outputs[f'output_{i}'] for i in range(len(outputs))]
+
+
+def get_model_type(runner):
+  """'features' for feature extractors, 'controls' for control predictors."""
+  if 'audio' in runner.input_shapes:
+    return 'features'
+  if {'f0_scaled', 'pw_scaled'} <= set(runner.input_shapes):
+    return 'controls'
+  raise ValueError('Quantization reports support feature extraction and '
+                   'control prediction models, not models with inputs '
+                   f'{sorted(runner.input_shapes)}.')
+
+
+def extract_features(runner, audio, frame_size, hop_size):
+  """Run a feature extractor on every hop of a clip.
+
+  The audio is front padded so that each hop of audio completes a frame, as in
+  streaming inference.
+
+  Args:
+    runner: TFLiteRunner of a `VSTExtractFeatures` model.
+    audio: Audio at 16kHz, shape [n_samples].
+    frame_size: Samples per a frame of analysis.
+    hop_size: Samples per a hop.
+
+  Returns:
+    f0_hz and power_db, each of shape [n_samples // hop_size].
+  """
+  audio = np.pad(np.asarray(audio, np.float32).reshape([-1]),
+                 (frame_size - hop_size, 0))
+  n_frames = (len(audio) - frame_size) // hop_size + 1
+  f0_hz, power_db = [], []
+  for i in range(n_frames):
+    outputs = runner(audio=audio[i * hop_size:i * hop_size + frame_size])
+    f0_hz.append(outputs[0])
+    power_db.append(outputs[2])
+  return np.ravel(f0_hz), np.ravel(power_db)
+
+
+def predict_controls(runner, f0_scaled, pw_scaled):
+  """Run a control predictor over a sequence of frames, carrying RNN state.
+
+  Args:
+    runner: TFLiteRunner of a `VSTPredictControls`,
+      `VSTStatelessPredictControls` or `VSTStatelessPredictControlsFrames`
+      model.
+    f0_scaled: Scaled f0, shape [n_frames].
+    pw_scaled: Scaled power, shape [n_frames].
+
+  Returns:
+    amps, harmonic_distribution and noise_magnitudes, of shapes [n_frames, 1],
+      [n_frames, n_harmonics] and [n_frames, n_noise].
+  """
+  frames_per_call = int(np.prod(runner.input_shapes['f0_scaled']))
+  n_frames = len(f0_scaled)
+  # Hold the last frame to fill the last call.
+  n_padded = -(-n_frames // frames_per_call) * frames_per_call
+  f0_scaled = np.pad(f0_scaled, (0, n_padded - n_frames), mode='edge')
+  pw_scaled = np.pad(pw_scaled, (0, n_padded - n_frames), mode='edge')
+  state = (np.zeros(runner.input_shapes['state'], np.float32)
+           if 'state' in runner.input_shapes else None)
+
+  controls = []
+  for start in range(0, n_padded, frames_per_call):
+    inputs = {'f0_scaled': f0_scaled[start:start + frames_per_call],
+              'pw_scaled': pw_scaled[start:start + frames_per_call]}
+    if state is not None:
+      inputs['state'] = state
+      *outputs, state = runner(**inputs)
+    else:
+      outputs = runner(**inputs)
+    controls.append([np.reshape(x, [frames_per_call, -1]) for x in outputs])
+  return [np.concatenate(x)[:n_frames] for x in zip(*controls)]
+
+
+def synthesize(amps, harmonic_distribution, noise_magnitudes, f0_hz, hop_size,
+               sample_rate=16000, seed=0):
+  """Render frame-wise controls to audio, with a fixed noise seed.
+
+  Args:
+    amps: Amplitudes, shape [n_frames, 1].
+    harmonic_distribution: Harmonic distribution, shape [n_frames,
+      n_harmonics].
+    noise_magnitudes: Noise filter magnitudes, shape [n_frames, n_noise].
+    f0_hz: Fundamental frequency, shape [n_frames].
+    hop_size: Samples per a frame.
+    sample_rate: Sample rate of the audio.
+    seed: Seed of the white noise, keep it fixed to compare controls.
+
+  Returns:
+    Audio of shape [n_frames * hop_size].
+  """
+  n_samples = len(f0_hz) * hop_size
+  harmonic_audio = ddsp.core.harmonic_synthesis(
+      frequencies=np.reshape(f0_hz, [1, -1, 1]).astype(np.float32),
+      amplitudes=amps[np.newaxis],
+      harmonic_distribution=harmonic_distribution[np.newaxis],
+      n_samples=n_samples,
+      sample_rate=sample_rate,
+      amp_resample_method='linear')
+  noise = np.random.RandomState(seed).uniform(-1.0, 1.0, [1, n_samples])
+  noise_audio = ddsp.core.frequency_filter(
+      noise.astype(np.float32), noise_magnitudes[np.newaxis], window_size=0)
+  return (harmonic_audio + noise_audio).numpy()[0]
+
+
+def _latency_stats(runner):
+  times = 1000.0 * np.array(runner.times[1:] or runner.times)
+  return {
+      'latency_ms_mean': float(times.mean()),
+      'latency_ms_p50': float(np.percentile(times, 50)),
+      'latency_ms_p99': float(np.percentile(times, 99)),
+  }
+
+
+def evaluate_tflite_models(tflite_models,
+                           clips,
+                           sample_rate=16000,
+                           frame_rate=50,
+                           frame_size=1024,
+                           reference='none',
+                           num_threads=1):
+  """Compare the size, latency, and accuracy of TFLite models.
+
+  Args:
+    tflite_models: Dictionary of names (e.g. quantization modes) to TFLite
+      models of the same inference module, as byte strings.
+    clips: List of dictionaries with 'audio' at 16kHz, and optionally
+      'f0_hz' and 'f0_confidence' at any frame rate. Control predictors use
+      f0_hz if given, and the power of the audio.
+    sample_rate: Sample rate of synthesized audio.
+    frame_rate: Frame rate of the model.
+    frame_size: Samples per a frame of power and f0 analysis.
+    reference: Name of the float model to compare against.
+    num_threads: CPU threads of the TFLite interpreter.
+
+  Returns:
+    Dictionary of names to dictionaries of metrics.
+
+  Raises:
+    ValueError: If the reference model is missing.
+  """
+  if reference not in tflite_models:
+    raise ValueError(f'Reference model {reference!r} is missing.')
+  hop_size = ddsp.spectral_ops.CREPE_SAMPLE_RATE // frame_rate
+  synth_hop_size = sample_rate // frame_rate
+  runners = {k: TFLiteRunner(v, num_threads)
+             for k, v in tflite_models.items()}
+  model_type = get_model_type(runners[reference])
+
+  # Model outputs, [clip][name].
+  outputs = []
+  for clip in clips:
+    audio = np.asarray(clip['audio'], np.float32).reshape([-1])
+    n_frames = len(audio) // hop_size
+    if model_type == 'features':
+      outputs.append({k: extract_features(r, audio, frame_size, hop_size)
+                      for k, r in runners.items()})
+    else:
+      if 'f0_hz' in clip:
+        f0_hz = ddsp.core.resample(
+            np.reshape(clip['f0_hz'], [-1]).astype(np.float32),
+            n_frames).numpy()
+      else:
+        f0_hz = np.full([n_frames], 440.0, np.float32)
+      power_db = np.reshape(ddsp.spectral_ops.compute_power(
+          np.pad(audio, (frame_size - hop_size, 0)),
+          frame_rate=frame_rate, frame_size=frame_size, padding='valid'),
+                            [-1])[:n_frames]
+      f0_scaled = np.asarray(preprocessing.scale_f0_hz(f0_hz))
+      pw_scaled = np.asarray(preprocessing.scale_db(power_db))
+      clip_outputs = {}
+      for k, r in runners.items():
+        controls = predict_controls(r, f0_scaled, pw_scaled)
+        clip_outputs[k] = synthesize(*controls, f0_hz, synth_hop_size,
+                                     sample_rate)
+      outputs.append(clip_outputs)
+
+  report = {}
+  reference_size = len(tflite_models[reference])
+  for name, runner in runners.items():
+    result = {
+        'size_bytes': len(tflite_models[name]),
+        'size_ratio': len(tflite_models[name]) / reference_size,
+    }
+    result.update(_latency_stats(runner))
+    if model_type == 'features':
+      f0_metrics = metrics.F0Metrics(sample_rate, frame_rate)
+      power_errors = []
+      for clip, clip_outputs in zip(clips, outputs):
+        f0_ref, power_ref = clip_outputs[reference]
+        f0_hz, power_db = clip_outputs[name]
+        if 'f0_confidence' in clip:
+          f0_confidence = ddsp.core.resample(
+              np.reshape(clip['f0_confidence'], [-1]).astype(np.float32),
+              len(f0_ref)).numpy()
+        else:
+          f0_confidence = np.ones_like(f0_ref)
+        f0_metrics.update_state(
+            {'f0_hz': f0_ref[np.newaxis], 'f0_confidence': f0_confidence[
+                np.newaxis]}, f0_hz[np.newaxis])
+        power_errors.append(np.abs(power_db - power_ref).mean())
+      result.update({k: float(v.result())
+                     for k, v in f0_metrics.metrics.items()})
+      result['power_db_error'] = float(np.mean(power_errors))
+    else:
+      spectral_loss = losses.SpectralLoss(loss_type='L1', mag_weight=1.0,
+                                          logmag_weight=1.0)
+      result['spectral_loss'] = float(np.mean([
+          spectral_loss(o[reference][np.newaxis], o[name][np.newaxis])
+          for o in outputs]))
+    report[name] = result
+  return report
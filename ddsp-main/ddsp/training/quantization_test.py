@@ -0,0 +1,144 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for ddsp.training.quantization."""
+
+import tempfile
+
+from absl.testing import parameterized
+from ddsp.training import preprocessing
+from ddsp.training import quantization
+import numpy as np
+import tensorflow.compat.v2 as tf
+
+FRAME_SIZE = 1024
+HOP_SIZE = 320
+STATE_SIZE = 64
+
+
+class FakePredictControls(tf.Module):
+  """Same signature as VSTStatelessPredictControlsFrames, with big weights."""
+
+  def __init__(self, n_frames):
+    super().__init__()
+    self.n_frames = n_frames
+    rng = np.random.RandomState(0)
+    self.w_in = tf.Variable(rng.randn(2, STATE_SIZE).astype(np.float32))
+    self.w_state = tf.Variable(
+        0.1 * rng.randn(STATE_SIZE, STATE_SIZE).astype(np.float32))
+    self.w_out = tf.Variable(
+        0.1 * rng.randn(STATE_SIZE, 1 + 10 + 8).astype(np.float32))
+
+  def signatures(self):
+    return {'call': self.call.get_concrete_function(
+        f0_scaled=tf.TensorSpec([self.n_frames], tf.float32),
+        pw_scaled=tf.TensorSpec([self.n_frames], tf.float32),
+        state=tf.TensorSpec([STATE_SIZE], tf.float32))}
+
+  @tf.function
+  def call(self, f0_scaled, pw_scaled, state):
+    x = tf.stack([f0_scaled, pw_scaled], axis=1)
+    state = state[tf.newaxis]
+    outputs = []
+    for i in range(self.n_frames):
+      state = tf.tanh(tf.matmul(x[i:i + 1], self.w_in) +
+                      tf.matmul(state, self.w_state))
+      outputs.append(tf.matmul(state, self.w_out))
+    outputs = tf.nn.sigmoid(tf.concat(outputs, axis=0))
+    return outputs[:, :1], outputs[:, 1:11], outputs[:, 11:], state[0]
+
+
+class FakeExtractFeatures(tf.Module):
+  """Same signature as VSTExtractFeatures, with big weights."""
+
+  def __init__(self):
+    super().__init__()
+    rng = np.random.RandomState(0)
+    self.w = tf.Variable(
+        0.01 * rng.randn(FRAME_SIZE, 360).astype(np.float32))
+
+  def signatures(self):
+    return {'call': self.call.get_concrete_function(
+        audio=tf.TensorSpec([FRAME_SIZE], tf.float32))}
+
+  @tf.function
+  def call(self, audio):
+    activations = tf.matmul(audio[tf.newaxis], self.w)
+    f0_hz = 200.0 + 10.0 * tf.reduce_sum(tf.nn.softmax(activations) *
+                                         tf.range(360.0))
+    pw_db = 10.0 * tf.math.log(tf.reduce_mean(audio**2) + 1e-6)
+    return (f0_hz, preprocessing.scale_f0_hz(f0_hz), pw_db,
+            preprocessing.scale_db(pw_db))
+
+
+class QuantizationTest(parameterized.TestCase, tf.test.TestCase):
+
+  def _convert(self, module):
+    saved_model_dir = tempfile.mkdtemp(dir=self.get_temp_dir())
+    tf.saved_model.save(module, saved_model_dir,
+                        signatures=module.signatures())
+    return {mode: quantization.convert_saved_model(saved_model_dir, mode)
+            for mode in quantization.QUANTIZATION_MODES}
+
+  def _clips(self):
+    t = np.arange(16000) / 16000.0
+    return [{'audio': 0.5 * np.sin(2 * np.pi * 440.0 * t),
+             'f0_hz': np.full([250], 440.0),
+             'f0_confidence': np.ones([250])},
+            {'audio': 0.1 * np.sin(2 * np.pi * 220.0 * t)}]
+
+  @parameterized.named_parameters(('single_frame', 1), ('multi_frame', 4))
+  def test_controls_report(self, n_frames):
+    tflite_models = self._convert(FakePredictControls(n_frames))
+    report = quantization.evaluate_tflite_models(
+        tflite_models, self._clips(), frame_size=FRAME_SIZE)
+
+    self.assertEqual(set(report), set(quantization.QUANTIZATION_MODES))
+    self.assertEqual(report['none']['spectral_loss'], 0.0)
+    self.assertLess(report['dynamic_range']['size_ratio'], 0.5)
+    self.assertLess(report['float16']['size_ratio'], 0.75)
+    for mode in ('dynamic_range', 'float16'):
+      self.assertGreater(report[mode]['latency_ms_mean'], 0.0)
+      self.assertLess(report[mode]['spectral_loss'], 1.0)
+
+  def test_features_report(self):
+    tflite_models = self._convert(FakeExtractFeatures())
+    report = quantization.evaluate_tflite_models(
+        tflite_models, self._clips(), frame_size=FRAME_SIZE)
+
+    self.assertEqual(report['none']['f0_dist'], 0.0)
+    self.assertEqual(report['none']['raw_pitch_accuracy'], 1.0)
+    self.assertEqual(report['none']['power_db_error'], 0.0)
+    self.assertLess(report['dynamic_range']['size_ratio'], 0.5)
+    self.assertLess(report['dynamic_range']['f0_dist'], 1.0)
+
+  def test_predict_controls_pads_the_last_call(self):
+    runner = quantization.TFLiteRunner(
+        self._convert(FakePredictControls(4))['none'])
+    f0_scaled = np.linspace(0.2, 0.6, 10)
+    pw_scaled = np.linspace(0.3, 0.8, 10)
+    amps, hd, noise = quantization.predict_controls(runner, f0_scaled,
+                                                    pw_scaled)
+    self.assertEqual(amps.shape, (10, 1))
+    self.assertEqual(hd.shape, (10, 10))
+    self.assertEqual(noise.shape, (10, 8))
+    self.assertLen(runner.times, 3)
+
+  def test_unknown_quantization_raises_value_error(self):
+    with self.assertRaises(ValueError):
+      quantization.convert_saved_model(self.get_temp_dir(), 'int4')
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -0,0 +1,486 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Render server that batches concurrent tone transfer requests.
+
+A small HTTP/1.1 server built on asyncio streams, without dependencies beyond
+the standard library. Concurrent requests for the same model and of similar
+length are rendered together in a single batch by a StreamingAutoencoderInference
+model. Requests are grouped in buckets of `bucket_frames` frames, padded to the
+length of their bucket, and the rendered audio is trimmed back to the length of
+each request.
+
+Endpoints:
+  POST /render?model=<name>&pitch_shift=<semitones>&loudness_shift=<dB>
+    The body is either a JSON object with lists 'f0_hz' and 'loudness_db' at
+    the frame rate of the model, or an audio file (Content-Type: audio/*) from
+    which the features are extracted with CREPE. Responds with a 16 bit WAV.
+  GET /models
+    JSON list of model names.
+  GET /metrics
+    JSON of queue depth, batch size histogram, and request latencies.
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+import io
+import json
+import time
+import urllib.parse
+import wave
+
+from absl import logging
+import ddsp
+from ddsp import lazy_imports
+from ddsp.training import inference
+import numpy as np
+
+librosa = lazy_imports.LazyModule('librosa')
+
+_FEATURE_SAMPLE_RATE = 16000
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+            405: 'Method Not Allowed', 413: 'Payload Too Large',
+            500: 'Internal Server Error'}
+
+
+class RenderMetrics(object):
+  """Counters of batches, and a window of recent request latencies."""
+
+  def __init__(self, max_latencies=10000):
+    self.batch_sizes = collections.Counter()
+    self.latencies = collections.deque(maxlen=max_latencies)
+    self.n_requests = 0
+    self.n_errors = 0
+    self.max_queue_depth = 0
+
+  def record_batch(self, batch_size):
+    self.batch_sizes[batch_size] += 1
+
+  def record_request(self, latency, error=False):
+    self.n_requests += 1
+    self.n_errors += int(error)
+    if not error:
+      self.latencies.append(latency)
+
+  def snapshot(self, queue_depth):
+    """Dictionary of metrics, with latencies in milliseconds."""
+    self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+    latencies = 1000.0 * np.array(self.latencies)
+
+    def percentile(q):
+      return float(np.percentile(latencies, q)) if latencies.size else None
+
+    n_batches = sum(self.batch_sizes.values())
+    n_batched = sum(k * v for k, v in self.batch_sizes.items())
+    return {
+        'queue_depth': queue_depth,
+        'max_queue_depth': self.max_queue_depth,
+        'n_requests': self.n_requests,
+        'n_errors': self.n_errors,
+        'n_batches': n_batches,
+        'mean_batch_size': n_batched / n_batches if n_batches else None,
+        'batch_size_histogram': {
+            str(k): v for k, v in sorted(self.batch_sizes.items())},
+        'latency_ms_p50': percentile(50),
+        'latency_ms_p99': percentile(99),
+        'latency_ms_mean': float(latencies.mean()) if latencies.size else None,
+    }
+
+
+class _Request(object):
+  """Features of a queued request, and the future of its audio."""
+
+  def __init__(self, features, n_frames, future, arrival_time):
+    self.features = features
+    self.n_frames = n_frames
+    self.future = future
+    self.arrival_time = arrival_time
+
+
+class HTTPError(Exception):
+  """Error that is reported to the client with an HTTP status code."""
+
+  def __init__(self, status, message):
+    super().__init__(message)
+    self.status = status
+
+
+def encode_wav(audio, sample_rate):
+  """Encode float audio in [-1, 1] as a mono 16 bit WAV file."""
+  samples = (np.clip(audio, -1.0, 1.0) * 32767.0).astype('<i2')
+  f = io.BytesIO()
+  with wave.open(f, 'wb') as wav:
+    wav.setnchannels(1)
+    wav.setsampwidth(2)
+    wav.setframerate(sample_rate)
+    wav.writeframes(samples.tobytes())
+  return f.getvalue()
+
+
+def decode_wav(wav_data):
+  """Decode a mono 16 bit WAV file, returns float audio and the sample rate."""
+  with wave.open(io.BytesIO(wav_data), 'rb') as wav:
+    samples = np.frombuffer(wav.readframes(wav.getnframes()), '<i2')
+    return samples.astype(np.float32) / 32767.0, wav.getframerate()
+
+
+class RenderServer(object):
+  """Serve tone transfer over HTTP, with dynamic batching of requests."""
+
+  def __init__(self,
+               models,
+               max_batch_size=8,
+               max_wait_ms=10.0,
+               bucket_frames=250,
+               block_frames=1000,
+               max_models=4,
+               frame_rate=250,
+               viterbi_method='banded',
+               max_body_bytes=64 * 2**20):
+    """Constructor.
+
+    Args:
+      models: Dictionary of model names to checkpoint directories, or to
+        StreamingAutoencoderInference models that are already built.
+      max_batch_size: Maximum number of requests rendered together.
+      max_wait_ms: Longest time that the oldest queued request waits for other
+        requests to fill its batch.
+      bucket_frames: Requests are padded to a multiple of this many frames, and
+        only requests with the same padded length are batched together. Larger
+        buckets batch more requests, at the cost of rendering more padding.
+      block_frames: Frames per a block of streaming rendering.
+      max_models: Maximum number of models restored from checkpoints that are
+        kept in memory at once.
+      frame_rate: Rate in Hz of the features extracted from audio requests.
+      viterbi_method: Viterbi decoding of CREPE activations, see
+        spectral_ops.compute_f0().
+      max_body_bytes: Larger requests are rejected.
+    """
+    if not models:
+      raise ValueError('RenderServer needs at least one model.')
+    self.models = dict(models)
+    self.max_batch_size = max_batch_size
+    self.max_wait = max_wait_ms / 1000.0
+    self.bucket_frames = bucket_frames
+    self.frame_rate = frame_rate
+    self.viterbi_method = viterbi_method
+    self.max_body_bytes = max_body_bytes
+    self.registry = inference.ModelRegistry(
+        max_models=max_models, block_frames=block_frames, verbose=False)
+    self.metrics = RenderMetrics()
+
+    # Models are only called from a single thread, as the registry swaps the
+    # global gin config. Feature extraction runs alongside in another thread.
+    self._model_executor = concurrent.futures.ThreadPoolExecutor(1)
+    self._feature_executor = concurrent.futures.ThreadPoolExecutor(1)
+    self._pending = collections.OrderedDict()
+    self._wakeup = None
+    self._batch_task = None
+    self._server = None
+
+  @property
+  def queue_depth(self):
+    return sum(len(requests) for requests in self._pending.values())
+
+  def _get_model(self, name):
+    """Restore or look up a model, only called from the model thread."""
+    model = self.models[name]
+    if isinstance(model, str):
+      model = self.registry.get(model)
+    return model
+
+  def _render_batch(self, name, requests):
+    """Render a batch of requests, padded to the same length."""
+    model = self._get_model(name)
+    n_frames = max(r.n_frames for r in requests)
+    batch = {}
+    for k in requests[0].features:
+      batch[k] = np.stack([np.pad(r.features[k], (0, n_frames - r.n_frames),
+                                  mode='edge') for r in requests])
+    audio = model.render(batch)
+    return [audio[i, :r.n_frames * model.hop_size]
+            for i, r in enumerate(requests)], model.sample_rate
+
+  async def _batch_loop(self):
+    """Render queued requests, batching the ones that arrive together."""
+    loop = asyncio.get_running_loop()
+    while True:
+      while not self._pending:
+        self._wakeup.clear()
+        await self._wakeup.wait()
+
+      # The oldest request decides which bucket is rendered next.
+      key = min(self._pending,
+                key=lambda k: self._pending[k][0].arrival_time)
+      deadline = self._pending[key][0].arrival_time + self.max_wait
+      while len(self._pending[key]) < self.max_batch_size:
+        timeout = deadline - loop.time()
+        if timeout <= 0:
+          break
+        self._wakeup.clear()
+        try:
+          await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+          break
+
+      queued = self._pending.pop(key)
+      requests = queued[:self.max_batch_size]
+      if len(queued) > len(requests):
+        self._pending[key] = queued[len(requests):]
+      # Skip requests whose clients have gone away.
+      requests = [r for r in requests if not r.future.done()]
+      if not requests:
+        continue
+
+      self.metrics.record_batch(len(requests))
+      try:
+        audios, sample_rate = await loop.run_in_executor(
+            self._model_executor, self._render_batch, key[0], requests)
+      except Exception as e:  # pylint: disable=broad-except
+        for r in requests:
+          if not r.future.done():
+            r.future.set_exception(e)
+      else:
+        for r, audio in zip(requests, audios):
+          if not r.future.done():
+            r.future.set_result((audio, sample_rate))
+
+  async def render(self, features, model=None, pitch_shift=0.0,
+                   loudness_shift=0.0):
+    """Queue features for rendering, and wait for the batch to be rendered.
+
+    Args:
+      features: Dictionary of 'f0_hz' and 'loudness_db' (or 'power_db'), each
+        of shape [n_frames], at the frame rate of the model.
+      model: Name of the model, optional if the server only has one.
+      pitch_shift: Semitones to shift f0 by.
+      loudness_shift: Decibels to shift the loudness (or power) by.
+
+    Returns:
+      Tuple of the rendered audio of shape [n_samples], and its sample rate.
+
+    Raises:
+      HTTPError: With status 404 for an unknown model, or 400 for invalid
+        features.
+    """
+    if model is None and len(self.models) == 1:
+      model = next(iter(self.models))
+    if model not in self.models:
+      raise HTTPError(404, f'Unknown model {model!r}.')
+    db_keys = [k for k in ('loudness_db', 'power_db') if k in features]
+    if 'f0_hz' not in features or len(db_keys) != 1:
+      raise HTTPError(400, 'Features need "f0_hz", and either "loudness_db" or '
+                      '"power_db".')
+    try:
+      f0_hz = np.asarray(features['f0_hz'], np.float32)
+      db = np.asarray(features[db_keys[0]], np.float32)
+    except (TypeError, ValueError) as e:
+      raise HTTPError(400, f'Invalid features: {e}') from e
+    if f0_hz.ndim != 1 or f0_hz.shape != db.shape or not f0_hz.size:
+      raise HTTPError(400, 'Features must be non-empty lists of equal length.')
+
+    f0_midi = np.clip(np.asarray(ddsp.core.hz_to_midi(f0_hz)) + pitch_shift,
+                      0.0, 127.0)
+    features = {'f0_hz': np.asarray(ddsp.core.midi_to_hz(f0_midi), np.float32),
+                db_keys[0]: db + loudness_shift}
+
+    loop = asyncio.get_running_loop()
+    n_frames = f0_hz.size
+    n_buckets = -(-n_frames // self.bucket_frames)
+    key = (model, db_keys[0], n_buckets * self.bucket_frames)
+    request = _Request(features, n_frames, loop.create_future(), loop.time())
+    self._pending.setdefault(key, []).append(request)
+    self.metrics.max_queue_depth = max(self.metrics.max_queue_depth,
+                                       self.queue_depth)
+    self._wakeup.set()
+
+    try:
+      result = await request.future
+    except Exception:
+      self.metrics.record_request(loop.time() - request.arrival_time,
+                                  error=True)
+      raise
+    self.metrics.record_request(loop.time() - request.arrival_time)
+    return result
+
+  def _extract_features(self, audio_data):
+    """Decode an audio file, and compute its f0 and loudness."""
+    audio, _ = librosa.load(io.BytesIO(audio_data), sr=_FEATURE_SAMPLE_RATE,
+                            mono=True)
+    f0_hz, _ = ddsp.spectral_ops.compute_f0(
+        audio, self.frame_rate, viterbi=True, padding='center',
+        viterbi_method=self.viterbi_method)
+    loudness_db = np.asarray(ddsp.spectral_ops.compute_loudness(
+        audio, _FEATURE_SAMPLE_RATE, self.frame_rate))
+    n_frames = min(len(f0_hz), len(loudness_db))
+    return {'f0_hz': f0_hz[:n_frames], 'loudness_db': loudness_db[:n_frames]}
+
+  async def extract_features(self, audio_data):
+    """Compute the features of an audio file without blocking the server."""
+    loop = asyncio.get_running_loop()
+    try:
+      return await loop.run_in_executor(
+          self._feature_executor, self._extract_features, audio_data)
+    except Exception as e:  # pylint: disable=broad-except
+      raise HTTPError(400, f'Could not read audio: {e}') from e
+
+  async def _dispatch(self, method, target, headers, body):
+    """Handle a request, returns the status, content type, and body."""
+    url = urllib.parse.urlsplit(target)
+    query = dict(urllib.parse.parse_qsl(url.query))
+    if url.path == '/metrics':
+      if method != 'GET':
+        raise HTTPError(405, 'Use GET for /metrics.')
+      return 200, 'application/json', self.metrics_json()
+    if url.path == '/models':
+      if method != 'GET':
+        raise HTTPError(405, 'Use GET for /models.')
+      return 200, 'application/json', json.dumps(list(self.models)).encode()
+    if url.path != '/render':
+      raise HTTPError(404, f'Unknown path {url.path!r}.')
+    if method != 'POST':
+      raise HTTPError(405, 'Use POST for /render.')
+
+    try:
+      pitch_shift = float(query.get('pitch_shift', 0.0))
+      loudness_shift = float(query.get('loudness_shift', 0.0))
+    except ValueError as e:
+      raise HTTPError(400, f'Invalid shift: {e}') from e
+    content_type = headers.get('content-type', 'application/json')
+    if content_type.startswith('audio/'):
+      features = await self.extract_features(body)
+    else:
+      try:
+        features = json.loads(body)
+      except ValueError as e:
+        raise HTTPError(400, f'Invalid JSON: {e}') from e
+      if not isinstance(features, dict):
+        raise HTTPError(400, 'The JSON body must be an object.')
+    audio, sample_rate = await self.render(
+        features, query.get('model'), pitch_shift, loudness_shift)
+    return 200, 'audio/wav', encode_wav(audio, sample_rate)
+
+  async def _handle_connection(self, reader, writer):
+    """Serve HTTP/1.1 requests of a connection, keeping it alive."""
+    try:
+      while True:
+        request_line = await reader.readline()
+        if not request_line:
+          break
+        headers = {}
+        while True:
+          line = await reader.readline()
+          if line in (b'\r\n', b'\n', b''):
+            break
+          name, _, value = line.decode('latin-1').partition(':')
+          headers[name.strip().lower()] = value.strip()
+
+        try:
+          method, target, _ = request_line.decode('latin-1').split()
+          content_length = int(headers.get('content-length', 0))
+          if content_length > self.max_body_bytes:
+            raise HTTPError(413, f'Requests are limited to '
+                            f'{self.max_body_bytes} bytes.')
+          body = await reader.readexactly(content_length)
+          status, content_type, payload = await self._dispatch(
+              method, target, headers, body)
+        except HTTPError as e:
+          status, content_type = e.status, 'application/json'
+          payload = json.dumps({'error': str(e)}).encode()
+        except ValueError as e:
+          status, content_type = 400, 'application/json'
+          payload = json.dumps({'error': f'Malformed request: {e}'}).encode()
+        except (asyncio.IncompleteReadError, ConnectionError):
+          break
+        except Exception as e:  # pylint: disable=broad-except
+          logging.exception('Error serving %s', request_line)
+          status, content_type = 500, 'application/json'
+          payload = json.dumps({'error': str(e)}).encode()
+
+        keep_alive = (headers.get('connection', '').lower() != 'close' and
+                      status != 413)
+        writer.write(
+            f'HTTP/1.1 {status} {_REASONS[status]}\r\n'
+            f'Content-Type: {content_type}\r\n'
+            f'Content-Length: {len(payload)}\r\n'
+            f'Connection: {"keep-alive" if keep_alive else "close"}\r\n'
+            f'\r\n'.encode('latin-1') + payload)
+        await writer.drain()
+        if not keep_alive:
+          break
+    except ConnectionError:
+      pass
+    finally:
+      writer.close()
+
+  def metrics_json(self):
+    return json.dumps(self.metrics.snapshot(self.queue_depth)).encode()
+
+  async def start(self, host='127.0.0.1', port=8000, preload=True):
+    """Start serving, returns the port (useful with port=0).
+
+    Args:
+      host: Address to listen on.
+      port: Port to listen on, 0 picks a free port.
+      preload: Restore the models from checkpoints before serving, up to the
+        registry size, so that the first requests don't wait for them.
+
+    Returns:
+      The port that the server listens on.
+    """
+    loop = asyncio.get_running_loop()
+    self._wakeup = asyncio.Event()
+    self._batch_task = loop.create_task(self._batch_loop())
+    if preload:
+      names = [k for k, v in self.models.items() if isinstance(v, str)]
+      for name in names[:self.registry.max_models]:
+        start_time = time.time()
+        await loop.run_in_executor(self._model_executor, self._get_model, name)
+        logging.info('Loaded model %s in %.1f seconds.', name,
+                     time.time() - start_time)
+    self._server = await asyncio.start_server(
+        self._handle_connection, host, port)
+    port = self._server.sockets[0].getsockname()[1]
+    logging.info('Serving %d models on http://%s:%d', len(self.models), host,
+                 port)
+    return port
+
+  async def serve_forever(self, host='127.0.0.1', port=8000):
+    await self.start(host, port)
+    try:
+      await self._server.serve_forever()
+    finally:
+      await self.close()
+
+  async def close(self):
+    """Stop serving, and fail any requests that are still queued."""
+    if self._server is not None:
+      self._server.close()
+      await self._server.wait_closed()
+      self._server = None
+    if self._batch_task is not None:
+      self._batch_task.cancel()
+      try:
+        await self._batch_task
+      except asyncio.CancelledError:
+        pass
+      self._batch_task = None
+    for requests in self._pending.values():
+      for r in requests:
+        if not r.future.done():
+          r.future.set_exception(HTTPError(500, 'The server was closed.'))
+    self._pending.clear()
+    self._model_executor.shutdown(wait=True)
+    self._feature_executor.shutdown(wait=True)
@@ -0,0 +1,148 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for ddsp.training.serving."""
+
+import asyncio
+import json
+
+import ddsp
+from ddsp.training import decoders
+from ddsp.training import inference
+from ddsp.training import preprocessing
+from ddsp.training import serving
+import numpy as np
+import tensorflow.compat.v2 as tf
+
+
+def get_model():
+  """Small harmonic model, which renders deterministically."""
+  dag = [(ddsp.synths.Harmonic(n_samples=640, use_angular_cumsum=True),
+          ['amps', 'harmonic_distribution', 'f0_hz'])]
+  model = inference.StreamingAutoencoderInference(
+      block_frames=8,
+      preprocessor=preprocessing.F0LoudnessPreprocessor(
+          time_steps=10, compute_loudness=False),
+      decoder=decoders.RnnFcDecoder(
+          rnn_channels=8,
+          ch=8,
+          layers_per_stack=1,
+          stateless=True,
+          input_keys=('ld_scaled', 'f0_scaled'),
+          output_splits=(('amps', 1), ('harmonic_distribution', 10))),
+      processor_group=ddsp.processors.ProcessorGroup(dag=dag))
+  model.warm_up()
+  return model
+
+
+def get_features(n_frames, f0_hz=440.0):
+  return {'f0_hz': np.full([n_frames], f0_hz, np.float32),
+          'loudness_db': np.linspace(-40.0, -10.0, n_frames, dtype=np.float32)}
+
+
+async def http_request(port, method, target, body=b''):
+  """Send a single request, returns the status and the response body."""
+  reader, writer = await asyncio.open_connection('127.0.0.1', port)
+  writer.write(f'{method} {target} HTTP/1.1\r\n'
+               f'Content-Length: {len(body)}\r\n'
+               f'Connection: close\r\n\r\n'.encode() + body)
+  await writer.drain()
+  response = await reader.read()
+  writer.close()
+  head, _, payload = response.partition(b'\r\n\r\n')
+  return int(head.split()[1]), payload
+
+
+class RenderServerTest(tf.test.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.model = get_model()
+
+  def _run(self, server, coroutine_fn):
+    """Run a coroutine function while the server is serving."""
+    async def run():
+      port = await server.start(port=0)
+      try:
+        return await coroutine_fn(port)
+      finally:
+        await server.close()
+    return asyncio.run(run())
+
+  def test_concurrent_requests_are_batched(self):
+    server = serving.RenderServer({'flute': self.model}, max_batch_size=4,
+                                  max_wait_ms=1000.0, bucket_frames=1)
+    features = [get_features(20, f0_hz) for f0_hz in (220.0, 330.0, 440.0,
+                                                      550.0)]
+
+    async def render(unused_port):
+      return await asyncio.gather(*[server.render(f) for f in features])
+
+    results = self._run(server, render)
+    for f, (audio, sample_rate) in zip(features, results):
+      expected = self.model.render({k: v[np.newaxis] for k, v in f.items()})
+      self.assertEqual(sample_rate, 16000)
+      self.assertAllClose(expected[0], audio, atol=1e-3)
+
+    metrics = server.metrics.snapshot(server.queue_depth)
+    self.assertEqual(metrics['batch_size_histogram'], {'4': 1})
+    self.assertEqual(metrics['n_requests'], 4)
+    self.assertEqual(metrics['max_queue_depth'], 4)
+    self.assertGreater(metrics['latency_ms_p99'], 0.0)
+
+  def test_requests_are_padded_to_their_bucket(self):
+    server = serving.RenderServer({'flute': self.model}, max_batch_size=4,
+                                  max_wait_ms=50.0, bucket_frames=10)
+
+    async def render(unused_port):
+      return await asyncio.gather(server.render(get_features(17)),
+                                  server.render(get_features(20)),
+                                  server.render(get_features(25)))
+
+    results = self._run(server, render)
+    self.assertEqual([len(audio) for audio, _ in results],
+                     [17 * 64, 20 * 64, 25 * 64])
+    # Lengths 17 and 20 share a bucket, 25 is in the next one.
+    self.assertEqual(server.metrics.batch_sizes, {2: 1, 1: 1})
+
+  def test_http_endpoints(self):
+    server = serving.RenderServer({'flute': self.model}, max_wait_ms=1.0)
+    body = json.dumps({k: v.tolist()
+                       for k, v in get_features(30).items()}).encode()
+
+    async def requests(port):
+      return [
+          await http_request(port, 'POST', '/render?model=flute', body),
+          await http_request(port, 'POST', '/render?model=tuba', body),
+          await http_request(port, 'POST', '/render', b'not json'),
+          await http_request(port, 'GET', '/models'),
+          await http_request(port, 'GET', '/metrics'),
+      ]
+
+    responses = self._run(server, requests)
+    status, wav_data = responses[0]
+    self.assertEqual(status, 200)
+    audio, sample_rate = serving.decode_wav(wav_data)
+    self.assertEqual(audio.shape, (30 * 64,))
+    self.assertEqual(sample_rate, 16000)
+    self.assertEqual(responses[1][0], 404)
+    self.assertEqual(responses[2][0], 400)
+    self.assertEqual(json.loads(responses[3][1]), ['flute'])
+    metrics = json.loads(responses[4][1])
+    self.assertEqual(metrics['n_requests'], 1)
+    self.assertEqual(metrics['queue_depth'], 0)
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -17,16 +17,19 @@
 import io
 
 import ddsp
+from ddsp import lazy_imports
 from ddsp.core import tf_float32
 from ddsp.training.plotting import pianoroll_plot_setup
-import matplotlib.patches as mpatches
-import matplotlib.pyplot as plt
-from matplotlib.ticker import MaxNLocator
-import note_seq
-from note_seq import sequences_lib
 import numpy as np
 import tensorflow.compat.v2 as tf
 
+# Slow to import, and only needed when writing summaries.
+mpatches = lazy_imports.LazyModule('matplotlib.patches')
+plt = lazy_imports.LazyModule('matplotlib.pyplot')
+ticker = lazy_imports.LazyModule('matplotlib.ticker')
+note_seq = lazy_imports.LazyModule('note_seq')
+sequences_lib = lazy_imports.LazyModule('note_seq.sequences_lib')
+
 
 def fig_summary(tag, fig, step):
   """Writes an image summary from a string buffer of an mpl figure.
@@ -246,7 +249,7 @@ def _midiae_f0_helper(q_pitch, f0_midi, curve, i, step, label, tag):
   ax.plot(curve, 'darkgreen', linewidth=1.25, label=label)
 
   ax.set_ylim(min_, max_)
-  ax.yaxis.set_major_locator(MaxNLocator(integer=True))
+  ax.yaxis.set_major_locator(ticker.MaxNLocator(integer=True))
   ax.legend()
   fig_summary(f'{tag}/ex_{i + 1}', fig, step)
 
@@ -287,7 +290,7 @@ def _midiae_ld_helper(ld_input, ld_rec, curve, db_key, i, step, label, tag):
   plt.plot(ld_rec, 'g', linewidth=1.25, label='rec ld')
   plt.step(curve, 'r', linewidth=0.75, label=label)
 
-  plt.gca().yaxis.set_major_locator(MaxNLocator(integer=True))
+  plt.gca().yaxis.set_major_locator(ticker.MaxNLocator(integer=True))
   plt.legend()
   fig_summary(f'{tag}/{db_key}_{i + 1}', fig, step)
 
@@ -448,7 +451,7 @@ def pianoroll_summary(batch, step, name, frame_rate, pred_key,
                                       xlim=[0, img.shape[1]])
     ax.imshow(img, origin='lower', aspect='auto', interpolation='nearest')
     ax.set_ylim((max(lower_limit - 5, 0), min(upper_limit + 5, 127)))
-    ax.yaxis.set_major_locator(MaxNLocator(integer=True))
+    ax.yaxis.set_major_locator(ticker.MaxNLocator(integer=True))
     labels_and_colors = [
         ('GT MIDI', gt_color['rgb']),  # green
         ('Pred MIDI', pred_color['rgb']),  # blue
@@ -78,6 +78,25 @@ def get_strategy(tpu='', cluster_config=''):
   return strategy
 
 
+@gin.configurable
+def set_mixed_precision_policy(policy=None):
+  """Set the global Keras mixed precision policy, before creating a model.
+
+  Network layers (encoders and decoders) compute in the reduced precision of
+  the policy and keep float32 variables. Models, preprocessors, processors, and
+  losses are float32 layers, so features, synthesis, and losses stay in
+  float32.
+
+  Args:
+    policy: Name of a policy, such as 'mixed_bfloat16' for CPUs and TPUs with
+      bfloat16 support, or 'mixed_float16' for GPUs. If None, the policy is not
+      changed.
+  """
+  if policy is not None:
+    logging.info('Setting mixed precision policy: %s', policy)
+    tf.keras.mixed_precision.set_global_policy(policy)
+
+
 def expand_path(file_path):
   return os.path.expanduser(os.path.expandvars(file_path))
 
@@ -267,14 +286,21 @@ def train(data_provider,
   # Train.
   with summary_writer.as_default():
     tick = time.time()
+    tick_step = int(trainer.step.numpy())
 
     first_step = True
 
     while trainer.step < num_steps:
       step = trainer.step
+      prev_step = int(step.numpy())
 
-      # Take a step.
-      losses = trainer.train_step(dataset_iter)
+      # Take steps_per_execution steps, without going past num_steps.
+      if trainer.steps_per_execution > 1:
+        n_steps = min(trainer.steps_per_execution, num_steps - prev_step)
+        losses = trainer.train_step(dataset_iter, tf.constant(n_steps))
+      else:
+        losses = trainer.train_step(dataset_iter)
+      step_value = int(step.numpy())
 
       # Create training loss metrics when starting/restarting training.
       if first_step:
@@ -284,22 +310,25 @@ def train(data_provider,
                       for name in loss_names}
         first_step = False
 
-      # Update metrics.
+      # Update metrics, losses are averaged over the steps of the call.
       for k, v in losses.items():
-        avg_losses[k].update_state(v)
+        avg_losses[k].update_state(v, sample_weight=step_value - prev_step)
 
       # Log the step.
-      log_str = 'step: {}\t'.format(int(step.numpy()))
+      log_str = 'step: {}\t'.format(step_value)
       for k, v in losses.items():
         log_str += '{}: {:.2f}\t'.format(k, v)
       logging.info(log_str)
 
       # Write Summaries.
-      if step % steps_per_summary == 0 and save_dir:
+      # Summaries and checkpoints when the steps pass a multiple of the period.
+      if (step_value // steps_per_summary > prev_step // steps_per_summary and
+          save_dir):
         # Speed.
-        steps_per_sec = steps_per_summary / (time.time() - tick)
+        steps_per_sec = (step_value - tick_step) / (time.time() - tick)
         tf.summary.scalar('steps_per_sec', steps_per_sec, step=step)
         tick = time.time()
+        tick_step = step_value
 
         # Metrics.
         for k, metric in avg_losses.items():
@@ -308,7 +337,7 @@ def train(data_provider,
 
       # Report metrics for hyperparameter tuning if enabled.
       if report_loss_to_hypertune:
-        cloud.report_metric_to_hypertune(losses['total_loss'], step.numpy())
+        cloud.report_metric_to_hypertune(losses['total_loss'], step_value)
 
       # Stop the training when the loss reaches given value
       if (early_stop_loss_value is not None and
@@ -318,7 +347,8 @@ def train(data_provider,
         break
 
       # Save Model.
-      if step % steps_per_save == 0 and save_dir:
+      if (step_value // steps_per_save > prev_step // steps_per_save and
+          save_dir):
         trainer.save(save_dir)
         summary_writer.flush()
 
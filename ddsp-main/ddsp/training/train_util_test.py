@@ -0,0 +1,97 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for ddsp.training.train_util."""
+
+import glob
+import os
+
+import ddsp
+from ddsp.training import data
+from ddsp.training import decoders
+from ddsp.training import models
+from ddsp.training import preprocessing
+from ddsp.training import train_util
+from ddsp.training import trainers
+import numpy as np
+import tensorflow.compat.v2 as tf
+
+
+class RandomProvider(data.DataProvider):
+  """Random features of 1600 samples and 100 frames."""
+
+  def __init__(self):
+    super().__init__(sample_rate=16000, frame_rate=1000)
+
+  def get_dataset(self, shuffle=True):
+    rng = np.random.RandomState(0)
+    return tf.data.Dataset.from_tensor_slices({
+        'audio': rng.randn(8, 1600).astype(np.float32),
+        'f0_hz': rng.uniform(100, 500, (8, 100)).astype(np.float32),
+        'loudness_db': rng.uniform(-60, 0, (8, 100)).astype(np.float32),
+    })
+
+
+class TrainTest(tf.test.TestCase):
+
+  def get_trainer(self, **kwargs):
+    """Trainer of a small harmonic Autoencoder."""
+    model = models.Autoencoder(
+        preprocessor=preprocessing.F0LoudnessPreprocessor(time_steps=100),
+        decoder=decoders.RnnFcDecoder(
+            rnn_channels=8,
+            ch=8,
+            layers_per_stack=1,
+            input_keys=('ld_scaled', 'f0_scaled'),
+            output_splits=(('amps', 1), ('harmonic_distribution', 4))),
+        processor_group=ddsp.processors.ProcessorGroup(dag=[
+            (ddsp.synths.Harmonic(n_samples=1600),
+             ['amps', 'harmonic_distribution', 'f0_hz']),
+        ]),
+        losses=[ddsp.losses.SpectralLoss(fft_sizes=(256, 64))])
+    return trainers.Trainer(model, tf.distribute.get_strategy(), **kwargs)
+
+  def summary_steps(self, save_dir, tag):
+    """Steps of the summaries of a tag in the training event files."""
+    steps = []
+    event_files = glob.glob(
+        os.path.join(save_dir, 'summaries', 'train', 'events.*'))
+    for event_file in event_files:
+      for event in tf.compat.v1.train.summary_iterator(event_file):
+        if any(v.tag == tag for v in event.summary.value):
+          steps.append(event.step)
+    return sorted(steps)
+
+  def test_periods_not_divisible_by_steps_per_execution(self):
+    save_dir = self.get_temp_dir()
+    trainer = self.get_trainer(steps_per_execution=3)
+
+    # Calls end at steps 3, 6, 9 and 10.
+    train_util.train(RandomProvider(), trainer, batch_size=4, num_steps=10,
+                     steps_per_summary=5, steps_per_save=4, save_dir=save_dir,
+                     restore_dir=save_dir)
+
+    self.assertEqual(int(trainer.step.numpy()), 10)
+    # The first call that passes a multiple of the period.
+    self.assertEqual(self.summary_steps(save_dir, 'losses/total_loss'),
+                     [6, 10])
+    checkpoint_steps = [
+        int(os.path.basename(p).split('-')[-1].split('.')[0])
+        for p in glob.glob(os.path.join(save_dir, 'ckpt-*.index'))]
+    # Saves at steps 6 and 9, and a final checkpoint.
+    self.assertCountEqual(checkpoint_steps, [6, 9, 10])
+
+
+if __name__ == '__main__':
+  tf.test.main()
@@ -34,7 +34,10 @@ class Trainer(object):
                lr_decay_steps=10000,
                lr_decay_rate=0.98,
                grad_clip_norm=3.0,
-               restore_keys=None):
+               restore_keys=None,
+               steps_per_execution=1,
+               grad_accumulation_steps=1,
+               loss_scale=None):
     """Constructor.
 
     Args:
@@ -47,12 +50,32 @@ class Trainer(object):
       grad_clip_norm: Norm level by which to clip gradients.
       restore_keys: List of names of model properties to restore. If no keys are
         passed, restore the whole model.
+      steps_per_execution: Number of training steps taken by each call of
+        train_step() in a single tf.function, with the losses averaged over
+        the steps on device. Larger values reduce the per-step overhead of
+        Python, logging and summaries.
+      grad_accumulation_steps: Split each batch into this many micro-batches,
+        computed one after another, and apply the average of their gradients
+        in a single optimizer step. Lowers the activation memory of a step by
+        about this factor for the same effective batch size. The per-replica
+        batch size must be divisible by it.
+      loss_scale: Use dynamic loss scaling of the gradients. If None, only
+        scale under a 'mixed_float16' policy (see
+        train_util.set_mixed_precision_policy()), where small gradients
+        underflow. Not needed for 'mixed_bfloat16', which has the exponent
+        range of float32.
     """
     self.model = model
     self.strategy = strategy
     self.checkpoints_to_keep = checkpoints_to_keep
     self.grad_clip_norm = grad_clip_norm
     self.restore_keys = restore_keys
+    self.steps_per_execution = steps_per_execution
+    self.grad_accumulation_steps = grad_accumulation_steps
+    if loss_scale is None:
+      compute_dtype = tf.keras.mixed_precision.global_policy().compute_dtype
+      loss_scale = compute_dtype == 'float16'
+    self.loss_scale = loss_scale
 
     # Create an optimizer.
     lr_schedule = tf.keras.optimizers.schedules.ExponentialDecay(
@@ -62,6 +85,9 @@ class Trainer(object):
 
     with self.strategy.scope():
       self.optimizer = tf.keras.optimizers.Adam(lr_schedule)
+      if self.loss_scale:
+        self.optimizer = tf.keras.mixed_precision.LossScaleOptimizer(
+            self.optimizer)
 
   def get_checkpoint(self, model=None):
     """Model arg can also be a tf.train.Checkpoint(**dict(submodules))."""
@@ -150,8 +176,30 @@ class Trainer(object):
       return dataset
 
   @tf.function
-  def train_step(self, inputs):
-    """Distributed training step."""
+  def train_step(self, inputs, steps=None):
+    """Distributed training steps.
+
+    Args:
+      inputs: A batch, or an iterator of batches that is advanced every step.
+      steps: Number of training steps to take, defaults to
+        steps_per_execution. Pass a tensor to change it without retracing.
+
+    Returns:
+      Dictionary of scalar losses, averaged over the steps.
+    """
+    steps = self.steps_per_execution if steps is None else steps
+    losses = self.distributed_step(inputs)
+    if isinstance(steps, int) and steps == 1:
+      return losses
+
+    # Accumulate losses on device, a tf.while_loop after autograph.
+    for _ in tf.range(steps - 1):
+      step_losses = self.distributed_step(inputs)
+      losses = {k: v + step_losses[k] for k, v in losses.items()}
+    return {k: v / tf.cast(steps, v.dtype) for k, v in losses.items()}
+
+  def distributed_step(self, inputs):
+    """Single distributed training step."""
     # Wrap iterator in tf.function, slight speedup passing in iter vs batch.
     batch = next(inputs) if hasattr(inputs, '__next__') else inputs
     losses = self.run(self.step_fn, batch)
@@ -162,13 +210,84 @@ class Trainer(object):
   @tf.function
   def step_fn(self, batch):
     """Per-Replica training step."""
-    with tf.GradientTape() as tape:
-      _, losses = self.model(batch, return_losses=True, training=True)
+    if self.grad_accumulation_steps > 1:
+      grads, losses = self.accumulate_gradients(batch)
+    else:
+      grads, losses = self.compute_gradients(batch)
     # Clip and apply gradients.
-    grads = tape.gradient(losses['total_loss'], self.model.trainable_variables)
     grads, _ = tf.clip_by_global_norm(grads, self.grad_clip_norm)
     self.optimizer.apply_gradients(zip(grads, self.model.trainable_variables))
-    return losses
+    return dict(losses)
+
+  def compute_gradients(self, batch):
+    """Losses of a batch, and gradients of the total loss."""
+    with tf.GradientTape() as tape:
+      _, losses = self.model(batch, return_losses=True, training=True)
+      loss = losses['total_loss']
+      if self.loss_scale:
+        loss = self.optimizer.get_scaled_loss(loss)
+    grads = tape.gradient(loss, self.model.trainable_variables)
+    if self.loss_scale:
+      grads = self.optimizer.get_unscaled_gradients(grads)
+    return grads, losses
+
+  def accumulate_gradients(self, batch):
+    """Losses and gradients averaged over micro-batches of a batch.
+
+    Args:
+      batch: Dictionary of tensors with a leading batch dimension.
+
+    Returns:
+      grads: List of gradients of the total loss, one for each trainable
+        variable.
+      losses: Dictionary of scalar losses.
+
+    Raises:
+      ValueError: If the batch size is not divisible by
+        grad_accumulation_steps.
+      tf.errors.InvalidArgumentError: At run time instead, if the batch size
+        is not known when tracing, such as for batches without
+        drop_remainder.
+    """
+    n_micro = self.grad_accumulation_steps
+    x = tf.nest.flatten(batch)[0]
+    batch_size = x.shape[0]
+    checks = []
+    if batch_size is None:
+      checks.append(tf.debugging.assert_equal(
+          tf.shape(x)[0] % n_micro, 0,
+          message=('Batch size must be divisible by grad_accumulation_steps '
+                   f'({n_micro}).')))
+    elif batch_size % n_micro:
+      raise ValueError(f'Batch size ({batch_size}) must be divisible by '
+                       f'grad_accumulation_steps ({n_micro}).')
+
+    # [n_micro, micro_batch_size, ...], to index a micro-batch in a loop.
+    with tf.control_dependencies(checks):
+      micro_batches = tf.nest.map_structure(
+          lambda x: tf.reshape(x, tf.concat([[n_micro, -1], tf.shape(x)[1:]],
+                                            0)),
+          batch)
+
+    def micro_batch_gradients(i):
+      micro_batch = tf.nest.map_structure(lambda x: x[i], micro_batches)
+      grads, losses = self.compute_gradients(micro_batch)
+      # Unused variables have no gradient.
+      grads = [tf.zeros_like(v) if g is None else tf.convert_to_tensor(g)
+               for g, v in zip(grads, self.model.trainable_variables)]
+      # A plain dict instead of the model's tracked dict, as loop variable.
+      return grads, dict(losses)
+
+    # Micro-batches one after another in a tf.while_loop, so that only the
+    # activations of one micro-batch are kept at a time.
+    grads, losses = micro_batch_gradients(0)
+    for i in tf.range(1, n_micro):
+      micro_grads, micro_losses = micro_batch_gradients(i)
+      grads = [g + micro_g for g, micro_g in zip(grads, micro_grads)]
+      losses = {k: v + micro_losses[k] for k, v in losses.items()}
+    grads = [g / n_micro for g in grads]
+    losses = {k: v / n_micro for k, v in losses.items()}
+    return grads, losses
 
 
 @gin.configurable
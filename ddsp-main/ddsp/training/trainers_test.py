@@ -0,0 +1,153 @@
+# Copyright 2024 The DDSP Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for ddsp.training.trainers."""
+
+import ddsp
+from ddsp.training import decoders
+from ddsp.training import models
+from ddsp.training import preprocessing
+from ddsp.training import train_util
+from ddsp.training import trainers
+import numpy as np
+import tensorflow.compat.v2 as tf
+
+
+def get_trainer(**kwargs):
+  """Trainer of a small harmonic Autoencoder."""
+  tf.keras.utils.set_random_seed(0)
+  model = models.Autoencoder(
+      preprocessor=preprocessing.F0LoudnessPreprocessor(time_steps=100),
+      decoder=decoders.RnnFcDecoder(
+          rnn_channels=16,
+          ch=16,
+          layers_per_stack=1,
+          input_keys=('ld_scaled', 'f0_scaled'),
+          output_splits=(('amps', 1), ('harmonic_distribution', 10))),
+      processor_group=ddsp.processors.ProcessorGroup(dag=[
+          (ddsp.synths.Harmonic(n_samples=1600),
+           ['amps', 'harmonic_distribution', 'f0_hz']),
+      ]),
+      losses=[ddsp.losses.SpectralLoss(fft_sizes=(256, 64))])
+  return trainers.Trainer(model, tf.distribute.get_strategy(), **kwargs)
+
+
+class TrainerTest(tf.test.TestCase):
+
+  def setUp(self):
+    """Creates a batch of random features."""
+    super().setUp()
+    rng = np.random.RandomState(0)
+    self.batch = {
+        'audio': tf.constant(rng.randn(4, 1600).astype(np.float32)),
+        'f0_hz': tf.constant(rng.uniform(100, 500, (4, 100)).astype(
+            np.float32)),
+        'loudness_db': tf.constant(rng.uniform(-60, 0, (4, 100)).astype(
+            np.float32)),
+    }
+
+  def tearDown(self):
+    tf.keras.mixed_precision.set_global_policy('float32')
+    super().tearDown()
+
+  def test_train_step_takes_steps_from_iterator(self):
+    # No updates, so that each step's loss is the loss of its batch.
+    trainer = get_trainer(learning_rate=0.0)
+    trainer.build(self.batch)
+    batches = [tf.nest.map_structure(lambda x, i=i: x * (1.0 + 0.1 * i),
+                                     self.batch) for i in range(4)]
+    expected_loss = np.mean([
+        trainer.model(b, return_losses=True, training=True)[1]['total_loss']
+        for b in batches[:3]])
+
+    iterator = iter(tf.data.Dataset.from_tensor_slices(
+        tf.nest.map_structure(lambda *x: tf.stack(x), *batches)))
+    losses = trainer.train_step(iterator, tf.constant(3))
+
+    self.assertEqual(int(trainer.step.numpy()), 3)
+    self.assertAllEqual(next(iterator)['audio'], batches[3]['audio'])
+    self.assertAllClose(losses['total_loss'], expected_loss, rtol=1e-5)
+
+  def test_accumulated_gradients_match_batch_gradients(self):
+    trainer = get_trainer()
+    trainer.build(self.batch)
+    grads, losses = trainer.compute_gradients(self.batch)
+
+    accumulating_trainer = get_trainer(grad_accumulation_steps=2)
+    accumulating_trainer.build(self.batch)
+    accumulated_grads, accumulated_losses = (
+        accumulating_trainer.accumulate_gradients(self.batch))
+
+    self.assertAllClose(losses['total_loss'],
+                        accumulated_losses['total_loss'], rtol=1e-5)
+    for grad, accumulated_grad in zip(grads, accumulated_grads):
+      self.assertAllClose(grad, accumulated_grad, rtol=1e-4, atol=1e-5)
+
+  def test_indivisible_batch_raises_value_error(self):
+    trainer = get_trainer(grad_accumulation_steps=3)
+    trainer.build(self.batch)
+    with self.assertRaises(ValueError):
+      _ = trainer.accumulate_gradients(self.batch)
+
+  def test_accumulate_gradients_of_unknown_batch_size(self):
+    trainer = get_trainer()
+    trainer.build(self.batch)
+    grads, _ = trainer.compute_gradients(self.batch)
+
+    accumulating_trainer = get_trainer(grad_accumulation_steps=2)
+    accumulating_trainer.build(self.batch)
+    accumulate_gradients = tf.function(
+        accumulating_trainer.accumulate_gradients,
+        input_signature=[{k: tf.TensorSpec([None] + v.shape[1:], v.dtype)
+                          for k, v in self.batch.items()}])
+    accumulated_grads, _ = accumulate_gradients(self.batch)
+
+    for grad, accumulated_grad in zip(grads, accumulated_grads):
+      self.assertAllClose(grad, accumulated_grad, rtol=1e-4, atol=1e-5)
+    with self.assertRaisesRegex(tf.errors.InvalidArgumentError,
+                                'grad_accumulation_steps'):
+      _ = accumulate_gradients({k: v[:3] for k, v in self.batch.items()})
+
+  def test_mixed_precision_keeps_synthesis_in_float32(self):
+    train_util.set_mixed_precision_policy('mixed_bfloat16')
+    trainer = get_trainer()
+    trainer.build(self.batch)
+    outputs = trainer.model(self.batch, training=False)
+    grads, losses = trainer.compute_gradients(self.batch)
+
+    self.assertEqual(trainer.model.decoder.compute_dtype, 'bfloat16')
+    self.assertEqual(outputs['f0_hz'].dtype, tf.float32)
+    self.assertEqual(outputs['audio_synth'].dtype, tf.float32)
+    self.assertEqual(losses['total_loss'].dtype, tf.float32)
+    self.assertTrue(all(g.dtype == tf.float32 for g in grads))
+    # Loss scaling is only needed for float16.
+    self.assertFalse(trainer.loss_scale)
+
+  def test_loss_scaling_unscales_gradients(self):
+    trainer = get_trainer()
+    trainer.build(self.batch)
+    grads, _ = trainer.compute_gradients(self.batch)
+
+    scaled_trainer = get_trainer(loss_scale=True)
+    scaled_trainer.build(self.batch)
+    unscaled_grads, _ = scaled_trainer.compute_gradients(self.batch)
+
+    self.assertIsInstance(scaled_trainer.optimizer,
+                          tf.keras.mixed_precision.LossScaleOptimizer)
+    for grad, unscaled_grad in zip(grads, unscaled_grads):
+      self.assertAllClose(grad, unscaled_grad, rtol=1e-4, atol=1e-6)
+
+
+if __name__ == '__main__':
+  tf.test.main()